@@ -12,7 +12,7 @@ import numpy as np
 import io
 from astropy.io import fits
 from astropy.wcs import WCS
-from astropy.table import Table
+from astropy.table import Table, Column, MaskedColumn
 from astropy.coordinates import SkyCoord
 from astropy.coordinates import search_around_sky
 
@@ -23,7 +23,10 @@ from pathlib import Path
 import struct
 import base64
 import glob
+import ast
+import operator
 import hashlib
+import tokenize
 import secrets
 import random
 import copy
@@ -69,7 +72,7 @@ import time
 from types import SimpleNamespace 
 from datetime import datetime
 from concurrent.futures import ProcessPoolExecutor
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import Future, ThreadPoolExecutor
 from astropy.time import Time 
 import psutil 
 import asyncio 
@@ -78,6 +81,7 @@ import warnings
 from astropy.visualization import simple_norm
 import matplotlib as mpl
 import functools
+from collections import OrderedDict
 from pydantic import BaseModel
 from typing import Optional, List, Literal, Union
 from scipy.ndimage import zoom
@@ -231,7 +235,7 @@ UVICORN_HOST = "127.0.0.1"
 UVICORN_PORT = 8000
 UVICORN_RELOAD_MODE = os.getenv("NELOURA_UVICORN_RELOAD", "0").lower() in {"1", "true", "yes", "on"}
 DEFAULT_EXPORT_FORMAT = 'csv'
-MAX_EXPORT_ROWS = 10000
+MAX_EXPORT_ROWS = 0  # default cap for /catalog-export/; 0 exports every matching row
 CATALOG_COLUMN_ANALYSIS_SAMPLE_SIZE = 1000
 SYSTEM_STATS_UPDATE_INTERVAL = 2
 PROXY_DOWNLOAD_TIMEOUT = 60
@@ -1711,7 +1715,7 @@ app.include_router(settings_router)
 # (Cookie-based auto-session removed to honor per-tab session requirement)
 
 import time, secrets, threading
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, replace as dataclass_replace
 from typing import Any, Dict, Optional
 from starlette.middleware.base import BaseHTTPMiddleware
 from fastapi.responses import JSONResponse
@@ -1959,8 +1963,6 @@ def save_mappings():
 load_mappings()
 # --- End Catalog Column Mapping ---
 
-# Global variable to store loaded catalog data
-loaded_catalogs = {}
 # Admin-only endpoint to erase uploads directory contents
 @app.post("/admin/erase-uploads")
 async def admin_erase_uploads(request: Request):
@@ -1980,6 +1982,13 @@ async def admin_erase_uploads(request: Request):
                             shutil.rmtree(p)
                     except Exception:
                         continue
+        catalog_table_cache.invalidate()
+        catalog_store.invalidate()
+        catalog_spatial_index.invalidate()
+        catalog_tile_sources.invalidate()
+        catalog_tile_cache.clear()
+        catalog_result_sets.invalidate()
+        plot_aggregates.invalidate()
         return JSONResponse({"ok": True})
     except Exception as e:
         return JSONResponse(status_code=500, content={"error": str(e)})
@@ -2574,26 +2583,22 @@ async def get_pixel_scale(filepath: str):
         raise HTTPException(status_code=403, detail="Access to this file path is forbidden.")
 
     try:
-        with fits.open(full_path) as hdul:
-            # Find the first HDU with a valid WCS
-            header, wcs = None, None
-            # Find the first HDU with a valid header and data.
-            for hdu in hdul:
-                if hdu.header and hdu.data is not None and hdu.data.ndim >= 2:
-                    header = hdu.header
-                    try:
-                        wcs = WCSpy(header)
-                    except Exception:
-                        wcs = None
-                    # Stop at the first valid HDU
-                    break
-            
-            if header is None:
-                raise HTTPException(status_code=400, detail="No valid image HDU found in FITS file.")
+        metadata = fits_metadata_cache.get(full_path)
+        # Use the first HDU that carries 2D (or higher) image data.
+        hdu_index = metadata.first_image_index()
+        if hdu_index is None:
+            raise HTTPException(status_code=400, detail="No valid image HDU found in FITS file.")
+        header = metadata.hdu(hdu_index).header
+        try:
+            wcs = WCSpy(header)
+        except Exception:
+            wcs = None
 
         pixel_scale = get_pixel_scale_from_header(header, wcs)
         return {"filepath": filepath, "pixel_scale_arcsec": pixel_scale}
 
+    except HTTPException:
+        raise
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
@@ -2858,49 +2863,47 @@ async def plotter_load_catalog_endpoint(request: Request, catalog_name: str):
         return JSONResponse(status_code=500, content={"error": f"Failed to load catalog (plotter): {str(e)}"})
 
 @app.post("/upload-catalog/")
-async def upload_catalog(file: UploadFile = File(...)):
-    """Uploads a FITS catalog file, adding a timestamp to avoid overwrites."""
+async def upload_catalog(request: Request):
+    """
+    Uploads a catalog file, adding a suffix to avoid overwrites. The body is either multipart
+    form data (field 'file') or the raw file with ?filename=; text catalogs are parsed and
+    stored while they stream in (see CatalogUploadIngest), so the catalog is ready on return.
+    """
     try:
         # Save into files/uploads (not catalogs/)
         uploads_dir = Path(UPLOADS_DIRECTORY)
         uploads_dir.mkdir(parents=True, exist_ok=True)
 
-        # Generate a unique filename with a timestamp
-        original_stem = Path(file.filename).stem
-        original_suffix = Path(file.filename).suffix or ".fits"
-        # Ensure uploaded catalogs are clearly prefixed, keep original name
-        prefixed_stem = original_stem if original_stem.lower().startswith("upload_") else f"upload_{original_stem}"
-        unique_filename = f"{prefixed_stem}{original_suffix}"
-        # If a file with the same name exists, append an incrementing suffix to avoid overwrite
-        counter = 1
-        while (uploads_dir / unique_filename).exists():
-            unique_filename = f"{prefixed_stem}_{counter}{original_suffix}"
-            counter += 1
-        upload_path = uploads_dir / unique_filename
+        def destination(filename: str) -> Path:
+            original_stem = Path(filename).stem
+            original_suffix = Path(filename).suffix or ".fits"
+            # Ensure uploaded catalogs are clearly prefixed, keep original name
+            prefixed_stem = original_stem if original_stem.lower().startswith("upload_") else f"upload_{original_stem}"
+            unique_filename = f"{prefixed_stem}{original_suffix}"
+            # If a file with the same name exists, append an incrementing suffix to avoid overwrite
+            counter = 1
+            while (uploads_dir / unique_filename).exists() or (uploads_dir / f".{unique_filename}.partial").exists():
+                unique_filename = f"{prefixed_stem}_{counter}{original_suffix}"
+                counter += 1
+            print(f"Attempting to save uploaded catalog as: {uploads_dir / unique_filename}")
+            return uploads_dir / unique_filename
+
+        ingest, store = await _receive_upload(request, destination, catalog=True)
+        unique_filename = ingest.path.name
+        print(f"Successfully saved catalog: {ingest.path}")
 
-        # Basic check to prevent excessively large uploads (optional)
-        # max_size = 500 * 1024 * 1024 # 500 MB limit
-        # if file.size > max_size:
-        #     raise HTTPException(status_code=413, detail=f"File size exceeds limit ({max_size // 1024 // 1024} MB)")
-
-        print(f"Attempting to save uploaded catalog as: {upload_path}")
-
-        # Save the uploaded file
-        with open(upload_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-        
-        print(f"Successfully saved catalog: {upload_path}")
-        
-        # Optional: Clear cache if necessary
-        # catalog_cache.pop(unique_filename, None) 
-        
         # Return path relative to project root for frontend usage
         rel_path = f"{UPLOADS_DIRECTORY}/{unique_filename}"
         return JSONResponse(content={
             "message": "Catalog uploaded successfully",
             "filename": unique_filename,
             "path": rel_path,
-            "filepath": rel_path
+            "filepath": rel_path,
+            "upload_id": ingest.upload_id,
+            "size": ingest.bytes,
+            "stored": store is not None,
+            "rows": store.nrows if store is not None else None,
+            "columns": store.colnames if store is not None else None,
         })
     
     except HTTPException as http_exc:
@@ -2908,30 +2911,12 @@ async def upload_catalog(file: UploadFile = File(...)):
          raise http_exc # Re-raise FastAPI specific exceptions
 
     except Exception as e:
+        # _receive_upload already removed the partial file
         print(f"Error during catalog upload: {e}")
-        # Clean up partially uploaded file if error occurs
-        if 'upload_path' in locals() and upload_path.exists():
-            try:
-                 upload_path.unlink()
-                 print(f"Cleaned up partially uploaded file: {upload_path}")
-            except Exception as cleanup_err:
-                 print(f"Error cleaning up file {upload_path}: {cleanup_err}")
-        
-        # Determine appropriate status code
-        status_code = 500
-        error_detail = f"Failed to upload catalog: {str(e)}"
-        # Example: Check for specific errors like disk full (requires OS-specific checks or catching specific exceptions)
-        # if isinstance(e, OSError) and e.errno == errno.ENOSPC:
-        #    status_code = 507 # Insufficient Storage
-        #    error_detail = "Insufficient storage space to save catalog."
-            
         return JSONResponse(
-            status_code=status_code,
-            content={"error": error_detail}
+            status_code=500,
+            content={"error": f"Failed to upload catalog: {str(e)}"}
         )
-    finally:
-        if file and hasattr(file, 'file') and not file.file.closed:
-             file.file.close()
 
 
 @app.get("/catalog-columns/")
@@ -2969,6 +2954,14 @@ async def get_catalog_columns(catalog_name: str):
     if catalog_path is None:
         raise HTTPException(status_code=404, detail=f"Catalog file not found: {catalog_name}")
 
+    if CATALOG_STORE_ENABLED:
+        try:
+            store = catalog_store.get(catalog_path)
+            if store is not None:
+                return JSONResponse(content={"columns": store.colnames})
+        except Exception as e:
+            print(f"[catalog_store] Could not use store for {catalog_path}: {e}")
+
     try:
         with fits.open(catalog_path) as hdul:
             # Find the first binary table HDU
@@ -2995,6 +2988,15 @@ async def get_catalog_columns(catalog_name: str):
         raise HTTPException(status_code=500, detail=f"Error reading catalog columns for {catalog_name}: {str(e)}")
 
 
+@app.get("/catalog-cache-stats/")
+async def catalog_cache_stats():
+    """Hit/miss and size counters for the shared catalog table cache, the columnar store, the spatial indexes, the tile sources, the query result sets, the plot aggregates and the catalog watcher."""
+    return JSONResponse(content={"tables": catalog_table_cache.stats(), "store": catalog_store.stats(),
+                                 "spatial": catalog_spatial_index.stats(), "tiles": catalog_tile_sources.stats(),
+                                 "results": catalog_result_sets.stats(), "plots": plot_aggregates.stats(),
+                                 "watch": catalog_watcher.stats()})
+
+
 @app.api_route("/catalog-column-values/", methods=["GET", "POST"])
 async def catalog_column_values(request: Request):
     """
@@ -3007,7 +3009,8 @@ async def catalog_column_values(request: Request):
       {
         "catalog_name": "cata10_v4_final.fits" (or "catalogs/..." or "files/..."),
         "row_indices": [0, 1, 2, ...],
-        "columns": ["colA", "colB", ...]
+        "columns": ["colA", "colB", ...],
+        "format": "json" | "columnar"   (optional; columnar answers with typed arrays, see _catalog_columnar_payload)
       }
     """
     if request.method == "GET":
@@ -3155,6 +3158,14 @@ async def catalog_column_values(request: Request):
         except Exception:
             return None
 
+    if str(payload.get("format") or "json").lower() == "columnar":
+        rows = np.asarray(valid_indices, dtype=np.int64)
+        content = _catalog_columnar_payload(
+            {"catalog_name": catalog_name, "num_records": int(rows.size)},
+            [("__row_index", rows), *((col, table[col][rows]) for col in cols_exist)],
+        )
+        return Response(content=content, media_type="application/octet-stream")
+
     # Build response as per-column arrays aligned with `valid_indices`
     values = {}
     for col in cols_exist:
@@ -3348,7 +3359,8 @@ class SimpleTileGenerator:
         """Calculates and sets the initial dynamic range (min/max) with Ceph-friendly access."""
         self._ensure_image_data_loaded()
         current_image_data = self.image_data
-        if not isinstance(current_image_data, np.ndarray) or current_image_data.size == 0:
+        # ndarray/memmap, or an array facade such as VirtualImageArray
+        if current_image_data is None or int(getattr(current_image_data, "size", 0) or 0) == 0:
             self.min_value, self.max_value = 0.0, 1.0
             return
 
@@ -3735,6 +3747,562 @@ class SimpleTileGenerator:
         print(f"Colormap LUT updated for '{self.color_map}'")
 
 
+# --- Virtual images: lazily evaluated arithmetic over loaded images ---
+try:
+    import numexpr  # type: ignore
+    _NUMEXPR_AVAILABLE = True
+except Exception:
+    numexpr = None
+    _NUMEXPR_AVAILABLE = False
+
+VIRTUAL_IMAGE_PREFIX = "virtual:"
+VIRTUAL_IMAGE_BLOCK_PX = int(os.getenv('VIRTUAL_IMAGE_BLOCK_PX', '512'))
+VIRTUAL_IMAGE_CACHE_MB = int(os.getenv('VIRTUAL_IMAGE_CACHE_MB', '256'))
+VIRTUAL_IMAGE_MAX_DEFINITIONS = int(os.getenv('VIRTUAL_IMAGE_MAX_DEFINITIONS', '32'))
+VIRTUAL_IMAGE_MAX_OPERANDS = int(os.getenv('VIRTUAL_IMAGE_MAX_OPERANDS', '8'))
+VIRTUAL_IMAGE_MAX_EXPRESSION_CHARS = 512
+VIRTUAL_IMAGE_MAX_MATERIALIZE_PX = int(os.getenv('VIRTUAL_IMAGE_MAX_MATERIALIZE_PX', str(4096 * 4096)))
+
+# Functions accepted in expressions; all exist in numpy and numexpr under the same name.
+_VIRTUAL_FUNCTIONS = {
+    "sqrt": np.sqrt, "log": np.log, "log10": np.log10, "log1p": np.log1p, "exp": np.exp,
+    "abs": np.abs, "arcsinh": np.arcsinh, "sinh": np.sinh, "where": np.where,
+}
+_VIRTUAL_ALLOWED_NODES = (
+    ast.Expression, ast.BinOp, ast.UnaryOp, ast.Compare, ast.Call, ast.Name, ast.Load, ast.Constant,
+    ast.Add, ast.Sub, ast.Mult, ast.Div, ast.Pow, ast.USub, ast.UAdd, ast.Invert, ast.BitAnd, ast.BitOr,
+    ast.Lt, ast.LtE, ast.Gt, ast.GtE, ast.Eq, ast.NotEq,
+)
+
+
+# Folded constants beyond this magnitude are rejected; pixel arithmetic never needs them.
+_VIRTUAL_MAX_CONSTANT = 1e30
+_VIRTUAL_CONSTANT_OPS = {
+    ast.Add: operator.add, ast.Sub: operator.sub, ast.Mult: operator.mul, ast.Div: operator.truediv,
+    ast.Pow: operator.pow, ast.USub: operator.neg, ast.UAdd: operator.pos,
+}
+
+
+class _VirtualConstantFolder(ast.NodeTransformer):
+    """Turn numeric constants into floats and fold constant-only arithmetic, rejecting non-finite or huge results."""
+
+    @staticmethod
+    def _checked(value, node) -> ast.Constant:
+        if not math.isfinite(value) or abs(value) > _VIRTUAL_MAX_CONSTANT:
+            raise HTTPException(status_code=400, detail="Constant in expression is out of range.")
+        return ast.copy_location(ast.Constant(value=value), node)
+
+    def visit_Constant(self, node):
+        try:
+            value = float(node.value)
+        except OverflowError:
+            raise HTTPException(status_code=400, detail="Constant in expression is out of range.")
+        return self._checked(value, node)
+
+    def visit_UnaryOp(self, node):
+        self.generic_visit(node)
+        if not isinstance(node.operand, ast.Constant):
+            return node
+        op = _VIRTUAL_CONSTANT_OPS.get(type(node.op))
+        if op is None:
+            raise HTTPException(status_code=400, detail="~ applies to masks (comparisons), not constants.")
+        return self._checked(op(node.operand.value), node)
+
+    def visit_BinOp(self, node):
+        self.generic_visit(node)
+        constants = (isinstance(node.left, ast.Constant), isinstance(node.right, ast.Constant))
+        op = _VIRTUAL_CONSTANT_OPS.get(type(node.op))
+        if op is None:
+            if any(constants):
+                raise HTTPException(status_code=400, detail="& and | combine masks (comparisons), not constants.")
+            return node
+        if not all(constants):
+            return node
+        try:
+            value = op(node.left.value, node.right.value)
+        except (OverflowError, ZeroDivisionError):
+            raise HTTPException(status_code=400, detail="Constant in expression is out of range.")
+        if isinstance(value, complex):
+            raise HTTPException(status_code=400, detail="Constant in expression is not a real number.")
+        return self._checked(value, node)
+
+
+def _compile_virtual_expression(expression: str, operand_names) -> tuple[str, object]:
+    """
+    Validate an image expression and return (normalized source, compiled numpy code).
+
+    Only arithmetic, comparisons, &/|/~ and the functions in _VIRTUAL_FUNCTIONS are accepted, and
+    every name must be an operand. Constants are made floats and constant subexpressions are folded
+    up front, so the compiled code only does bounded float work per pixel (as numexpr would).
+    """
+    text = str(expression or "").strip()
+    if not text:
+        raise HTTPException(status_code=400, detail="Expression is empty.")
+    if len(text) > VIRTUAL_IMAGE_MAX_EXPRESSION_CHARS:
+        raise HTTPException(status_code=400, detail="Expression is too long.")
+    try:
+        tree = ast.parse(text, mode="eval")
+    except SyntaxError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid expression: {e.msg}")
+    operands = set(operand_names)
+    used = set()
+    for node in ast.walk(tree):
+        if not isinstance(node, _VIRTUAL_ALLOWED_NODES):
+            raise HTTPException(status_code=400, detail=f"Unsupported syntax in expression: {type(node).__name__}")
+        if isinstance(node, ast.Constant) and not isinstance(node.value, (int, float)):
+            raise HTTPException(status_code=400, detail="Only numeric constants are allowed in expressions.")
+        if isinstance(node, ast.Call):
+            if not isinstance(node.func, ast.Name) or node.func.id not in _VIRTUAL_FUNCTIONS or node.keywords:
+                raise HTTPException(status_code=400, detail=f"Unsupported function; allowed: {', '.join(sorted(_VIRTUAL_FUNCTIONS))}")
+        elif isinstance(node, ast.Name):
+            if node.id in _VIRTUAL_FUNCTIONS:
+                continue
+            if node.id not in operands:
+                raise HTTPException(status_code=400, detail=f"Unknown operand '{node.id}' in expression.")
+            used.add(node.id)
+    if not used:
+        raise HTTPException(status_code=400, detail="Expression does not reference any operand.")
+    tree = ast.fix_missing_locations(_VirtualConstantFolder().visit(tree))
+    source = ast.unparse(tree)
+    return source, compile(tree, "<virtual-image>", "eval")
+
+
+def _scale_raw_pixels(raw, bscale: float, bzero: float, blank) -> np.ndarray:
+    """Apply BLANK/BSCALE/BZERO to raw FITS pixels (as float32)."""
+    raw = np.asarray(raw)
+    out = raw.astype(np.float32)
+    if blank is not None and raw.dtype.kind in ("i", "u"):
+        try:
+            out[raw == int(blank)] = np.nan
+        except Exception:
+            pass
+    if bscale != 1.0 or bzero != 0.0:
+        out = out * np.float32(bscale) + np.float32(bzero)
+    return out
+
+
+class _VirtualOperand:
+    """One named input of a virtual image: a memory-mapped 2D plane plus its mapping from the reference grid."""
+
+    def __init__(self, name: str, path: Path, hdu_index: int):
+        self.name = name
+        self.path = Path(path)
+        self.hdu_index = int(hdu_index)
+        meta = fits_metadata_cache.get(self.path).hdu(self.hdu_index)
+        if not meta.is_2d_image:
+            raise HTTPException(status_code=400, detail=f"Operand {name}: HDU {self.hdu_index} has no 2D image data.")
+        self.meta = meta
+        self.width, self.height = meta.width, meta.height
+        header = meta.header
+        self.bscale = float(header.get("BSCALE", 1.0))
+        self.bzero = float(header.get("BZERO", 0.0))
+        self.blank = header.get("BLANK", None)
+        self.reproject = False  # set by VirtualImage when this operand is not on the reference grid
+        self._hdul = None
+        self._plane = None
+        self._lock = threading.Lock()
+
+    @property
+    def plane(self):
+        """First 2D plane of the HDU as an unscaled memmap (opened on first use)."""
+        if self._plane is None:
+            with self._lock:
+                if self._plane is None:
+                    self._hdul = fits.open(self.path, memmap=True, lazy_load_hdus=True, do_not_scale_image_data=True)
+                    data = self._hdul[self.hdu_index].data
+                    if data is None:
+                        raise HTTPException(status_code=400, detail=f"Operand {self.name} has no image data.")
+                    while getattr(data, "ndim", 0) > 2:
+                        data = data[0]
+                    self._plane = data
+        return self._plane
+
+    def read_grid(self, rows: slice, cols: slice) -> np.ndarray:
+        """Values on a regular slice of this operand's own pixel grid."""
+        return _scale_raw_pixels(self.plane[rows, cols], self.bscale, self.bzero, self.blank)
+
+    def read_points(self, ix: np.ndarray, iy: np.ndarray) -> np.ndarray:
+        """Values at integer pixel positions (NaN outside the image); only the touched pages are read."""
+        out = np.full(ix.shape, np.nan, dtype=np.float32)
+        inside = (ix >= 0) & (ix < self.width) & (iy >= 0) & (iy < self.height)
+        if np.any(inside):
+            out[inside] = _scale_raw_pixels(self.plane[iy[inside], ix[inside]], self.bscale, self.bzero, self.blank)
+        return out
+
+    def close(self) -> None:
+        with self._lock:
+            if self._hdul is not None:
+                try:
+                    self._hdul.close()
+                except Exception:
+                    pass
+            self._hdul = None
+            self._plane = None
+
+
+class VirtualImage:
+    """
+    An image defined by an expression over other images, evaluated only where it is looked at.
+
+    Pixels live on the grid of the reference operand. Operands on a different grid are resampled
+    (nearest neighbour) through their WCS. Full-resolution reads are assembled from fixed-size blocks
+    that are evaluated once and kept in virtual_block_cache. Strided (zoomed-out) reads are evaluated
+    directly on the sampled pixels, so no full-size array is ever built.
+    """
+
+    def __init__(self, image_id: str, expression: str, operands: dict, reference: str):
+        self.id = image_id
+        self.key = f"{VIRTUAL_IMAGE_PREFIX}{image_id}"
+        self.operands = operands
+        self.reference = operands[reference]
+        self.expression, self._code = _compile_virtual_expression(expression, operands.keys())
+        self.width, self.height = self.reference.width, self.reference.height
+        self.block = max(64, int(VIRTUAL_IMAGE_BLOCK_PX))
+        ref_bundle = self.reference.meta.wcs_bundle
+        self.flip_y = bool(ref_bundle.flip_y)
+        for op in operands.values():
+            if op is self.reference:
+                continue
+            same_grid = (op.width, op.height) == (self.width, self.height) and _same_celestial_grid(
+                op.meta.wcs_bundle.wcs, ref_bundle.wcs)
+            op.reproject = not same_grid
+            if op.reproject and (op.meta.wcs_bundle.wcs is None or ref_bundle.wcs is None):
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Operand {op.name} is not on the reference grid and has no celestial WCS to reproject with.",
+                )
+        self.header = self._build_header()
+        self.array = VirtualImageArray(self)
+
+    def _build_header(self) -> fits.Header:
+        wcs = self.reference.meta.wcs_bundle.wcs
+        header = wcs.to_header(relax=True) if wcs is not None else fits.Header()
+        header.insert(0, ("NAXIS2", self.height), after=False)
+        header.insert(0, ("NAXIS1", self.width), after=False)
+        header.insert(0, ("NAXIS", 2), after=False)
+        header.insert(0, ("BITPIX", -32), after=False)
+        header["VIRTEXPR"] = (self.expression[:68], "virtual image expression")
+        for name, op in self.operands.items():
+            header.add_history(f"{name} = {op.path.name}[{op.hdu_index}]{' (reprojected)' if op.reproject else ''}")
+        return header
+
+    def describe(self) -> dict:
+        return {
+            "id": self.id,
+            "filepath": self.key,
+            "expression": self.expression,
+            "width": self.width,
+            "height": self.height,
+            "reference": self.reference.name,
+            "flip_y": self.flip_y,
+            "operands": {
+                name: {"filepath": str(op.path), "hdu": op.hdu_index, "reprojected": op.reproject}
+                for name, op in self.operands.items()
+            },
+        }
+
+    # -- evaluation -------------------------------------------------------------------------
+    def _evaluate(self, rows: slice, cols: slice) -> np.ndarray:
+        """Evaluate the expression on a regular slice of the (raw, unflipped) reference grid."""
+        values = {}
+        grid_px = None
+        for name, op in self.operands.items():
+            if not op.reproject:
+                values[name] = op.read_grid(rows, cols)
+                continue
+            if grid_px is None:
+                yy = np.arange(rows.start, rows.stop, rows.step, dtype=float)
+                xx = np.arange(cols.start, cols.stop, cols.step, dtype=float)
+                gx, gy = np.meshgrid(xx, yy)
+                grid_px = (gx.ravel(), gy.ravel(), gx.shape)
+                ref_approx = get_wcs_approximation(self.reference.path, self.reference.hdu_index)
+                with warnings.catch_warnings():
+                    warnings.simplefilter("ignore")
+                    if ref_approx is not None:
+                        ra, dec = ref_approx.pix2world(grid_px[0], grid_px[1])
+                    else:
+                        ra, dec = self.reference.meta.wcs_bundle.wcs.all_pix2world(grid_px[0], grid_px[1], 0)
+                grid_world = (np.asarray(ra, dtype=float), np.asarray(dec, dtype=float))
+            op_approx = get_wcs_approximation(op.path, op.hdu_index)
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore")
+                if op_approx is not None:
+                    px, py = op_approx.world2pix(*grid_world)
+                else:
+                    px, py = op.meta.wcs_bundle.wcs.all_world2pix(grid_world[0], grid_world[1], 0, quiet=True)
+            finite = np.isfinite(px) & np.isfinite(py)
+            ix = np.where(finite, np.rint(np.where(finite, px, 0)), -1).astype(np.int64)
+            iy = np.where(finite, np.rint(np.where(finite, py, 0)), -1).astype(np.int64)
+            values[name] = op.read_points(ix, iy).reshape(grid_px[2])
+        with np.errstate(all="ignore"):
+            if _NUMEXPR_AVAILABLE:
+                result = numexpr.evaluate(self.expression, local_dict=values)
+            else:
+                result = eval(self._code, {"__builtins__": {}}, {**_VIRTUAL_FUNCTIONS, **values})
+        result = np.asarray(result, dtype=np.float32)
+        if result.ndim == 0:  # expression without any spatially varying term
+            result = np.full(values[self.reference.name].shape, float(result), dtype=np.float32)
+        return result
+
+    def _block(self, by: int, bx: int) -> np.ndarray:
+        key = (self.id, by, bx)
+        cached = virtual_block_cache.get(key)
+        if cached is not None:
+            return cached
+        b = self.block
+        data = self._evaluate(slice(by * b, min(self.height, (by + 1) * b), 1),
+                              slice(bx * b, min(self.width, (bx + 1) * b), 1))
+        data.setflags(write=False)
+        virtual_block_cache.put(key, data)
+        return data
+
+    def read_raw(self, rows: slice, cols: slice) -> np.ndarray:
+        """Regular slice of the raw reference grid (positive steps, already clipped to the image)."""
+        if rows.step > 1 or cols.step > 1:
+            return self._evaluate(rows, cols)
+        out = np.empty((rows.stop - rows.start, cols.stop - cols.start), dtype=np.float32)
+        b = self.block
+        for by in range(rows.start // b, (rows.stop - 1) // b + 1):
+            for bx in range(cols.start // b, (cols.stop - 1) // b + 1):
+                blk = self._block(by, bx)
+                y0, y1 = max(rows.start, by * b), min(rows.stop, (by + 1) * b)
+                x0, x1 = max(cols.start, bx * b), min(cols.stop, (bx + 1) * b)
+                out[y0 - rows.start:y1 - rows.start, x0 - cols.start:x1 - cols.start] = \
+                    blk[y0 - by * b:y1 - by * b, x0 - bx * b:x1 - bx * b]
+        return out
+
+    def value_at(self, x: int, y: int) -> float | None:
+        """Single pixel in raw (FITS array) orientation, served from the block cache when warm."""
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            return None
+        b = self.block
+        blk = virtual_block_cache.get((self.id, y // b, x // b))
+        v = blk[y % b, x % b] if blk is not None else self._evaluate(slice(y, y + 1, 1), slice(x, x + 1, 1))[0, 0]
+        return float(v) if np.isfinite(v) else None
+
+    def close(self) -> None:
+        virtual_block_cache.drop(self.id)
+        for op in self.operands.values():
+            op.close()
+
+
+class VirtualImageArray:
+    """
+    Read-only 2D array facade over a VirtualImage in display orientation.
+
+    Supports what SimpleTileGenerator and the histogram code do with image_data: shape/dtype/size,
+    basic 2D slicing (any positive step) and, for small images only, conversion to a real array.
+    """
+
+    ndim = 2
+    dtype = np.dtype(np.float32)
+
+    def __init__(self, image: VirtualImage):
+        self.image = image
+        self.shape = (image.height, image.width)
+        self.size = image.height * image.width
+
+    def __len__(self):
+        return self.shape[0]
+
+    def _read(self, rows: slice, cols: slice) -> np.ndarray:
+        h, w = self.shape
+        r0, r1, rs = rows.indices(h)
+        c0, c1, cs = cols.indices(w)
+        if rs <= 0 or cs <= 0:
+            return np.asarray(self)[rows, cols]
+        n_rows = len(range(r0, r1, rs))
+        n_cols = len(range(c0, c1, cs))
+        if n_rows == 0 or n_cols == 0:
+            return np.empty((n_rows, n_cols), dtype=np.float32)
+        c_stop = c0 + (n_cols - 1) * cs + 1
+        if not self.image.flip_y:
+            return self.image.read_raw(slice(r0, r0 + (n_rows - 1) * rs + 1, rs), slice(c0, c_stop, cs))
+        # Display row r is raw row h-1-r: read the mirrored raw rows upwards and flip the result.
+        last = r0 + (n_rows - 1) * rs
+        raw = self.image.read_raw(slice(h - 1 - last, h - r0, rs), slice(c0, c_stop, cs))
+        return raw[::-1]
+
+    def __getitem__(self, key):
+        if not isinstance(key, tuple):
+            key = (key,)
+        if len(key) == 1:
+            key = (key[0], slice(None))
+        if len(key) == 2 and all(isinstance(k, (slice, int, np.integer)) for k in key):
+            rows, cols = key
+            squeeze = []
+            if not isinstance(rows, slice):
+                rows = int(rows) + (self.shape[0] if int(rows) < 0 else 0)
+                rows, squeeze = slice(rows, rows + 1), squeeze + [0]
+            if not isinstance(cols, slice):
+                cols = int(cols) + (self.shape[1] if int(cols) < 0 else 0)
+                cols, squeeze = slice(cols, cols + 1), squeeze + [1]
+            out = self._read(rows, cols)
+            return out.squeeze(axis=tuple(squeeze)) if squeeze else out
+        return np.asarray(self)[key]
+
+    def __array__(self, dtype=None, copy=None):
+        if self.size > VIRTUAL_IMAGE_MAX_MATERIALIZE_PX:
+            raise ValueError(f"Refusing to materialize a {self.shape[1]}x{self.shape[0]} virtual image")
+        out = self._read(slice(None), slice(None))
+        return out.astype(dtype) if dtype is not None else out
+
+
+def _same_celestial_grid(wcs_a, wcs_b) -> bool:
+    if wcs_a is None or wcs_b is None:
+        return wcs_a is None and wcs_b is None
+    try:
+        a, b = wcs_a.wcs, wcs_b.wcs
+        return (
+            list(a.ctype) == list(b.ctype)
+            and np.allclose(a.crval, b.crval, rtol=0, atol=1e-9)
+            and np.allclose(a.crpix, b.crpix, rtol=0, atol=1e-6)
+            and np.allclose(a.get_pc() * a.get_cdelt()[:, None], b.get_pc() * b.get_cdelt()[:, None], rtol=1e-9, atol=0)
+            and (wcs_a.sip is None) == (wcs_b.sip is None)
+        )
+    except Exception:
+        return False
+
+
+class VirtualBlockCache:
+    """Byte-bounded LRU of evaluated virtual-image blocks, shared by all sessions."""
+
+    def __init__(self, max_bytes: int = VIRTUAL_IMAGE_CACHE_MB * 1024 * 1024):
+        self.max_bytes = int(max_bytes)
+        self._entries: "OrderedDict[tuple, np.ndarray]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            arr = self._entries.get(key)
+            if arr is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return arr
+
+    def put(self, key, arr: np.ndarray) -> None:
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old.nbytes
+            self._entries[key] = arr
+            self._bytes += arr.nbytes
+            while self._bytes > self.max_bytes and len(self._entries) > 1:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.nbytes
+
+    def drop(self, image_id: str) -> None:
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == image_id]:
+                self._bytes -= self._entries.pop(key).nbytes
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"blocks": len(self._entries), "bytes": self._bytes, "max_bytes": self.max_bytes,
+                    "hits": self.hits, "misses": self.misses}
+
+
+virtual_block_cache = VirtualBlockCache()
+_virtual_images: "OrderedDict[str, VirtualImage]" = OrderedDict()
+_virtual_images_lock = threading.Lock()
+
+
+def _is_virtual_image_key(path_like) -> bool:
+    return isinstance(path_like, str) and path_like.startswith(VIRTUAL_IMAGE_PREFIX)
+
+
+def get_virtual_image(key: str) -> VirtualImage:
+    image_id = key[len(VIRTUAL_IMAGE_PREFIX):] if _is_virtual_image_key(key) else str(key)
+    with _virtual_images_lock:
+        image = _virtual_images.get(image_id)
+        if image is not None:
+            _virtual_images.move_to_end(image_id)
+    if image is None:
+        raise HTTPException(status_code=404, detail=f"Virtual image not found (it may have expired): {image_id}")
+    return image
+
+
+def _register_virtual_image(expression: str, operand_specs: dict, reference: str | None) -> VirtualImage:
+    if not operand_specs:
+        raise HTTPException(status_code=400, detail="At least one operand is required.")
+    if len(operand_specs) > VIRTUAL_IMAGE_MAX_OPERANDS:
+        raise HTTPException(status_code=400, detail=f"Too many operands (max {VIRTUAL_IMAGE_MAX_OPERANDS}).")
+    resolved = {}
+    for name, spec in operand_specs.items():
+        if not str(name).isidentifier() or name in _VIRTUAL_FUNCTIONS:
+            raise HTTPException(status_code=400, detail=f"Invalid operand name: {name!r}")
+        spec = spec if isinstance(spec, dict) else {"filepath": spec}
+        path = _resolve_browser_fits_path(spec.get("filepath"))
+        hdu_index = _pick_first_image_hdu(path, spec.get("hdu"))
+        metadata = fits_metadata_cache.get(path)
+        resolved[name] = (path, hdu_index, metadata.size, metadata.mtime_ns)
+    reference = reference or next(iter(operand_specs))
+    if reference not in resolved:
+        raise HTTPException(status_code=400, detail=f"Reference operand '{reference}' is not defined.")
+
+    # Same definition (and unchanged inputs) -> same id, so evaluated blocks are shared.
+    fingerprint = json.dumps(
+        [str(expression).strip(), reference, sorted((k, str(v[0]), v[1], v[2], v[3]) for k, v in resolved.items())]
+    )
+    image_id = hashlib.sha1(fingerprint.encode("utf-8")).hexdigest()[:16]
+    with _virtual_images_lock:
+        existing = _virtual_images.get(image_id)
+        if existing is not None:
+            _virtual_images.move_to_end(image_id)
+            return existing
+    image = VirtualImage(
+        image_id, expression, {name: _VirtualOperand(name, v[0], v[1]) for name, v in resolved.items()}, reference
+    )
+    with _virtual_images_lock:
+        _virtual_images[image_id] = image
+        while len(_virtual_images) > VIRTUAL_IMAGE_MAX_DEFINITIONS:
+            _, evicted = _virtual_images.popitem(last=False)
+            evicted.close()
+    return image
+
+
+class VirtualTileGenerator(SimpleTileGenerator):
+    """SimpleTileGenerator over a VirtualImage; tiles, overview and histogram read through VirtualImageArray."""
+
+    def __init__(self, image: VirtualImage):
+        super().__init__(str(image.reference.path), image.reference.hdu_index, image_data=image.array)
+        self.virtual_image = image
+        self.header = image.header
+        try:
+            self.wcs = WCS(image.header)
+        except Exception:
+            self.wcs = None
+        # The array facade already serves display orientation.
+        self._flip_required = image.flip_y
+        self._flip_applied = image.flip_y
+
+
+def _new_tile_generator(fits_file: str, hdu_index: int) -> SimpleTileGenerator:
+    """Tile generator for a session image: a FITS HDU or a virtual image key."""
+    if _is_virtual_image_key(fits_file):
+        return VirtualTileGenerator(get_virtual_image(fits_file))
+    return SimpleTileGenerator(fits_file, hdu_index)
+
+
+def _virtual_image_wcs_source(current_file, hdu_index: int):
+    """
+    File and HDU to read a session image's header and WCS from. A virtual image resolves to its
+    reference operand (same pixel grid and WCS); every path or HDU that is not virtual is returned as is.
+    """
+    if _is_virtual_image_key(current_file):
+        image = get_virtual_image(current_file)
+        return str(image.reference.path), image.reference.hdu_index
+    return current_file, hdu_index
+
+# Max error (channel pixels, per base pixel of zoom-out) tolerated for the per-tile affine before mapping every pixel.
+RGB_WCS_AFFINE_TOLERANCE_PX = float(os.getenv('RGB_WCS_AFFINE_TOLERANCE_PX', '0.25'))
+
+
 class RGBTileGenerator:
     """Compose three independently scaled FITS channels into live RGB tiles."""
 
@@ -4276,34 +4844,35 @@ class RGBTileGenerator:
             # Sample a 3x3 grid of probe points (9 pts) instead of all T*T pixels.
             # For any reasonable projection, the WCS mapping over a 256px tile is
             # locally affine to sub-pixel accuracy, so we fit an affine and apply it.
+            # Four quarter points are held out of the fit to bound its error.
             steps = np.array([0.0, 0.5, 1.0])
             probe_col, probe_row = np.meshgrid(steps * (T - 1), steps * (T - 1))  # shape (3,3)
-            probe_col = probe_col.ravel()   # x within tile  (9,)
-            probe_row = probe_row.ravel()   # y within tile  (9,)
-
-            base_display_x = float(frame.get("offset_x", 0.0)) + (x * T + probe_col + 0.5) * base_scale - 0.5
-            base_display_y = float(frame.get("offset_y", 0.0)) + (y * T + probe_row + 0.5) * base_scale - 0.5
-            base_wcs_x, base_wcs_y = self._display_to_wcs_pixels(base, base_display_x, base_display_y)
+            check_col, check_row = np.meshgrid(np.array([0.25, 0.75]) * (T - 1), np.array([0.25, 0.75]) * (T - 1))
+            probe_col = np.concatenate([probe_col.ravel(), check_col.ravel()])   # x within tile  (13,)
+            probe_row = np.concatenate([probe_row.ravel(), check_row.ravel()])   # y within tile  (13,)
 
-            # Only 9 WCS calls instead of T*T (65 536)
-            world = base.wcs.all_pix2world(base_wcs_x, base_wcs_y, 0)
-            tgt_x, tgt_y = gen.wcs.all_world2pix(world[0], world[1], 0)
-            tgt_x, tgt_y = self._wcs_to_display_pixels(gen, tgt_x, tgt_y)
+            # Only 13 WCS calls instead of T*T (65 536)
+            tgt_x, tgt_y = self._map_tile_pixels_wcs(gen, frame, base_scale, x, y, probe_col, probe_row)
 
             if not (np.all(np.isfinite(tgt_x)) and np.all(np.isfinite(tgt_y))):
                 raise ValueError("Non-finite WCS probe values; cannot fit affine")
 
             # Fit affine: [tgt] = [probe_col, probe_row, 1] @ A  (least squares, 9 pts -> 2 unknowns each)
-            A_src = np.column_stack([probe_col, probe_row, np.ones(9)])  # (9, 3)
-            cx, _, _, _ = np.linalg.lstsq(A_src, tgt_x, rcond=None)    # coeffs for target-x
-            cy, _, _, _ = np.linalg.lstsq(A_src, tgt_y, rcond=None)    # coeffs for target-y
+            A_src = np.column_stack([probe_col, probe_row, np.ones(probe_col.size)])  # (13, 3)
+            cx, _, _, _ = np.linalg.lstsq(A_src[:9], tgt_x[:9], rcond=None)    # coeffs for target-x
+            cy, _, _, _ = np.linalg.lstsq(A_src[:9], tgt_y[:9], rcond=None)    # coeffs for target-y
+            affine_error = float(np.max(np.hypot(A_src[9:] @ cx - tgt_x[9:], A_src[9:] @ cy - tgt_y[9:])))
 
-            # Build full-tile source coordinates via the fitted affine (no WCS calls here)
             all_col, all_row = np.meshgrid(np.arange(T, dtype=float), np.arange(T, dtype=float))
             all_col = all_col.ravel()
             all_row = all_row.ravel()
-            src_x = cx[0] * all_col + cx[1] * all_row + cx[2]   # target image col
-            src_y = cy[0] * all_col + cy[1] * all_row + cy[2]   # target image row
+            if affine_error <= RGB_WCS_AFFINE_TOLERANCE_PX * max(1.0, float(base_scale)):
+                # Build full-tile source coordinates via the fitted affine (no WCS calls here)
+                src_x = cx[0] * all_col + cx[1] * all_row + cx[2]   # target image col
+                src_y = cy[0] * all_col + cy[1] * all_row + cy[2]   # target image row
+            else:
+                # Strong distortion across this tile: map every pixel (fitted WCS patches where faster).
+                src_x, src_y = self._map_tile_pixels_wcs(gen, frame, base_scale, x, y, all_col, all_row, wait=True)
 
             valid = (
                 np.isfinite(src_x) & np.isfinite(src_y) &
@@ -4322,6 +4891,25 @@ class RGBTileGenerator:
             logger.debug("RGB WCS tile alignment failed; falling back to scaled sampling: %s", exc)
             return None
 
+    def _map_tile_pixels_wcs(self, gen, frame, base_scale, x, y, col, row, wait=False):
+        """Tile pixel (col, row) of the RGB frame -> display pixel of channel `gen`, through the sky."""
+        base = frame["base"]
+        T = self.tile_size
+        base_display_x = float(frame.get("offset_x", 0.0)) + (x * T + col + 0.5) * base_scale - 0.5
+        base_display_y = float(frame.get("offset_y", 0.0)) + (y * T + row + 0.5) * base_scale - 0.5
+        base_wcs_x, base_wcs_y = self._display_to_wcs_pixels(base, base_display_x, base_display_y)
+        base_approx = _generator_wcs_approximation(base, wait=wait)
+        gen_approx = _generator_wcs_approximation(gen, wait=wait)
+        if base_approx is not None:
+            world = base_approx.pix2world(base_wcs_x, base_wcs_y)
+        else:
+            world = base.wcs.all_pix2world(base_wcs_x, base_wcs_y, 0)
+        if gen_approx is not None:
+            tgt_x, tgt_y = gen_approx.world2pix(world[0], world[1])
+        else:
+            tgt_x, tgt_y = gen.wcs.all_world2pix(world[0], world[1], 0)
+        return self._wcs_to_display_pixels(gen, tgt_x, tgt_y)
+
     def _render_channel_tile_scaled(self, gen, base, level, x, y):
         if gen is base:
             return self._normalized_rgb_tile(gen, self._extract_direct_tile_data(gen, level, x, y))
@@ -4704,8 +5292,9 @@ def _get_base_header_and_shape(session_data):
         base_flip = getattr(base_gen, "flip_required", False)
         return header, shape, file_id, base_flip
     try:
-        with fits.open(fits_file, memmap=True, lazy_load_hdus=True) as hdul:
-            hdu = hdul[hdu_index]
+        source_file, source_hdu = _virtual_image_wcs_source(fits_file, hdu_index)
+        with fits.open(source_file, memmap=True, lazy_load_hdus=True) as hdul:
+            hdu = hdul[source_hdu]
             header = hdu.header.copy()
             data = hdu.data
             shape = None
@@ -4920,6 +5509,11 @@ async def get_fits_histogram(
                     image_data_raw = gen.image_data
                     height, width = image_data_raw.shape[-2:]
 
+        # A virtual image without a generator: sample its lazily evaluated array.
+        if image_data_raw is None and _is_virtual_image_key(current_file):
+            image_data_raw = get_virtual_image(current_file).array
+            height, width = image_data_raw.shape
+
         # Fallback: open file if no generator data present
         if image_data_raw is None:
             full_path = Path(current_file)
@@ -5042,91 +5636,6 @@ async def get_fits_histogram(
 @app.get("/fits-header/{filepath:path}")
 async def get_fits_header(filepath: str, hdu_index: int = Query(0, description="Index of the HDU to read the header from")):
     """Retrieve the header of a specific HDU from a FITS file."""
-    def _parse_fast_header_card(card: str):
-        key = card[:8].strip()
-        if not key or key == "END" or card[8:10] != "= ":
-            return None
-
-        raw = card[10:].rstrip()
-        in_quote = False
-        slash_index = None
-        for idx, ch in enumerate(raw):
-            if ch == "'":
-                in_quote = not in_quote
-            elif ch == "/" and not in_quote:
-                slash_index = idx
-                break
-
-        value_text = raw[:slash_index].strip() if slash_index is not None else raw.strip()
-        comment = raw[slash_index + 1:].strip() if slash_index is not None else ""
-
-        if value_text.startswith("'"):
-            end = value_text.rfind("'")
-            value = value_text[1:end].strip() if end > 0 else value_text.strip("'").strip()
-        elif value_text in {"T", "F"}:
-            value = value_text == "T"
-        else:
-            try:
-                value = int(value_text)
-            except Exception:
-                try:
-                    value = float(value_text.replace("D", "E"))
-                except Exception:
-                    value = value_text
-        return key, value, comment
-
-    def _skip_fast_fits_data(fh, header: dict) -> None:
-        block_size = 2880
-        try:
-            bitpix = abs(int(header.get("BITPIX", 0) or 0))
-            byte_per_value = bitpix // 8
-            naxis = int(header.get("NAXIS", 0) or 0)
-            values = 1
-            for axis in range(1, naxis + 1):
-                values *= int(header.get(f"NAXIS{axis}", 0) or 0)
-            pcount = int(header.get("PCOUNT", 0) or 0)
-            gcount = int(header.get("GCOUNT", 1) or 1)
-            data_bytes = int(gcount * (pcount + values * byte_per_value)) if naxis > 0 else int(pcount)
-            padded = ((data_bytes + block_size - 1) // block_size) * block_size
-            if padded:
-                fh.seek(padded, os.SEEK_CUR)
-        except Exception:
-            pass
-
-    def _fast_header_from_fits(path: Path, target_hdu: int):
-        block_size = 2880
-        with open(path, "rb") as fh:
-            index = 0
-            while True:
-                header = {}
-                header_list = []
-                found_end = False
-
-                while True:
-                    block = fh.read(block_size)
-                    if not block or len(block) < block_size:
-                        raise HTTPException(status_code=400, detail=f"Invalid HDU index: {target_hdu}. File has {index} HDUs.")
-                    for pos in range(0, block_size, 80):
-                        card = block[pos:pos + 80].decode("ascii", errors="replace")
-                        key = card[:8].strip()
-                        if key == "END":
-                            found_end = True
-                            break
-                        parsed = _parse_fast_header_card(card)
-                        if parsed is None:
-                            continue
-                        k, v, c = parsed
-                        header[k] = v
-                        header_list.append({"key": k, "value": repr(v), "comment": c})
-                    if found_end:
-                        break
-
-                if index == target_hdu:
-                    return header_list
-
-                _skip_fast_fits_data(fh, header)
-                index += 1
-
     try:
         # Construct the full path relative to the workspace or use absolute path
         # This assumes 'files/' directory or allows absolute paths
@@ -5140,19 +5649,9 @@ async def get_fits_header(filepath: str, hdu_index: int = Query(0, description="
         if not full_path.exists():
             raise HTTPException(status_code=404, detail=f"FITS file not found at: {full_path}")
 
-        if _is_colab_drive_path(full_path):
-            header_list = _fast_header_from_fits(full_path, int(hdu_index))
-            return JSONResponse(content={"header": header_list, "hdu_index": hdu_index, "filename": full_path.name, "fast": True})
-
-        with fits.open(full_path, memmap=True, lazy_load_hdus=True, do_not_scale_image_data=True) as hdul:
-            if hdu_index < 0 or hdu_index >= len(hdul):
-                 raise HTTPException(status_code=400, detail=f"Invalid HDU index: {hdu_index}. File has {len(hdul)} HDUs.")
-
-            header = hdul[hdu_index].header
-            # Convert header to a list of key-value pairs for easier frontend handling
-            header_list = [{"key": k, "value": repr(v), "comment": header.comments[k]} for k, v in header.items() if k] # Ensure key is not empty
-
-            return JSONResponse(content={"header": header_list, "hdu_index": hdu_index, "filename": full_path.name})
+        metadata = await asyncio.to_thread(fits_metadata_cache.get, full_path)
+        header_list = metadata.hdu(hdu_index).cards
+        return JSONResponse(content={"header": header_list, "hdu_index": hdu_index, "filename": full_path.name})
 
     except FileNotFoundError:
          raise HTTPException(status_code=404, detail=f"FITS file not found at specified path: {filepath}")
@@ -5184,212 +5683,32 @@ async def get_fits_hdu_info(filepath: str):
     if not full_path.exists():
         raise HTTPException(status_code=404, detail=f"FITS file not found at: {filepath}")
 
-    def _image_shape_from_header(header):
-        try:
-            naxis = int(header.get("NAXIS", 0) or 0)
-            if naxis <= 0:
-                return None
-            dims = []
-            for axis in range(naxis, 0, -1):
-                value = int(header.get(f"NAXIS{axis}", 0) or 0)
-                if value <= 0:
-                    return None
-                dims.append(value)
-            return tuple(dims)
-        except Exception:
-            return None
-
-    def _dtype_from_header(header):
-        bitpix = int(header.get("BITPIX", 0) or 0)
-        if bitpix == 8:
-            return "uint8"
-        if bitpix == 16:
-            return "int16"
-        if bitpix == 32:
-            return "int32"
-        if bitpix == 64:
-            return "int64"
-        if bitpix == -32:
-            return "float32"
-        if bitpix == -64:
-            return "float64"
-        return "Unknown"
-
-    def _parse_fast_card_value(raw: str):
-        value = raw
-        in_quote = False
-        cut = len(value)
-        for idx, ch in enumerate(value):
-            if ch == "'":
-                in_quote = not in_quote
-            elif ch == "/" and not in_quote:
-                cut = idx
-                break
-        value = value[:cut].strip()
-        if not value:
-            return None
-        if value.startswith("'"):
-            end = value.rfind("'")
-            return value[1:end].strip() if end > 0 else value.strip("'").strip()
-        if value in {"T", "F"}:
-            return value == "T"
-        try:
-            return int(value)
-        except Exception:
-            pass
-        try:
-            return float(value.replace("D", "E"))
-        except Exception:
-            return value
-
-    def _fast_hdu_info_from_fits_headers(path: Path):
+    def _hdu_info_from_metadata(metadata: FitsFileMetadata) -> list:
+        recommended_index = metadata.recommended_index()
         hdu_list = []
-        recommended_index = -1
-        max_pixels = 0
-        block_size = 2880
-
-        def _data_bytes_from_header(header: dict) -> int:
-            try:
-                bitpix = abs(int(header.get("BITPIX", 0) or 0))
-                byte_per_value = bitpix // 8
-                naxis = int(header.get("NAXIS", 0) or 0)
-                values = 1
-                for axis in range(1, naxis + 1):
-                    values *= int(header.get(f"NAXIS{axis}", 0) or 0)
-                pcount = int(header.get("PCOUNT", 0) or 0)
-                gcount = int(header.get("GCOUNT", 1) or 1)
-                return int(gcount * (pcount + values * byte_per_value)) if naxis > 0 else int(pcount)
-            except Exception:
-                return 0
-
-        with open(path, "rb") as fh:
-            index = 0
-            while True:
-                header = {}
-                found_end = False
-
-                while True:
-                    block = fh.read(block_size)
-                    if not block:
-                        found_end = False
-                        break
-                    if len(block) < block_size:
-                        found_end = False
-                        break
-
-                    for pos in range(0, block_size, 80):
-                        card = block[pos:pos + 80].decode("ascii", errors="replace")
-                        key = card[:8].strip()
-                        if key == "END":
-                            found_end = True
-                            break
-                        if key and card[8:10] == "= ":
-                            header[key] = _parse_fast_card_value(card[10:])
-                    if found_end:
-                        break
-
-                if not found_end:
-                    break
-
-                xtension = str(header.get("XTENSION", "") or "").strip().upper()
-                is_primary = index == 0 and not xtension
-                is_table = "TABLE" in xtension
-                shape = _image_shape_from_header(header)
-                is_image = (not is_table) and bool(shape)
-                if is_image and shape and len(shape) >= 2:
-                    num_pixels = int(np.prod(shape))
-                    if num_pixels > max_pixels:
-                        max_pixels = num_pixels
-                        recommended_index = index
-
-                info = {
-                    "index": index,
-                    "name": header.get("EXTNAME") or ("PRIMARY" if is_primary else f"HDU {index}"),
-                    "type": "Primary" if is_primary else ("Table" if is_table else "Image"),
-                    "isRecommended": False,
-                }
-                if is_image and shape:
-                    info["dimensions"] = shape
-                    info["dataType"] = _dtype_from_header(header)
-                    info["bunit"] = header.get("BUNIT", "Unknown")
-                    info["hasWCS"] = bool(header.get("CTYPE1") and header.get("CTYPE2"))
-                elif is_table:
-                    info["rows"] = int(header.get("NAXIS2", 0) or 0)
-                    info["columns"] = int(header.get("TFIELDS", 0) or 0)
-                hdu_list.append(info)
-
-                data_bytes = _data_bytes_from_header(header)
-
-                try:
-                    padded = ((data_bytes + block_size - 1) // block_size) * block_size
-                    if padded:
-                        fh.seek(padded, os.SEEK_CUR)
-                except Exception:
-                    break
-                index += 1
-
-        for info in hdu_list:
-            info["isRecommended"] = info["index"] == recommended_index
+        for meta in metadata.hdus:
+            info = {
+                "index": meta.index,
+                "name": meta.name,
+                "type": meta.kind,
+                "isRecommended": meta.index == recommended_index,
+            }
+            shape = meta.shape
+            if shape:
+                info["dimensions"] = shape
+                info["dataType"] = meta.dtype_name
+                info["bunit"] = meta.header.get("BUNIT", "Unknown")
+                info["hasWCS"] = meta.has_celestial_wcs
+            elif meta.is_table:
+                info["rows"] = int(meta.header.get("NAXIS2", 0) or 0)
+                info["columns"] = int(meta.header.get("TFIELDS", 0) or 0)
+            hdu_list.append(info)
         return hdu_list
 
     try:
-        if _is_colab_drive_path(full_path):
-            try:
-                file_size = full_path.stat().st_size
-            except Exception:
-                file_size = 0
-            hdu_list = _fast_hdu_info_from_fits_headers(full_path)
-            return JSONResponse(content={
-                "hduList": hdu_list,
-                "filename": full_path.name,
-                "fast": True,
-                "partial": False,
-                "file_size": int(file_size),
-            })
-
-        with fits.open(full_path, memmap=True, lazy_load_hdus=True, do_not_scale_image_data=True) as hdul:
-            hdu_list = []
-            # Determine which HDU is likely the main science image
-            recommended_index = -1
-            max_pixels = 0
-            
-            # First pass: find the best candidate for the "recommended" HDU
-            for i, hdu in enumerate(hdul):
-                shape = _image_shape_from_header(hdu.header)
-                if hdu.is_image and shape and len(shape) >= 2:
-                    num_pixels = int(np.prod(shape))
-                    if num_pixels > max_pixels:
-                        max_pixels = num_pixels
-                        recommended_index = i
-
-            # Second pass: gather info for all HDUs
-            for i, hdu in enumerate(hdul):
-                # Basic info
-                info = {
-                    "index": i,
-                    "name": hdu.name or hdu.header.get('EXTNAME', f'HDU {i}'),
-                    "type": "Primary" if isinstance(hdu, fits.PrimaryHDU) else ("Image" if hdu.is_image else "Table"),
-                    "isRecommended": i == recommended_index
-                }
-
-                # Add specific details based on HDU type
-                shape = _image_shape_from_header(hdu.header)
-                if hdu.is_image and shape:
-                    info["dimensions"] = shape
-                    info["dataType"] = _dtype_from_header(hdu.header)
-                    info["bunit"] = hdu.header.get('BUNIT', 'Unknown')
-                    try:
-                        wcs_info = WCS(hdu.header)
-                        info["hasWCS"] = wcs_info.has_celestial
-                    except Exception:
-                        info["hasWCS"] = False
-                elif isinstance(hdu, (fits.BinTableHDU, fits.TableHDU)):
-                    info["rows"] = hdu.header.get('NAXIS2', 0)
-                    info["columns"] = hdu.header.get('TFIELDS', 0)
-
-                hdu_list.append(info)
-                
-            return JSONResponse(content={"hduList": hdu_list, "filename": full_path.name})
+        metadata = await asyncio.to_thread(fits_metadata_cache.get, full_path)
+        hdu_list = await asyncio.to_thread(_hdu_info_from_metadata, metadata)
+        return JSONResponse(content={"hduList": hdu_list, "filename": full_path.name, "file_size": int(metadata.size)})
     except Exception as e:
         logger.error(f"Failed to read HDU info for {full_path}: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Failed to read HDU info: {str(e)}")
@@ -5527,30 +5846,9 @@ async def generate_sed_optimized(
         print(f"[[DEBUG]] generate_sed_optimized CALLED. ra: {ra} dec: {dec} catalog_name: {catalog_name} (ignoring JS galaxy_name)")
 
         # 1) Load catalog (support catalogs/, files/, files/uploads/)
-        catalog_table = loaded_catalogs.get(catalog_name)
+        catalog_table = get_astropy_table_from_catalog(catalog_name, catalogs_dir)
         if catalog_table is None:
-            print(f"SED: Loading catalog '{catalog_name}'...")
-            base_dir = Path(".").resolve()
-            candidates = [
-                (base_dir, base_dir / catalog_name),
-                (base_dir / CATALOGS_DIRECTORY, base_dir / CATALOGS_DIRECTORY / catalog_name),
-                (base_dir / UPLOADS_DIRECTORY, base_dir / UPLOADS_DIRECTORY / catalog_name),
-                (base_dir / FILES_DIRECTORY, base_dir / FILES_DIRECTORY / catalog_name),
-            ]
-            found_dir = None
-            for parent_dir, fullp in candidates:
-                try:
-                    if fullp.is_file():
-                        found_dir = parent_dir
-                        break
-                except Exception:
-                    continue
-            # Fallback to catalogs_dir if not found by probing
-            probe_dir = found_dir if found_dir is not None else catalogs_dir
-            catalog_table = get_astropy_table_from_catalog(catalog_name, Path(probe_dir))
-            if catalog_table is None:
-                return JSONResponse(status_code=404, content={"error": f"Failed to load catalog '{catalog_name}'"})
-            loaded_catalogs[catalog_name] = catalog_table
+            return JSONResponse(status_code=404, content={"error": f"Failed to load catalog '{catalog_name}'"})
 
         # 2) Find nearest row
         available_cols_lower = {c.lower(): c for c in catalog_table.colnames}
@@ -6560,6 +6858,7 @@ async def generate_sed_optimized(
                 try:
                     session = getattr(request.state, "session", None)
                     fits_path = (session.data.get("current_fits_file") if session is not None else "") or ""
+                    fits_path, _ = _virtual_image_wcs_source(fits_path, 0)
                 except Exception:
                     fits_path = ""
                 if fits_path:
@@ -6914,55 +7213,220 @@ async def generate_sed_optimized(
         print(f"Error saving SED: {e}")
         print(traceback.format_exc())
         return JSONResponse(status_code=500, content={"error": f"Failed to save SED: {str(e)}"})
-@app.get("/source-properties/")
-async def source_properties(
-    request: Request,
-    catalog_name: str,
-    ra: Optional[float] = Query(None),
-    dec: Optional[float] = Query(None),
-    row_index: Optional[int] = Query(None, description="Direct table row index (0-based) for exact retrieval"),
-    ra_col: Optional[str] = Query(None, description="Override RA column name"),
-    dec_col: Optional[str] = Query(None, description="Override DEC column name"),
-    size_col: Optional[str] = Query(None, description="Optional size/radius column name (unused here)"),
-    tolerance_arcsec: Optional[float] = Query(
-        None,
-        description="Optional tolerance derived from region size (arcsec). If provided, allows nearest match within this tolerance when exact RA/Dec match fails.",
-    ),
-):
-    """Per-session source properties; uses session-scoped catalog cache."""
-    session = getattr(request.state, "session", None)
-    if session is None:
-        return JSONResponse(status_code=401, content={"error": "Missing session"})
-    session_data = session.data
 
+
+# --- Source properties ---
+# /source-properties/ answers for one source and /source-properties/batch/ for many. Positions
+# are matched exactly on the "viewer" spatial index: RA normalised to [0, 360) so -175deg matches
+# 185deg, and both coordinates rounded to _SOURCE_MATCH_DECIMALS, which keeps matching stable
+# across float formatting / JS round-trips while still being deterministic. A nearest source
+# within tolerance_arcsec is the optional fallback. Both endpoints share the index cache entry,
+# so both build it through _source_spatial_index.
+_SOURCE_MATCH_DECIMALS = 6  # degrees; ~0.36 arcsec
+
+
+def _source_sexagesimal_degrees(s: str, is_ra: bool) -> float:
     try:
-        session_catalogs = session_data.setdefault("loaded_catalogs", {})
-        catalog_table = session_catalogs.get(catalog_name)
-        if catalog_table is None:
-            print(f"Catalog '{catalog_name}' not in session cache. Attempting to load as Astropy Table.")
-            base_dir = Path(".").resolve()
-            candidates = [
-                (base_dir, base_dir / catalog_name),
-                (base_dir / CATALOGS_DIRECTORY, base_dir / CATALOGS_DIRECTORY / catalog_name),
-                (base_dir / UPLOADS_DIRECTORY, base_dir / UPLOADS_DIRECTORY / catalog_name),
-                (base_dir / FILES_DIRECTORY, base_dir / FILES_DIRECTORY / catalog_name),
-            ]
-            found_dir = None
-            for parent_dir, fullp in candidates:
+        txt = str(s).strip().lower()
+        nums = re.findall(r'[+-]?\d+(?:\.\d+)?', txt)
+        if not nums:
+            return float('nan')
+        a0 = float(nums[0])
+        a1 = float(nums[1]) if len(nums) > 1 else 0.0
+        a2 = float(nums[2]) if len(nums) > 2 else 0.0
+        sign = -1.0 if a0 < 0 else 1.0
+        a0 = abs(a0)
+        val = a0 + a1/60.0 + a2/3600.0
+        if is_ra:
+            return sign * val * 15.0
+        return sign * val
+    except Exception:
+        return float('nan')
+
+
+def _source_coordinate_degrees(val, is_ra: bool, col_name: str | None = None) -> float:
+    """Degrees for one RA/Dec cell: angle quantities, sexagesimal or numeric text, radians, hours for RA."""
+    try:
+        # Astropy Quantity with angle units
+        try:
+            if hasattr(val, 'unit') and getattr(val, 'unit') is not None:
+                q = val
                 try:
-                    if fullp.is_file():
-                        found_dir = parent_dir
-                        break
+                    return float(q.to(u.deg).value)
                 except Exception:
-                    continue
-            probe_dir = found_dir if found_dir is not None else Path(CATALOGS_DIRECTORY)
-            catalog_table = get_astropy_table_from_catalog(catalog_name, Path(probe_dir))
-            if catalog_table is None:
-                return JSONResponse(status_code=404, content={"error": f"Failed to load catalog '{catalog_name}' as Astropy Table."})
-            session_catalogs[catalog_name] = catalog_table
-            print(f"Cached Astropy Table for '{catalog_name}' in session.")
-
-        # If caller provides a direct row index, return that row's full properties (all columns).
+                    try:
+                        return float((q.to(u.hourangle)).to(u.deg).value)
+                    except Exception:
+                        pass
+        except Exception:
+            pass
+
+        # Strings (sexagesimal or numeric)
+        if isinstance(val, str):
+            out = _source_sexagesimal_degrees(val, is_ra)
+            if np.isfinite(out):
+                return out
+            try:
+                v = float(val)
+            except Exception:
+                return float('nan')
+            val = v
+
+        # numpy scalar -> python
+        if hasattr(val, 'item'):
+            val = val.item()
+
+        if isinstance(val, (int, float, np.number)):
+            v = float(val)
+            if not np.isfinite(v):
+                return float('nan')
+            # radians
+            if abs(v) <= (2*np.pi + 1e-6):
+                return v * (180.0/np.pi)
+            # hours for RA
+            if is_ra:
+                name = (col_name or '').lower()
+                if ('hms' in name) or ('hour' in name):
+                    return v * 15.0
+            return v
+    except Exception:
+        return float('nan')
+    return float('nan')
+
+
+def _source_ra_degrees(x: float) -> float:
+    v = float(x)
+    if not np.isfinite(v):
+        return float('nan')
+    v = v % 360.0
+    if v < 0:
+        v += 360.0
+    return v
+
+
+def _source_viewer_degrees(table, col_name: str, is_ra: bool) -> np.ndarray:
+    col = table[col_name]
+    if col.dtype.kind in ('i', 'u', 'f') and not np.ma.getmaskarray(col).any():
+        # Same conventions as _source_coordinate_degrees, vectorized for numeric columns.
+        v = np.array(col, dtype=float)
+        small = np.abs(v) <= (2*np.pi + 1e-6)
+        lower = (col_name or '').lower()
+        scale = 15.0 if (is_ra and (('hms' in lower) or ('hour' in lower))) else 1.0
+        out = np.where(small, np.degrees(v), v * scale)
+        out[~np.isfinite(v)] = np.nan
+    else:
+        out = np.array([_source_coordinate_degrees(v, is_ra, col_name) for v in col], dtype=float)
+    return out
+
+
+def _source_coordinate_columns(table, ra_col: Optional[str] = None, dec_col: Optional[str] = None) -> tuple:
+    """(RA column, Dec column) of table: valid overrides first, then the usual names; None where unresolved."""
+    available_cols_lower = {col.lower(): col for col in table.colnames}
+
+    # Prefer explicit overrides from query params when valid
+    ra_col_name = available_cols_lower.get((ra_col or '').lower()) if ra_col else None
+    dec_col_name = available_cols_lower.get((dec_col or '').lower()) if dec_col else None
+
+    # Fallback to default candidate lists
+    if not ra_col_name:
+        ra_col_name = next((available_cols_lower[name.lower()] for name in RA_COLUMN_NAMES if name.lower() in available_cols_lower), None)
+    if not dec_col_name:
+        dec_col_name = next((available_cols_lower[name.lower()] for name in DEC_COLUMN_NAMES if name.lower() in available_cols_lower), None)
+
+    # Final fallback for known PHANGS naming
+    if not ra_col_name:
+        ra_col_name = available_cols_lower.get('phangs_ra')
+    if not dec_col_name:
+        dec_col_name = available_cols_lower.get('phangs_dec')
+    return ra_col_name, dec_col_name
+
+
+def _source_spatial_index(catalog_path: Path, table, ra_col_name: str, dec_col_name: str) -> "CatalogSpatialIndex":
+    return catalog_spatial_index.get(
+        catalog_path, ra_col_name, dec_col_name,
+        lambda: (_source_viewer_degrees(table, ra_col_name, True), _source_viewer_degrees(table, dec_col_name, False)),
+        convention="viewer",
+    )
+
+
+def _match_source_positions(index: "CatalogSpatialIndex", ra, dec, tolerance_arcsec: Optional[float] = None) -> np.ndarray:
+    """
+    Catalog row for each queried (ra, dec) as /source-properties/ would pick it, or -1: the
+    lowest row whose rounded position equals the rounded query, else (with a tolerance) the
+    nearest source within tolerance_arcsec.
+    """
+    q_ra = np.mod(np.asarray(ra, dtype=float), 360.0)
+    q_dec = np.asarray(dec, dtype=float)
+    rows = np.full(q_ra.shape, -1, dtype=np.int64)
+    todo = np.flatnonzero(np.isfinite(q_ra) & np.isfinite(q_dec))
+    if not todo.size:
+        return rows
+    xyz = _radec_to_unit(q_ra[todo], q_dec[todo]).reshape(-1, 3)
+    # Rounded coordinates can only agree within ~1.5e-6 deg, so the candidates come from a tiny cone.
+    query, candidates, _ = index.pairs(xyz, 2.0 * 10.0 ** (-_SOURCE_MATCH_DECIMALS), k=4)
+    if len(candidates):
+        cand_ra, cand_dec = index.coordinates(candidates)
+        same = ((np.round(cand_ra, _SOURCE_MATCH_DECIMALS) == np.round(q_ra[todo[query]], _SOURCE_MATCH_DECIMALS))
+                & (np.round(cand_dec, _SOURCE_MATCH_DECIMALS) == np.round(q_dec[todo[query]], _SOURCE_MATCH_DECIMALS)))
+        query, candidates = query[same], candidates[same]
+        # keep first occurrence on duplicates
+        order = np.lexsort((candidates, query))
+        query, candidates = query[order], candidates[order]
+        first = np.ones(len(query), dtype=bool)
+        first[1:] = query[1:] != query[:-1]
+        rows[todo[query[first]]] = candidates[first]
+    tol = float(tolerance_arcsec) if (tolerance_arcsec is not None and np.isfinite(tolerance_arcsec)) else None
+    if tol is not None and tol > 0:
+        missing = np.flatnonzero(rows[todo] < 0)
+        if missing.size:
+            nearest, _ = index.nearest_each(xyz[missing], tol / 3600.0)
+            rows[todo[missing]] = nearest
+    return rows
+
+
+def _source_properties_json_column(values) -> list:
+    """JSON-safe list for a column slice: None for masked cells and NaN/Inf, text decoded."""
+    raw, valid = _query_raw(values)
+    if raw.ndim > 1:
+        out = [_sanitize_json_value(v) for v in raw]
+    elif raw.dtype.kind in ('S', 'U'):
+        out = _query_text(raw, lower=False).tolist()
+    elif raw.dtype.kind == 'O':
+        out = [_sanitize_json_value(v) for v in raw]
+    else:
+        out = raw.tolist()
+        if raw.dtype.kind in ('f', 'c'):
+            valid = valid & np.isfinite(raw)
+    for i in np.flatnonzero(~valid):
+        out[i] = None
+    return out
+
+
+@app.get("/source-properties/")
+async def source_properties(
+    request: Request,
+    catalog_name: str,
+    ra: Optional[float] = Query(None),
+    dec: Optional[float] = Query(None),
+    row_index: Optional[int] = Query(None, description="Direct table row index (0-based) for exact retrieval"),
+    ra_col: Optional[str] = Query(None, description="Override RA column name"),
+    dec_col: Optional[str] = Query(None, description="Override DEC column name"),
+    size_col: Optional[str] = Query(None, description="Optional size/radius column name (unused here)"),
+    tolerance_arcsec: Optional[float] = Query(
+        None,
+        description="Optional tolerance derived from region size (arcsec). If provided, allows nearest match within this tolerance when exact RA/Dec match fails.",
+    ),
+):
+    """Per-session source properties; catalogs come from the shared catalog table cache."""
+    session = getattr(request.state, "session", None)
+    if session is None:
+        return JSONResponse(status_code=401, content={"error": "Missing session"})
+    try:
+        catalog_table = get_astropy_table_from_catalog(catalog_name, Path(CATALOGS_DIRECTORY))
+        if catalog_table is None:
+            return JSONResponse(status_code=404, content={"error": f"Failed to load catalog '{catalog_name}' as Astropy Table."})
+
+        # If caller provides a direct row index, return that row's full properties (all columns).
         # This is the fastest + most reliable way to show full properties after clicking a marker.
         if row_index is not None:
             try:
@@ -7033,153 +7497,32 @@ async def source_properties(
         if ra is None or dec is None:
             return JSONResponse(status_code=400, content={"error": "ra and dec are required unless row_index is provided"})
 
-        available_cols_lower = {col.lower(): col for col in catalog_table.colnames}
-
-        # Prefer explicit overrides from query params when valid
-        ra_col_name = available_cols_lower.get((ra_col or '').lower()) if ra_col else None
-        dec_col_name = available_cols_lower.get((dec_col or '').lower()) if dec_col else None
-
-        # Fallback to default candidate lists
-        if not ra_col_name:
-            ra_col_name = next((available_cols_lower[name.lower()] for name in RA_COLUMN_NAMES if name.lower() in available_cols_lower), None)
-        if not dec_col_name:
-            dec_col_name = next((available_cols_lower[name.lower()] for name in DEC_COLUMN_NAMES if name.lower() in available_cols_lower), None)
-
-        # Final fallback for known PHANGS naming
-        if not ra_col_name:
-            ra_col_name = available_cols_lower.get('phangs_ra')
-        if not dec_col_name:
-            dec_col_name = available_cols_lower.get('phangs_dec')
-
+        ra_col_name, dec_col_name = _source_coordinate_columns(catalog_table, ra_col, dec_col)
         if not ra_col_name or not dec_col_name:
             print(f"[source-properties] Could not resolve RA/DEC columns. Requested: ra_col={ra_col}, dec_col={dec_col}. Available: {list(catalog_table.colnames)[:10]} ...")
             return JSONResponse(status_code=400, content={"error": f"Could not find RA/DEC columns in catalog '{catalog_name}'."})
 
-        # Robust RA/DEC normalization to degrees (supports sexagesimal strings, astropy quantities, radians, hours)
-        def _parse_sexagesimal(s: str, is_ra: bool) -> float:
-            try:
-                import re
-                txt = str(s).strip().lower()
-                nums = re.findall(r'[+-]?\d+(?:\.\d+)?', txt)
-                if not nums:
-                    return float('nan')
-                a0 = float(nums[0])
-                a1 = float(nums[1]) if len(nums) > 1 else 0.0
-                a2 = float(nums[2]) if len(nums) > 2 else 0.0
-                sign = -1.0 if a0 < 0 else 1.0
-                a0 = abs(a0)
-                val = a0 + a1/60.0 + a2/3600.0
-                if is_ra:
-                    return sign * val * 15.0
-                return sign * val
-            except Exception:
-                return float('nan')
-
-        def _normalize_coord_value(val, is_ra: bool, col_name: str | None = None) -> float:
-            try:
-                # Astropy Quantity with angle units
-                try:
-                    from astropy import units as u
-                    if hasattr(val, 'unit') and getattr(val, 'unit') is not None:
-                        q = val
-                        try:
-                            return float(q.to(u.deg).value)
-                        except Exception:
-                            try:
-                                return float((q.to(u.hourangle)).to(u.deg).value)
-                            except Exception:
-                                pass
-                except Exception:
-                    pass
-
-                # Strings (sexagesimal or numeric)
-                if isinstance(val, str):
-                    out = _parse_sexagesimal(val, is_ra)
-                    if np.isfinite(out):
-                        return out
-                    try:
-                        v = float(val)
-                    except Exception:
-                        return float('nan')
-                    val = v
-
-                # numpy scalar -> python
-                if hasattr(val, 'item'):
-                    val = val.item()
-
-                if isinstance(val, (int, float, np.number)):
-                    v = float(val)
-                    if not np.isfinite(v):
-                        return float('nan')
-                    # radians
-                    if abs(v) <= (2*np.pi + 1e-6):
-                        return v * (180.0/np.pi)
-                    # hours for RA
-                    if is_ra:
-                        name = (col_name or '').lower()
-                        if ('hms' in name) or ('hour' in name):
-                            return v * 15.0
-                    return v
-            except Exception:
-                return float('nan')
-            return float('nan')
-
-        # Exact match lookup (deterministic).
-        #
-        # Notes:
-        # - We normalize RA to [0, 360) so -175deg matches 185deg.
-        # - We match by rounding both catalog coords and query coords to a fixed precision.
-        #   This makes matching stable across float formatting / JS round-trips while still being deterministic.
-        MATCH_DECIMALS = 6  # degrees; ~0.36 arcsec
-
-        def _norm_ra_deg(x: float) -> float:
-            v = float(x)
-            if not np.isfinite(v):
-                return float('nan')
-            v = v % 360.0
-            if v < 0:
-                v += 360.0
-            return v
+        # Exact match lookup (deterministic); see the notes on _SOURCE_MATCH_DECIMALS.
+        MATCH_DECIMALS = _SOURCE_MATCH_DECIMALS
 
         try:
-            exact_index = session_data.setdefault("catalog_exact_index", {})
-            key = (catalog_name, ra_col_name, dec_col_name, int(len(catalog_table)), int(MATCH_DECIMALS))
-            idx_entry = exact_index.get(key)
-            if idx_entry is None:
-                ra_col_data = catalog_table[ra_col_name]
-                dec_col_data = catalog_table[dec_col_name]
-                table_ra = np.array([_norm_ra_deg(_normalize_coord_value(v, True, ra_col_name)) for v in ra_col_data], dtype=float)
-                table_dec = np.array([_normalize_coord_value(v, False, dec_col_name) for v in dec_col_data], dtype=float)
-
-                lookup: dict[tuple[float, float], int] = {}
-                for i in range(int(len(catalog_table))):
-                    r = table_ra[i]
-                    d = table_dec[i]
-                    if not (np.isfinite(r) and np.isfinite(d)):
-                        continue
-                    k = (round(float(r), MATCH_DECIMALS), round(float(d), MATCH_DECIMALS))
-                    # keep first occurrence on duplicates
-                    if k not in lookup:
-                        lookup[k] = i
-
-                # Precompute unit vectors + optional KDTree for fast nearest lookup (used only when tolerance_arcsec is provided).
-                ra_rad = np.radians(table_ra)
-                dec_rad = np.radians(table_dec)
-                cosd = np.cos(dec_rad)
-                unit_xyz = np.column_stack((cosd * np.cos(ra_rad), cosd * np.sin(ra_rad), np.sin(dec_rad)))
-                try:
-                    from scipy.spatial import cKDTree
-                    tree = cKDTree(unit_xyz)
-                except Exception:
-                    tree = None
-
-                idx_entry = {"lookup": lookup, "ra_deg": table_ra, "dec_deg": table_dec, "unit_xyz": unit_xyz, "tree": tree}
-                exact_index[key] = idx_entry
+            catalog_path = _locate_catalog_file(catalog_name, Path(CATALOGS_DIRECTORY))
+            if catalog_path is None:
+                return JSONResponse(status_code=404, content={"error": f"Catalog '{catalog_name}' not found."})
+            index = _source_spatial_index(catalog_path, catalog_table, ra_col_name, dec_col_name)
 
-            q_ra = _norm_ra_deg(float(ra))
+            q_ra = _source_ra_degrees(float(ra))
             q_dec = float(dec)
             q_key = (round(float(q_ra), MATCH_DECIMALS), round(float(q_dec), MATCH_DECIMALS))
-            matched_idx = idx_entry["lookup"].get(q_key)
+            # Rounded coordinates can only agree within ~1.5e-6 deg, so the candidates come from a tiny cone.
+            candidates, _ = index.cone(q_ra, q_dec, 2.0 * 10.0 ** (-MATCH_DECIMALS), sort=False)
+            matched_idx = None
+            if len(candidates):
+                cand_ra, cand_dec = index.coordinates(candidates)
+                same = (np.round(cand_ra, MATCH_DECIMALS) == q_key[0]) & (np.round(cand_dec, MATCH_DECIMALS) == q_key[1])
+                if same.any():
+                    # keep first occurrence on duplicates
+                    matched_idx = int(candidates[same].min())
             if matched_idx is None:
                 # Optional tolerance-based fallback (ONLY if caller supplies tolerance_arcsec)
                 tol = float(tolerance_arcsec) if (tolerance_arcsec is not None and np.isfinite(tolerance_arcsec)) else None
@@ -7194,41 +7537,10 @@ async def source_properties(
                         },
                     )
 
-                q_ra_rad = np.radians(q_ra)
-                q_dec_rad = np.radians(q_dec)
-                q_vec = np.array([
-                    np.cos(q_dec_rad) * np.cos(q_ra_rad),
-                    np.cos(q_dec_rad) * np.sin(q_ra_rad),
-                    np.sin(q_dec_rad),
-                ])
-
-                min_sep_arcsec = None
-                nearest_idx = None
-                if idx_entry.get("tree") is not None:
-                    _, i_nn = idx_entry["tree"].query(q_vec, k=1)
-                    nearest_idx = int(i_nn)
-                    try:
-                        dot = float(np.clip(np.dot(q_vec, idx_entry["unit_xyz"][nearest_idx]), -1.0, 1.0))
-                        theta_rad = float(np.arccos(dot))
-                        min_sep_arcsec = float(np.degrees(theta_rad) * 3600.0)
-                    except Exception:
-                        min_sep_arcsec = None
-                else:
-                    # Fallback (approx) in arcsec
-                    ra_arr = idx_entry.get("ra_deg")
-                    dec_arr = idx_entry.get("dec_deg")
-                    if ra_arr is None or dec_arr is None:
-                        return JSONResponse(status_code=500, content={"error": "Exact index missing RA/Dec arrays."})
-                    ra_diff = np.abs(ra_arr - q_ra)
-                    ra_diff = np.where(ra_diff > 180.0, 360.0 - ra_diff, ra_diff)
-                    dec_diff = np.abs(dec_arr - q_dec)
-                    dist_deg = np.sqrt((ra_diff * np.cos(np.radians(q_dec)))**2 + dec_diff**2)
-                    if dist_deg.size:
-                        nearest_idx = int(np.argmin(dist_deg))
-                        min_sep_arcsec = float(dist_deg[nearest_idx] * 3600.0)
-
-                if nearest_idx is not None and min_sep_arcsec is not None and min_sep_arcsec <= tol:
-                    matched_idx = nearest_idx
+                nearest_rows, nearest_sep = index.nearest(q_ra, q_dec, 1)
+                min_sep_arcsec = float(nearest_sep[0] * 3600.0) if len(nearest_rows) else None
+                if min_sep_arcsec is not None and min_sep_arcsec <= tol:
+                    matched_idx = int(nearest_rows[0])
                 else:
                     return JSONResponse(
                         status_code=404,
@@ -7306,42 +7618,155 @@ async def source_properties(
     except Exception as e:
       return JSONResponse(status_code=500, content={"error": f"Failed to get source properties: {str(e)}"})
 
+
+@app.post("/source-properties/batch/")
+async def source_properties_batch(request: Request):
+    """
+    Properties of many sources in one response, for views that would otherwise send one
+    /source-properties/ request per source.
+
+    Body JSON:
+      {
+        "catalog_name": "cata10_v4_final.fits",
+        "row_indices": [0, 5, ...]               (or "ra": [...], "dec": [...] matched as /source-properties/ does)
+        "columns": ["colA", ...]                 (optional; every column by default)
+        "ra_col", "dec_col", "tolerance_arcsec"  (optional; as on /source-properties/)
+        "format": "columnar" | "json"            (optional; columnar by default, see _catalog_columnar_payload)
+      }
+
+    Queries without a row are left out; `__query_index` (columnar) or `query_indices` (JSON) gives
+    the position in the request of each returned row, and `__row_index` / `row_indices` the row.
+    """
+    session = getattr(request.state, "session", None)
+    if session is None:
+        return JSONResponse(status_code=401, content={"error": "Missing session"})
+    try:
+        payload = await request.json()
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid JSON body")
+    if not isinstance(payload, dict):
+        raise HTTPException(status_code=400, detail="Invalid JSON body")
+
+    catalog_name = str(payload.get("catalog_name") or "").strip()
+    row_indices = payload.get("row_indices")
+    ra = payload.get("ra")
+    dec = payload.get("dec")
+    columns = payload.get("columns")
+    tolerance_arcsec = payload.get("tolerance_arcsec")
+    output = str(payload.get("format") or "columnar").lower()
+
+    if not catalog_name:
+        raise HTTPException(status_code=400, detail="Missing catalog_name")
+    if output not in ("columnar", "json"):
+        raise HTTPException(status_code=400, detail="format must be 'columnar' or 'json'")
+    if columns is not None and (not isinstance(columns, list) or not all(isinstance(c, str) for c in columns)):
+        raise HTTPException(status_code=400, detail="columns must be a list of strings")
+    if tolerance_arcsec is not None and not isinstance(tolerance_arcsec, (int, float)):
+        raise HTTPException(status_code=400, detail="tolerance_arcsec must be a number")
+    if row_indices is not None:
+        if not isinstance(row_indices, list) or not all(isinstance(i, (int, float)) and float(i).is_integer() for i in row_indices):
+            raise HTTPException(status_code=400, detail="row_indices must be a list of integers")
+    elif not (isinstance(ra, list) and isinstance(dec, list) and len(ra) == len(dec)):
+        raise HTTPException(status_code=400, detail="row_indices, or ra and dec lists of the same length, are required")
+    else:
+        try:
+            ra = np.asarray(ra, dtype=float)
+            dec = np.asarray(dec, dtype=float)
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="ra and dec must be lists of numbers")
+
+    catalog_table = get_astropy_table_from_catalog(catalog_name, Path(CATALOGS_DIRECTORY))
+    if catalog_table is None:
+        return JSONResponse(status_code=404, content={"error": f"Failed to load catalog '{catalog_name}' as Astropy Table."})
+
+    lower_map = {str(c).lower(): str(c) for c in catalog_table.colnames}
+    if columns is None:
+        cols_exist = list(catalog_table.colnames)
+    else:
+        cols_exist = []
+        for c in columns:
+            c2 = lower_map.get(str(c).lower())
+            if c2 and c2 not in cols_exist:
+                cols_exist.append(c2)
+
+    header = {"catalog_name": catalog_name}
+    if row_indices is not None:
+        index = None
+        catalog_path = None
+    else:
+        ra_col_name, dec_col_name = _source_coordinate_columns(catalog_table, payload.get("ra_col"), payload.get("dec_col"))
+        if not ra_col_name or not dec_col_name:
+            return JSONResponse(status_code=400, content={"error": f"Could not find RA/DEC columns in catalog '{catalog_name}'."})
+        catalog_path = _locate_catalog_file(catalog_name, Path(CATALOGS_DIRECTORY))
+        if catalog_path is None:
+            return JSONResponse(status_code=404, content={"error": f"Catalog '{catalog_name}' not found."})
+        header.update({"ra_col": ra_col_name, "dec_col": dec_col_name, "match_decimals": _SOURCE_MATCH_DECIMALS})
+
+    def build():
+        if row_indices is not None:
+            rows = np.asarray(row_indices, dtype=np.int64).reshape(-1)
+        else:
+            index = _source_spatial_index(catalog_path, catalog_table, ra_col_name, dec_col_name)
+            rows = _match_source_positions(index, ra, dec, tolerance_arcsec)
+        queries = np.flatnonzero((rows >= 0) & (rows < len(catalog_table)))
+        rows = rows[queries]
+        header.update({"num_records": int(rows.size), "num_queries": int(len(row_indices) if row_indices is not None else len(ra))})
+        # Store-backed tables gather just these rows from the memory-mapped columns.
+        if output == "columnar":
+            return _catalog_columnar_payload(
+                header,
+                [("__query_index", queries), ("__row_index", rows), *((col, catalog_table[col][rows]) for col in cols_exist)],
+            )
+        values = {col: _source_properties_json_column(catalog_table[col][rows]) for col in cols_exist}
+        return {**header, "query_indices": queries.tolist(), "row_indices": rows.tolist(), "columns": cols_exist, "values": values}
+
+    loop = asyncio.get_running_loop()
+    try:
+        content = await loop.run_in_executor(app.state.thread_executor, build)
+    except Exception as e:
+        return JSONResponse(status_code=500, content={"error": f"Failed to get source properties: {str(e)}"})
+    if output == "columnar":
+        return Response(content=content, media_type="application/octet-stream")
+    return JSONResponse(content=content)
+
 @app.post("/upload-fits/")
-async def upload_fits_file(file: UploadFile = File(...)):
-    """Upload a FITS file to the server."""
+async def upload_fits_file(request: Request):
+    """Upload a FITS file to the server (multipart field 'file', or the raw body with ?filename=)."""
     try:
         # Create the 'uploads' directory if it doesn't exist
         uploads_dir = Path(UPLOADS_DIRECTORY)
         uploads_dir.mkdir(parents=True, exist_ok=True)
-        
-        # Generate a safe filename
-        original_filename = file.filename
-        safe_filename = re.sub(r'[^\w\-\.]', '_', original_filename)
-        
-        # Add timestamp to ensure uniqueness
-        timestamp = int(time.time())
-        filename_parts = safe_filename.split('.')
-        if len(filename_parts) > 1:
-            # Insert timestamp before the extension
-            ext = filename_parts[-1]
-            base = '.'.join(filename_parts[:-1])
-            safe_filename = f"{base}_{timestamp}.{ext}"
-        else:
-            # No extension; append timestamp and default to .fits
-            safe_filename = f"{safe_filename}_{timestamp}.fits"
-        
-        # Construct the file path
-        file_path = uploads_dir / safe_filename
-        
-        # Write the file
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-        
+
+        def destination(original_filename: str) -> Path:
+            # Generate a safe filename
+            safe_filename = re.sub(r'[^\w\-\.]', '_', original_filename)
+
+            # Add timestamp to ensure uniqueness
+            timestamp = int(time.time())
+            filename_parts = safe_filename.split('.')
+            if len(filename_parts) > 1:
+                # Insert timestamp before the extension
+                ext = filename_parts[-1]
+                base = '.'.join(filename_parts[:-1])
+                safe_filename = f"{base}_{timestamp}.{ext}"
+            else:
+                # No extension; append timestamp and default to .fits
+                safe_filename = f"{safe_filename}_{timestamp}.fits"
+            return uploads_dir / safe_filename
+
+        # Write the file block by block as it arrives
+        ingest, _ = await _receive_upload(request, destination, catalog=False)
+        safe_filename = ingest.path.name
+
         # Return the relative path for loading
         return JSONResponse(content={
             "message": "File uploaded successfully",
-            "filepath": f"uploads/{safe_filename}"
+            "filepath": f"uploads/{safe_filename}",
+            "upload_id": ingest.upload_id,
+            "size": ingest.bytes,
         })
+    except HTTPException:
+        raise
     except Exception as e:
         import traceback
         print(f"Error uploading file: {e}")
@@ -8015,121 +8440,882 @@ def _is_colab_drive_path(path_like) -> bool:
         return False
 
 
-def _header_shape_2d(header) -> tuple[int, int]:
-    width = int(header.get("NAXIS1", 0) or 0)
-    height = int(header.get("NAXIS2", 0) or 0)
-    return width, height
+# --- Shared FITS header / HDU metadata cache ---
+# Header-only consumers (header viewer, HDU list, pixel scale, tile info, coordinate
+# endpoints) read every HDU header of a file once and are then served from memory.
+# Entries are keyed by resolved path and invalidated when size or mtime changes.
+FITS_METADATA_CACHE_MAX_FILES = int(os.getenv('FITS_METADATA_CACHE_MAX_FILES', '128'))
+_FITS_BLOCK_SIZE = 2880
+_FITS_END_CARD = b"END" + b" " * 5
+_FITS_BITPIX_DTYPES = {8: '>u1', 16: '>i2', 32: '>i4', 64: '>i8', -32: '>f4', -64: '>f8'}
+_FITS_BITPIX_NAMES = {8: "uint8", 16: "int16", 32: "int32", 64: "int64", -32: "float32", -64: "float64"}
 
 
-def _header_initial_display_range(header) -> tuple[float | None, float | None]:
+def _fits_data_size_from_header(header) -> int:
+    """Size in bytes of the data unit that follows `header` (FITS standard, without padding)."""
     try:
-        datamin = header.get("DATAMIN", None)
-        datamax = header.get("DATAMAX", None)
-        if datamin is None or datamax is None:
-            return None, None
-        datamin = float(datamin)
-        datamax = float(datamax)
-        if np.isfinite(datamin) and np.isfinite(datamax) and datamin < datamax:
-            return datamin, datamax
+        bitpix = abs(int(header.get("BITPIX", 0) or 0))
+        naxis = int(header.get("NAXIS", 0) or 0)
+        pcount = int(header.get("PCOUNT", 0) or 0)
+        gcount = int(header.get("GCOUNT", 1) or 1)
+        if naxis <= 0:
+            return pcount * (bitpix // 8)
+        first_axis = 2 if (header.get("GROUPS", False) and int(header.get("NAXIS1", 0) or 0) == 0) else 1
+        values = 1
+        for axis in range(first_axis, naxis + 1):
+            values *= int(header.get(f"NAXIS{axis}", 0) or 0)
+        return int(gcount * (pcount + values) * (bitpix // 8))
     except Exception:
-        pass
-    return None, None
+        return 0
 
 
-def _sample_display_range_from_hdu(hdu, width: int, height: int) -> tuple[float | None, float | None]:
+def _fits_image_shape_from_header(header) -> tuple | None:
+    """Numpy-order shape (NAXISn, ..., NAXIS1) of an image header, or None."""
     try:
-        data = hdu.data
-        if data is None:
-            return None, None
-        if getattr(data, "ndim", 0) > 2:
-            if data.ndim == 3:
-                data = data[0, :, :]
-            elif data.ndim == 4:
-                data = data[0, 0, :, :]
-            else:
-                data = data.reshape((-1, height, width))[0]
-
-        win_size = int(os.getenv("COLAB_DRIVE_RANGE_SAMPLE_SIZE", "512"))
-        win_h = max(1, min(int(height), win_size))
-        win_w = max(1, min(int(width), win_size))
-        y0 = max(0, int(height) // 2 - win_h // 2)
-        x0 = max(0, int(width) // 2 - win_w // 2)
-        sample = np.asarray(data[y0:y0 + win_h, x0:x0 + win_w])
-        sample = sample[np.isfinite(sample)]
-        if sample.size == 0:
-            return None, None
-        vmin = float(np.percentile(sample, DYNAMIC_RANGE_PERCENTILES["q_min"]))
-        vmax = float(np.percentile(sample, DYNAMIC_RANGE_PERCENTILES["q_max"]))
-        if np.isfinite(vmin) and np.isfinite(vmax) and vmin < vmax:
-            return vmin, vmax
-        vmin = float(np.min(sample))
-        vmax = float(np.max(sample))
-        if np.isfinite(vmin) and np.isfinite(vmax):
-            if vmin == vmax:
-                return vmin - 0.5, vmax + 0.5
-            if vmin < vmax:
-                return vmin, vmax
+        naxis = int(header.get("NAXIS", 0) or 0)
+        if naxis <= 0:
+            return None
+        dims = []
+        for axis in range(naxis, 0, -1):
+            value = int(header.get(f"NAXIS{axis}", 0) or 0)
+            if value <= 0:
+                return None
+            dims.append(value)
+        return tuple(dims)
     except Exception:
-        pass
-    return None, None
+        return None
 
 
-def _fast_tile_info_from_header(fits_file: str, hdu_index: int, session_data: dict | None = None) -> dict:
-    with fits.open(fits_file, memmap=True, lazy_load_hdus=True, do_not_scale_image_data=True) as hdul:
-        if not (0 <= hdu_index < len(hdul)):
-            raise HTTPException(status_code=400, detail=f"Invalid HDU index: {hdu_index}. File has {len(hdul)} HDUs.")
-        header = hdul[hdu_index].header
-        width, height = _header_shape_2d(header)
-        if width <= 0 or height <= 0:
-            raise HTTPException(status_code=400, detail="Selected HDU does not expose 2D image dimensions in its header.")
+@dataclass
+class FitsHduMetadata:
+    index: int
+    name: str
+    kind: str  # "Primary" | "Image" | "Table"
+    header: fits.Header  # shared between requests: copy before mutating
+    data_offset: int = -1  # byte offset of the data unit, -1 when unknown (e.g. tile-compressed)
+    data_size: int = 0
+    compressed: bool = False
+    _has_celestial_wcs: Optional[bool] = field(default=None, repr=False)
+    _cards: Optional[list] = field(default=None, repr=False)
+    _wcs_bundle: Optional["WcsBundle"] = field(default=None, repr=False)
+    _wcs_lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+    _wcs_approx_future: Optional[Future] = field(default=None, repr=False)
+
+    @property
+    def is_table(self) -> bool:
+        return self.kind == "Table"
+
+    @property
+    def shape(self) -> tuple | None:
+        if self.is_table:
+            return None
+        return _fits_image_shape_from_header(self.header)
 
-        tile_size = IMAGE_TILE_SIZE_PX
-        max_level = max(0, int(np.ceil(np.log2(max(width, height) / tile_size))))
-        info = {
-            "width": width,
-            "height": height,
-            "tileSize": tile_size,
-            "maxLevel": max_level,
-            "minLevel": 0,
-            "bunit": header.get("BUNIT", None),
-            "color_map": "grayscale",
-            "scaling_function": "linear",
-            "invert_colormap": False,
-        }
+    @property
+    def is_image(self) -> bool:
+        return bool(self.shape)
+
+    @property
+    def is_2d_image(self) -> bool:
+        shape = self.shape
+        return bool(shape) and len(shape) >= 2
+
+    @property
+    def width(self) -> int:
+        return int(self.header.get("NAXIS1", 0) or 0)
+
+    @property
+    def height(self) -> int:
+        return int(self.header.get("NAXIS2", 0) or 0)
+
+    @property
+    def dtype_name(self) -> str:
+        try:
+            return _FITS_BITPIX_NAMES.get(int(self.header.get("BITPIX", 0) or 0), "Unknown")
+        except Exception:
+            return "Unknown"
+
+    @property
+    def has_celestial_wcs(self) -> bool:
+        if self._has_celestial_wcs is None:
+            try:
+                with warnings.catch_warnings():
+                    warnings.simplefilter("ignore")
+                    self._has_celestial_wcs = bool(WCS(self.header).has_celestial)
+            except Exception:
+                self._has_celestial_wcs = False
+        return self._has_celestial_wcs
+
+    @property
+    def wcs_bundle(self) -> "WcsBundle":
+        """WCS products for this HDU, built once on first use (see WcsBundle)."""
+        if self._wcs_bundle is None:
+            with self._wcs_lock:
+                if self._wcs_bundle is None:
+                    self._wcs_bundle = _build_wcs_bundle(self.header)
+        return self._wcs_bundle
+
+    def wcs_approximation(self, wait: bool = False) -> Optional["WcsApproximation"]:
+        """
+        Fitted fast-path WCS for this HDU (see WcsApproximation), or None.
+
+        The first call schedules the fit in the background and returns None so hover requests
+        never wait on it; wait=True blocks until the fit is available (bulk callers).
+        """
+        bundle = self.wcs_bundle
+        with self._wcs_lock:
+            if self._wcs_approx_future is None:
+                self._wcs_approx_future = _wcs_approx_executor.submit(_build_wcs_approximation, bundle)
+            future = self._wcs_approx_future
+        if not wait and not future.done():
+            return None
+        try:
+            return future.result()
+        except Exception:
+            return None
+
+    @property
+    def cards(self) -> list:
+        """Header as the [{key, value, comment}] list served by /fits-header/."""
+        if self._cards is None:
+            self._cards = [
+                {"key": card.keyword, "value": repr(card.value), "comment": card.comment}
+                for card in self.header.cards if card.keyword
+            ]
+        return self._cards
+
+
+@dataclass
+class FitsFileMetadata:
+    path: Path
+    size: int
+    mtime_ns: int
+    hdus: list
+
+    def hdu(self, hdu_index: int) -> FitsHduMetadata:
+        hdu_index = int(hdu_index)
+        if not (0 <= hdu_index < len(self.hdus)):
+            raise HTTPException(status_code=400, detail=f"Invalid HDU index: {hdu_index}. File has {len(self.hdus)} HDUs.")
+        return self.hdus[hdu_index]
+
+    def first_image_index(self) -> int | None:
+        for meta in self.hdus:
+            if meta.is_2d_image:
+                return meta.index
+        return None
+
+    def recommended_index(self) -> int:
+        """Index of the largest 2D (or higher) image HDU, -1 if there is none."""
+        best_index, best_pixels = -1, 0
+        for meta in self.hdus:
+            if meta.is_2d_image:
+                num_pixels = int(np.prod(meta.shape))
+                if num_pixels > best_pixels:
+                    best_index, best_pixels = meta.index, num_pixels
+        return best_index
+
+    def read_raw_pixel(self, hdu_index: int, x: int, y: int, plane: int = 0):
+        """
+        Read one unscaled pixel straight from the data unit (no astropy, no memmap).
+        Returns None when the HDU layout does not allow direct access (compressed, unknown BITPIX);
+        callers then fall back to fits.open.
+        """
+        meta = self.hdu(hdu_index)
+        dtype = _FITS_BITPIX_DTYPES.get(int(meta.header.get("BITPIX", 0) or 0))
+        if meta.compressed or meta.data_offset < 0 or dtype is None or not meta.is_2d_image:
+            return None
+        dt = np.dtype(dtype)
+        width, height = meta.width, meta.height
+        n_planes = int(np.prod(meta.shape[:-2])) if len(meta.shape) > 2 else 1
+        plane = max(0, min(n_planes - 1, int(plane or 0)))
+        pos = meta.data_offset + ((plane * height + int(y)) * width + int(x)) * dt.itemsize
+        with open(self.path, "rb") as fh:
+            fh.seek(pos)
+            raw = fh.read(dt.itemsize)
+        if len(raw) != dt.itemsize:
+            return None
+        return np.frombuffer(raw, dtype=dt)[0]
+
+
+def _scan_fits_headers_raw(path: Path) -> list:
+    """Walk the HDUs of a FITS file block by block, parsing headers and skipping data units."""
+    hdus = []
+    with open(path, "rb") as fh:
+        offset = 0
+        index = 0
+        while True:
+            blocks = []
+            found_end = False
+            while not found_end:
+                block = fh.read(_FITS_BLOCK_SIZE)
+                if len(block) < _FITS_BLOCK_SIZE:
+                    break
+                blocks.append(block)
+                for pos in range(0, _FITS_BLOCK_SIZE, 80):
+                    if block[pos:pos + 8] == _FITS_END_CARD:
+                        found_end = True
+                        break
+            if not found_end:
+                break
+            header = fits.Header.fromstring(b"".join(blocks).decode("ascii", errors="replace"))
+            xtension = str(header.get("XTENSION", "") or "").strip().upper()
+            is_primary = index == 0 and not xtension
+            is_table = "TABLE" in xtension
+            compressed = is_table and bool(header.get("ZIMAGE", False))
+            data_offset = offset + len(blocks) * _FITS_BLOCK_SIZE
+            data_size = _fits_data_size_from_header(header)
+            hdus.append(FitsHduMetadata(
+                index=index,
+                name=str(header.get("EXTNAME") or ("PRIMARY" if is_primary else f"HDU {index}")),
+                kind="Primary" if is_primary else ("Table" if is_table else "Image"),
+                header=header,
+                data_offset=data_offset,
+                data_size=data_size,
+                compressed=compressed,
+            ))
+            padded = ((data_size + _FITS_BLOCK_SIZE - 1) // _FITS_BLOCK_SIZE) * _FITS_BLOCK_SIZE
+            offset = data_offset + padded
+            fh.seek(offset)
+            index += 1
+    return hdus
+
+
+def _scan_fits_headers_astropy(path: Path) -> list:
+    """Fallback for files the raw walker cannot describe (tile-compressed images, malformed headers)."""
+    hdus = []
+    with fits.open(path, memmap=True, lazy_load_hdus=True, do_not_scale_image_data=True, ignore_missing_end=True) as hdul:
+        for i, hdu in enumerate(hdul):
+            compressed = isinstance(hdu, fits.CompImageHDU)
+            try:
+                info = hdul.fileinfo(i) or {}
+            except Exception:
+                info = {}
+            header = fits.Header(hdu.header, copy=True)
+            hdus.append(FitsHduMetadata(
+                index=i,
+                name=str(hdu.name or header.get('EXTNAME', f'HDU {i}')),
+                kind="Primary" if isinstance(hdu, fits.PrimaryHDU) else ("Image" if hdu.is_image else "Table"),
+                header=header,
+                data_offset=-1 if compressed else int(info.get("datLoc", -1) or -1),
+                data_size=int(info.get("datSpan", 0) or 0),
+                compressed=compressed,
+            ))
+    return hdus
+
+
+class FitsMetadataCache:
+    """Bounded LRU of parsed FITS headers keyed by (resolved path, size, mtime)."""
+
+    def __init__(self, max_files: int = FITS_METADATA_CACHE_MAX_FILES):
+        self.max_files = max(1, int(max_files))
+        self._entries: "OrderedDict[str, FitsFileMetadata]" = OrderedDict()
+        self._lock = threading.RLock()
+        self._load_locks: dict[str, threading.Lock] = {}
+        self.hits = 0
+        self.misses = 0
 
-        settings = _get_session_display_settings(session_data or {})
-        if isinstance(settings, dict):
-            if settings.get("color_map") is not None:
-                info["color_map"] = resolve_color_map_key(settings.get("color_map")) or "grayscale"
-            if settings.get("scaling_function") is not None:
-                info["scaling_function"] = str(settings.get("scaling_function"))
-            if "invert_colormap" in settings:
-                info["invert_colormap"] = bool(settings.get("invert_colormap"))
-            if settings.get("min_value") is not None and settings.get("max_value") is not None:
+    def _lookup(self, key: str, size: int, mtime_ns: int) -> FitsFileMetadata | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.size != size or entry.mtime_ns != mtime_ns:
+            self._entries.pop(key, None)
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def get(self, path_like) -> FitsFileMetadata:
+        path = Path(path_like).resolve()
+        st = path.stat()
+        key = str(path)
+        with self._lock:
+            entry = self._lookup(key, st.st_size, st.st_mtime_ns)
+            if entry is not None:
+                self.hits += 1
+                return entry
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+        # Single-flight: concurrent requests for the same file wait for one parse.
+        with load_lock:
+            with self._lock:
+                entry = self._lookup(key, st.st_size, st.st_mtime_ns)
+                if entry is not None:
+                    self.hits += 1
+                    return entry
+                self.misses += 1
+            try:
                 try:
-                    info["initial_display_min"] = float(settings.get("min_value"))
-                    info["initial_display_max"] = float(settings.get("max_value"))
+                    hdus = _scan_fits_headers_raw(path)
+                    if not hdus or any(meta.compressed for meta in hdus):
+                        hdus = _scan_fits_headers_astropy(path)
                 except Exception:
-                    pass
+                    hdus = _scan_fits_headers_astropy(path)
+            except BaseException:
+                with self._lock:
+                    self._load_locks.pop(key, None)
+                raise
+            entry = FitsFileMetadata(path=path, size=st.st_size, mtime_ns=st.st_mtime_ns, hdus=hdus)
+            with self._lock:
+                self._entries[key] = entry
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_files:
+                    self._entries.popitem(last=False)
+                self._load_locks.pop(key, None)
+            return entry
+
+    def invalidate(self, path_like=None) -> None:
+        with self._lock:
+            if path_like is None:
+                self._entries.clear()
+                return
+            try:
+                key = str(Path(path_like).resolve())
+            except Exception:
+                key = str(path_like)
+            self._entries.pop(key, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"files": len(self._entries), "max_files": self.max_files, "hits": self.hits, "misses": self.misses}
 
-        if "initial_display_min" not in info or "initial_display_max" not in info:
-            datamin, datamax = _header_initial_display_range(header)
-            if datamin is not None and datamax is not None:
-                info["initial_display_min"] = datamin
-                info["initial_display_max"] = datamax
-            else:
-                sample_min, sample_max = _sample_display_range_from_hdu(hdul[hdu_index], width, height)
-                if sample_min is not None and sample_max is not None:
-                    info["initial_display_min"] = sample_min
-                    info["initial_display_max"] = sample_max
 
+fits_metadata_cache = FitsMetadataCache()
+
+
+@dataclass(frozen=True)
+class WcsBundle:
+    """
+    Coordinate state of one image HDU, shared by all coordinate endpoints.
+
+    Lives on the cached FitsHduMetadata, so it is built once per (file, HDU) and dropped
+    together with the header entry when the file changes on disk.
+    """
+    wcs: Optional[WCS]  # celestial 2D WCS (None when the header has no celestial axes)
+    flip_y: bool
+    determinant: float
+    width: int
+    height: int
+    arcsec_per_pixel: Optional[float] = None
+    arcsec_per_pixel_xy: Optional[tuple] = None
+    north_angle_deg: Optional[float] = None  # angle of celestial north from +y towards +x, in pixel space
+
+    @property
+    def has_celestial(self) -> bool:
+        return self.wcs is not None
+
+    def to_display_y(self, y_fits, origin: str = "top"):
+        """Map array-space y (origin=0) to the displayed frame: flip when required, then apply origin."""
+        y = (self.height - 1.0) - y_fits if self.flip_y else y_fits
+        return (self.height - 1.0) - y if str(origin).lower().startswith("bottom") else y
+
+    def from_display_y(self, y_display, origin: str = "top"):
+        """Inverse of to_display_y."""
+        y = (self.height - 1.0) - y_display if str(origin).lower().startswith("bottom") else y_display
+        return (self.height - 1.0) - y if self.flip_y else y
+
+
+def _build_wcs_bundle(header) -> WcsBundle:
+    flip_y, determinant = _wcs_orientation_from_header_quiet(header)
+    width, height = _header_shape_2d(header)
+    celestial = None
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            w_full = WCS(_prepare_jwst_header_for_wcs(header))
+            if getattr(w_full, "has_celestial", False):
+                celestial = w_full.celestial if int(getattr(w_full, "naxis", 2)) > 2 else w_full
+                # Finalize wcsprm now: later transforms from concurrent requests are then read-only.
+                celestial.wcs.set()
+    except Exception as e:
+        logger.warning(f"[wcs] Could not build WCS from header: {e}")
+        celestial = None
+
+    arcsec_per_pixel = arcsec_xy = north_angle = None
+    if celestial is not None:
         try:
-            flip_y, _, _ = analyze_wcs_orientation(header, None)
-            info["flip_y"] = bool(flip_y)
+            arcsec_per_pixel = float(_compute_arcsec_per_pixel(celestial))
+            arcsec_xy = tuple(float(v) for v in _compute_arcsec_per_pixel_xy(celestial))
         except Exception:
-            info["flip_y"] = False
+            arcsec_per_pixel = arcsec_xy = None
+        try:
+            cx = (width - 1) / 2.0 if width > 0 else float(celestial.wcs.crpix[0] - 1)
+            cy = (height - 1) / 2.0 if height > 0 else float(celestial.wcs.crpix[1] - 1)
+            ra0, dec0 = celestial.all_pix2world([[cx, cy]], 0)[0]
+            step = (arcsec_per_pixel or 1.0) / 3600.0
+            dec1 = dec0 + step if dec0 + step <= 90.0 else dec0 - step
+            x1, y1 = celestial.all_world2pix([[ra0, dec1]], 0)[0]
+            sign = 1.0 if dec1 > dec0 else -1.0
+            angle = float(np.degrees(np.arctan2(sign * (x1 - cx), sign * (y1 - cy))))
+            north_angle = angle if np.isfinite(angle) else None
+        except Exception:
+            north_angle = None
+
+    return WcsBundle(
+        wcs=celestial,
+        flip_y=bool(flip_y),
+        determinant=float(determinant),
+        width=int(width),
+        height=int(height),
+        arcsec_per_pixel=arcsec_per_pixel,
+        arcsec_per_pixel_xy=arcsec_xy,
+        north_angle_deg=north_angle,
+    )
+
+
+def get_wcs_bundle(path_like, hdu_index: int) -> WcsBundle:
+    """Cached WCS bundle for (file, HDU); rebuilt automatically when the file changes."""
+    return fits_metadata_cache.get(path_like).hdu(hdu_index).wcs_bundle
+
+
+def _catalog_projection_wcs(image_wcs, bundle: Optional[WcsBundle] = None) -> tuple:
+    """
+    (celestial WCS, arcsec per pixel or None) for projecting a catalog onto an image. The bundle's
+    cached celestial WCS and scale are used as they are; any other WCS (an RGB base) is reduced
+    to its celestial axes and measured here.
+    """
+    if bundle is not None and (image_wcs is None or image_wcs is bundle.wcs):
+        image_wcs, arcsec_per_pixel = bundle.wcs, bundle.arcsec_per_pixel
+    else:
+        arcsec_per_pixel = None
+        try:
+            if image_wcs is not None and int(getattr(image_wcs, "naxis", 2)) > 2:
+                image_wcs = image_wcs.celestial if hasattr(image_wcs, 'celestial') else image_wcs.sub(['celestial'])
+        except Exception:
+            pass
+        try:
+            if image_wcs is not None and getattr(image_wcs, "has_celestial", False):
+                arcsec_per_pixel = float(_compute_arcsec_per_pixel(image_wcs))
+        except Exception:
+            arcsec_per_pixel = None
+    if arcsec_per_pixel is not None and not (np.isfinite(arcsec_per_pixel) and arcsec_per_pixel > 0):
+        arcsec_per_pixel = None
+    return image_wcs, arcsec_per_pixel
+
+
+# --- Fitted WCS approximation (fast path for hover probes, RGB alignment and bulk projection) ---
+WCS_APPROX_ENABLED = os.getenv('WCS_APPROX_ENABLED', '1').lower() not in ('0', 'false', 'no')
+WCS_APPROX_PATCH_SIZE = int(os.getenv('WCS_APPROX_PATCH_SIZE', '256'))
+WCS_APPROX_TOLERANCE_PX = float(os.getenv('WCS_APPROX_TOLERANCE_PX', '0.01'))
+WCS_APPROX_MAX_PATCHES = int(os.getenv('WCS_APPROX_MAX_PATCHES', '40000'))
+WCS_APPROX_MIN_POINTS = int(os.getenv('WCS_APPROX_MIN_POINTS', '256'))  # below this the exact call is cheaper
+WCS_APPROX_MIN_COVERAGE = float(os.getenv('WCS_APPROX_MIN_COVERAGE', '0.9'))  # share of image patches the fit must pass
+WCS_APPROX_WAIT_MIN_POINTS = int(os.getenv('WCS_APPROX_WAIT_MIN_POINTS', '200000'))  # bulk requests worth waiting for the fit
+_WCS_APPROX_FIT_SAMPLES = 7    # per patch axis, used for the least-squares fit
+_WCS_APPROX_CHECK_SAMPLES = 10  # per patch axis, held-out grid used to measure the error
+_wcs_approx_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="wcs-approx")
+
+
+def _poly3_terms(s, t):
+    """Full cubic basis in (s, t); the inputs are patch-normalized to [-1, 1]."""
+    s2 = s * s
+    t2 = t * t
+    return np.stack([np.ones_like(s), s, t, s2, s * t, t2, s2 * s, s2 * t, s * t2, t2 * t], axis=-1)
+
+
+def _poly3_eval(g, s, t):
+    """Evaluate _poly3_terms(s, t) @ g in Horner form; g is (10, ...) and broadcasts against s, t."""
+    return (g[0] + s * (g[1] + s * (g[3] + s * g[6] + t * g[7]) + t * g[4])
+            + t * (g[2] + t * (g[5] + t * g[9] + s * g[8])))
+
+
+def _wrap_ra_delta(d):
+    return (np.asarray(d, dtype=float) + 180.0) % 360.0 - 180.0
+
+
+def _wcs_distortion_kinds(wcs: WCS) -> tuple:
+    """(has any distortion, has lookup-table distortion): SIP, TPV/TNX/ZPX/TPD polynomials, or table corrections."""
+    tables = any(getattr(wcs, name, None) is not None for name in ("cpdis1", "cpdis2", "det2im1", "det2im2"))
+    ctypes = [str(c).upper() for c in getattr(wcs.wcs, "ctype", [])]
+    try:
+        # wcslib keeps TPV as a distortion sequence and reports the base projection in ctype;
+        # the written header names it again.
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            header = wcs.to_header(relax=True)
+        ctypes += [str(header.get(f"CTYPE{i}", "")).upper() for i in (1, 2)]
+    except Exception:
+        pass
+    polynomial = getattr(wcs, "sip", None) is not None or any(c.endswith(("-TPV", "-TNX", "-ZPX", "-TPD")) for c in ctypes)
+    return polynomial or tables, tables
+
+
+class WcsApproximation:
+    """
+    Piecewise fit of an image WCS, for callers that convert many points per request.
+
+    The pixel grid (plus one patch of margin around the image) is cut into square patches.
+    Each patch stores a cubic from patch-normalized pixels to (RA offset, Dec offset) about
+    the patch centre, and one back, both fitted to exact WCS samples. Every patch is then
+    checked on a held-out grid; patches whose error exceeds the tolerance (near the poles,
+    badly behaved distortion, non-finite samples) are answered by the exact WCS, as are
+    points off the grid.
+    """
+
+    def __init__(self, wcs: WCS, width: int, height: int,
+                 patch_size: int = WCS_APPROX_PATCH_SIZE, tolerance_px: float = WCS_APPROX_TOLERANCE_PX):
+        started = time.perf_counter()
+        self.wcs = wcs
+        self.width = int(width)
+        self.height = int(height)
+        self.tolerance_px = float(tolerance_px)
+        patch = max(32, int(patch_size))
+        while True:
+            nx = int(np.ceil(self.width / patch)) + 2
+            ny = int(np.ceil(self.height / patch)) + 2
+            if nx * ny <= WCS_APPROX_MAX_PATCHES:
+                break
+            patch *= 2
+        self.patch = patch
+        self.half = patch / 2.0
+        self.x0 = -float(patch)
+        self.y0 = -float(patch)
+        self.nx, self.ny = nx, ny
+        n = nx * ny
+
+        jj, ii = np.divmod(np.arange(n), nx)
+        cx = self.x0 + (ii + 0.5) * patch
+        cy = self.y0 + (jj + 0.5) * patch
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            ra0, dec0 = wcs.all_pix2world(cx, cy, 0)
+        self.center_ra = np.asarray(ra0, dtype=float)
+        self.center_dec = np.asarray(dec0, dtype=float)
+
+        def _sample(k):
+            g = np.linspace(-1.0, 1.0, k)
+            gs, gt = np.meshgrid(g, g)
+            s, t = gs.ravel(), gt.ravel()
+            px = cx[:, None] + s[None, :] * self.half
+            py = cy[:, None] + t[None, :] * self.half
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore")
+                ra, dec = wcs.all_pix2world(px.ravel(), py.ravel(), 0)
+            dra = _wrap_ra_delta(np.asarray(ra).reshape(n, -1) - self.center_ra[:, None])
+            ddec = np.asarray(dec).reshape(n, -1) - self.center_dec[:, None]
+            return s, t, dra, ddec
+
+        # Forward (pixel -> sky offset): the design matrix is shared by every patch.
+        s, t, dra, ddec = _sample(_WCS_APPROX_FIT_SAMPLES)
+        finite = np.all(np.isfinite(dra) & np.isfinite(ddec), axis=1)
+        dra = np.where(finite[:, None], dra, 0.0)
+        ddec = np.where(finite[:, None], ddec, 0.0)
+        pinv = np.linalg.pinv(_poly3_terms(s, t))  # (10, m)
+        self.fwd_ra = pinv @ dra.T  # (10, n)
+        self.fwd_dec = pinv @ ddec.T
+
+        # Inverse (sky offset -> pixel): inputs differ per patch, so solve the normal equations in batch.
+        self.scale_ra = np.maximum(np.max(np.abs(dra), axis=1), 1e-12)
+        self.scale_dec = np.maximum(np.max(np.abs(ddec), axis=1), 1e-12)
+        terms = _poly3_terms(dra / self.scale_ra[:, None], ddec / self.scale_dec[:, None])  # (n, m, 10)
+        ata = np.einsum("nmi,nmj->nij", terms, terms) + np.eye(terms.shape[-1]) * 1e-12
+        st = np.stack([np.broadcast_to(s, dra.shape), np.broadcast_to(t, dra.shape)], axis=-1)
+        atb = np.einsum("nmi,nmc->nic", terms, st)
+        try:
+            inv = np.linalg.solve(ata, atb)  # (n, 10, 2)
+        except np.linalg.LinAlgError:
+            inv = np.stack([np.linalg.lstsq(a, b, rcond=None)[0] for a, b in zip(ata, atb)])
+        self.inv_s = np.ascontiguousarray(inv[..., 0].T)  # (10, n)
+        self.inv_t = np.ascontiguousarray(inv[..., 1].T)
+
+        # Held-out check in both directions, in pixels.
+        s, t, dra_e, ddec_e = _sample(_WCS_APPROX_CHECK_SAMPLES)
+        cos_dec = np.cos(np.radians(self.center_dec))
+        jac = (self.fwd_ra[1] * self.fwd_dec[2] - self.fwd_ra[2] * self.fwd_dec[1]) * cos_dec
+        deg_per_px = np.sqrt(np.abs(jac)) / self.half
+        with np.errstate(divide="ignore", invalid="ignore"):
+            fwd_err = np.hypot((_poly3_eval(self.fwd_ra[:, :, None], s, t) - dra_e) * cos_dec[:, None],
+                               _poly3_eval(self.fwd_dec[:, :, None], s, t) - ddec_e) / deg_per_px[:, None]
+            u = dra_e / self.scale_ra[:, None]
+            v = ddec_e / self.scale_dec[:, None]
+            inv_err = np.hypot(_poly3_eval(self.inv_s[:, :, None], u, v) - s,
+                               _poly3_eval(self.inv_t[:, :, None], u, v) - t) * self.half
+        err = np.maximum(np.max(fwd_err, axis=1), np.max(inv_err, axis=1))
+        err = np.where(finite & np.isfinite(err), err, np.inf)
+        self.patch_error_px = err
+        self.ok = err <= self.tolerance_px
+
+        # Coarse locator for world -> pixel: one cubic over the whole grid, used only to pick a patch.
+        self.locator = None
+        good = np.flatnonzero(self.ok)
+        if good.size:
+            ref = good[np.argmin(np.hypot(cx[good] - self.width / 2.0, cy[good] - self.height / 2.0))]
+            self.ref_ra = float(self.center_ra[ref])
+            self.ref_dec = float(self.center_dec[ref])
+            lu = _wrap_ra_delta(dra_e[good] + self.center_ra[good, None] - self.ref_ra).ravel()
+            lv = (ddec_e[good] + self.center_dec[good, None] - self.ref_dec).ravel()
+            px = (cx[good, None] + s[None, :] * self.half).ravel()
+            py = (cy[good, None] + t[None, :] * self.half).ravel()
+            stride = max(1, lu.size // 20000)
+            lu, lv, px, py = lu[::stride], lv[::stride], px[::stride], py[::stride]
+            self.locator_scale = (max(float(np.max(np.abs(lu))), 1e-12), max(float(np.max(np.abs(lv))), 1e-12))
+            lterms = _poly3_terms(lu / self.locator_scale[0], lv / self.locator_scale[1])
+            self.locator = np.linalg.lstsq(lterms, np.stack([px, py], axis=-1), rcond=None)[0]  # (10, 2)
+
+        # The fitted path is used only where the held-out check passed on most of the image, and only
+        # in directions where the exact transform is costly for this header: sky -> pixel iterates
+        # whenever the header has distortion, pixel -> sky only interpolates lookup tables. Plain
+        # TAN and polynomial pixel -> sky stay on wcslib, which is already cheaper than the fit.
+        # (Requests below WCS_APPROX_MIN_POINTS always use the exact WCS, see pix2world/world2pix.)
+        inner = self.ok.reshape(ny, nx)[1:-1, 1:-1]
+        self.coverage = float(np.count_nonzero(inner)) / max(1, inner.size)
+        distorted, tables = _wcs_distortion_kinds(wcs)
+        accurate = self.locator is not None and self.coverage >= WCS_APPROX_MIN_COVERAGE
+        self.use_world2pix = bool(accurate and distorted)
+        self.use_pix2world = bool(accurate and tables)
+
+        self.build_seconds = time.perf_counter() - started
+        self.max_error_px = float(np.max(err[self.ok])) if np.any(self.ok) else None
+        logger.info(
+            f"[wcs-approx] {self.width}x{self.height}: {int(np.count_nonzero(self.ok))}/{n} patches of "
+            f"{self.patch}px within {self.tolerance_px}px (max {self.max_error_px}, coverage {self.coverage:.3f}), "
+            f"fast pix2world={self.use_pix2world} world2pix={self.use_world2pix}, built in {self.build_seconds:.3f}s"
+        )
+
+    def summary(self) -> dict:
+        return {
+            "patch_size": self.patch,
+            "patches": int(self.ok.size),
+            "fitted_patches": int(np.count_nonzero(self.ok)),
+            "tolerance_px": self.tolerance_px,
+            "max_error_px": self.max_error_px,
+            "coverage": round(self.coverage, 4),
+            "fast_pix2world": self.use_pix2world,
+            "fast_world2pix": self.use_world2pix,
+            "build_seconds": round(self.build_seconds, 4),
+        }
+
+    def _patch_index(self, x, y):
+        with np.errstate(invalid="ignore"):
+            i = np.floor((x - self.x0) / self.patch)
+            j = np.floor((y - self.y0) / self.patch)
+            inside = (i >= 0) & (i < self.nx) & (j >= 0) & (j < self.ny)
+        idx = np.where(inside, j * self.nx + i, 0).astype(np.int64)
+        return idx, inside & self.ok[idx]
+
+    def _patch_center(self, idx):
+        j, i = np.divmod(idx, self.nx)
+        return self.x0 + (i + 0.5) * self.patch, self.y0 + (j + 0.5) * self.patch
+
+    def pix2world(self, x, y):
+        """Vectorized pixel (origin 0) -> (ra, dec) in degrees; same conventions as wcs.all_pix2world."""
+        x = np.atleast_1d(np.asarray(x, dtype=float))
+        y = np.atleast_1d(np.asarray(y, dtype=float))
+        if not self.use_pix2world or x.size < WCS_APPROX_MIN_POINTS:
+            ra, dec = self.wcs.all_pix2world(x, y, 0)
+            return np.asarray(ra, dtype=float), np.asarray(dec, dtype=float)
+        return self._approx_pix2world(x, y)
+
+    def world2pix(self, ra, dec):
+        """Vectorized (ra, dec) in degrees -> pixel (origin 0); same conventions as wcs.all_world2pix."""
+        ra = np.atleast_1d(np.asarray(ra, dtype=float))
+        dec = np.atleast_1d(np.asarray(dec, dtype=float))
+        if not self.use_world2pix or ra.size < WCS_APPROX_MIN_POINTS:
+            x, y = self.wcs.all_world2pix(ra, dec, 0, quiet=True)
+            return np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+        return self._approx_world2pix(ra, dec)
+
+    def _approx_pix2world(self, x, y):
+        idx, fast = self._patch_index(x, y)
+        if np.all(fast):
+            ra, dec = self._fast_pix2world(x, y, idx)
+        else:
+            ra = np.full(x.shape, np.nan)
+            dec = np.full(x.shape, np.nan)
+            if np.any(fast):
+                ra[fast], dec[fast] = self._fast_pix2world(x[fast], y[fast], idx[fast])
+            slow = ~fast & np.isfinite(x) & np.isfinite(y)
+            if np.any(slow):
+                ra[slow], dec[slow] = self.wcs.all_pix2world(x[slow], y[slow], 0)
+        return ra, dec
+
+    def _fast_pix2world(self, x, y, idx):
+        cx, cy = self._patch_center(idx)
+        s = (x - cx) / self.half
+        t = (y - cy) / self.half
+        ra = (self.center_ra[idx] + _poly3_eval(self.fwd_ra[:, idx], s, t)) % 360.0
+        dec = self.center_dec[idx] + _poly3_eval(self.fwd_dec[:, idx], s, t)
+        return ra, dec
+
+    def _local_inverse(self, ra, dec, idx):
+        u = _wrap_ra_delta(ra - self.center_ra[idx]) / self.scale_ra[idx]
+        v = (dec - self.center_dec[idx]) / self.scale_dec[idx]
+        cx, cy = self._patch_center(idx)
+        return (cx + _poly3_eval(self.inv_s[:, idx], u, v) * self.half,
+                cy + _poly3_eval(self.inv_t[:, idx], u, v) * self.half)
+
+    def _approx_world2pix(self, ra, dec):
+        x = np.full(ra.shape, np.nan)
+        y = np.full(ra.shape, np.nan)
+        done = np.zeros(ra.shape, dtype=bool)
+        if self.locator is not None:
+            lu = _wrap_ra_delta(ra - self.ref_ra) / self.locator_scale[0]
+            lv = (dec - self.ref_dec) / self.locator_scale[1]
+            idx, fast = self._patch_index(_poly3_eval(self.locator[:, 0], lu, lv),
+                                          _poly3_eval(self.locator[:, 1], lu, lv))
+            # Two passes: the coarse locator can land one patch off near patch borders; the local
+            # inverse then names the right patch. Only results inside the patch that produced them count.
+            sel = np.flatnonzero(fast)
+            p = idx[sel]
+            for _ in range(2):
+                if sel.size == 0:
+                    break
+                lx, ly = self._local_inverse(ra[sel], dec[sel], p)
+                new_idx, new_fast = self._patch_index(lx, ly)
+                settled = new_fast & (new_idx == p)
+                hit = sel[settled]
+                x[hit] = lx[settled]
+                y[hit] = ly[settled]
+                done[hit] = True
+                retry = new_fast & ~settled
+                sel = sel[retry]
+                p = new_idx[retry]
+        slow = ~done & np.isfinite(ra) & np.isfinite(dec)
+        if np.any(slow):
+            x[slow], y[slow] = self.wcs.all_world2pix(ra[slow], dec[slow], 0, quiet=True)
+        return x, y
+
+
+def _build_wcs_approximation(bundle: "WcsBundle") -> Optional[WcsApproximation]:
+    if not WCS_APPROX_ENABLED or bundle.wcs is None or bundle.width <= 0 or bundle.height <= 0:
+        return None
+    try:
+        return WcsApproximation(bundle.wcs, bundle.width, bundle.height)
+    except Exception as e:
+        logger.warning(f"[wcs-approx] Fit failed, using exact WCS: {e}")
+        return None
 
-        return info
+
+def get_wcs_approximation(path_like, hdu_index: int, wait: bool = False) -> Optional[WcsApproximation]:
+    """Fitted fast-path WCS for (file, HDU), or None while it is still being built / unavailable."""
+    return fits_metadata_cache.get(path_like).hdu(hdu_index).wcs_approximation(wait=wait)
+
+
+def _generator_wcs_approximation(gen, wait: bool = False) -> Optional[WcsApproximation]:
+    """Approximation matching a tile generator's WCS, or None (caller then uses gen.wcs)."""
+    try:
+        path = getattr(gen, "fits_file_path", None)
+        if not path:
+            return None
+        approx = get_wcs_approximation(path, int(getattr(gen, "hdu_index", 0) or 0), wait=wait)
+        if approx is None or approx.width != int(gen.width) or approx.height != int(gen.height):
+            return None
+        return approx
+    except Exception:
+        return None
+
+
+def _header_shape_2d(header) -> tuple[int, int]:
+    width = int(header.get("NAXIS1", 0) or 0)
+    height = int(header.get("NAXIS2", 0) or 0)
+    return width, height
+
+
+def _header_initial_display_range(header) -> tuple[float | None, float | None]:
+    try:
+        datamin = header.get("DATAMIN", None)
+        datamax = header.get("DATAMAX", None)
+        if datamin is None or datamax is None:
+            return None, None
+        datamin = float(datamin)
+        datamax = float(datamax)
+        if np.isfinite(datamin) and np.isfinite(datamax) and datamin < datamax:
+            return datamin, datamax
+    except Exception:
+        pass
+    return None, None
+
+
+def _sample_display_range_from_hdu(hdu, width: int, height: int) -> tuple[float | None, float | None]:
+    try:
+        data = hdu.data
+        if data is None:
+            return None, None
+        if getattr(data, "ndim", 0) > 2:
+            if data.ndim == 3:
+                data = data[0, :, :]
+            elif data.ndim == 4:
+                data = data[0, 0, :, :]
+            else:
+                data = data.reshape((-1, height, width))[0]
+
+        win_size = int(os.getenv("COLAB_DRIVE_RANGE_SAMPLE_SIZE", "512"))
+        win_h = max(1, min(int(height), win_size))
+        win_w = max(1, min(int(width), win_size))
+        y0 = max(0, int(height) // 2 - win_h // 2)
+        x0 = max(0, int(width) // 2 - win_w // 2)
+        sample = np.asarray(data[y0:y0 + win_h, x0:x0 + win_w])
+        sample = sample[np.isfinite(sample)]
+        if sample.size == 0:
+            return None, None
+        vmin = float(np.percentile(sample, DYNAMIC_RANGE_PERCENTILES["q_min"]))
+        vmax = float(np.percentile(sample, DYNAMIC_RANGE_PERCENTILES["q_max"]))
+        if np.isfinite(vmin) and np.isfinite(vmax) and vmin < vmax:
+            return vmin, vmax
+        vmin = float(np.min(sample))
+        vmax = float(np.max(sample))
+        if np.isfinite(vmin) and np.isfinite(vmax):
+            if vmin == vmax:
+                return vmin - 0.5, vmax + 0.5
+            if vmin < vmax:
+                return vmin, vmax
+    except Exception:
+        pass
+    return None, None
+
+
+def _fast_tile_info_from_header(fits_file: str, hdu_index: int, session_data: dict | None = None) -> dict:
+    header = fits_metadata_cache.get(fits_file).hdu(hdu_index).header
+    width, height = _header_shape_2d(header)
+    if width <= 0 or height <= 0:
+        raise HTTPException(status_code=400, detail="Selected HDU does not expose 2D image dimensions in its header.")
+
+    tile_size = IMAGE_TILE_SIZE_PX
+    max_level = max(0, int(np.ceil(np.log2(max(width, height) / tile_size))))
+    info = {
+        "width": width,
+        "height": height,
+        "tileSize": tile_size,
+        "maxLevel": max_level,
+        "minLevel": 0,
+        "bunit": header.get("BUNIT", None),
+        "color_map": "grayscale",
+        "scaling_function": "linear",
+        "invert_colormap": False,
+    }
+
+    settings = _get_session_display_settings(session_data or {})
+    if isinstance(settings, dict):
+        if settings.get("color_map") is not None:
+            info["color_map"] = resolve_color_map_key(settings.get("color_map")) or "grayscale"
+        if settings.get("scaling_function") is not None:
+            info["scaling_function"] = str(settings.get("scaling_function"))
+        if "invert_colormap" in settings:
+            info["invert_colormap"] = bool(settings.get("invert_colormap"))
+        if settings.get("min_value") is not None and settings.get("max_value") is not None:
+            try:
+                info["initial_display_min"] = float(settings.get("min_value"))
+                info["initial_display_max"] = float(settings.get("max_value"))
+            except Exception:
+                pass
+
+    if "initial_display_min" not in info or "initial_display_max" not in info:
+        datamin, datamax = _header_initial_display_range(header)
+        if datamin is not None and datamax is not None:
+            info["initial_display_min"] = datamin
+            info["initial_display_max"] = datamax
+        else:
+            with fits.open(fits_file, memmap=True, lazy_load_hdus=True, do_not_scale_image_data=True) as hdul:
+                sample_min, sample_max = _sample_display_range_from_hdu(hdul[hdu_index], width, height)
+            if sample_min is not None and sample_max is not None:
+                info["initial_display_min"] = sample_min
+                info["initial_display_max"] = sample_max
+
+    try:
+        flip_y, _, _ = analyze_wcs_orientation(header, None)
+        info["flip_y"] = bool(flip_y)
+    except Exception:
+        info["flip_y"] = False
+
+    return info
 
 
 @app.post("/request-tiles/")
@@ -8200,7 +9386,7 @@ async def get_fits_tile_information(request: Request):
         try:
             # Initialize generator using the shared executor
             loop = asyncio.get_running_loop()
-            tile_generator = await loop.run_in_executor(app.state.thread_executor, SimpleTileGenerator, fits_file, hdu_index)
+            tile_generator = await loop.run_in_executor(app.state.thread_executor, _new_tile_generator, fits_file, hdu_index)
             # IMPORTANT: apply session display settings so zoomed-in tiles match the current min/max/colormap.
             try:
                 _apply_display_settings_to_generator(tile_generator, _get_session_display_settings(session_data))
@@ -8273,11 +9459,11 @@ async def get_fits_tile(level: int, x: int, y: int, request: Request):
             async with gen_lock:
                 tile_generator = session_generators.get(file_id)
                 if not tile_generator:
-                    if not Path(fits_file).exists():
+                    if not _is_virtual_image_key(fits_file) and not Path(fits_file).exists():
                         return JSONResponse(status_code=404, content={"error": f"FITS file path not found: {fits_file}"})
                     # Initialize generator and dynamic range using shared executor
                     loop = asyncio.get_running_loop()
-                    tile_generator = await loop.run_in_executor(app.state.thread_executor, SimpleTileGenerator, fits_file, hdu_index)
+                    tile_generator = await loop.run_in_executor(app.state.thread_executor, _new_tile_generator, fits_file, hdu_index)
                     await loop.run_in_executor(app.state.thread_executor, tile_generator.ensure_dynamic_range_calculated)
                     # IMPORTANT: apply session display settings so zoomed-in tiles match the current min/max/colormap.
                     try:
@@ -8332,28 +9518,16 @@ def _resolve_browser_fits_path(filepath: str) -> Path:
 
 
 def _pick_first_image_hdu(path: Path, requested_hdu=None) -> int:
-    with fits.open(str(path), ignore_missing_end=True, memmap=True, lazy_load_hdus=True, do_not_scale_image_data=True) as hdul:
-        def _is_image_header(hdu) -> bool:
-            try:
-                header = hdu.header
-                naxis = int(header.get("NAXIS", 0) or 0)
-                width = int(header.get("NAXIS1", 0) or 0)
-                height = int(header.get("NAXIS2", 0) or 0)
-                return naxis >= 2 and width > 0 and height > 0
-            except Exception:
-                return False
-
-        if requested_hdu is not None:
-            hdu_index = int(requested_hdu)
-            if hdu_index < 0 or hdu_index >= len(hdul):
-                raise HTTPException(status_code=400, detail=f"Invalid HDU index: {hdu_index}. File has {len(hdul)} HDUs.")
-            if not _is_image_header(hdul[hdu_index]):
-                raise HTTPException(status_code=400, detail=f"HDU {hdu_index} is not an image HDU.")
-            return hdu_index
-        for idx, hdu in enumerate(hdul):
-            if _is_image_header(hdu):
-                return idx
-    raise HTTPException(status_code=400, detail="No image HDU found in FITS file.")
+    metadata = fits_metadata_cache.get(path)
+    if requested_hdu is not None:
+        meta = metadata.hdu(requested_hdu)
+        if not meta.is_2d_image:
+            raise HTTPException(status_code=400, detail=f"HDU {meta.index} is not an image HDU.")
+        return meta.index
+    hdu_index = metadata.first_image_index()
+    if hdu_index is None:
+        raise HTTPException(status_code=400, detail="No image HDU found in FITS file.")
+    return hdu_index
 
 
 def _get_rgb_generator(session_data: dict, create: bool = False) -> RGBTileGenerator | None:
@@ -8748,9 +9922,11 @@ def table_to_serializable(table: Table) -> list:
         sources_list.append(source_dict)
     return sources_list
 @app.get("/cone-search/")
-async def cone_search(ra: float, dec: float, radius: float, catalog_name: str):
+async def cone_search(ra: float, dec: float, radius: float, catalog_name: str, k: Optional[int] = None):
     """
     Performs a cone search in a given catalog.
+
+    radius is in arcsec. With k, only the k nearest sources within the radius are returned.
     """
     catalogs_dir = Path(CATALOGS_DIRECTORY)  # Updated
     
@@ -8767,89 +9943,492 @@ async def cone_search(ra: float, dec: float, radius: float, catalog_name: str):
     if not ra_col_name or not dec_col_name:
         raise HTTPException(status_code=500, detail="Could not detect RA/Dec columns in catalog")
 
-    # Ensure RA and Dec columns are float type for SkyCoord
-    try:
-        # Handle cases where columns might be bytes
-        if catalog_table[ra_col_name].dtype.kind == 'S':
-             catalog_table[ra_col_name] = np.char.decode(catalog_table[ra_col_name])
-        if catalog_table[dec_col_name].dtype.kind == 'S':
-             catalog_table[dec_col_name] = np.char.decode(catalog_table[dec_col_name])
-        
-        catalog_table[ra_col_name] = catalog_table[ra_col_name].astype(float)
-        catalog_table[dec_col_name] = catalog_table[dec_col_name].astype(float)
-    except (ValueError, TypeError) as e:
-        raise HTTPException(status_code=500, detail=f"Could not convert coordinate columns to numeric type: {e}")
-
-    # Create SkyCoord objects for the catalog and the search position
-    catalog_coords = SkyCoord(ra=catalog_table[ra_col_name], dec=catalog_table[dec_col_name], unit=(u.deg, u.deg), frame='icrs')
-    search_coord = SkyCoord(ra=ra, dec=dec, unit=(u.deg, u.deg), frame='icrs')
-
-    # Perform the cone search using separation method
-    separations = search_coord.separation(catalog_coords)
-    radius_angle = radius * u.arcsec
-    
-    # Find sources within the specified radius
-    mask = separations < radius_angle
-    idx = np.where(mask)[0]
+    # Cone and nearest queries run on the catalog's spatial index (built once per catalog version).
+    index = _catalog_spatial_index(catalog_name, catalogs_dir, catalog_table, ra_col_name, dec_col_name)
+    if index is None:
+        raise HTTPException(status_code=500, detail="Could not convert coordinate columns to numeric type.")
+    radius_deg = float(radius) / 3600.0
+    if k is not None:
+        if k <= 0:
+            raise HTTPException(status_code=400, detail="k must be a positive integer.")
+        idx, sep_deg = index.nearest(ra, dec, k, max_radius_deg=radius_deg)
+    else:
+        idx, sep_deg = index.cone(ra, dec, radius_deg)
 
     if len(idx) == 0:
         return {"sources": []}
 
-    # Create a new table with the found sources
+    # Create a new table with the found sources (already ordered by distance)
     nearby_sources_table = catalog_table[idx]
-    
-    # Add a column for the distance
-    nearby_sources_table['distance_arcsec'] = separations[mask].to(u.arcsec).value
-    
-    # Sort by distance
-    nearby_sources_table.sort('distance_arcsec')
+    nearby_sources_table['distance_arcsec'] = sep_deg * 3600.0
 
     # Convert the result to a list of dictionaries
     sources_list = table_to_serializable(nearby_sources_table)
 
     return {"sources": sources_list}
 
-@app.get("/flag-search/")
-async def flag_search(catalog_name: str, flag_column: str):
+@app.get("/region-search/")
+async def region_search(
+    catalog_name: str,
+    box: Optional[str] = Query(None, description="ra_min,ra_max,dec_min,dec_max in degrees (RA wraps when ra_min > ra_max)"),
+    polygon: Optional[str] = Query(None, description="ra1,dec1,ra2,dec2,... in degrees; edges are great circles"),
+    limit: int = Query(1000, ge=0, description="Maximum number of sources returned inline"),
+):
     """
-    Searches a catalog for entries where a given flag column is true.
+    Sources of a catalog inside a RA/Dec box or a sky polygon.
+
+    Besides the (row-ordered, limited) sources, the response carries a selection handle for
+    the full result, usable with /catalog-selection/ and the `selection` parameter of /catalog-binary/.
     """
-    catalogs_dir = Path(CATALOGS_DIRECTORY)  # Updated
-    
+    if (box is None) == (polygon is None):
+        raise HTTPException(status_code=400, detail="Give exactly one of 'box' or 'polygon'.")
+    catalogs_dir = Path(CATALOGS_DIRECTORY)
+    catalog_table = get_astropy_table_from_catalog(catalog_name, catalogs_dir)
+    if catalog_table is None:
+        raise HTTPException(status_code=404, detail=f"Could not load catalog '{catalog_name}'.")
+    ra_col_name, dec_col_name = detect_coordinate_columns(catalog_table.colnames)
+    if not ra_col_name or not dec_col_name:
+        raise HTTPException(status_code=500, detail="Could not detect RA/Dec columns in catalog")
+    index = _catalog_spatial_index(catalog_name, catalogs_dir, catalog_table, ra_col_name, dec_col_name)
+    if index is None:
+        raise HTTPException(status_code=500, detail="Could not convert coordinate columns to numeric type.")
+
     try:
-        catalog_table = get_astropy_table_from_catalog(catalog_name, catalogs_dir)
-        if catalog_table is None:
-            raise HTTPException(status_code=404, detail=f"Could not load catalog '{catalog_name}'.")
+        values = [float(v) for v in (box if box is not None else polygon).split(',') if v.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Region coordinates must be comma-separated numbers.")
+    try:
+        if box is not None:
+            if len(values) != 4:
+                raise ValueError("'box' needs ra_min,ra_max,dec_min,dec_max.")
+            rows = index.box(*values)
+            description = "box({})".format(", ".join(f"{v:g}" for v in values))
+        else:
+            if len(values) % 2:
+                raise ValueError("'polygon' needs (ra, dec) pairs.")
+            rows = index.polygon(values[0::2], values[1::2])
+            description = "polygon({})".format(", ".join(f"{v:g}" for v in values))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to read catalog: {e}")
+    rows = np.sort(rows)
+    mask = np.zeros(len(catalog_table), dtype=bool)
+    mask[rows] = True
+    selection = _register_catalog_selection(_locate_catalog_file(catalog_name, catalogs_dir), mask, description)
+    sources = table_to_serializable(catalog_table[rows[:limit]]) if limit and len(rows) else []
+    return {"sources": sources, "count": int(len(rows)), "truncated": bool(len(rows) > limit),
+            "selection": selection.describe()}
+
+# --- Catalog cross-match ---
+# Matches two catalogs within a radius as a background job. The larger catalog's spatial index is
+# queried with the smaller catalog's positions in chunks (scipy spreads each chunk over
+# CROSSMATCH_WORKERS threads); the joined table is written to the uploads folder, so it lists,
+# overlays and filters like any uploaded catalog.
+CROSSMATCH_JOBS = {}
+CROSSMATCH_CHUNK_ROWS = int(os.getenv('CROSSMATCH_CHUNK_ROWS', '500000'))
+CROSSMATCH_WORKERS = int(os.getenv('CROSSMATCH_WORKERS', str(CPU_COUNT)))
+CROSSMATCH_INITIAL_K = int(os.getenv('CROSSMATCH_INITIAL_K', '4'))
+CROSSMATCH_MAX_RADIUS_ARCSEC = float(os.getenv('CROSSMATCH_MAX_RADIUS_ARCSEC', '3600'))
+_crossmatch_output_lock = threading.Lock()
+
+
+class CrossMatchRequest(BaseModel):
+    catalog_a: str
+    catalog_b: str
+    radius_arcsec: float
+    mode: Literal['nearest', 'all', 'best'] = 'nearest'  # best = mutual nearest neighbours
+    join: Literal['inner', 'left'] = 'inner'  # left keeps unmatched rows of catalog_a
+    ra_col_a: Optional[str] = None
+    dec_col_a: Optional[str] = None
+    ra_col_b: Optional[str] = None
+    dec_col_b: Optional[str] = None
+    columns_a: Optional[List[str]] = None
+    columns_b: Optional[List[str]] = None
+    output_name: Optional[str] = None
+
+
+def _crossmatch_side(catalog_name: str, ra_col: Optional[str], dec_col: Optional[str], columns: Optional[List[str]]) -> dict:
+    """Loads one side of a cross-match request, raising HTTPException for unusable input."""
+    catalog_table = get_astropy_table_from_catalog(catalog_name, Path(CATALOGS_DIRECTORY))
+    if catalog_table is None:
+        raise HTTPException(status_code=404, detail=f"Could not load catalog '{catalog_name}'.")
+    detected_ra, detected_dec = detect_coordinate_columns(catalog_table.colnames)
+    ra_col, dec_col = ra_col or detected_ra, dec_col or detected_dec
+    if not ra_col or not dec_col:
+        raise HTTPException(status_code=400, detail=f"Could not detect RA/Dec columns in '{catalog_name}'.")
+    missing = [c for c in [ra_col, dec_col] + list(columns or []) if c not in catalog_table.colnames]
+    if missing:
+        raise HTTPException(status_code=400, detail=f"Columns not found in '{catalog_name}': {', '.join(missing)}")
+    return {"name": catalog_name, "table": catalog_table, "ra": ra_col, "dec": dec_col,
+            "columns": list(columns) if columns else list(catalog_table.colnames)}
 
-    if flag_column not in catalog_table.colnames:
-        raise HTTPException(status_code=400, detail=f"Flag column '{flag_column}' not found in catalog.")
 
-    try:
-        column_data = catalog_table[flag_column]
-        
-        if column_data.dtype.kind in ['b', 'i']: # Boolean or integer
-             mask = column_data.astype(bool)
-        elif column_data.dtype.kind in ['U', 'S']: # String
-             str_data_lower = np.char.lower(column_data.astype(str))
-             true_values = ['true', 't', 'yes', 'y', '1']
-             mask = np.isin(str_data_lower, true_values)
-        else:
-             mask = column_data.astype(bool)
+def _crossmatch_take(column, rows: np.ndarray, missing: Optional[np.ndarray] = None):
+    """Rows of a column, masked where `missing` is set (left-join rows without a partner)."""
+    values = column[np.where(rows >= 0, rows, 0) if missing is not None else rows]
+    if missing is None or not missing.any():
+        return values
+    mask = np.ma.getmaskarray(values) | missing.reshape((-1,) + (1,) * (np.ndim(values) - 1))
+    return MaskedColumn(np.asarray(values), mask=mask, name=column.name, unit=getattr(column, 'unit', None))
 
-        flagged_sources_table = catalog_table[mask]
 
+def _crossmatch_pairs(side_a: dict, side_b: dict, radius_deg: float, report) -> tuple:
+    """(rows of a, rows of b, separations in degrees) of every pair within radius_deg."""
+    catalogs_dir = Path(CATALOGS_DIRECTORY)
+    report(1, "Indexing catalogs")
+    index_a = _catalog_spatial_index(side_a["name"], catalogs_dir, side_a["table"], side_a["ra"], side_a["dec"])
+    index_b = _catalog_spatial_index(side_b["name"], catalogs_dir, side_b["table"], side_b["ra"], side_b["dec"])
+    if index_a is None or index_b is None:
+        raise ValueError("Could not convert coordinate columns to numeric type.")
+    # Tree on the larger side, chunked queries from the smaller one.
+    swap = len(index_a) < len(index_b)
+    tree_side, query_side = (index_b, index_a) if swap else (index_a, index_b)
+    chunks = []
+    total = len(query_side)
+    for start in range(0, total, max(1, CROSSMATCH_CHUNK_ROWS)):
+        stop = min(total, start + max(1, CROSSMATCH_CHUNK_ROWS))
+        query, rows, sep = tree_side.pairs(query_side.xyz[start:stop], radius_deg,
+                                           k=CROSSMATCH_INITIAL_K, workers=CROSSMATCH_WORKERS)
+        chunks.append((query_side.rows[start + query], rows, sep))
+        report(5 + 80 * stop / max(total, 1), f"Matching ({stop:,}/{total:,})")
+    query_rows = np.concatenate([c[0] for c in chunks]) if chunks else np.zeros(0, dtype=np.int64)
+    tree_rows = np.concatenate([c[1] for c in chunks]) if chunks else np.zeros(0, dtype=np.int64)
+    sep = np.concatenate([c[2] for c in chunks]) if chunks else np.zeros(0, dtype=float)
+    return (query_rows, tree_rows, sep) if swap else (tree_rows, query_rows, sep)
+
+
+def _crossmatch_select(rows_a: np.ndarray, rows_b: np.ndarray, sep: np.ndarray, mode: str) -> np.ndarray:
+    """Indices of the pairs kept by the match mode, ordered by (row of a, separation, row of b)."""
+    order = np.lexsort((rows_b, sep, rows_a))
+    if mode == 'all' or not len(order):
+        return order
+    first_a = np.ones(len(order), dtype=bool)
+    first_a[1:] = rows_a[order][1:] != rows_a[order][:-1]
+    nearest = order[first_a]
+    if mode == 'nearest':
+        return nearest
+    by_b = np.lexsort((rows_a, sep, rows_b))
+    first_b = np.ones(len(by_b), dtype=bool)
+    first_b[1:] = rows_b[by_b][1:] != rows_b[by_b][:-1]
+    best_of_b = np.zeros(len(order), dtype=bool)
+    best_of_b[by_b[first_b]] = True
+    return nearest[best_of_b[nearest]]
+
+
+def _crossmatch_output_path(output_name: Optional[str], side_a: dict, side_b: dict) -> Path:
+    uploads_dir = Path(UPLOADS_DIRECTORY)
+    uploads_dir.mkdir(parents=True, exist_ok=True)
+    stem = output_name or f"xmatch_{Path(side_a['name']).stem}_{Path(side_b['name']).stem}"
+    stem = re.sub(r'[^A-Za-z0-9_.+-]+', '_', Path(stem).stem).strip('._') or "xmatch"
+    filename = f"{stem}.fits"
+    counter = 1
+    while (uploads_dir / filename).exists():
+        filename = f"{stem}_{counter}.fits"
+        counter += 1
+    return uploads_dir / filename
+
+
+def crossmatch_worker(job_id: str, job_state: dict, side_a: dict, side_b: dict, params: dict):
+    """Runs one cross-match job in a background thread, recording progress in job_state."""
+    start_time = time.time()
+
+    def report(progress, stage=""):
+        job_state['progress'] = round(float(progress), 1)
+        job_state['stage'] = stage
+        if 5 < progress < 100:
+            elapsed = time.time() - start_time
+            job_state['eta'] = round(elapsed / progress * (100 - progress))
+        else:
+            job_state['eta'] = -1
+
+    try:
+        job_state['status'] = 'running'
+        radius_deg = float(params['radius_arcsec']) / 3600.0
+        rows_a, rows_b, sep = _crossmatch_pairs(side_a, side_b, radius_deg, report)
+        match_seconds = time.time() - start_time
+        report(86, "Joining")
+        keep = _crossmatch_select(rows_a, rows_b, sep, params['mode'])
+        n_pairs = int(len(rows_a))
+        rows_a, rows_b, sep = rows_a[keep], rows_b[keep], sep[keep] * 3600.0
+        matched_a = int(len(np.unique(rows_a)))
+        n_match = None
+        if params['mode'] == 'all':
+            n_match = np.bincount(rows_a, minlength=len(side_a["table"]))
+        if params['join'] == 'left':
+            unmatched = np.ones(len(side_a["table"]), dtype=bool)
+            unmatched[rows_a] = False
+            extra = np.flatnonzero(unmatched)
+            rows_a = np.concatenate((rows_a, extra))
+            rows_b = np.concatenate((rows_b, np.full(len(extra), -1, dtype=np.int64)))
+            sep = np.concatenate((sep, np.full(len(extra), np.nan)))
+            order = np.argsort(rows_a, kind="stable")
+            rows_a, rows_b, sep = rows_a[order], rows_b[order], sep[order]
+        missing_b = rows_b < 0
+
+        out = Table()
+        taken = set()
+        for name in side_a["columns"]:
+            out[name] = _crossmatch_take(side_a["table"][name], rows_a)
+            taken.add(name.lower())
+        for name in side_b["columns"]:
+            out_name = name
+            while out_name.lower() in taken:
+                out_name = f"{out_name}_2"
+            column = _crossmatch_take(side_b["table"][name], rows_b, missing_b)
+            out[out_name] = column
+            taken.add(out_name.lower())
+        out['xmatch_sep_arcsec'] = sep
+        out['xmatch_row_1'] = rows_a
+        out['xmatch_row_2'] = rows_b
+        if n_match is not None:
+            out['xmatch_n'] = n_match[rows_a]
+        out.meta['XM_CATA'] = str(side_a["name"])[-68:]
+        out.meta['XM_CATB'] = str(side_b["name"])[-68:]
+        out.meta['XM_RAD'] = float(params['radius_arcsec'])
+        out.meta['XM_MODE'] = params['mode']
+
+        report(95, "Writing catalog")
+        with _crossmatch_output_lock:
+            output_path = _crossmatch_output_path(params.get('output_name'), side_a, side_b)
+            partial_path = output_path.with_name(output_path.name + ".partial")
+            out.write(partial_path, format='fits', overwrite=True)
+            os.replace(partial_path, output_path)
+        catalog_store.get(output_path)
+
+        rel_path = f"{UPLOADS_DIRECTORY}/{output_path.name}"
+        job_state['result'] = {
+            "catalog": rel_path, "filename": output_path.name,
+            "rows": int(len(out)), "pairs": n_pairs, "matched_a": matched_a,
+            "rows_a": int(len(side_a["table"])), "rows_b": int(len(side_b["table"])),
+            "mode": params['mode'], "join": params['join'], "radius_arcsec": float(params['radius_arcsec']),
+            "match_seconds": round(match_seconds, 3), "elapsed_seconds": round(time.time() - start_time, 3),
+        }
+        report(100, "Complete")
+        job_state['status'] = 'complete'
+        print(f"[crossmatch] {job_id}: {side_a['name']} x {side_b['name']} -> {rel_path} "
+              f"({len(out)} rows, {time.time() - start_time:.2f}s)")
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to filter by flag: {e}")
+        print(f"[crossmatch] {job_id} failed: {e}")
+        job_state['status'] = 'error'
+        job_state['error'] = str(e)
+        job_state['eta'] = -1
 
-    if len(flagged_sources_table) == 0:
-        return {"sources": []}
 
-    sources_list = table_to_serializable(flagged_sources_table)
+@app.post("/catalog-crossmatch/")
+async def start_catalog_crossmatch(req: CrossMatchRequest):
+    """
+    Starts a cross-match of catalog_a against catalog_b within radius_arcsec.
+
+    mode 'nearest' keeps the closest source of b for each source of a, 'all' keeps every pair
+    and 'best' keeps mutual nearest neighbours. Poll /catalog-crossmatch-status/{job_id}; the
+    result names the joined catalog written to the uploads folder.
+    """
+    if not np.isfinite(req.radius_arcsec) or req.radius_arcsec <= 0 or req.radius_arcsec > CROSSMATCH_MAX_RADIUS_ARCSEC:
+        raise HTTPException(status_code=400, detail=f"radius_arcsec must be in (0, {CROSSMATCH_MAX_RADIUS_ARCSEC:g}].")
+    loop = asyncio.get_running_loop()
+    side_a = await loop.run_in_executor(None, _crossmatch_side, req.catalog_a, req.ra_col_a, req.dec_col_a, req.columns_a)
+    side_b = await loop.run_in_executor(None, _crossmatch_side, req.catalog_b, req.ra_col_b, req.dec_col_b, req.columns_b)
 
-    return {"sources": sources_list}
+    job_id = str(uuid.uuid4())
+    job_state = {'status': 'queued', 'progress': 0, 'eta': -1, 'stage': 'Queued', 'result': None, 'error': None}
+    params = {'radius_arcsec': float(req.radius_arcsec), 'mode': req.mode, 'join': req.join, 'output_name': req.output_name}
+    thread = threading.Thread(target=crossmatch_worker, args=(job_id, job_state, side_a, side_b, params),
+                              name=f"crossmatch-{job_id[:8]}", daemon=True)
+    CROSSMATCH_JOBS[job_id] = {'state': job_state, 'thread': thread}
+    thread.start()
+    return JSONResponse(content={"job_id": job_id})
+
+
+@app.get("/catalog-crossmatch-status/{job_id}")
+async def get_catalog_crossmatch_status(job_id: str):
+    job = CROSSMATCH_JOBS.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return JSONResponse(content=dict(job['state']))
+# --- End Catalog cross-match ---
+
+# --- Flag search ---
+# Flag columns combined with and/or/not (or &, |, ~), e.g.
+#   saturated | (edge & ~deblended)        clean & quality == 2
+# A bare column means the flag is set (non-zero, true, yes). Everything is
+# evaluated on packed bitmaps: stored catalogs read them from their flag
+# indexes (see CatalogFlagIndex), other catalogs index the columns they use.
+# The rows found are registered as a selection handle for the overlay and
+# export endpoints.
+
+_CATALOG_FLAG_EXPR_ALLOWED_NODES = (
+    ast.Expression, ast.UnaryOp, ast.Not, ast.BoolOp, ast.And, ast.Or,
+    ast.Compare, ast.Eq, ast.NotEq, ast.Name, ast.Load, ast.Constant,
+)
+
+
+def _catalog_flag_index_from_column(name: str, column) -> Optional["CatalogFlagIndex"]:
+    """In-memory CatalogFlagIndex for a column of a catalog without a store, or None if it is no flag."""
+    raw, valid = _query_raw(column)
+    dictionary = codes = None
+    if raw.ndim != 1:
+        return None
+    if raw.dtype.kind in ('U', 'S'):
+        dictionary, codes = np.unique(raw, return_inverse=True)
+    found = _catalog_flag_codes(raw, None if valid.all() else ~valid, dictionary, codes)
+    if found is None:
+        return None
+    values, rows_codes, truth, boolean = found
+    return CatalogFlagIndex(name, len(raw), values, truth, *_catalog_bitmap_containers(rows_codes, len(raw)), boolean=boolean)
+
+
+class CatalogFlagQuery:
+    """A validated flag expression over one catalog table, evaluated to a packbits bitmap."""
+
+    def __init__(self, text: str, table: Table, flag_indexes: Optional[dict] = None):
+        text = str(text or "").strip()
+        if not text:
+            raise HTTPException(status_code=400, detail="Flag expression is empty.")
+        if len(text) > CATALOG_EXPRESSION_MAX_CHARS:
+            raise HTTPException(status_code=400, detail="Flag expression is too long.")
+        self.table = table
+        self.nrows = len(table)
+        self.flag_indexes = dict(flag_indexes or {})
+        self.columns: dict[str, str] = {}
+        self.source = text
+        self.tree = self._parse(text)
+
+    def _parse(self, text: str) -> ast.Expression:
+        colnames = list(self.table.colnames)
+        lower_names = {}
+        for name in colnames:
+            lower_names.setdefault(str(name).lower(), []).append(name)
+
+        def _quoted(match):
+            if match.group(1) not in colnames:
+                raise HTTPException(status_code=400, detail=f"Unknown column `{match.group(1)}` in flag expression.")
+            key = f"__flag{len(self.columns)}"
+            self.columns[key] = match.group(1)
+            return key
+
+        out = []
+        try:
+            # '&', '|' and '~' read as and/or/not, so they bind looser than '==' (see CatalogExpression).
+            for tok in tokenize.generate_tokens(io.StringIO(re.sub(r"`([^`]+)`", _quoted, text)).readline):
+                kind, value = tok.type, tok.string
+                if kind == tokenize.OP and value in _CATALOG_EXPR_LOGICAL_TOKENS:
+                    kind, value = (tokenize.NAME if value != "=" else tokenize.OP), _CATALOG_EXPR_LOGICAL_TOKENS[value]
+                elif kind == tokenize.NAME and value.lower() in ("true", "false") and value not in colnames:
+                    value = value.capitalize()
+                out.append((kind, value))
+            tree = ast.parse(tokenize.untokenize(out).strip(), mode="eval")
+        except (SyntaxError, tokenize.TokenError) as e:
+            raise HTTPException(status_code=400, detail=f"Invalid flag expression: {getattr(e, 'msg', None) or e}")
+        for node in ast.walk(tree):
+            if not isinstance(node, _CATALOG_FLAG_EXPR_ALLOWED_NODES):
+                raise HTTPException(status_code=400, detail=f"Unsupported syntax in flag expression: {type(node).__name__}")
+            if isinstance(node, ast.Name) and node.id not in self.columns:
+                if node.id in colnames:
+                    self.columns[node.id] = node.id
+                elif len(lower_names.get(node.id.lower(), [])) == 1:
+                    self.columns[node.id] = lower_names[node.id.lower()][0]
+                else:
+                    raise HTTPException(status_code=400, detail=f"Unknown column '{node.id}' in flag expression.")
+            if isinstance(node, ast.Compare):
+                sides = (node.left, node.comparators[0])
+                if len(node.ops) != 1 or not (isinstance(sides[0], ast.Name) and isinstance(sides[1], ast.Constant)):
+                    raise HTTPException(status_code=400, detail="Flag comparisons are written 'column == value' or 'column != value'.")
+        return tree
+
+    def _index(self, column: str) -> Optional["CatalogFlagIndex"]:
+        if column not in self.flag_indexes:
+            self.flag_indexes[column] = _catalog_flag_index_from_column(column, self.table[column])
+        return self.flag_indexes[column]
+
+    def bits(self) -> np.ndarray:
+        return self._eval(self.tree.body)
+
+    def mask(self) -> np.ndarray:
+        return np.unpackbits(self.bits(), count=self.nrows).astype(bool)
+
+    def _eval(self, node) -> np.ndarray:
+        if isinstance(node, ast.Name):
+            column = self.columns[node.id]
+            index = self._index(column)
+            if index is not None:
+                return index.true_bits()
+            raw, valid = _query_raw(self.table[column])
+            if raw.dtype.kind in ('U', 'S'):
+                # Text that is not an indexed flag: only true/yes-style words count as set.
+                return np.packbits(np.isin(np.char.strip(_query_text(raw)), _CATALOG_FLAG_TRUE_TEXT) & valid)
+            try:
+                return np.packbits(raw.astype(bool) & valid)
+            except (TypeError, ValueError):
+                raise HTTPException(status_code=400, detail=f"Column '{column}' is not a flag column.")
+        if isinstance(node, ast.Compare):
+            column = self.columns[node.left.id]
+            value = node.comparators[0].value
+            index = self._index(column)
+            if index is not None:
+                hit = index.value_bits(value)
+                return hit if isinstance(node.ops[0], ast.Eq) else (index.valid_bits() & _bitmap_invert(hit, self.nrows))
+            raw, valid = _query_raw(self.table[column])
+            try:
+                hit = raw.astype(np.float64, copy=False) == float(value)
+            except (TypeError, ValueError):
+                raise HTTPException(status_code=400, detail=f"Column '{column}' cannot be compared with {value!r}.")
+            return np.packbits((hit if isinstance(node.ops[0], ast.Eq) else ~hit) & valid)
+        if isinstance(node, ast.UnaryOp):
+            return _bitmap_invert(self._eval(node.operand), self.nrows)
+        if isinstance(node, ast.BoolOp):
+            op = np.bitwise_and if isinstance(node.op, ast.And) else np.bitwise_or
+            result = self._eval(node.values[0])
+            for value in node.values[1:]:
+                result = op(result, self._eval(value))
+            return result
+        raise HTTPException(status_code=400, detail="A flag expression combines flag columns with and/or/not.")
+
+
+@app.get("/flag-search/")
+async def flag_search(
+    catalog_name: str,
+    flag_column: Optional[str] = Query(None, description="Rows where this flag is set"),
+    flags: Optional[str] = Query(None, description="Flag expression, e.g. 'saturated | (edge & ~deblended)' or 'quality == 2'"),
+    include_sources: bool = Query(True, description="False returns only the selection handle"),
+):
+    """
+    Searches a catalog for entries where a flag column is true, or where a combination of flags holds.
+    """
+    catalogs_dir = Path(CATALOGS_DIRECTORY)  # Updated
+    
+    try:
+        catalog_table = get_astropy_table_from_catalog(catalog_name, catalogs_dir)
+        if catalog_table is None:
+            raise HTTPException(status_code=404, detail=f"Could not load catalog '{catalog_name}'.")
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to read catalog: {e}")
+
+    if not flags:
+        if not flag_column:
+            raise HTTPException(status_code=400, detail="Provide flag_column or flags.")
+        if flag_column not in catalog_table.colnames:
+            raise HTTPException(status_code=400, detail=f"Flag column '{flag_column}' not found in catalog.")
+        flags = f"`{flag_column}`"
+
+    store = _catalog_store_for(catalog_name, catalogs_dir)
+    query = CatalogFlagQuery(flags, catalog_table,
+                             _catalog_flag_indexes(catalog_name, catalogs_dir) if store is not None and store.nrows == len(catalog_table) else None)
+    try:
+        bits = query.bits()
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to filter by flag: {e}")
+
+    result = {"sources": []}
+    catalog_path = _locate_catalog_file(catalog_name, catalogs_dir)
+    if catalog_path is not None:
+        result["selection"] = _register_catalog_selection_bits(catalog_path, bits, len(catalog_table), query.source).describe()
+    if not include_sources or not bits.any():
+        return result
+    result["sources"] = table_to_serializable(catalog_table[query.mask()])
+    return result
 
 
 
@@ -8872,8 +10451,12 @@ class RangeCondition(BaseModel):
 
 class RangeSearchRequest(BaseModel):
     catalog_name: str
-    conditions: List[RangeCondition]
-    logical_operator: Literal['AND', 'OR']
+    conditions: List[RangeCondition] = []
+    logical_operator: Literal['AND', 'OR'] = 'AND'
+    # Alternative to conditions: "(flux > 5*err) & (class == 'star' | snr > 20)"; see CatalogExpression.
+    expression: Optional[str] = None
+    # False returns only the selection handle (for reuse via ?selection= on other catalog endpoints).
+    include_sources: bool = True
 
 
 # ALSO UPDATE THE ENDPOINT FUNCTION:
@@ -8893,7 +10476,17 @@ async def range_search(request: RangeSearchRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to read catalog: {e}")
 
+    if request.expression:
+        expression = CatalogExpression(
+            request.expression, catalog_table,
+            _catalog_query_dictionaries(request.catalog_name, catalogs_dir),
+            _catalog_flag_indexes(request.catalog_name, catalogs_dir),
+        )
+        return _range_search_result(request, catalog_table, catalogs_dir, expression.evaluate(), expression.source)
+
     all_masks = []
+    text_indexes = None
+    flag_indexes = None
     
     for condition in request.conditions:
         if condition.column_name not in catalog_table.colnames:
@@ -8920,11 +10513,17 @@ async def range_search(request: RangeSearchRequest):
             else:
                 raise HTTPException(status_code=400, detail=f"Invalid boolean value '{value_str}' for column '{column_name}'. Use true/false.")
             
-            if operator != '==':
-                raise HTTPException(status_code=400, detail=f"Only '==' operator is supported for boolean column '{column_name}'.")
+            if operator not in ('==', '!='):
+                raise HTTPException(status_code=400, detail=f"Only '==' and '!=' operators are supported for boolean column '{column_name}'.")
             
-            mask = (column_data == value)
-            all_masks.append(mask)
+            if flag_indexes is None:
+                flag_indexes = _catalog_flag_indexes(request.catalog_name, catalogs_dir)
+            index = flag_indexes.get(column_name)
+            if index is not None and index.nrows == len(catalog_table):
+                mask = index.mask(index.value_bits(value))
+            else:
+                mask = np.asarray(column_data == value)
+            all_masks.append(mask if operator == '==' else ~mask)
             continue
 
         # Step 2: Handle explicit string columns or known string columns
@@ -8933,21 +10532,19 @@ async def range_search(request: RangeSearchRequest):
                 raise HTTPException(status_code=400, detail=f"Only '==' and '!=' operators are supported for string column '{column_name}'.")
             
             try:
-                # Convert column data to string for comparison if needed
-                if column_data.dtype.kind == 'S':  # Byte strings
-                    str_column_data = np.char.decode(column_data, 'utf-8', errors='ignore')
-                else:  # Unicode strings or other types
-                    str_column_data = np.array([str(val) for val in column_data])
-                
-                # Perform case-insensitive comparison
+                # Perform case-insensitive comparison; stored text columns look the value up
+                # in their sorted dictionary and compare integer codes.
                 condition_value_str = value_str.lower()
-                str_column_data_lower = np.char.lower(str_column_data.astype(str))
-                
-                if operator == '==':
-                    mask = str_column_data_lower == condition_value_str
-                else:  # !=
-                    mask = str_column_data_lower != condition_value_str
-                    
+                if text_indexes is None:
+                    text_indexes = _catalog_query_dictionaries(request.catalog_name, catalogs_dir)
+                index = text_indexes.get(column_name)
+                if index is not None:
+                    mask = index.rows(index.compare_codes(ast.Eq, condition_value_str))
+                else:
+                    mask = _query_text(_query_raw(column_data)[0]) == condition_value_str
+                if operator == '!=':
+                    mask = ~mask
+
                 all_masks.append(mask)
                 continue
             except Exception as e:
@@ -8964,9 +10561,8 @@ async def range_search(request: RangeSearchRequest):
             
             try:
                 # Convert entire column to string for comparison
-                str_column_data = np.array([str(val) for val in column_data])
                 condition_value_lower = value_str.lower()
-                str_column_data_lower = np.char.lower(str_column_data)
+                str_column_data_lower = _query_text(_query_raw(column_data)[0])
                 
                 if operator == '==':
                     mask = str_column_data_lower == condition_value_lower
@@ -9027,15 +10623,43 @@ async def range_search(request: RangeSearchRequest):
         else:
             raise HTTPException(status_code=400, detail=f"Invalid logical operator '{request.logical_operator}'.")
         
-        filtered_table = catalog_table[final_mask]
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to combine filters: {e}")
 
-    if len(filtered_table) == 0:
-        return {"sources": []}
+    description = f" {request.logical_operator.lower()} ".join(
+        f"{c.column_name} {c.operator} {c.value.strip()!r}" for c in request.conditions
+    )
+    return _range_search_result(request, catalog_table, catalogs_dir, np.asarray(final_mask, dtype=bool), description)
+
+
+def _range_search_result(request: RangeSearchRequest, catalog_table: Table, catalogs_dir: Path,
+                         final_mask: np.ndarray, description: str) -> dict:
+    """Register the matching rows as a selection and serialize them (unless only the handle was asked for)."""
+    result = {"sources": []}
+    catalog_path = _locate_catalog_file(request.catalog_name, catalogs_dir)
+    if catalog_path is not None:
+        result["selection"] = _register_catalog_selection(catalog_path, final_mask, description).describe()
+    if not request.include_sources or not final_mask.any():
+        return result
+    result["sources"] = table_to_serializable(catalog_table[final_mask])
+    return result
 
-    sources_list = table_to_serializable(filtered_table)
-    return {"sources": sources_list}
+
+@app.get("/catalog-selection/{selection_id}")
+async def catalog_selection(
+    selection_id: str,
+    format: str = Query("json", regex="^(json|bitmap|indices)$", description="json metadata, packed bitmap bytes, or little-endian int64 row indices"),
+):
+    """A stored row selection: metadata, the packed bitmap (numpy packbits order) or its row indices."""
+    selection = get_catalog_selection(selection_id)
+    if format == "json":
+        return JSONResponse(content=selection.describe())
+    payload = selection.bits.tobytes() if format == "bitmap" else selection.indices().astype("<i8").tobytes()
+    return Response(
+        content=payload,
+        media_type="application/octet-stream",
+        headers={"X-Selection-Rows": str(selection.nrows), "X-Selection-Count": str(selection.count)},
+    )
 @app.get("/list-files/")
 @app.get("/list-files/{path:path}")
 async def list_files(path: str = ""):
@@ -9242,6 +10866,70 @@ async def load_file(request: Request, filepath: str, hdu: int = Query(DEFAULT_HD
         return JSONResponse(status_code=500, content={"error": f"Failed to set active file: {str(e)}"})
 
 
+@app.post("/virtual-image/")
+async def create_virtual_image(request: Request):
+    """
+    Define an image as an expression over other images and (by default) make it the session's image.
+
+    Body: {"expression": "(A - B) / sqrt(C)",
+           "operands": {"A": {"filepath": "f200w.fits", "hdu": 1}, "B": "bkg.fits", ...},
+           "reference": "A",   # grid of the result; defaults to the first operand
+           "activate": true}
+    Operands on a different pixel grid are resampled through their WCS onto the reference grid.
+    Nothing is computed up front: tiles, histogram and probes evaluate only the blocks they touch.
+    """
+    session = getattr(request.state, "session", None)
+    if session is None:
+        raise HTTPException(status_code=401, detail="Missing session")
+    session_data = session.data
+
+    try:
+        data = await request.json()
+    except Exception:
+        raise HTTPException(status_code=400, detail="Body must be JSON.")
+    operands = data.get("operands")
+    if not isinstance(operands, dict):
+        raise HTTPException(status_code=400, detail="'operands' must be an object mapping names to files.")
+
+    try:
+        image = await asyncio.to_thread(_register_virtual_image, data.get("expression"), operands, data.get("reference"))
+        result = image.describe()
+        if data.get("activate", True):
+            session_data["current_fits_file"] = image.key
+            session_data["current_hdu_index"] = 0
+            session_data.pop("current_slice_index", None)
+            session_data.pop("current_slice_count", None)
+            session_data.setdefault("tile_cache", TileCache(max_size=TILE_CACHE_MAX_SIZE)).clear()
+            # The display range of the previous image means nothing for the result; keep the colormap only.
+            settings = dict(_get_session_display_settings(session_data) or {})
+            settings.pop("min_value", None)
+            settings.pop("max_value", None)
+            _set_session_display_settings(session_data, settings)
+
+            loop = asyncio.get_running_loop()
+            generator = await loop.run_in_executor(app.state.thread_executor, VirtualTileGenerator, image)
+            _apply_display_settings_to_generator(generator, settings)
+            session_data.setdefault("active_tile_generators", {})[make_file_id(image.key, 0)] = generator
+            info = await loop.run_in_executor(app.state.thread_executor, generator.get_tile_info)
+            info["flip_y"] = image.flip_y
+            info["minLevel"] = 0
+            if getattr(session, "session_id", None):
+                info["session_id"] = session.session_id
+            result["tile_info"] = info
+        result["block_cache"] = virtual_block_cache.stats()
+        return JSONResponse(content=result)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to create virtual image: {e}")
+
+
+@app.get("/virtual-image/{image_id}")
+async def describe_virtual_image(image_id: str):
+    image = get_virtual_image(image_id)
+    return JSONResponse(content={**image.describe(), "block_cache": virtual_block_cache.stats()})
+
+
 ## 3D endpoints removed
 
 
@@ -9689,6 +11377,11 @@ def _flip_y_from_header_quiet(header) -> bool:
     Lightweight, non-logging variant of analyze_wcs_orientation(..., data=None)
     used in hot paths (e.g. /probe-pixel).
     """
+    return _wcs_orientation_from_header_quiet(header)[0]
+
+
+def _wcs_orientation_from_header_quiet(header) -> tuple[bool, float]:
+    """(flip_y, determinant) with the same decision rules as analyze_wcs_orientation, without logging."""
     try:
         # CD matrix format
         if 'CD1_1' in header:
@@ -9723,9 +11416,9 @@ def _flip_y_from_header_quiet(header) -> bool:
         # Near-singular: fall back to cd22 sign
         if abs(determinant) < 1e-15:
             flip_y = (cd22 < 0)
-        return bool(flip_y)
+        return bool(flip_y), float(determinant)
     except Exception:
-        return False
+        return False, 1.0
 
 
 @app.get("/probe-pixel/")
@@ -9748,6 +11441,20 @@ async def probe_pixel(
             raise HTTPException(status_code=400, detail="No current FITS file and no 'filepath' provided.")
         hdu_index = int(hdu if hdu is not None else session_data.get("current_hdu_index", 0))
 
+        if _is_virtual_image_key(current_file):
+            image = get_virtual_image(current_file)
+            x_idx = int(x)
+            y_idx = int(image.height - 1 - y) if origin.lower().startswith("bottom") else int(y)
+            if image.flip_y:
+                y_idx = int(image.height - 1 - y_idx)
+            px = await asyncio.to_thread(image.value_at, x_idx, y_idx)
+            content = {"value": px, "unit": None, "x": x_idx, "y": y_idx, "origin": origin,
+                       "filepath": image.key, "hdu_index": 0, "used_generator": False,
+                       "applied_flip_y": image.flip_y, "virtual": True}
+            if px is None and not (0 <= x_idx < image.width and 0 <= y_idx < image.height):
+                content["detail"] = "Out of bounds"
+            return JSONResponse(content=content, status_code=200)
+
         full_path = Path(current_file)
         if not full_path.exists():
             if not str(full_path).startswith(str(FILES_DIRECTORY)):
@@ -9761,71 +11468,63 @@ async def probe_pixel(
         used_generator = False
         applied_flip_y = False
 
-        # No caching for probe-pixel: read only the needed pixel directly from the FITS on each request.
-        # This avoids keeping extra per-session caches (and avoids copying/flipping full arrays).
+        # Headers come from the shared metadata cache; the pixel itself is read straight from the
+        # data unit (one small seek+read), so no per-session array caches or astropy opens are needed.
         slice_index = _current_session_slice_index(session_data)
+        plane_index = int(slice_index) if slice_index is not None else 0
 
-        # IMPORTANT: do_not_scale_image_data=True prevents Astropy from auto-applying BSCALE/BZERO
-        # to the full array (which can force materialization into RAM). We'll scale only the one pixel.
-        with fits.open(full_path, memmap=True, lazy_load_hdus=True, do_not_scale_image_data=True) as hdul:
-            if not (0 <= hdu_index < len(hdul)):
-                raise HTTPException(status_code=400, detail=f"Invalid HDU index: {hdu_index}. File has {len(hdul)} HDUs.")
-            h = hdul[hdu_index]
-            header = h.header
-            unit = header.get("BUNIT", None)
-            data = h.data
-            if data is None or getattr(data, "ndim", 0) < 2:
-                raise HTTPException(status_code=400, detail="Selected HDU has no 2D image data.")
-
-            arr = data
-            if getattr(arr, "ndim", 0) > 2:
-                # If cube: use current session slice (defaults to 0)
-                if arr.ndim >= 3:
-                    si = int(slice_index) if slice_index is not None else 0
-                    si = max(0, min(int(arr.shape[0]) - 1, si))
-                    arr = arr[si, :, :]
-                else:
-                    arr = arr[0] if arr.ndim == 3 else arr[0, 0]
+        metadata = fits_metadata_cache.get(full_path)
+        meta = metadata.hdu(hdu_index)
+        header = meta.header
+        unit = header.get("BUNIT", None)
+        if not meta.is_2d_image:
+            raise HTTPException(status_code=400, detail="Selected HDU has no 2D image data.")
+        height, width = meta.height, meta.width
 
-            height, width = int(arr.shape[-2]), int(arr.shape[-1])
+        # flip_y from the cached WCS bundle (same rules as analyze_wcs_orientation, no logging).
+        applied_flip_y = meta.wcs_bundle.flip_y
 
-            # Determine flip_y from header only (cheap) WITHOUT noisy logging.
-            applied_flip_y = _flip_y_from_header_quiet(header)
+        x_idx = int(x)
+        y_idx = int(height - 1 - y) if origin.lower().startswith("bottom") else int(y)
+        if applied_flip_y:
+            y_idx = int(height - 1 - y_idx)
 
-            x_idx = int(x)
-            y_idx = int(height - 1 - y) if origin.lower().startswith("bottom") else int(y)
-            if applied_flip_y:
-                y_idx = int(height - 1 - y_idx)
-
-            if not (0 <= x_idx < width and 0 <= y_idx < height):
-                return JSONResponse(content={"value": None, "unit": unit, "x": x_idx, "y": y_idx,
-                                             "origin": origin, "filepath": str(full_path),
-                                             "hdu_index": hdu_index, "used_generator": used_generator,
-                                             "applied_flip_y": applied_flip_y, "detail": "Out of bounds"}, status_code=200)
-            try:
-                raw_px = arr[y_idx, x_idx]
-                # Apply FITS scaling for just this pixel (avoid scaling the full array).
-                bscale = float(header.get("BSCALE", 1.0))
-                bzero = float(header.get("BZERO", 0.0))
-                # BLANK applies to integer arrays
-                blank = header.get("BLANK", None)
-                if blank is not None:
-                    try:
-                        if np.asarray(raw_px).dtype.kind in ("i", "u") and int(raw_px) == int(blank):
-                            raw_px = np.nan
-                    except Exception:
-                        pass
-                px = float(raw_px) * bscale + bzero
-                if not np.isfinite(px):
-                    px = None
-            except Exception:
+        if not (0 <= x_idx < width and 0 <= y_idx < height):
+            return JSONResponse(content={"value": None, "unit": unit, "x": x_idx, "y": y_idx,
+                                         "origin": origin, "filepath": str(full_path),
+                                         "hdu_index": hdu_index, "used_generator": used_generator,
+                                         "applied_flip_y": applied_flip_y, "detail": "Out of bounds"}, status_code=200)
+        try:
+            raw_px = metadata.read_raw_pixel(hdu_index, x_idx, y_idx, plane_index)
+            if raw_px is None:
+                # Tile-compressed or unusual layouts: let astropy decode the pixel.
+                # do_not_scale_image_data=True keeps BSCALE/BZERO off the full array; we scale one pixel below.
+                with fits.open(full_path, memmap=True, lazy_load_hdus=True, do_not_scale_image_data=True) as hdul:
+                    arr = hdul[hdu_index].data
+                    if getattr(arr, "ndim", 0) > 2:
+                        arr = arr.reshape((-1, height, width))
+                        arr = arr[max(0, min(int(arr.shape[0]) - 1, plane_index))]
+                    raw_px = arr[y_idx, x_idx]
+            # Apply FITS scaling for just this pixel (avoid scaling the full array).
+            bscale = float(header.get("BSCALE", 1.0))
+            bzero = float(header.get("BZERO", 0.0))
+            # BLANK applies to integer arrays
+            blank = header.get("BLANK", None)
+            if blank is not None:
+                try:
+                    if np.asarray(raw_px).dtype.kind in ("i", "u") and int(raw_px) == int(blank):
+                        raw_px = np.nan
+                except Exception:
+                    pass
+            px = float(raw_px) * bscale + bzero
+            if not np.isfinite(px):
                 px = None
+        except Exception:
+            px = None
 
-            return JSONResponse(content={"value": px, "unit": unit, "x": x_idx, "y": y_idx, "origin": origin,
-                                         "filepath": str(full_path), "hdu_index": hdu_index,
-                                         "used_generator": used_generator, "applied_flip_y": applied_flip_y}, status_code=200)
-
-        # (response returned inside FITS context above)
+        return JSONResponse(content={"value": px, "unit": unit, "x": x_idx, "y": y_idx, "origin": origin,
+                                     "filepath": str(full_path), "hdu_index": hdu_index,
+                                     "used_generator": used_generator, "applied_flip_y": applied_flip_y}, status_code=200)
     except HTTPException:
         raise
     except Exception as e:
@@ -9851,6 +11550,7 @@ async def pixel_to_world(
         if not current_file:
             raise HTTPException(status_code=400, detail="No current FITS file and no 'filepath' provided.")
         hdu_index = int(hdu if hdu is not None else session_data.get("current_hdu_index", 0))
+        current_file, hdu_index = _virtual_image_wcs_source(current_file, hdu_index)
 
         full_path = Path(current_file)
         if not full_path.exists():
@@ -9859,48 +11559,21 @@ async def pixel_to_world(
         if not full_path.exists():
             raise HTTPException(status_code=404, detail=f"FITS file not found: {full_path}")
 
-        # Prefer session generator (cached WCS + flip state) to avoid per-request WCS construction.
+        # WCS, height and flip state come from the per-(file, HDU) bundle; a live session generator
+        # only overrides the flip decision so we match the currently displayed orientation.
+        bundle = get_wcs_bundle(full_path, hdu_index)
+        if bundle.height <= 0:
+            raise HTTPException(status_code=400, detail="Selected HDU has no 2D image data.")
         session_generators = session_data.setdefault("active_tile_generators", {})
         slice_index = _current_session_slice_index(session_data)
-        file_id = _make_active_file_id(str(full_path), hdu_index, slice_index)
-        gen = session_generators.get(file_id)
+        gen = session_generators.get(_make_active_file_id(str(full_path), hdu_index, slice_index))
+        flip_y = bool(getattr(gen, "_flip_required", bundle.flip_y)) if gen is not None else bundle.flip_y
+        height = bundle.height
+        w = bundle.wcs
 
-        w = getattr(gen, "wcs", None) if gen is not None else None
-        header = getattr(gen, "header", None) if gen is not None else None
-        height = int(getattr(gen, "height", 0)) if gen is not None else 0
-        flip_y = bool(getattr(gen, "_flip_required", False)) if gen is not None else False
-
-        if w is None or not getattr(w, "has_celestial", False) or height <= 0 or header is None:
-            with fits.open(full_path, memmap=True, lazy_load_hdus=True) as hdul:
-                if not (0 <= hdu_index < len(hdul)):
-                    raise HTTPException(status_code=400, detail=f"Invalid HDU index: {hdu_index}. File has {len(hdul)} HDUs.")
-                h = hdul[hdu_index]
-                header = h.header
-                data = h.data
-                if data is None or data.ndim < 2:
-                    raise HTTPException(status_code=400, detail="Selected HDU has no 2D image data.")
-                if data.ndim > 2:
-                    data = data[0] if data.ndim == 3 else data[0, 0]
-                height = int(data.shape[-2])
-                try:
-                    flip_y, _, _ = analyze_wcs_orientation(header, None)
-                    flip_y = bool(flip_y)
-                except Exception:
-                    flip_y = False
-                # Build WCS; for cubes, use the celestial (2D) part so pixel->world accepts x,y.
-                w_full = WCS(header)
-                w = w_full.celestial if getattr(w_full, "has_celestial", False) else w_full
-
-        if not w or not getattr(w, "has_celestial", False):
+        if w is None:
             return JSONResponse(content={"ra": None, "dec": None, "detail": "No celestial WCS"}, status_code=200)
 
-        # For some generators, `gen.wcs` can be a full N-D WCS. Use celestial subset so we can pass x,y.
-        try:
-            if getattr(w, "has_celestial", False) and int(getattr(w, "naxis", 2)) > 2:
-                w = w.celestial
-        except Exception:
-            pass
-
         x_idx = float(x)
         y_idx = float(height - 1 - y) if origin.lower().startswith("bottom") else float(y)
         if flip_y:
@@ -9939,6 +11612,7 @@ async def wcs_orientation(
         if not current_file:
             raise HTTPException(status_code=400, detail="No current FITS file and no 'filepath' provided.")
         hdu_index = int(hdu if hdu is not None else session_data.get("current_hdu_index", 0))
+        current_file, hdu_index = _virtual_image_wcs_source(current_file, hdu_index)
 
         full_path = Path(current_file)
         if not full_path.exists():
@@ -9959,16 +11633,17 @@ async def wcs_orientation(
             except Exception:
                 pass
 
-        # Fallback: compute directly from the header using the canonical function.
-        with fits.open(full_path, memmap=True, lazy_load_hdus=True) as hdul:
-            if not (0 <= hdu_index < len(hdul)):
-                raise HTTPException(status_code=400, detail=f"Invalid HDU index: {hdu_index}. File has {len(hdul)} HDUs.")
-            header = hdul[hdu_index].header
-            flip_y, determinant, _ = analyze_wcs_orientation(header, None)
-            return JSONResponse(
-                content={"flip_y": bool(flip_y), "determinant": float(determinant), "source": "header"},
-                status_code=200
-            )
+        # Fallback: the cached WCS bundle (same decision rules as analyze_wcs_orientation).
+        bundle = get_wcs_bundle(full_path, hdu_index)
+        return JSONResponse(
+            content={
+                "flip_y": bool(bundle.flip_y),
+                "determinant": float(bundle.determinant),
+                "north_angle_deg": bundle.north_angle_deg,
+                "source": "header",
+            },
+            status_code=200
+        )
     except HTTPException:
         raise
     except Exception as e:
@@ -9995,6 +11670,7 @@ async def world_to_pixel_batch(
         if not fits_file:
             raise HTTPException(status_code=400, detail="No current FITS file and no 'filepath' provided.")
         hdu_index = int(payload.hdu if payload.hdu is not None else session_data.get("current_hdu_index", 0))
+        fits_file, hdu_index = _virtual_image_wcs_source(fits_file, hdu_index)
 
         full_path = Path(fits_file)
         if not full_path.exists():
@@ -10018,42 +11694,15 @@ async def world_to_pixel_batch(
         session_generators = session_data.setdefault("active_tile_generators", {})
         tile_generator = session_generators.get(file_id)
 
-        wcs_obj = None
-        header_obj = None
-        width = None
-        height = None
-        flip_required = False
-
+        bundle = get_wcs_bundle(full_path, hdu_index)
+        wcs_obj = bundle.wcs
+        width = bundle.width or None
+        height = bundle.height or None
+        flip_required = bundle.flip_y
         if tile_generator is not None:
-            wcs_obj = getattr(tile_generator, "wcs", None)
-            header_obj = getattr(tile_generator, "header", None)
-            width = getattr(tile_generator, "width", None)
-            height = getattr(tile_generator, "height", None)
-            flip_required = bool(getattr(tile_generator, "_flip_required", False))
-
-        if (wcs_obj is None or not getattr(wcs_obj, "has_celestial", False)) and header_obj is not None:
-            try:
-                prepared = _prepare_jwst_header_for_wcs(header_obj)
-                wcs_obj = WCS(prepared)
-            except Exception:
-                wcs_obj = None
-
-        if wcs_obj is None or not getattr(wcs_obj, "has_celestial", False):
-            with fits.open(full_path, memmap=True, lazy_load_hdus=True) as hdul:
-                if not (0 <= hdu_index < len(hdul)):
-                    raise HTTPException(status_code=400, detail=f"Invalid HDU index: {hdu_index}. File has {len(hdul)} HDUs.")
-                hdu = hdul[hdu_index]
-                header_obj = hdu.header
-                data = hdu.data
-                if data is not None and data.ndim >= 2:
-                    height = int(data.shape[-2])
-                    width = int(data.shape[-1])
-                prepared = _prepare_jwst_header_for_wcs(header_obj)
-                wcs_obj = WCS(prepared)
-                try:
-                    flip_required, _, _ = analyze_wcs_orientation(header_obj, None)
-                except Exception:
-                    pass
+            width = getattr(tile_generator, "width", width)
+            height = getattr(tile_generator, "height", height)
+            flip_required = bool(getattr(tile_generator, "_flip_required", flip_required))
 
         pixels_out = []
         for idx, point in enumerate(points):
@@ -10074,17 +11723,10 @@ async def world_to_pixel_batch(
             valid_indices.append(idx)
 
         origin = (payload.origin or "top").lower()
-        if wcs_obj is not None and getattr(wcs_obj, "has_celestial", False) and valid_rows:
+        if wcs_obj is not None and valid_rows:
             coords = np.array(valid_rows, dtype=float)
             try:
-                # For cubes, use celestial subset so world->pixel accepts (ra,dec) rows.
-                w_use = wcs_obj
-                try:
-                    if getattr(w_use, "has_celestial", False) and int(getattr(w_use, "naxis", 2)) > 2:
-                        w_use = w_use.celestial
-                except Exception:
-                    w_use = wcs_obj
-                pix = w_use.all_world2pix(coords, 0)
+                pix = wcs_obj.all_world2pix(coords, 0)
             except Exception:
                 pix = None
             if pix is not None:
@@ -10111,6 +11753,301 @@ async def world_to_pixel_batch(
         raise HTTPException(status_code=500, detail=f"world-to-pixel failed: {e}")
 
 
+# --- Display geometry + binary bulk coordinate conversion ---
+# Overlay tools (regions, external catalogs, contour vertices) convert tens of thousands of
+# positions at once. These endpoints take packed little-endian float64 pairs and answer in the
+# same layout, so there is no JSON/pydantic work per point.
+COORD_BULK_MAX_POINTS = int(os.getenv('COORD_BULK_MAX_POINTS', '20000000'))
+COORD_BULK_CHUNK_POINTS = int(os.getenv('COORD_BULK_CHUNK_POINTS', '262144'))
+COORD_BULK_WORKERS = int(os.getenv('COORD_BULK_WORKERS', str(max(2, min(8, CPU_COUNT)))))
+_coord_executor = ThreadPoolExecutor(max_workers=COORD_BULK_WORKERS, thread_name_prefix="coords")
+
+
+@dataclass(frozen=True)
+class DisplayGeometry:
+    """
+    Mapping between sky coordinates and the pixels the viewer displays (top-left origin).
+
+    For a plain image this is the image WCS plus the display flip; for an RGB frame it is the
+    base channel WCS plus the flip and the frame offset used by RGBTileGenerator._wcs_to_display_pixels.
+    """
+    wcs: WCS
+    width: int  # displayed frame size
+    height: int
+    source_height: int  # rows of the WCS image, used for the flip
+    flip_y: bool
+    offset_x: float = 0.0
+    offset_y: float = 0.0
+    kind: str = "image"  # "image" | "rgb"
+    fingerprint: str = ""
+    approx: Optional[WcsApproximation] = None  # fitted fast path for self.wcs, when built
+
+    def world_to_display(self, ra, dec):
+        if self.approx is not None:
+            x, y = self.approx.world2pix(ra, dec)
+        else:
+            x, y = self.wcs.all_world2pix(np.asarray(ra, dtype=float), np.asarray(dec, dtype=float), 0, quiet=True)
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        if self.flip_y:
+            y = (float(self.source_height) - 1.0) - y
+        return x - self.offset_x, y - self.offset_y
+
+    def display_to_world(self, x, y):
+        xs = np.asarray(x, dtype=float) + self.offset_x
+        ys = np.asarray(y, dtype=float) + self.offset_y
+        if self.flip_y:
+            ys = (float(self.source_height) - 1.0) - ys
+        if self.approx is not None:
+            return self.approx.pix2world(xs, ys)
+        ra, dec = self.wcs.all_pix2world(xs, ys, 0)
+        return np.asarray(ra, dtype=float), np.asarray(dec, dtype=float)
+
+    def apply_origin(self, y, origin: str):
+        """Top-origin display y <-> bottom-origin display y (the mapping is its own inverse)."""
+        if str(origin or "top").lower().startswith("bottom"):
+            return (float(self.height) - 1.0) - np.asarray(y, dtype=float)
+        return np.asarray(y, dtype=float)
+
+    def with_private_wcs(self) -> "DisplayGeometry":
+        """Copy with its own deep copy of the WCS (also behind the approximation's exact fallback), for one worker thread."""
+        wcs = self.wcs.deepcopy()
+        approx = None
+        if self.approx is not None:
+            approx = copy.copy(self.approx)
+            approx.wcs = wcs
+        return dataclass_replace(self, wcs=wcs, approx=approx)
+
+
+def _resolve_session_fits_path(session_data: dict, filepath: str | None) -> Path:
+    current_file = filepath or session_data.get("current_fits_file")
+    if not current_file:
+        raise HTTPException(status_code=400, detail="No current FITS file and no 'filepath' provided.")
+    full_path = Path(current_file)
+    if not full_path.exists():
+        candidate = Path(FILES_DIRECTORY) / current_file
+        if candidate.exists():
+            full_path = candidate
+    if not full_path.exists():
+        raise HTTPException(status_code=404, detail=f"FITS file not found: {full_path}")
+    return full_path
+
+
+def _geometry_fingerprint(path_like, hdu_index: int, *parts) -> str:
+    metadata = fits_metadata_cache.get(path_like)
+    tail = ":".join(str(p) for p in parts)
+    return f"{metadata.path}:{int(hdu_index)}:{metadata.size}:{metadata.mtime_ns}:{tail}"
+
+
+def _session_display_geometry(session_data: dict, filepath: str | None = None, hdu: int | None = None,
+                              frame: str = "auto", wait_for_approx: bool = False) -> DisplayGeometry:
+    """
+    Resolve the geometry the session is currently displaying.
+
+    frame="auto" uses the RGB frame when an RGB composite is loaded (and no explicit filepath is
+    given), otherwise the current (or requested) FITS image. wait_for_approx blocks until the
+    fitted WCS approximation exists instead of using the exact WCS while it is being built.
+    """
+    frame = (frame or "auto").lower()
+    rgb_generator = _get_rgb_generator(session_data, create=False)
+    rgb_frame = None
+    if frame in ("auto", "rgb") and not filepath and rgb_generator is not None:
+        try:
+            rgb_frame = rgb_generator._rgb_frame()
+        except Exception:
+            rgb_frame = None
+    if frame == "rgb" and (rgb_frame is None or rgb_frame.get("base") is None):
+        raise HTTPException(status_code=400, detail="No RGB frame is loaded in this session.")
+
+    if rgb_frame is not None and rgb_frame.get("base") is not None:
+        base = rgb_frame["base"]
+        base_path = getattr(base, "fits_file_path", None)
+        base_hdu = int(getattr(base, "hdu_index", 0) or 0)
+        bundle = get_wcs_bundle(base_path, base_hdu)
+        if bundle.wcs is None:
+            raise HTTPException(status_code=400, detail="RGB base channel has no celestial WCS.")
+        flip_y = bool(getattr(base, "_flip_required", False))
+        offset_x = float(rgb_frame.get("offset_x", 0.0))
+        offset_y = float(rgb_frame.get("offset_y", 0.0))
+        width = int(rgb_frame.get("width") or base.width)
+        height = int(rgb_frame.get("height") or base.height)
+        return DisplayGeometry(
+            wcs=bundle.wcs,
+            width=width,
+            height=height,
+            source_height=int(base.height),
+            flip_y=flip_y,
+            offset_x=offset_x,
+            offset_y=offset_y,
+            kind="rgb",
+            fingerprint=_geometry_fingerprint(base_path, base_hdu, "rgb", int(flip_y), offset_x, offset_y, width, height),
+            approx=get_wcs_approximation(base_path, base_hdu, wait=wait_for_approx),
+        )
+
+    current_file, hdu_index = _virtual_image_wcs_source(
+        filepath or session_data.get("current_fits_file"),
+        int(hdu if hdu is not None else session_data.get("current_hdu_index", 0)),
+    )
+    full_path = _resolve_session_fits_path(session_data, current_file)
+    bundle = get_wcs_bundle(full_path, hdu_index)
+    if bundle.wcs is None:
+        raise HTTPException(status_code=400, detail="Selected HDU has no celestial WCS.")
+    if bundle.height <= 0 or bundle.width <= 0:
+        raise HTTPException(status_code=400, detail="Selected HDU has no 2D image data.")
+    flip_y = bundle.flip_y
+    try:
+        slice_index = _current_session_slice_index(session_data)
+        gen = session_data.get("active_tile_generators", {}).get(_make_active_file_id(str(full_path), hdu_index, slice_index))
+        if gen is not None:
+            flip_y = bool(getattr(gen, "_flip_required", flip_y))
+    except Exception:
+        pass
+    return DisplayGeometry(
+        wcs=bundle.wcs,
+        width=bundle.width,
+        height=bundle.height,
+        source_height=bundle.height,
+        flip_y=flip_y,
+        kind="image",
+        fingerprint=_geometry_fingerprint(full_path, hdu_index, "image", int(flip_y)),
+        approx=get_wcs_approximation(full_path, hdu_index, wait=wait_for_approx),
+    )
+
+
+def _convert_points_chunked(geometry: DisplayGeometry, method: str, a: np.ndarray, b: np.ndarray,
+                            chunk_points: int = COORD_BULK_CHUNK_POINTS):
+    """
+    Run geometry.<method> ("world_to_display" or "display_to_world") over chunks on the coordinate
+    thread pool. wcslib evaluation on one WCS object is not guaranteed to be thread-safe, so each
+    pool thread converts through its own copy of the geometry's WCS.
+    """
+    n = int(a.size)
+    out_a = np.full(n, np.nan, dtype=np.float64)
+    out_b = np.full(n, np.nan, dtype=np.float64)
+    if n == 0:
+        return out_a, out_b
+    private = threading.local()
+
+    def _run(start: int, stop: int, convert=None) -> None:
+        sl = slice(start, stop)
+        valid = np.isfinite(a[sl]) & np.isfinite(b[sl])
+        if not np.any(valid):
+            return
+        if convert is None:
+            if getattr(private, "convert", None) is None:
+                private.convert = getattr(geometry.with_private_wcs(), method)
+            convert = private.convert
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            ca, cb = convert(a[sl][valid], b[sl][valid])
+        ra_view = out_a[sl]
+        rb_view = out_b[sl]
+        ra_view[valid] = ca
+        rb_view[valid] = cb
+
+    chunk_points = max(1024, int(chunk_points))
+    bounds = [(s, min(n, s + chunk_points)) for s in range(0, n, chunk_points)]
+    if len(bounds) == 1:
+        _run(*bounds[0], convert=getattr(geometry, method))
+    else:
+        for fut in [_coord_executor.submit(_run, s, e) for s, e in bounds]:
+            fut.result()
+    bad = ~(np.isfinite(out_a) & np.isfinite(out_b))
+    out_a[bad] = np.nan
+    out_b[bad] = np.nan
+    return out_a, out_b
+
+
+async def _bulk_coordinate_conversion(request: Request, direction: str, origin: str, filepath: str | None,
+                                      hdu: int | None, frame: str) -> Response:
+    session = getattr(request.state, "session", None)
+    if session is None:
+        raise HTTPException(status_code=401, detail="Missing session")
+    session_data = session.data
+
+    body = await request.body()
+    if len(body) % 16 != 0:
+        raise HTTPException(status_code=400, detail="Body must be packed little-endian float64 pairs (16 bytes per point).")
+    n_points = len(body) // 16
+    if n_points > COORD_BULK_MAX_POINTS:
+        raise HTTPException(status_code=413, detail=f"Too many points ({n_points}); limit is {COORD_BULK_MAX_POINTS}.")
+
+    try:
+        loop = asyncio.get_running_loop()
+        # Resolving the geometry can wait for the WCS approximation fit, so it runs off the event loop too.
+        geometry = await loop.run_in_executor(
+            app.state.thread_executor,
+            lambda: _session_display_geometry(session_data, filepath=filepath, hdu=hdu, frame=frame,
+                                              wait_for_approx=n_points >= WCS_APPROX_WAIT_MIN_POINTS),
+        )
+        pairs = np.frombuffer(body, dtype="<f8").reshape(-1, 2)
+        a = np.ascontiguousarray(pairs[:, 0], dtype=np.float64)
+        b = np.ascontiguousarray(pairs[:, 1], dtype=np.float64)
+
+        def _work():
+            if direction == "world-to-pixel":
+                x, y = _convert_points_chunked(geometry, "world_to_display", a, b)
+                return x, geometry.apply_origin(y, origin)
+            y_top = geometry.apply_origin(b, origin)
+            return _convert_points_chunked(geometry, "display_to_world", a, y_top)
+
+        out_a, out_b = await loop.run_in_executor(app.state.thread_executor, _work)
+        out = np.empty((n_points, 2), dtype="<f8")
+        out[:, 0] = out_a
+        out[:, 1] = out_b
+        return Response(
+            content=out.tobytes(),
+            media_type="application/octet-stream",
+            headers={
+                "X-Point-Count": str(n_points),
+                "X-Image-Width": str(geometry.width),
+                "X-Image-Height": str(geometry.height),
+                "X-Flip-Y": "1" if geometry.flip_y else "0",
+                "X-Frame": geometry.kind,
+                "X-Origin": "bottom" if str(origin).lower().startswith("bottom") else "top",
+                "Cache-Control": "no-store",
+            },
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"{direction} (binary) failed: {e}")
+
+
+@app.post("/world-to-pixel-binary/")
+async def world_to_pixel_binary(
+    request: Request,
+    origin: str = Query("top"),
+    filepath: str | None = Query(None),
+    hdu: int | None = Query(None),
+    frame: str = Query("auto", regex="^(auto|image|rgb)$"),
+):
+    """
+    Bulk RA/Dec -> displayed pixel conversion.
+
+    Body: packed little-endian float64 [ra0, dec0, ra1, dec1, ...] in degrees.
+    Response: packed little-endian float64 [x0, y0, x1, y1, ...]; NaN marks points that could not be converted.
+    """
+    return await _bulk_coordinate_conversion(request, "world-to-pixel", origin, filepath, hdu, frame)
+
+
+@app.post("/pixel-to-world-binary/")
+async def pixel_to_world_binary(
+    request: Request,
+    origin: str = Query("top"),
+    filepath: str | None = Query(None),
+    hdu: int | None = Query(None),
+    frame: str = Query("auto", regex="^(auto|image|rgb)$"),
+):
+    """
+    Bulk displayed pixel -> RA/Dec conversion (inverse of /world-to-pixel-binary/).
+
+    Body: packed little-endian float64 [x0, y0, x1, y1, ...] in displayed pixels (origin as given).
+    Response: packed little-endian float64 [ra0, dec0, ...] in degrees; NaN marks failures.
+    """
+    return await _bulk_coordinate_conversion(request, "pixel-to-world", origin, filepath, hdu, frame)
+
+
 
 @app.get("/fits-binary/")
 @app.get("/canfits-binary/")
@@ -10435,7 +12372,7 @@ def initialize_tile_generator(request: Request, file_id, fits_data):
             fits_file = session_data.get("current_fits_file")
             hdu_index = int(session_data.get("current_hdu_index", 0))
             if fits_file:
-                session_generators[file_id] = SimpleTileGenerator(fits_file, hdu_index)
+                session_generators[file_id] = _new_tile_generator(fits_file, hdu_index)
 
         print(f"Tile generator initialized for {file_id} (session)")
     except Exception as e:
@@ -10471,7 +12408,7 @@ async def get_fits_overview(request: Request, quality: int = 0, file_id: str = Q
             if current_full_path:
                 generator_instance = None
                 if slice_from_id is None or slice_from_id <= 0:
-                    generator_instance = SimpleTileGenerator(current_full_path, hdu_idx_from_id)
+                    generator_instance = _new_tile_generator(current_full_path, hdu_idx_from_id)
                 else:
                     # Read requested slice as 2D for overview rendering
                     with fits.open(current_full_path, ignore_missing_end=True, memmap=True, lazy_load_hdus=True) as hdul:
@@ -11098,6 +13035,7 @@ def _resolve_region_import_wcs(session_data: dict, payload: RegionImportRequest)
     )
     if not fits_path:
         return None
+    fits_path, hdu_index = _virtual_image_wcs_source(fits_path, hdu_index)
     path = Path(str(fits_path))
     if not path.exists() and not path.is_absolute():
         path = Path(FILES_DIRECTORY) / path
@@ -11485,16 +13423,23 @@ async def create_region_cutout(request: Request, payload: RegionCutoutRequest):
                     return resolved
             raise HTTPException(status_code=404, detail=f"FITS file not found: {candidate}")
 
-        fits_path = _resolve_fits_path(fits_file)
-        
         # Prefer an explicit payload HDU when provided (do not override with session HDU)
         hdu_index = int(payload.hdu_index if payload.hdu_index is not None else session_data.get("current_hdu_index", 0))
+
+        # A virtual image is cut on its reference operand's grid, with pixels evaluated from its expression.
+        virtual_image = get_virtual_image(fits_file) if _is_virtual_image_key(fits_file) else None
+        fits_file, hdu_index = _virtual_image_wcs_source(fits_file, hdu_index)
+        fits_path = _resolve_fits_path(fits_file)
         
         # Load the FITS file
         with fits.open(str(fits_path), memmap=True, lazy_load_hdus=True) as hdul:
             hdu = hdul[hdu_index]
             image_data = hdu.data
             header = hdu.header.copy()
+            if virtual_image is not None:
+                # Cutout2D only needs the shape here; the cutout box is evaluated below.
+                image_data = np.broadcast_to(np.float32(np.nan), (virtual_image.height, virtual_image.width))
+                header = virtual_image.header.copy()
             
             if image_data is None or image_data.ndim < 2:
                 raise HTTPException(status_code=400, detail="Invalid image data")
@@ -11638,6 +13583,12 @@ async def create_region_cutout(request: Request, payload: RegionCutoutRequest):
                 )
             except Exception as e:
                 raise HTTPException(status_code=400, detail=f"Failed to create cutout: {str(e)}")
+
+            if virtual_image is not None:
+                virtual_data = np.full(cutout.shape, np.nan, dtype=np.float32)
+                rows, cols = (slice(sl.start, sl.stop, 1) for sl in cutout.slices_original)
+                virtual_data[cutout.slices_cutout] = virtual_image.read_raw(rows, cols)
+                cutout.data = virtual_data
             
             cutout_data = np.array(cutout.data, copy=True)
             region_mask_array = None
@@ -11744,14 +13695,6 @@ def sanitize(val):
         return None
 
 
-@lru_cache(maxsize=16)
-def _get_table_cached(catalogs_dir_str: str, catalog_name: str):
-    catalogs_dir = Path(catalogs_dir_str)
-    tbl = get_astropy_table_from_catalog(catalog_name, catalogs_dir)
-    if tbl is None:
-        raise HTTPException(status_code=404, detail=f"Could not load catalog '{catalog_name}'.")
-    return tbl
-
 @app.get("/catalog-binary-raw/{catalog_name:path}")
 async def catalog_binary_raw(
     request: Request,
@@ -11768,6 +13711,8 @@ async def catalog_binary_raw(
     dec_col: Optional[str] = Query(None, description="Override DEC column name"),
     size_col: Optional[str] = Query(None, description="Override size/radius column name"),
     color_col: Optional[str] = Query(None, description="Column to prefetch for color coding"),
+    selection: Optional[str] = Query(None, description="Selection handle from /range-search/ to restrict rows"),
+    cursor: Optional[str] = Query(None, description="Cursor from a previous page's pagination; serves this page from its cached result set"),
 ):
     from io import BytesIO
     import struct, gzip, numpy as np
@@ -11813,119 +13758,81 @@ async def catalog_binary_raw(
         limit = min(max(limit, 1), 500)
 
         # 1) Load table once from cache (no re-read on every page)
-        table = _get_table_cached(str(catalogs_dir.resolve()), catalog_name)
+        table = get_astropy_table_from_catalog(catalog_name, catalogs_dir)
+        if table is None:
+            raise HTTPException(status_code=404, detail=f"Could not load catalog '{catalog_name}'.")
 
         total_items = len(table)
 
-        # Prepare filtering mask across the full table
-        mask = np.ones(total_items, dtype=bool)
-
         # Determine candidate columns for search/filters
         requested_cols = None
         if columns:
             requested_cols = [c.strip() for c in columns.split(",") if c.strip() and c.strip() in table.colnames]
         candidate_cols = requested_cols if requested_cols is not None else list(table.colnames)
 
-        # Apply simple search (contains on any candidate column)
-        if search:
-            s = str(search).lower()
-            matched = np.zeros(total_items, dtype=bool)
-            for col_name in candidate_cols:
+        # Filtered and sorted rows of this query: computed once, later pages slice the cached result set.
+        result_version = _catalog_result_version(catalog_name, catalogs_dir)
+        result_query = ("raw", search, filters, selection, sort_by, sort_order, tuple(candidate_cols) if search else None)
+        result_set = catalog_result_sets.get(result_version, result_query, cursor)
+        sorted_order = sorted_mask = None
+        if result_set is not None:
+            total_filtered = result_set.size
+        else:
+            # Prepare filtering mask across the full table
+            mask = np.ones(total_items, dtype=bool)
+
+            # Apply simple search (contains on any candidate column) and advanced column filters
+            query_dictionaries = _catalog_query_dictionaries(catalog_name, catalogs_dir) if (search or filters or sort_by) else {}
+            if search or filters:
+                mask &= _catalog_query_mask(
+                    table, total_items, search, filters, search_columns=candidate_cols,
+                    dictionaries=query_dictionaries,
+                )
+            if selection:
+                mask &= _catalog_selection_mask(selection, catalog_name, catalogs_dir, total_items)
+
+            # Indices after filtering
+            filtered_indices = np.where(mask)[0]
+
+            # Sorting: the cached per-column permutation restricted to the filtered rows.
+            if sort_by:
                 try:
-                    col = table[col_name]
-                    # Convert to strings safely
-                    vals = np.array([str(x).lower() if x is not None else '' for x in col])
-                    matched |= np.char.find(vals, s) >= 0
+                    if sort_by in table.colnames:
+                        order = _catalog_sort_order(catalog_name, catalogs_dir, table, sort_by, sort_order == 'desc',
+                                                    query_dictionaries.get(sort_by))
+                        if order is not None:
+                            sorted_order = order
+                            sorted_mask = None if filtered_indices.size == total_items else mask
+                        else:
+                            filtered_indices = _catalog_sort_indices(table[sort_by], filtered_indices, sort_order == 'desc',
+                                                                     query_dictionaries.get(sort_by))
+                    elif sort_order == 'desc':
+                        # sort by derived columns like 'ra'/'dec' handled later after detection
+                        filtered_indices = filtered_indices[::-1]
                 except Exception:
-                    continue
-            mask &= matched
-
-        # Apply advanced column filters if provided
-        if filters:
-            try:
-                filter_dict = json.loads(filters)
-                if isinstance(filter_dict, dict):
-                    for col_name, cfg in filter_dict.items():
-                        if col_name not in table.colnames or not isinstance(cfg, dict):
-                            continue
-                        col = table[col_name]
-                        try:
-                            kind = cfg.get('type')
-                            if kind == 'range':
-                                vmin = cfg.get('min')
-                                vmax = cfg.get('max')
-                                arr = np.array(col, dtype=float)
-                                cond = np.ones_like(arr, dtype=bool)
-                                if vmin is not None:
-                                    try:
-                                        cond &= arr >= float(vmin)
-                                    except Exception:
-                                        cond &= False
-                                if vmax is not None:
-                                    try:
-                                        cond &= arr <= float(vmax)
-                                    except Exception:
-                                        cond &= False
-                                mask &= cond
-                            elif kind == 'equals':
-                                value = cfg.get('value')
-                                # Try numeric compare first, fallback to string
-                                try:
-                                    arr = np.array(col, dtype=float)
-                                    valf = float(value)
-                                    cond = arr == valf
-                                except Exception:
-                                    vals = np.array([str(x) for x in col])
-                                    cond = vals == str(value)
-                                mask &= cond
-                            elif kind == 'contains':
-                                value = cfg.get('value')
-                                if value is not None:
-                                    vals = np.array([str(x).lower() if x is not None else '' for x in col])
-                                    cond = np.char.find(vals, str(value).lower()) >= 0
-                                    mask &= cond
-                        except Exception:
-                            # Ignore broken filters on this column
-                            continue
-            except json.JSONDecodeError:
-                pass
+                    pass
+            total_filtered = int(filtered_indices.size)
+            if sorted_order is not None:
+                # The ordered rows are only gathered if a later page asks for them.
+                result_set = catalog_result_sets.put_ordered(result_version, result_query, sorted_order, sorted_mask,
+                                                             total_filtered)
+            else:
+                result_set = catalog_result_sets.put(result_version, result_query, filtered_indices)
 
         # limit already capped above
-
-        # Indices after filtering
-        filtered_indices = np.where(mask)[0]
-
-        # Sorting
-        if sort_by:
-            try:
-                if sort_by in table.colnames:
-                    col = table[sort_by]
-                    try:
-                        vals = np.array(col, dtype=float)
-                    except Exception:
-                        vals = np.array([str(x) for x in col])
-                else:
-                    # sort by derived columns like 'ra'/'dec' handled later after detection
-                    col = None
-                    vals = None
-                if vals is not None:
-                    order = np.argsort(vals[filtered_indices])
-                else:
-                    order = np.argsort(filtered_indices)
-                if sort_order == 'desc':
-                    order = order[::-1]
-                filtered_indices = filtered_indices[order]
-            except Exception:
-                pass
-
-        # Pagination window
-        total_filtered = int(filtered_indices.size)
         start_idx = (page - 1) * limit
         end_idx = min(start_idx + limit, total_filtered)
+
+        # Pagination window
         if start_idx >= total_filtered:
             page_indices = np.arange(0, 0, dtype=int)
+        elif sorted_order is not None:
+            # Walk the cached permutation only as far as this page.
+            page_indices = _catalog_sorted_page(sorted_order, sorted_mask, start_idx, end_idx)
+        elif result_set is not None:
+            page_indices = result_set.page(start_idx, end_idx)
         else:
-            page_indices = filtered_indices[start_idx:end_idx]
+            page_indices = np.asarray(filtered_indices[start_idx:end_idx], dtype=np.intp)
 
         # 2) Core numeric fields, best-effort RA/DEC and radius-like detection
         ra_col_detected, dec_col_detected = detect_coordinate_columns(table.colnames)
@@ -12104,31 +14011,8 @@ async def catalog_binary_raw(
                 except Exception:
                     pass
 
-        # 5) Boolean columns for UI (computed once, cached with table)
-        boolean_columns = []
-        if len(table) > 0:
-            for col_name in table.colnames:
-                col = table[col_name]
-                dt = getattr(col, "dtype", None)
-                if dt is None:
-                    continue
-                if dt.kind == 'b':
-                    boolean_columns.append(col_name)
-                elif dt.kind in ('i', 'u'):
-                    try:
-                        unique_vals = np.unique(col[:min(len(col), 100)])
-                        if np.all(np.isin(unique_vals, [0, 1])):
-                            boolean_columns.append(col_name)
-                    except Exception:
-                        pass
-                elif dt.kind in ('S', 'U'):
-                    try:
-                        sample_vals = np.char.lower(col[:10].astype(str))
-                        tf_vals = ['true', 'false', 't', 'f', 'yes', 'no', 'y', 'n', '1', '0']
-                        if np.any(np.isin(sample_vals, tf_vals)):
-                            boolean_columns.append(col_name)
-                    except Exception:
-                        pass
+        # 5) Boolean columns for UI (detected at ingest for stored catalogs)
+        boolean_columns = _catalog_boolean_columns(catalog_name, catalogs_dir, table)
 
         # 6) Header + page
         header = {
@@ -12142,7 +14026,8 @@ async def catalog_binary_raw(
                 "total_items": int(total_filtered),
                 "total_pages": (int(total_filtered) + limit - 1) // limit,
                 "has_next": end_idx < int(total_filtered),
-                "has_prev": page > 1
+                "has_prev": page > 1,
+                "cursor": result_set.cursor if result_set is not None else None,
             },
             "field_info": {
                 "ra": {"dtype": "float64", "offset": 0},
@@ -12197,6 +14082,705 @@ async def catalog_binary_raw(
         logger.error(f"Error in catalog_binary_raw: {e}", exc_info=True)
         return JSONResponse(status_code=500, content={"error": str(e)})
 
+# --- Catalog overlay level of detail ---
+# With a view rectangle and zoom, /catalog-binary/ returns the sources inside the view thinned
+# to a budget per screen cell. Cells form a quadtree over display pixels (2**-level pixels on a
+# side, aligned to the frame origin) and each cell keeps its top-ranked sources over the whole
+# cell, so every coarser level is a subset of every finer one and a client that zooms in only
+# needs the difference (since_level).
+
+CATALOG_LOD_CELL_PX = int(os.getenv('CATALOG_LOD_CELL_PX', '32'))
+CATALOG_LOD_PER_CELL = int(os.getenv('CATALOG_LOD_PER_CELL', '1'))
+CATALOG_LOD_MAX_POINTS = int(os.getenv('CATALOG_LOD_MAX_POINTS', '50000'))
+# Default ranking when no priority column is given: first numeric column whose name contains the hint.
+_CATALOG_PRIORITY_HINTS = (('mag', 'asc'), ('flux', 'desc'), ('snr', 'desc'))
+
+
+def _catalog_lod_level(zoom: float, cell_px: int = CATALOG_LOD_CELL_PX) -> int:
+    """Quadtree level whose cells (2**-level display pixels) span at least cell_px screen pixels at zoom."""
+    return int(-np.ceil(np.log2(max(float(cell_px), 1.0) / float(zoom))))
+
+
+def _parse_catalog_view(view: str) -> tuple:
+    try:
+        x0, y0, x1, y1 = (float(v) for v in str(view).split(','))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="'view' must be x0,y0,x1,y1.")
+    if not np.all(np.isfinite([x0, y0, x1, y1])) or x1 <= x0 or y1 <= y0:
+        raise HTTPException(status_code=400, detail="'view' must be a non-empty rectangle x0,y0,x1,y1.")
+    return x0, y0, x1, y1
+
+
+def _catalog_radius_pixels(catalog_table: Table, size_col: Optional[str], size_unit: Optional[str],
+                           arcsec_per_pixel: Optional[float]) -> np.ndarray:
+    """Per-row marker radius in display pixels from size_col (a column or a constant) and size_unit; 5 px by default."""
+    if size_col and (size_col in catalog_table.colnames):
+        try:
+            raw_size = np.array(catalog_table[size_col], dtype=float)
+
+            # Decide size unit
+            inferred_unit = (size_unit or "").strip().lower()
+            if inferred_unit in ("pix", "pixel", "pixels", "px"):
+                size_arcsec = None
+            elif inferred_unit in ("arcsec", "arcsecs", "arcsecond", "arcseconds", "asec", "\""):
+                size_arcsec = raw_size
+            elif inferred_unit in ("deg", "degree", "degrees"):
+                size_arcsec = raw_size * 3600.0
+            elif inferred_unit in ("rad", "radian", "radians"):
+                size_arcsec = raw_size * (180.0 / np.pi) * 3600.0
+            else:
+                # Try FITS/astropy column unit first
+                size_arcsec = None
+                try:
+                    from astropy import units as u
+                    col_unit = getattr(catalog_table[size_col], "unit", None)
+                    if col_unit is not None and str(col_unit).strip() != "":
+                        unit_obj = u.Unit(str(col_unit))
+                        if unit_obj.is_equivalent(u.arcsec):
+                            size_arcsec = (raw_size * unit_obj).to_value(u.arcsec)
+                        elif unit_obj.is_equivalent(u.deg):
+                            size_arcsec = (raw_size * unit_obj).to_value(u.deg) * 3600.0
+                        elif unit_obj.is_equivalent(u.rad):
+                            size_arcsec = (raw_size * unit_obj).to_value(u.rad) * (180.0 / np.pi) * 3600.0
+                except Exception:
+                    size_arcsec = None
+
+                # Heuristic fallback for common angular columns when unit is missing
+                if size_arcsec is None:
+                    if (size_col or "").strip().lower() in (
+                        "bmaj", "bmin", "fwhm", "major", "minor", "maj", "min"
+                    ):
+                        size_arcsec = raw_size
+
+            if size_arcsec is not None and arcsec_per_pixel is not None:
+                radius_px = np.array(size_arcsec, dtype=float) / max(arcsec_per_pixel, 1e-12)
+            else:
+                radius_px = raw_size
+
+            radius_px = np.where(np.isfinite(radius_px) & (radius_px > 0), radius_px, 5.0).astype(np.float32)
+        except Exception:
+            radius_px = np.full(len(catalog_table), 5.0, dtype=np.float32)
+    elif size_col:
+        # Support constant radii passed as `size_col=10` (common deep-link use)
+        # when the catalog does not have a column literally named "10".
+        try:
+            const_r = float(str(size_col).strip())
+            if np.isfinite(const_r) and const_r > 0:
+                unit_txt = (size_unit or "").strip().lower()
+                # For constant sizes, interpret unit via size_unit:
+                # - pixels/px => pixels
+                # - arcsec/deg/rad => angular converted using WCS scale
+                if unit_txt in ("arcsec", "arcsecs", "arcsecond", "arcseconds", "asec", "\""):
+                    if arcsec_per_pixel is not None:
+                        const_r = float(const_r) / max(float(arcsec_per_pixel), 1e-12)
+                elif unit_txt in ("deg", "degree", "degrees"):
+                    if arcsec_per_pixel is not None:
+                        const_r = (float(const_r) * 3600.0) / max(float(arcsec_per_pixel), 1e-12)
+                elif unit_txt in ("rad", "radian", "radians"):
+                    if arcsec_per_pixel is not None:
+                        const_r = (float(const_r) * (180.0 / np.pi) * 3600.0) / max(float(arcsec_per_pixel), 1e-12)
+                # else: treat as pixels by default
+                radius_px = np.full(len(catalog_table), float(const_r), dtype=np.float32)
+            else:
+                radius_px = np.full(len(catalog_table), 5.0, dtype=np.float32)
+        except Exception:
+            radius_px = np.full(len(catalog_table), 5.0, dtype=np.float32)
+    else:
+        radius_px = np.full(len(catalog_table), 5.0, dtype=np.float32)
+    return radius_px
+
+
+def _catalog_priority_column(catalog_table: Table, priority_col: Optional[str] = None, priority_order: Optional[str] = None) -> tuple:
+    """(column name, 'asc' | 'desc') ranking sources; (None, None) when no column applies."""
+    if priority_col:
+        name = _query_column_name(catalog_table.colnames, priority_col)
+        if name is None:
+            raise HTTPException(status_code=400, detail=f"Unknown priority column '{priority_col}'.")
+        return name, priority_order or 'desc'
+    for hint, hint_order in _CATALOG_PRIORITY_HINTS:
+        name = next((c for c in catalog_table.colnames
+                     if hint in c.lower() and catalog_table[c].ndim == 1 and catalog_table[c].dtype.kind in ('i', 'u', 'f')), None)
+        if name is not None:
+            return name, priority_order or hint_order
+    return None, None
+
+
+def _catalog_priority(catalog_table: Table, priority_col: Optional[str] = None, priority_order: Optional[str] = None) -> tuple:
+    """(column name, per-row rank key where smaller ranks first); (None, None) ranks by row order."""
+    name, order = _catalog_priority_column(catalog_table, priority_col, priority_order)
+    if name is None:
+        return None, None
+    raw, valid = _query_raw(catalog_table[name])
+    values, ok = _query_floats(raw)
+    key = np.array(values if order == 'asc' else -values, dtype=np.float64)
+    key[~(valid & ok & np.isfinite(key))] = np.inf
+    return name, key
+
+
+def _catalog_lod_cells(x: np.ndarray, y: np.ndarray, cell_size: float) -> np.ndarray:
+    cx = np.floor(np.asarray(x, dtype=float) / cell_size).astype(np.int64)
+    cy = np.floor(np.asarray(y, dtype=float) / cell_size).astype(np.int64)
+    if not cx.size:
+        return cx
+    return (cx - cx.min()) * (int(cy.max() - cy.min()) + 1) + (cy - cy.min())
+
+
+def _catalog_lod_keep(rows: np.ndarray, x, y, rank_key, cell_size: float, per_cell: int) -> np.ndarray:
+    """Mask of rows ranked within the first per_cell of their cell (ties broken by row index)."""
+    keep = np.zeros(len(rows), dtype=bool)
+    if not len(rows):
+        return keep
+    cells = _catalog_lod_cells(x, y, cell_size)
+    order = np.lexsort((rows, cells) if rank_key is None else (rows, rank_key, cells))
+    sorted_cells = cells[order]
+    starts = np.flatnonzero(np.r_[True, sorted_cells[1:] != sorted_cells[:-1]])
+    rank = np.arange(len(order)) - np.repeat(starts, np.diff(np.r_[starts, len(order)]))
+    keep[order[rank < per_cell]] = True
+    return keep
+
+
+def _catalog_lod_aggregate(x, y, ra, dec, cell_size: float) -> dict:
+    """Per-cell counts with mean display position and mean sky position of the sources in each cell."""
+    cells = _catalog_lod_cells(x, y, cell_size)
+    _, inverse, counts = np.unique(cells, return_inverse=True, return_counts=True)
+    mean = lambda v: np.bincount(inverse, weights=np.asarray(v, dtype=float), minlength=len(counts)) / counts
+    xyz = _radec_to_unit(ra, dec).reshape(-1, 3)
+    center = np.stack([mean(xyz[:, i]) for i in range(3)], axis=-1)
+    sky_ra, sky_dec = _unit_to_radec(center / np.linalg.norm(center, axis=1, keepdims=True))
+    return {"counts": counts, "x": mean(x), "y": mean(y), "ra": sky_ra, "dec": sky_dec}
+
+
+
+# --- Catalog overlay tiles ---
+# Catalogs too dense to draw marker by marker in the browser are rasterized here into
+# transparent PNG tiles on the /fits-tile pyramid (same tileSize and maxLevel), so the client
+# composites one more tiled layer whatever the row count. Positions are projected once per
+# (catalog, display geometry) and bucketed by finest-level tile; density tiles at coarse
+# levels are cut from a precomputed count pyramid instead of touching rows.
+CATALOG_TILE_SOURCES_MAX = int(os.getenv('CATALOG_TILE_SOURCES_MAX', '8'))
+CATALOG_TILE_CACHE_SIZE = int(os.getenv('CATALOG_TILE_CACHE_SIZE', '2000'))
+CATALOG_TILE_DENSITY_GRID = int(os.getenv('CATALOG_TILE_DENSITY_GRID', '2048'))  # max side of the finest count grid
+CATALOG_TILE_MARKER_CELL = int(os.getenv('CATALOG_TILE_MARKER_CELL', '8'))  # tile pixels per marker thinning cell
+CATALOG_TILE_MARKERS_PER_CELL = int(os.getenv('CATALOG_TILE_MARKERS_PER_CELL', '4'))
+
+
+class CatalogTileSource:
+    """
+    Display positions of one catalog in one display geometry, sorted by finest-level tile.
+
+    Positions use the x_pixels/y_pixels frame of /catalog-binary/ (0-based display pixels + 1) so
+    tiles and browser-drawn markers coincide. Only sources inside the frame are kept.
+    """
+
+    def __init__(self, x, y, width: int, height: int, tile_size: int = IMAGE_TILE_SIZE_PX):
+        self.width = int(width)
+        self.height = int(height)
+        self.tile_size = int(tile_size)
+        self.max_level = max(0, int(np.ceil(np.log2(max(self.width, self.height) / self.tile_size))))
+        self.token = ""  # set by the cache; identifies catalog file + columns + geometry
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        inside = np.isfinite(x) & np.isfinite(y) & (x >= 0.0) & (y >= 0.0) & (x < self.width) & (y < self.height)
+        rows = np.flatnonzero(inside)
+        # Bucket on the stored float32 values so tile bounds and buckets agree exactly.
+        u = (x[rows] + 1.0).astype(np.float32)
+        v = (y[rows] + 1.0).astype(np.float32)
+        ts = self.tile_size
+        self.ncx = self.width // ts + 1
+        self.ncy = self.height // ts + 1
+        cells = (v // ts).astype(np.int64) * self.ncx + (u // ts).astype(np.int64)
+        order = np.argsort(cells, kind='stable')
+        self.rows = rows[order].astype(np.int32 if x.size < 2 ** 31 else np.int64)
+        self.u = u[order]
+        self.v = v[order]
+        self.offsets = np.searchsorted(cells[order], np.arange(self.ncx * self.ncy + 1))
+
+        # Counts per bin of density_bin pixels, then 2x2 sums down to a single bin.
+        self.density_bin = 2 ** max(0, int(np.ceil(np.log2((max(self.width, self.height) + 1) / CATALOG_TILE_DENSITY_GRID))))
+        gw = self.width // self.density_bin + 1
+        gh = self.height // self.density_bin + 1
+        flat = (self.v // self.density_bin).astype(np.int64) * gw + (self.u // self.density_bin).astype(np.int64)
+        grid = np.bincount(flat, minlength=gw * gh).astype(np.int32).reshape(gh, gw)
+        self.density = [grid]
+        while max(grid.shape) > 1:
+            grid = np.pad(grid, ((0, grid.shape[0] % 2), (0, grid.shape[1] % 2)))
+            grid = grid[0::2, 0::2] + grid[1::2, 0::2] + grid[0::2, 1::2] + grid[1::2, 1::2]
+            self.density.append(grid)
+        self.density_max = [int(g.max()) if g.size else 0 for g in self.density]
+        self._derived: dict = {}
+        self._derived_lock = threading.Lock()
+
+    @property
+    def nbytes(self) -> int:
+        arrays = [self.rows, self.u, self.v, self.offsets, *self.density]
+        for value in self._derived.values():
+            arrays += [a for a in (value if isinstance(value, tuple) else (value,)) if isinstance(a, np.ndarray)]
+        return int(sum(a.nbytes for a in arrays))
+
+    def scale(self, level: int) -> float:
+        """Display pixels per tile pixel at a pyramid level."""
+        return 2.0 ** (self.max_level - int(level))
+
+    def positions(self, u0: float, v0: float, u1: float, v1: float) -> np.ndarray:
+        """Indices (into rows/u/v) of the sources with u0 <= u < u1 and v0 <= v < v1."""
+        ts = self.tile_size
+        cx0 = max(0, int(np.floor(u0 / ts)))
+        cy0 = max(0, int(np.floor(v0 / ts)))
+        cx1 = min(self.ncx - 1, int(np.floor(u1 / ts)))
+        cy1 = min(self.ncy - 1, int(np.floor(v1 / ts)))
+        if cx1 < cx0 or cy1 < cy0:
+            return np.zeros(0, dtype=np.int64)
+        pos = np.concatenate([
+            np.arange(self.offsets[cy * self.ncx + cx0], self.offsets[cy * self.ncx + cx1 + 1])
+            for cy in range(cy0, cy1 + 1)
+        ])
+        u = self.u[pos]
+        v = self.v[pos]
+        return pos[(u >= u0) & (u < u1) & (v >= v0) & (v < v1)]
+
+    def row_positions(self, nrows: int) -> tuple:
+        """(u, v) float32 per catalog row, NaN for rows outside the frame; built once."""
+        def build():
+            u = np.full(nrows, np.nan, dtype=np.float32)
+            v = np.full(nrows, np.nan, dtype=np.float32)
+            u[self.rows] = self.u
+            v[self.rows] = self.v
+            return u, v
+        return self.derived("row_positions", build)
+
+    def derived(self, key, build):
+        """Per-source array (aligned with rows) derived from catalog columns, built once."""
+        with self._derived_lock:
+            value = self._derived.get(key)
+            if value is None:
+                value = build()
+                self._derived[key] = value
+            return value
+
+
+class CatalogTileSourceCache:
+    """Tile sources keyed by (catalog path, RA column, Dec column, display geometry fingerprint)."""
+
+    def __init__(self, max_open: int = CATALOG_TILE_SOURCES_MAX):
+        self.max_open = max(1, int(max_open))
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.RLock()
+        self._load_locks: dict[str, threading.Lock] = {}
+        self.hits = 0
+        self.misses = 0
+        self.build_seconds = 0.0
+
+    def _lookup(self, key: str, size: int, mtime_ns: int):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] != size or entry[1] != mtime_ns:
+            self._entries.pop(key, None)
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def get(self, path_like, ra_col: str, dec_col: str, geometry: "DisplayGeometry", positions) -> CatalogTileSource:
+        """Source for a catalog in a geometry; positions() returns display (x, y) per row and runs only on a miss."""
+        path = Path(path_like).resolve()
+        st = path.stat()
+        key = f"{path}#{ra_col}#{dec_col}#{geometry.fingerprint}"
+        with self._lock:
+            entry = self._lookup(key, st.st_size, st.st_mtime_ns)
+            if entry is not None:
+                self.hits += 1
+                return entry[2]
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+        with load_lock:
+            with self._lock:
+                entry = self._lookup(key, st.st_size, st.st_mtime_ns)
+                if entry is not None:
+                    self.hits += 1
+                    return entry[2]
+                self.misses += 1
+            t0 = time.perf_counter()
+            try:
+                x, y = positions()
+                source = CatalogTileSource(x, y, geometry.width, geometry.height)
+                source.token = f"{key}#{st.st_size}#{st.st_mtime_ns}"
+            except BaseException:
+                with self._lock:
+                    self.build_seconds += time.perf_counter() - t0
+                    self._load_locks.pop(key, None)
+                raise
+            # Publish the source and retire the load lock together, so no caller can miss both.
+            with self._lock:
+                self.build_seconds += time.perf_counter() - t0
+                self._entries[key] = (st.st_size, st.st_mtime_ns, source)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_open:
+                    self._entries.popitem(last=False)
+                self._load_locks.pop(key, None)
+            return source
+
+    def peek(self, path_like, ra_col: str, dec_col: str, geometry: "DisplayGeometry") -> Optional[CatalogTileSource]:
+        """The source for a catalog in a geometry when it is already cached, else None (never projects)."""
+        path = Path(path_like).resolve()
+        st = path.stat()
+        with self._lock:
+            entry = self._lookup(f"{path}#{ra_col}#{dec_col}#{geometry.fingerprint}", st.st_size, st.st_mtime_ns)
+            return entry[2] if entry is not None else None
+
+    def invalidate(self, path_like=None) -> None:
+        with self._lock:
+            if path_like is None:
+                self._entries.clear()
+                return
+            try:
+                prefix = f"{Path(path_like).resolve()}#"
+            except Exception:
+                prefix = f"{path_like}#"
+            for key in [k for k in self._entries if k.startswith(prefix)]:
+                self._entries.pop(key, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"open": len(self._entries), "max_open": self.max_open, "hits": self.hits,
+                    "misses": self.misses, "build_seconds": round(self.build_seconds, 3),
+                    "bytes": sum(entry[2].nbytes for entry in self._entries.values())}
+
+
+catalog_tile_sources = CatalogTileSourceCache()
+# Rendered PNGs; keys carry the source token and every style parameter, so they are shared by sessions.
+catalog_tile_cache = TileCache(max_size=CATALOG_TILE_CACHE_SIZE)
+
+
+@lru_cache(maxsize=64)
+def _colormap_lut(name: str) -> np.ndarray:
+    color_map_func = COLOR_MAPS_PY.get(resolve_color_map_key(name) or "grayscale", COLOR_MAPS_PY["grayscale"])
+    return np.array([color_map_func(i) for i in range(256)], dtype=np.uint8)
+
+
+def _catalog_tile_source(request: Request, catalog_name: str, ra_col: Optional[str], dec_col: Optional[str]) -> tuple:
+    """(catalog table, tile source, display geometry) for a catalog in the session's current display."""
+    session = getattr(request.state, "session", None)
+    if session is None:
+        raise HTTPException(status_code=401, detail="Missing session")
+    catalogs_dir = Path(CATALOGS_DIRECTORY)
+    path = _locate_catalog_file(catalog_name, catalogs_dir)
+    catalog_table = get_astropy_table_from_catalog(catalog_name, catalogs_dir) if path is not None else None
+    if catalog_table is None:
+        raise HTTPException(status_code=404, detail=f"Could not load catalog '{catalog_name}'.")
+    detected_ra, detected_dec = detect_coordinate_columns(catalog_table.colnames)
+    ra_name = _query_column_name(catalog_table.colnames, ra_col) if ra_col else detected_ra
+    dec_name = _query_column_name(catalog_table.colnames, dec_col) if dec_col else detected_dec
+    if not ra_name or not dec_name:
+        raise HTTPException(status_code=400, detail="Could not resolve the RA/Dec columns of the catalog.")
+    geometry = _session_display_geometry(session.data)
+    try:
+        source = _catalog_display_source(path, catalog_table, ra_name, dec_name, geometry)
+    except (TypeError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=f"Could not project catalog positions: {e}")
+    return catalog_table, source, geometry
+
+
+def _catalog_display_source(path, catalog_table: Table, ra_name: str, dec_name: str, geometry: "DisplayGeometry") -> CatalogTileSource:
+    """
+    Positions of every catalog row in a display geometry, projected in parallel chunks on the
+    coordinate pool the first time and then shared by overlay tiles and /catalog-binary/.
+    """
+    def _positions():
+        ra_deg = _catalog_degrees(catalog_table[ra_name])
+        dec_deg = _catalog_degrees(catalog_table[dec_name])
+        return _convert_points_chunked(geometry, "world_to_display", ra_deg, dec_deg)
+
+    return catalog_tile_sources.get(path, ra_name, dec_name, geometry, _positions)
+
+
+def _catalog_density_counts(source: CatalogTileSource, level: int, x: int, y: int) -> tuple:
+    """(tile_size x tile_size source counts of a tile, peak count used to normalize the level)."""
+    ts = source.tile_size
+    s = source.scale(level)
+    if s >= source.density_bin:
+        k = int(round(np.log2(s / source.density_bin)))
+        grid = source.density[k]
+        counts = np.zeros((ts, ts), dtype=np.int64)
+        block = grid[y * ts:(y + 1) * ts, x * ts:(x + 1) * ts]
+        counts[:block.shape[0], :block.shape[1]] = block
+        vmax = source.density_max[k]
+    else:
+        u0, v0 = x * ts * s, y * ts * s
+        pos = source.positions(u0, v0, u0 + ts * s, v0 + ts * s)
+        ix = np.clip(((source.u[pos] - u0) / s).astype(np.int64), 0, ts - 1)
+        iy = np.clip(((source.v[pos] - v0) / s).astype(np.int64), 0, ts - 1)
+        counts = np.bincount(iy * ts + ix, minlength=ts * ts).reshape(ts, ts)
+        # Expected peak at this bin size, so fine levels share the coarse levels' scale.
+        vmax = source.density_max[0] * (s / source.density_bin) ** 2
+    return counts, vmax
+
+
+def _render_catalog_density_tile(source: CatalogTileSource, level: int, x: int, y: int, colormap: str, opacity: float) -> bytes:
+    ts = source.tile_size
+    counts, vmax = _catalog_density_counts(source, level, x, y)
+    norm = np.log1p(counts) / np.log1p(max(float(vmax), 1.0))
+    rgba = np.zeros((ts, ts, 4), dtype=np.uint8)
+    rgba[..., :3] = _colormap_lut(colormap)[(np.clip(norm, 0.0, 1.0) * 255).astype(np.uint8)]
+    rgba[..., 3] = np.where(counts > 0, int(round(255 * opacity)), 0)
+    buffer = io.BytesIO()
+    Image.fromarray(rgba, 'RGBA').save(buffer, format='PNG', optimize=False, compress_level=1)
+    return buffer.getvalue()
+
+
+def _catalog_marker_positions(source: CatalogTileSource, catalog_table: Table, level: int, x: int, y: int, style: dict) -> tuple:
+    """(positions of the markers a tile draws, per-source radius, per-source rank key or None)."""
+    ts = source.tile_size
+    s = source.scale(level)
+    size_key = ("radius", style["size_col"], style["size_unit"])
+
+    def _radius():
+        arcsec_per_pixel = None
+        try:
+            arcsec_per_pixel = float(_compute_arcsec_per_pixel(style["wcs"]))
+        except Exception:
+            pass
+        return _catalog_radius_pixels(catalog_table, style["size_col"], style["size_unit"], arcsec_per_pixel)[source.rows]
+
+    radius = source.derived(size_key, _radius)
+    max_radius = float(source.derived(size_key + ("max",), lambda: np.array([radius.max() if radius.size else 0.0]))[0])
+
+    # Thinning cells are aligned to the frame origin and the tile is grown by whole cells, so every
+    # tile keeps the same sources near a shared edge and markers are never cut at tile borders.
+    cell = CATALOG_TILE_MARKER_CELL * s
+    margin = np.ceil((max_radius + style["line_width"] * s) / cell) * cell
+    u0, v0 = x * ts * s, y * ts * s
+    pos = source.positions(u0 - margin, v0 - margin, u0 + ts * s + margin, v0 + ts * s + margin)
+    rank = None
+    if style["priority_name"] is not None:
+        rank = source.derived(("priority", style["priority_name"], style["priority_order"]),
+                              lambda: _catalog_priority(catalog_table, style["priority_name"], style["priority_order"])[1][source.rows])
+    pos = pos[_catalog_lod_keep(pos, source.u[pos], source.v[pos], None if rank is None else rank[pos], cell, style["per_cell"])]
+    return pos, radius, rank
+
+
+def _render_catalog_marker_tile(source: CatalogTileSource, catalog_table: Table, level: int, x: int, y: int, style: dict) -> bytes:
+    from PIL import ImageDraw
+
+    ts = source.tile_size
+    s = source.scale(level)
+    u0, v0 = x * ts * s, y * ts * s
+    pos, radius, rank = _catalog_marker_positions(source, catalog_table, level, x, y, style)
+    stroke = np.tile(np.array(style["color"], dtype=np.uint8), (len(pos), 1))
+    if style["color_col"] is not None:
+        def _values():
+            raw, valid = _query_raw(catalog_table[style["color_col"]])
+            values, ok = _query_floats(raw)
+            values = np.array(values, dtype=float)
+            values[~(valid & ok)] = np.nan
+            return values[source.rows]
+
+        values = source.derived(("color", style["color_col"]), _values)
+        vmin, vmax = style["vmin"], style["vmax"]
+        if vmin is None or vmax is None:
+            lo, hi = source.derived(("color_range", style["color_col"]), lambda: (
+                np.nanpercentile(values, [1, 99]) if np.isfinite(values).any() else np.array([0.0, 1.0])))
+            vmin = lo if vmin is None else vmin
+            vmax = hi if vmax is None else vmax
+        vals = values[pos]
+        t = np.clip((vals - vmin) / ((vmax - vmin) or 1.0), 0.0, 1.0)
+        finite = np.isfinite(t)
+        stroke[finite] = _colormap_lut(style["colormap"])[(t[finite] * 255).astype(np.uint8)]
+
+    img = Image.new('RGBA', (ts, ts), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(img, 'RGBA')
+    alpha = int(round(255 * style["opacity"]))
+    fill_alpha = int(round(255 * style["fill_opacity"]))
+    px = (source.u[pos] - u0) / s
+    py = (source.v[pos] - v0) / s
+    r = np.maximum(radius[pos] / s, 0.75)
+    # Lowest priority first so the highest-ranked markers end up on top.
+    order = np.arange(len(pos))[::-1] if rank is None else np.argsort(-rank[pos], kind='stable')
+    width = max(1, int(round(style["line_width"])))
+    for i in order:
+        c = tuple(int(v) for v in stroke[i])
+        box = (px[i] - r[i], py[i] - r[i], px[i] + r[i], py[i] + r[i])
+        draw.ellipse(box, outline=c + (alpha,), fill=(c + (fill_alpha,)) if fill_alpha else None, width=width)
+    buffer = io.BytesIO()
+    img.save(buffer, format='PNG', optimize=False, compress_level=1)
+    return buffer.getvalue()
+
+
+@app.get("/catalog-tile-info/{catalog_name:path}")
+async def catalog_tile_info(
+    request: Request,
+    catalog_name: str,
+    ra_col: Optional[str] = Query(None, description="Override RA column name"),
+    dec_col: Optional[str] = Query(None, description="Override DEC column name"),
+):
+    """Pyramid of /catalog-tile/ for a catalog in the current display (matches /fits-tile-info/)."""
+    loop = asyncio.get_running_loop()
+    _, source, _ = await loop.run_in_executor(app.state.thread_executor, _catalog_tile_source, request, catalog_name, ra_col, dec_col)
+    return {
+        "width": source.width,
+        "height": source.height,
+        "tileSize": source.tile_size,
+        "maxLevel": source.max_level,
+        "minLevel": 0,
+        "sources": int(source.rows.size),
+        "density_bin": source.density_bin,
+        "version": hashlib.sha1(source.token.encode("utf-8")).hexdigest()[:12],
+    }
+
+
+@app.get("/catalog-tile/{level}/{x}/{y}")
+async def catalog_tile(
+    request: Request,
+    level: int,
+    x: int,
+    y: int,
+    catalog_name: str = Query(..., description="Catalog file name"),
+    mode: str = Query("density", regex="^(density|markers)$", description="density: counts heatmap; markers: one circle per source"),
+    ra_col: Optional[str] = Query(None, description="Override RA column name"),
+    dec_col: Optional[str] = Query(None, description="Override DEC column name"),
+    colormap: Optional[str] = Query(None, description="Colormap for density or color_col (default inferno / viridis)"),
+    opacity: float = Query(0.85, ge=0.0, le=1.0),
+    color: str = Query("#ff0000", description="Marker colour when color_col is not given"),
+    color_col: Optional[str] = Query(None, description="Numeric column colour-coding the markers"),
+    vmin: Optional[float] = Query(None, description="color_col value at the bottom of the colormap (default: 1st percentile)"),
+    vmax: Optional[float] = Query(None, description="color_col value at the top of the colormap (default: 99th percentile)"),
+    size_col: Optional[str] = Query(None, description="Radius column (or a constant); see /catalog-binary/"),
+    size_unit: Optional[str] = Query(None, description="Unit for size_col (pixels|arcsec|deg|rad)"),
+    line_width: float = Query(1.5, gt=0.0, le=20.0, description="Marker outline width in screen pixels"),
+    fill_opacity: float = Query(0.0, ge=0.0, le=1.0),
+    priority_col: Optional[str] = Query(None, description="Column ranking markers when a cell holds too many"),
+    priority_order: Optional[str] = Query(None, regex="^(asc|desc)$"),
+    per_cell: int = Query(CATALOG_TILE_MARKERS_PER_CELL, ge=1, le=1000, description="Markers kept per thinning cell"),
+):
+    """
+    Transparent PNG tile of a catalog overlay on the /fits-tile pyramid of the current display.
+
+    Density tiles colour source counts per tile pixel on a log scale shared by the whole level.
+    Marker tiles draw circles (radius from size_col, colour from color_col), keeping at most
+    per_cell sources per CATALOG_TILE_MARKER_CELL screen pixels, ranked by priority_col.
+    """
+    if colormap is not None and resolve_color_map_key(colormap) is None:
+        raise HTTPException(status_code=400, detail=f"Unknown colormap '{colormap}'.")
+    try:
+        from PIL import ImageColor
+        rgb = ImageColor.getrgb(color)[:3]
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid colour '{color}'.")
+
+    loop = asyncio.get_running_loop()
+    catalog_table, source, geometry = await loop.run_in_executor(app.state.thread_executor, _catalog_tile_source, request, catalog_name, ra_col, dec_col)
+    if not (0 <= level <= source.max_level):
+        raise HTTPException(status_code=400, detail=f"Level must be between 0 and {source.max_level}.")
+    span = source.tile_size * source.scale(level)
+    if not (0 <= x < int(np.ceil(source.width / span)) and 0 <= y < int(np.ceil(source.height / span))):
+        raise HTTPException(status_code=404, detail=f"Tile ({level},{x},{y}) is outside the pyramid.")
+
+    if mode == "density":
+        params = (colormap or "inferno", opacity)
+        render = partial(_render_catalog_density_tile, source, level, x, y, *params)
+    else:
+        style = {
+            "colormap": colormap or "viridis", "opacity": opacity, "color": rgb,
+            "color_col": None, "vmin": vmin, "vmax": vmax,
+            "size_col": size_col, "size_unit": size_unit, "wcs": geometry.wcs,
+            "line_width": line_width, "fill_opacity": fill_opacity,
+            "priority_name": None, "priority_order": None, "per_cell": per_cell,
+        }
+        if color_col:
+            style["color_col"] = _query_column_name(catalog_table.colnames, color_col)
+            if style["color_col"] is None:
+                raise HTTPException(status_code=400, detail=f"Unknown colour column '{color_col}'.")
+        style["priority_name"], style["priority_order"] = _catalog_priority_column(catalog_table, priority_col, priority_order)
+        params = tuple(sorted((k, v) for k, v in style.items() if k != "wcs"))
+        render = partial(_render_catalog_marker_tile, source, catalog_table, level, x, y, style)
+
+    tile_key = f"{source.token}/{level}/{x}/{y}/{mode}/{params}"
+    headers = {"Cache-Control": "private, max-age=3600"}
+    cached_tile = catalog_tile_cache.get(tile_key)
+    if cached_tile:
+        return Response(content=cached_tile, media_type="image/png", headers=headers)
+    render_sem = getattr(app.state, "tile_render_semaphore", None)
+    if render_sem is None:
+        render_sem = asyncio.Semaphore(3)
+        app.state.tile_render_semaphore = render_sem
+    async with render_sem:
+        tile_data = await loop.run_in_executor(app.state.thread_executor, render)
+    catalog_tile_cache.put(tile_key, tile_data)
+    return Response(content=tile_data, media_type="image/png", headers=headers)
+
+
+
+# --- Columnar catalog payloads ---
+# layout=columnar on /catalog-binary/ and format=columnar on /catalog-column-values/:
+#   uint32 header length | JSON header (space-padded so the body starts 8-byte aligned) | body
+# header["columns"] lists {name, dtype, offset, length, shape, validity, dictionary} with offsets
+# relative to the body. Each array starts 8-byte aligned and is little-endian, so the browser
+# wraps it as a typed array view. Text is sent as integer codes into `dictionary`; `validity` is
+# an LSB-first bitmap (1 = present) included only when some rows are masked.
+_CATALOG_COLUMNAR_ALIGN = 8
+_CATALOG_COLUMNAR_DTYPES = {
+    'b': {1: 'bool'}, 'i': {1: 'int8', 2: 'int16', 4: 'int32', 8: 'int64'},
+    'u': {1: 'uint8', 2: 'uint16', 4: 'uint32', 8: 'uint64'}, 'f': {4: 'float32', 8: 'float64'},
+}
+
+
+def _catalog_columnar_array(values) -> tuple:
+    """(little-endian array, row validity or None, dictionary or None) for one column of a payload."""
+    raw, valid = _query_raw(values)
+    dictionary = None
+    if raw.dtype.kind == 'O':
+        nums, ok = _query_floats(raw)
+        if ok[valid].all():
+            raw = nums
+        else:
+            raw = np.array(['' if v is None else (v.decode('utf-8', 'ignore') if isinstance(v, bytes) else str(v))
+                            for v in raw.ravel()]).reshape(raw.shape)
+    if raw.dtype.kind in ('S', 'U'):
+        values_text, codes = np.unique(_query_text(raw, lower=False), return_inverse=True)
+        dictionary = [str(v) for v in values_text.tolist()]
+        code_dtype = np.uint8 if len(dictionary) <= 0xFF else np.uint16 if len(dictionary) <= 0xFFFF else np.int32
+        raw = codes.reshape(raw.shape).astype(code_dtype)
+    elif raw.dtype.kind in ('i', 'u') and raw.dtype.itemsize == 8 and raw.size:
+        # 64-bit integers travel as int32 when they fit, so clients get a plain Int32Array.
+        if np.iinfo(np.int32).min <= raw.min() and raw.max() <= np.iinfo(np.int32).max:
+            raw = raw.astype(np.int32)
+    elif raw.dtype.kind == 'f' and raw.dtype.itemsize < 4:
+        raw = raw.astype(np.float32)
+    elif raw.dtype.kind not in ('b', 'i', 'u', 'f'):
+        raw = raw.astype(np.float64)
+    if valid.ndim > 1:
+        valid = valid.reshape(len(valid), -1).all(axis=1)
+    return np.ascontiguousarray(raw, dtype=raw.dtype.newbyteorder('<')), (None if valid.all() else valid), dictionary
+
+
+def _catalog_columnar_payload(header: dict, columns) -> bytes:
+    """Header plus aligned column arrays for (name, values) pairs, all of the same length."""
+    specs, chunks, offset = [], [], 0
+
+    def _append(blob: bytes) -> int:
+        nonlocal offset
+        start = offset
+        chunks.append(blob)
+        offset += len(blob)
+        pad = -offset % _CATALOG_COLUMNAR_ALIGN
+        if pad:
+            chunks.append(b'\0' * pad)
+            offset += pad
+        return start
+
+    for name, values in columns:
+        arr, valid, dictionary = _catalog_columnar_array(values)
+        spec = {"name": str(name), "dtype": _CATALOG_COLUMNAR_DTYPES[arr.dtype.kind][arr.dtype.itemsize],
+                "length": int(arr.shape[0]), "shape": [int(n) for n in arr.shape[1:]],
+                "offset": _append(arr.tobytes()), "validity": None, "dictionary": dictionary}
+        if valid is not None:
+            spec["validity"] = _append(np.packbits(valid, bitorder='little').tobytes())
+        specs.append(spec)
+    header = dict(header, layout="columnar", alignment=_CATALOG_COLUMNAR_ALIGN, body_bytes=offset, columns=specs)
+    header_json = json.dumps(header, separators=(',', ':'), allow_nan=False).encode('utf-8')
+    header_json += b' ' * (-(4 + len(header_json)) % _CATALOG_COLUMNAR_ALIGN)
+    return struct.pack('<I', len(header_json)) + header_json + b''.join(chunks)
+# --- End Columnar catalog payloads ---
+
+
 @app.get("/catalog-binary/{catalog_name:path}")
 async def catalog_binary(
     request: Request,
@@ -12214,6 +14798,17 @@ async def catalog_binary(
     dec_col: Optional[str] = Query(None, description="Override DEC column name"),
     size_col: Optional[str] = Query(None, description="Override size/radius column name"),
     size_unit: Optional[str] = Query(None, description="Optional unit for size_col (pixels|arcsec|deg|rad). If omitted, uses FITS column unit when available; otherwise assumes pixels (except common angular columns like bmaj/bmin/fwhm)."),
+    selection: Optional[str] = Query(None, description="Selection handle from /range-search/ to restrict rows"),
+    view: Optional[str] = Query(None, description="Viewport x0,y0,x1,y1 in the x_pixels/y_pixels frame; enables level-of-detail mode"),
+    zoom: Optional[float] = Query(None, gt=0, description="Screen pixels per image pixel (required with view)"),
+    since_level: Optional[int] = Query(None, description="LOD level the client already holds for this view; only sources added since are returned"),
+    lod: str = Query("thin", regex="^(thin|count)$", description="thin: top sources per screen cell; count: one aggregate record per cell"),
+    priority_col: Optional[str] = Query(None, description="Column ranking sources when thinning (default: magnitude, flux or S/N column)"),
+    priority_order: Optional[str] = Query(None, regex="^(asc|desc)$", description="asc ranks small values first"),
+    per_cell: int = Query(CATALOG_LOD_PER_CELL, ge=1, le=10000, description="Sources kept per screen cell"),
+    max_points: int = Query(CATALOG_LOD_MAX_POINTS, ge=1, description="Views with at most this many sources are sent in full"),
+    layout: str = Query("records", regex="^(records|columnar)$", description="records: fixed-size records with JSON metadata; columnar: one typed array per column"),
+    cursor: Optional[str] = Query(None, description="Cursor from a previous page's pagination; serves this page from its cached result set"),
 ):
     """
     Return catalog data in binary format for faster transfer.
@@ -12221,6 +14816,14 @@ async def catalog_binary(
     Binary format structure:
     - Header (JSON metadata as UTF-8 bytes, length prefixed)
     - Data section with fixed-size records
+
+    layout=columnar replaces the records with one aligned array per field (ra, dec, x_pixels,
+    y_pixels, radius_pixels, __row_index and the requested columns); see _catalog_columnar_payload.
+
+    With view and zoom (and a catalog larger than max_points) only sources inside the view are
+    returned, thinned per screen cell; the header's "lod" block describes the level and whether
+    the view is complete. Such responses are increments: records carry __row_index and extend
+    what the client already holds.
     """
     catalogs_dir = Path(CATALOGS_DIRECTORY)
     # Resolve uploaded paths as well (e.g., files/uploads/...) like /catalog-columns
@@ -12247,29 +14850,24 @@ async def catalog_binary(
             raise HTTPException(status_code=404, detail=f"Could not load catalog '{catalog_name}'.")
         column_units_for_header = _catalog_column_units_map(catalog_table)
 
-        # Extract boolean columns (same logic as before)
-        boolean_columns = []
-        if len(catalog_table) > 0:
-            for col_name in catalog_table.colnames:
-                col = catalog_table[col_name]
-                if col.dtype.kind == 'b':
-                    boolean_columns.append(col_name)
-                elif col.dtype.kind in ('i', 'u'):
-                    unique_vals = np.unique(col[:min(len(col), 100)])
-                    if np.all(np.isin(unique_vals, [0, 1])):
-                        boolean_columns.append(col_name)
-                elif col.dtype.kind in ('S', 'U'):
-                    try:
-                        sample_vals = np.char.lower(col[:10].astype(str))
-                        true_false_vals = ['true', 'false', 't', 'f', 'yes', 'no', 'y', 'n', '1', '0']
-                        if np.any(np.isin(sample_vals, true_false_vals)):
-                            boolean_columns.append(col_name)
-                    except (TypeError, ValueError):
-                        continue
+        boolean_columns = _catalog_boolean_columns(catalog_name, catalogs_dir, catalog_table)
 
         if prevent_auto_load:
             return JSONResponse(content={"boolean_columns": boolean_columns})
 
+        selection_mask = _catalog_selection_mask(selection, catalog_name, catalogs_dir, len(catalog_table)) if selection else None
+
+        # Level-of-detail request; small catalogs are always sent whole.
+        lod_view = None
+        if view is not None:
+            lod_view = _parse_catalog_view(view)
+            if zoom is None:
+                raise HTTPException(status_code=400, detail="'zoom' is required with 'view'.")
+            if len(catalog_table) <= max_points:
+                lod_view = None
+        lod_header = {"whole_frame": True, "complete": True} if (view is not None and lod_view is None) else None
+        lod_aggregate = None
+
         # Load and process catalog data (use session-aware request to access current WCS/file)
         # Debug incoming query
         try:
@@ -12307,7 +14905,9 @@ async def catalog_binary(
         # - compute RA/Dec->pixel in vectorized numpy for all rows
         # - filter in-bounds
         # - only build per-row metadata JSON for the returned page rows (<= limit)
-        use_fast_path = (search is None and filters is None and (sort_by is None or sort_by in ('ra', 'dec')))
+        # Search, filters and column sorts run on the same path as numpy masks/argsort
+        # over the table columns (see _catalog_query_mask).
+        use_fast_path = True
         catalog_data = None  # only used by slow fallback
         fast_result = None
         if use_fast_path:
@@ -12317,6 +14917,7 @@ async def catalog_binary(
                 session_data = session.data if session is not None else None
                 fits_file = (session_data.get("current_fits_file") if session_data else getattr(app.state, "current_fits_file", None))
                 hdu_index = int(session_data.get("current_hdu_index", 0) if session_data else getattr(app.state, "current_hdu_index", 0))
+                fits_file, hdu_index = _virtual_image_wcs_source(fits_file, hdu_index)
                 rgb_frame = None
                 rgb_generator = _get_rgb_generator(session_data, create=False) if session_data is not None else None
                 if rgb_generator is not None:
@@ -12340,53 +14941,27 @@ async def catalog_binary(
                 if not fits_file and not (rgb_frame is not None and rgb_frame.get("base") is not None):
                     fast_result = {"error": "No FITS file currently selected", "records": [], "total": 0, "pagination": (page, limit)}
                 else:
+                    image_bundle = None
                     if not (rgb_frame is not None and rgb_frame.get("base") is not None):
                         # Build image WCS and dimensions without touching image data
                         image_wcs = (session_data.get("current_wcs_object") if session_data else getattr(app.state, "current_wcs_object", None))
                         image_height = None
                         image_width = None
                         flip_y = False
-                        with fits.open(fits_file) as hdul:
-                            if not (0 <= hdu_index < len(hdul)):
-                                hdu_index = 0
-                            image_hdu = hdul[hdu_index]
-                            # header-only image HDU test
-                            def _is_image_hdu(h) -> bool:
-                                try:
-                                    hdr = getattr(h, 'header', None)
-                                    if hdr is None:
-                                        return False
-                                    naxis = int(hdr.get('NAXIS', 0) or 0)
-                                    if naxis < 2:
-                                        return False
-                                    n1 = hdr.get('NAXIS1', None)
-                                    n2 = hdr.get('NAXIS2', None)
-                                    return (n1 is not None and n2 is not None and int(n1) > 0 and int(n2) > 0)
-                                except Exception:
-                                    return False
-                            if not _is_image_hdu(image_hdu):
-                                image_hdu = next((h for h in hdul if _is_image_hdu(h)), None)
-                            if image_hdu is None:
-                                fast_result = {"error": "No image HDU found in current FITS file", "records": [], "total": 0, "pagination": (page, limit)}
-                            else:
-                                fy, _, _ = analyze_wcs_orientation(image_hdu.header, None)
-                                flip_y = bool(fy)
-                                image_height = int(image_hdu.header.get('NAXIS2', 0))
-                                image_width = int(image_hdu.header.get('NAXIS1', 0))
-                                if image_wcs is None:
-                                    try:
-                                        wcs_header = _prepare_jwst_header_for_wcs(image_hdu.header)
-                                    except Exception:
-                                        wcs_header = image_hdu.header
-                                    image_wcs = WCS(wcs_header)
-                        try:
-                            if image_wcs is not None:
-                                if hasattr(image_wcs, 'celestial'):
-                                    image_wcs = image_wcs.celestial
-                                else:
-                                    image_wcs = image_wcs.sub(['celestial'])
-                        except Exception:
-                            pass
+                        # Header-only: geometry, flip and WCS come from the cached per-(file, HDU) bundle
+                        image_metadata = fits_metadata_cache.get(fits_file)
+                        if not (0 <= hdu_index < len(image_metadata.hdus)) or not image_metadata.hdus[hdu_index].is_2d_image:
+                            hdu_index = image_metadata.first_image_index()
+                        if hdu_index is None:
+                            fast_result = {"error": "No image HDU found in current FITS file", "records": [], "total": 0, "pagination": (page, limit)}
+                        else:
+                            image_bundle = image_metadata.hdu(hdu_index).wcs_bundle
+                            flip_y = bool(image_bundle.flip_y)
+                            image_height = image_bundle.height
+                            image_width = image_bundle.width
+                            if image_wcs is None:
+                                image_wcs = image_bundle.wcs
+                    image_wcs, arcsec_per_pixel = _catalog_projection_wcs(image_wcs, image_bundle)
 
                     # Require numeric RA/Dec columns for fast path (otherwise fall back to slow path)
                     if ra_col is None or dec_col is None:
@@ -12396,123 +14971,257 @@ async def catalog_binary(
                     else:
                         ra_col_data = catalog_table[ra_col]
                         dec_col_data = catalog_table[dec_col]
+                        # Radius pixels (size_col in angular units) use the pixel scale resolved with the WCS above.
+
+                        if rgb_frame is not None and rgb_frame.get("base") is not None and rgb_generator is not None:
+                            base = rgb_frame["base"]
+                            offset_x = float(rgb_frame.get("offset_x", 0.0))
+                            offset_y = float(rgb_frame.get("offset_y", 0.0))
+
+                            def _project(ra_v, dec_v):
+                                x_wcs, y_wcs = image_wcs.all_world2pix(ra_v, dec_v, 0)
+                                base_x, base_y = rgb_generator._wcs_to_display_pixels(base, x_wcs, y_wcs)
+                                return np.array(base_x, dtype=float) - offset_x, np.array(base_y, dtype=float) - offset_y
+
+                            def _display_to_wcs(x_d, y_d):
+                                # The display flip is its own inverse.
+                                return rgb_generator._wcs_to_display_pixels(base, np.asarray(x_d, dtype=float) + offset_x,
+                                                                            np.asarray(y_d, dtype=float) + offset_y)
+                        else:
+                            def _project(ra_v, dec_v):
+                                x_v, y_v = image_wcs.all_world2pix(ra_v, dec_v, 0)
+                                x_v = np.array(x_v, dtype=float)
+                                y_v = np.array(y_v, dtype=float)
+                                if flip_y and image_height is not None:
+                                    y_v = (float(image_height) - y_v - 1.0)
+                                return x_v, y_v
+
+                            def _display_to_wcs(x_d, y_d):
+                                y_d = np.asarray(y_d, dtype=float)
+                                return np.asarray(x_d, dtype=float), ((float(image_height) - y_d - 1.0) if flip_y else y_d)
+
+                        # The same frame as a DisplayGeometry: whole-catalog projections into it are cached
+                        # (catalog_tile_sources, shared with the overlay tiles) instead of redone per request.
+                        catalog_path = _locate_catalog_file(catalog_name, catalogs_dir)
+                        geometry = None
+                        try:
+                            if session_data is not None and catalog_path is not None:
+                                if rgb_frame is not None and rgb_frame.get("base") is not None:
+                                    geometry = _session_display_geometry(session_data, frame="rgb")
+                                elif fits_file and hdu_index is not None:
+                                    geometry = _session_display_geometry(session_data, filepath=str(fits_file), hdu=hdu_index, frame="image")
+                        except Exception:
+                            geometry = None
+                        if geometry is not None:
+                            _project = geometry.world_to_display
+
+                        def _project_rows(rows, ra_v, dec_v):
+                            """0-based display x, y of catalog rows, read from the cached projection when there is one."""
+                            source = catalog_tile_sources.peek(catalog_path, ra_col, dec_col, geometry) if geometry is not None else None
+                            if source is not None:
+                                u, v = source.row_positions(len(catalog_table))
+                                return u[rows].astype(float) - 1.0, v[rows].astype(float) - 1.0
+                            return _project(ra_v, dec_v)
+
+                        def _page_result(idx_page, total_filtered, end_idx, ra_page, dec_page, x_page, y_page, r_page):
+                            # Prepare header
+                            requested_cols = None
+                            if columns:
+                                requested_cols = [c.strip() for c in columns.split(',') if c.strip()]
+                            colnames_for_meta = list(catalog_table.colnames if requested_cols is None else [c for c in requested_cols if c in catalog_table.colnames])
+
+                            # Build metadata only for returned page rows.
+                            # IMPORTANT: keep this minimal for speed. Full row properties are fetched on-demand
+                            # via `/source-properties/?row_index=...`.
+                            metadata_list = []
+                            meta_columns = None
+                            if layout == "columnar":
+                                meta_columns = [("__row_index", np.asarray(idx_page, dtype=np.int64))]
+                                if columns:
+                                    meta_columns += [(cname, catalog_table[cname][idx_page]) for cname in colnames_for_meta]
+                                idx_meta = idx_page[:0]
+                            else:
+                                idx_meta = idx_page
+                            for ridx in idx_meta:
+                                md = {"__row_index": int(ridx)}
+                                # If caller explicitly requested columns, include only those values.
+                                if columns:
+                                    for cname in colnames_for_meta:
+                                        try:
+                                            v = _to_py(catalog_table[cname][int(ridx)])
+                                            if isinstance(v, float) and (np.isnan(v) or np.isinf(v)):
+                                                v = None
+                                            md[cname] = v
+                                        except Exception:
+                                            continue
+                                metadata_list.append(md)
+
+                            return {
+                                "idx_page": idx_page,
+                                "total_filtered": total_filtered,
+                                "pagination": {
+                                    "page": page,
+                                    "limit": limit,
+                                    "total_items": total_filtered,
+                                    "total_pages": (total_filtered + limit - 1) // limit,
+                                    "has_next": end_idx < total_filtered,
+                                    "has_prev": page > 1,
+                                    "cursor": result_set.cursor if result_set is not None else None,
+                                },
+                                "ra_page": ra_page.astype(np.float64, copy=False),
+                                "dec_page": dec_page.astype(np.float64, copy=False),
+                                "x_page": (x_page + 1.0).astype(np.float32, copy=False),
+                                "y_page": (y_page + 1.0).astype(np.float32, copy=False),
+                                "r_page": r_page.astype(np.float32, copy=False),
+                                "metadata_list": metadata_list,
+                                "meta_columns": meta_columns,
+                                "column_names": colnames_for_meta,
+                            }
+
+                        # Filtered, sorted rows of a query are cached (see catalog_result_sets), so later
+                        # pages only read and project their own rows. LOD responses are not paged.
+                        result_version = result_query = result_set = None
+                        if lod_view is None:
+                            result_version = _catalog_result_version(catalog_name, catalogs_dir, session_data)
+                            result_query = ("binary", ra_col, dec_col, search, filters, selection, sort_by, sort_order)
+                            result_set = catalog_result_sets.get(result_version, result_query, cursor)
+
                         # Numeric-only fast path
                         if ra_col_data.dtype.kind not in ('i', 'u', 'f') or dec_col_data.dtype.kind not in ('i', 'u', 'f'):
                             use_fast_path = False
+                        elif result_set is not None and image_wcs is not None and getattr(image_wcs, 'has_celestial', False) \
+                                and image_width and image_height:
+                            total_filtered = result_set.size
+                            start_idx = (page - 1) * limit
+                            end_idx = min(start_idx + limit, total_filtered)
+                            idx_page = result_set.page(start_idx, end_idx) if start_idx < end_idx else np.zeros(0, dtype=np.intp)
+                            ra_page = np.mod(np.array(ra_col_data[idx_page], dtype=float), 360.0)
+                            dec_page = np.array(dec_col_data[idx_page], dtype=float)
+                            x_page, y_page = _project_rows(idx_page, ra_page, dec_page)
+                            r_page = _catalog_radius_pixels(catalog_table[idx_page], size_col, size_unit, arcsec_per_pixel)
+                            fast_result = _page_result(idx_page, total_filtered, end_idx, ra_page, dec_page,
+                                                       np.asarray(x_page, dtype=float), np.asarray(y_page, dtype=float), r_page)
                         else:
                             ra_deg = np.array(ra_col_data, dtype=float)
                             dec_deg = np.array(dec_col_data, dtype=float)
                             # Convert negative RA to [0,360) for consistency (catalogs often 0..360)
                             ra_deg = np.mod(ra_deg, 360.0)
-                            # Radius pixels (supports size_col in angular units via image WCS pixel scale)
-                            arcsec_per_pixel = None
-                            try:
-                                if image_wcs is not None and getattr(image_wcs, "has_celestial", False):
-                                    arcsec_per_pixel = float(_compute_arcsec_per_pixel(image_wcs))
-                                    if not np.isfinite(arcsec_per_pixel) or arcsec_per_pixel <= 0:
-                                        arcsec_per_pixel = None
-                            except Exception:
-                                arcsec_per_pixel = None
-                            if size_col and (size_col in catalog_table.colnames):
-                                try:
-                                    raw_size = np.array(catalog_table[size_col], dtype=float)
-
-                                    # Decide size unit
-                                    inferred_unit = (size_unit or "").strip().lower()
-                                    if inferred_unit in ("pix", "pixel", "pixels", "px"):
-                                        size_arcsec = None
-                                    elif inferred_unit in ("arcsec", "arcsecs", "arcsecond", "arcseconds", "asec", "\""):
-                                        size_arcsec = raw_size
-                                    elif inferred_unit in ("deg", "degree", "degrees"):
-                                        size_arcsec = raw_size * 3600.0
-                                    elif inferred_unit in ("rad", "radian", "radians"):
-                                        size_arcsec = raw_size * (180.0 / np.pi) * 3600.0
-                                    else:
-                                        # Try FITS/astropy column unit first
-                                        size_arcsec = None
-                                        try:
-                                            from astropy import units as u
-                                            col_unit = getattr(catalog_table[size_col], "unit", None)
-                                            if col_unit is not None and str(col_unit).strip() != "":
-                                                unit_obj = u.Unit(str(col_unit))
-                                                if unit_obj.is_equivalent(u.arcsec):
-                                                    size_arcsec = (raw_size * unit_obj).to_value(u.arcsec)
-                                                elif unit_obj.is_equivalent(u.deg):
-                                                    size_arcsec = (raw_size * unit_obj).to_value(u.deg) * 3600.0
-                                                elif unit_obj.is_equivalent(u.rad):
-                                                    size_arcsec = (raw_size * unit_obj).to_value(u.rad) * (180.0 / np.pi) * 3600.0
-                                        except Exception:
-                                            size_arcsec = None
-
-                                        # Heuristic fallback for common angular columns when unit is missing
-                                        if size_arcsec is None:
-                                            if (size_col or "").strip().lower() in (
-                                                "bmaj", "bmin", "fwhm", "major", "minor", "maj", "min"
-                                            ):
-                                                size_arcsec = raw_size
-
-                                    if size_arcsec is not None and arcsec_per_pixel is not None:
-                                        radius_px = np.array(size_arcsec, dtype=float) / max(arcsec_per_pixel, 1e-12)
-                                    else:
-                                        radius_px = raw_size
-
-                                    radius_px = np.where(np.isfinite(radius_px) & (radius_px > 0), radius_px, 5.0).astype(np.float32)
-                                except Exception:
-                                    radius_px = np.full(len(catalog_table), 5.0, dtype=np.float32)
-                            elif size_col:
-                                # Support constant radii passed as `size_col=10` (common deep-link use)
-                                # when the catalog does not have a column literally named "10".
-                                try:
-                                    const_r = float(str(size_col).strip())
-                                    if np.isfinite(const_r) and const_r > 0:
-                                        unit_txt = (size_unit or "").strip().lower()
-                                        # For constant sizes, interpret unit via size_unit:
-                                        # - pixels/px => pixels
-                                        # - arcsec/deg/rad => angular converted using WCS scale
-                                        if unit_txt in ("arcsec", "arcsecs", "arcsecond", "arcseconds", "asec", "\""):
-                                            if arcsec_per_pixel is not None:
-                                                const_r = float(const_r) / max(float(arcsec_per_pixel), 1e-12)
-                                        elif unit_txt in ("deg", "degree", "degrees"):
-                                            if arcsec_per_pixel is not None:
-                                                const_r = (float(const_r) * 3600.0) / max(float(arcsec_per_pixel), 1e-12)
-                                        elif unit_txt in ("rad", "radian", "radians"):
-                                            if arcsec_per_pixel is not None:
-                                                const_r = (float(const_r) * (180.0 / np.pi) * 3600.0) / max(float(arcsec_per_pixel), 1e-12)
-                                        # else: treat as pixels by default
-                                        radius_px = np.full(len(catalog_table), float(const_r), dtype=np.float32)
-                                    else:
-                                        radius_px = np.full(len(catalog_table), 5.0, dtype=np.float32)
-                                except Exception:
-                                    radius_px = np.full(len(catalog_table), 5.0, dtype=np.float32)
-                            else:
-                                radius_px = np.full(len(catalog_table), 5.0, dtype=np.float32)
+                            radius_px = _catalog_radius_pixels(catalog_table, size_col, size_unit, arcsec_per_pixel)
 
                             if image_wcs is None or not getattr(image_wcs, 'has_celestial', False) or not (image_width and image_height):
                                 use_fast_path = False
                             else:
-                                if rgb_frame is not None and rgb_frame.get("base") is not None and rgb_generator is not None:
-                                    base = rgb_frame["base"]
-                                    x_wcs, y_wcs = image_wcs.all_world2pix(ra_deg, dec_deg, 0)
-                                    base_x, base_y = rgb_generator._wcs_to_display_pixels(base, x_wcs, y_wcs)
-                                    x_pix = np.array(base_x, dtype=float) - float(rgb_frame.get("offset_x", 0.0))
-                                    y_pix = np.array(base_y, dtype=float) - float(rgb_frame.get("offset_y", 0.0))
+                                # Region to project: the frame, or in LOD mode the view grown to whole cells of the
+                                # coarsest level involved (0-based display pixels, clipped to the frame).
+                                region = (0.0, 0.0, float(image_width), float(image_height))
+                                if lod_view is not None:
+                                    lod_level = _catalog_lod_level(zoom)
+                                    coarse_size = 2.0 ** -min(lod_level, since_level if since_level is not None else lod_level)
+                                    vx0, vy0, vx1, vy1 = (v - 1.0 for v in lod_view)
+                                    region = (
+                                        max(0.0, np.floor(vx0 / coarse_size) * coarse_size),
+                                        max(0.0, np.floor(vy0 / coarse_size) * coarse_size),
+                                        min(float(image_width), np.ceil(vx1 / coarse_size) * coarse_size),
+                                        min(float(image_height), np.ceil(vy1 / coarse_size) * coarse_size),
+                                    )
+
+                                # Whole-frame requests use (and on first use build) the cached projection of the
+                                # catalog; a level-of-detail view uses it when it is already there.
+                                projection = None
+                                if geometry is not None:
+                                    if lod_view is None:
+                                        projection = _catalog_display_source(catalog_path, catalog_table, ra_col, dec_col, geometry)
+                                    else:
+                                        projection = catalog_tile_sources.peek(catalog_path, ra_col, dec_col, geometry)
+                                candidates = None
+                                if projection is not None:
+                                    row_u, row_v = projection.row_positions(len(catalog_table))
+                                    inb = np.isfinite(row_u)
                                 else:
-                                    x_pix, y_pix = image_wcs.all_world2pix(ra_deg, dec_deg, 0)
-                                    x_pix = np.array(x_pix, dtype=float)
-                                    y_pix = np.array(y_pix, dtype=float)
-                                    if flip_y and image_height is not None:
-                                        y_pix = (float(image_height) - y_pix - 1.0)
-                                # In-bounds mask
-                                inb = (
-                                    np.isfinite(x_pix) & np.isfinite(y_pix) &
-                                    (x_pix >= 0.0) & (y_pix >= 0.0) &
-                                    (x_pix < float(image_width)) & (y_pix < float(image_height))
-                                )
+                                    # Large catalogs: the spatial index returns the rows inside a sky cap around the
+                                    # region and only those are projected; the pixel bounds stay the exact test.
+                                    if len(catalog_table) >= CATALOG_SPATIAL_MIN_ROWS and region[2] > region[0] and region[3] > region[1]:
+                                        spatial = _catalog_spatial_index(catalog_name, catalogs_dir, catalog_table, ra_col, dec_col)
+                                        cap = _display_footprint_cap(image_wcs, region[2] - region[0], region[3] - region[1], _display_to_wcs,
+                                                                     x0=region[0], y0=region[1]) if spatial is not None else None
+                                        if cap is not None:
+                                            candidates, _ = spatial.cone(*cap, sort=False)
+                                    if candidates is None:
+                                        x_pix, y_pix = _project(ra_deg, dec_deg)
+                                    else:
+                                        x_pix, y_pix = _project(ra_deg[candidates], dec_deg[candidates])
+                                    # In-bounds mask (x_pix/y_pix are per candidate when the index was used)
+                                    inb = (
+                                        np.isfinite(x_pix) & np.isfinite(y_pix) &
+                                        (x_pix >= 0.0) & (y_pix >= 0.0) &
+                                        (x_pix < float(image_width)) & (y_pix < float(image_height))
+                                    )
+                                    if candidates is not None:
+                                        inb_all = np.zeros(len(catalog_table), dtype=bool)
+                                        inb_all[candidates] = inb
+                                        inb = inb_all
+                                query_dictionaries = _catalog_query_dictionaries(catalog_name, catalogs_dir) if (search or filters or sort_by) else {}
+                                if search or filters:
+                                    inb &= _catalog_query_mask(
+                                        catalog_table, len(catalog_table), search, filters,
+                                        dictionaries=query_dictionaries,
+                                    )
+                                if selection_mask is not None:
+                                    inb &= selection_mask
                                 idx_all = np.nonzero(inb)[0]
+
+                                def _rows_xy(rows):
+                                    if projection is not None:
+                                        return row_u[rows].astype(float) - 1.0, row_v[rows].astype(float) - 1.0
+                                    pos = rows if candidates is None else np.searchsorted(candidates, rows)
+                                    return x_pix[pos], y_pix[pos]
+
+                                priority_key = None
+                                if lod_view is not None:
+                                    x_rows, y_rows = _rows_xy(idx_all)
+                                    in_region = (x_rows >= region[0]) & (x_rows < region[2]) & (y_rows >= region[1]) & (y_rows < region[3])
+                                    idx_all, x_rows, y_rows = idx_all[in_region], x_rows[in_region], y_rows[in_region]
+                                    in_view = (x_rows >= vx0) & (x_rows <= vx1) & (y_rows >= vy0) & (y_rows <= vy1)
+                                    lod_complete = int(np.count_nonzero(in_view)) <= max_points
+                                    priority_name, priority_key = _catalog_priority(catalog_table, priority_col, priority_order)
+                                    rank_rows = None if priority_key is None else priority_key[idx_all]
+                                    if lod_complete:
+                                        wanted = in_view.copy()
+                                    elif lod == "count":
+                                        wanted = in_view
+                                        lod_aggregate = _catalog_lod_aggregate(x_rows[in_view], y_rows[in_view], ra_deg[idx_all[in_view]],
+                                                                               dec_deg[idx_all[in_view]], 2.0 ** -lod_level)
+                                    else:
+                                        wanted = in_view & _catalog_lod_keep(idx_all, x_rows, y_rows, rank_rows, 2.0 ** -lod_level, per_cell)
+                                    if since_level is not None and lod_aggregate is None:
+                                        if since_level >= lod_level and not lod_complete:
+                                            wanted[:] = False
+                                        else:
+                                            wanted &= ~_catalog_lod_keep(idx_all, x_rows, y_rows, rank_rows, 2.0 ** -since_level, per_cell)
+                                    lod_header = {
+                                        "mode": "count" if lod_aggregate is not None else "thin",
+                                        "level": lod_level,
+                                        "since_level": since_level,
+                                        "cell_size": 2.0 ** -lod_level,
+                                        "cell_px": CATALOG_LOD_CELL_PX,
+                                        "per_cell": per_cell,
+                                        "view": list(lod_view),
+                                        "in_view": int(np.count_nonzero(in_view)),
+                                        "complete": bool(lod_complete),
+                                        "priority": priority_name,
+                                        "whole_frame": False,
+                                    }
+                                    # Count mode sends cells instead of rows (built after the page below).
+                                    idx_all = idx_all[wanted] if lod_aggregate is None else idx_all[:0]
                                 total_filtered = int(idx_all.size)
 
-                                # Optional sort by RA/Dec (numeric only)
-                                if sort_by == 'ra':
+                                # Optional sort by RA/Dec (numeric only) or by any catalog column
+                                start_idx = (page - 1) * limit
+                                end_idx = min(start_idx + limit, total_filtered)
+                                idx_page = lazy_order = None
+                                if lod_aggregate is not None:
+                                    pass
+                                elif sort_by == 'ra':
                                     order = np.argsort(ra_deg[idx_all])
                                     if sort_order == 'desc':
                                         order = order[::-1]
@@ -12522,54 +15231,57 @@ async def catalog_binary(
                                     if sort_order == 'desc':
                                         order = order[::-1]
                                     idx_all = idx_all[order]
-
-                                start_idx = (page - 1) * limit
-                                end_idx = min(start_idx + limit, total_filtered)
-                                idx_page = idx_all[start_idx:end_idx]
-
-                                # Prepare header
-                                requested_cols = None
-                                if columns:
-                                    requested_cols = [c.strip() for c in columns.split(',') if c.strip()]
-                                colnames_for_meta = list(catalog_table.colnames if requested_cols is None else [c for c in requested_cols if c in catalog_table.colnames])
-
-                                # Build metadata only for returned page rows.
-                                # IMPORTANT: keep this minimal for speed. Full row properties are fetched on-demand
-                                # via `/source-properties/?row_index=...`.
-                                metadata_list = []
-                                for ridx in idx_page:
-                                    md = {"__row_index": int(ridx)}
-                                    # If caller explicitly requested columns, include only those values.
-                                    if columns:
-                                        for cname in colnames_for_meta:
-                                            try:
-                                                v = _to_py(catalog_table[cname][int(ridx)])
-                                                if isinstance(v, float) and (np.isnan(v) or np.isinf(v)):
-                                                    v = None
-                                                md[cname] = v
-                                            except Exception:
-                                                continue
-                                    metadata_list.append(md)
-
-                                fast_result = {
-                                    "idx_page": idx_page,
-                                    "total_filtered": total_filtered,
-                                    "pagination": {
-                                        "page": page,
-                                        "limit": limit,
-                                        "total_items": total_filtered,
-                                        "total_pages": (total_filtered + limit - 1) // limit,
-                                        "has_next": end_idx < total_filtered,
-                                        "has_prev": page > 1,
-                                    },
-                                    "ra_page": ra_deg[idx_page].astype(np.float64, copy=False),
-                                    "dec_page": dec_deg[idx_page].astype(np.float64, copy=False),
-                                    "x_page": (x_pix[idx_page] + 1.0).astype(np.float32, copy=False),
-                                    "y_page": (y_pix[idx_page] + 1.0).astype(np.float32, copy=False),
-                                    "r_page": radius_px[idx_page].astype(np.float32, copy=False),
-                                    "metadata_list": metadata_list,
-                                    "column_names": colnames_for_meta,
-                                }
+                                elif sort_by:
+                                    sort_col = _query_column_name(catalog_table.colnames, sort_by)
+                                    order = None
+                                    if sort_col is not None:
+                                        order = _catalog_sort_order(catalog_name, catalogs_dir, catalog_table, sort_col,
+                                                                    sort_order == 'desc', query_dictionaries.get(sort_col))
+                                    if order is not None:
+                                        if total_filtered == len(catalog_table):
+                                            sorted_mask = None
+                                        else:
+                                            sorted_mask = np.zeros(len(catalog_table), dtype=bool)
+                                            sorted_mask[idx_all] = True
+                                        # Walk the cached permutation only as far as the requested page; the
+                                        # result set gathers the ordered rows if a later page asks for them.
+                                        idx_page = _catalog_sorted_page(order, sorted_mask, start_idx, end_idx)
+                                        lazy_order = (order, sorted_mask)
+                                    elif sort_col is not None:
+                                        idx_all = _catalog_sort_indices(catalog_table[sort_col], idx_all, sort_order == 'desc',
+                                                                        query_dictionaries.get(sort_col))
+                                elif priority_key is not None:
+                                    # LOD responses list the highest-ranked sources first so `limit` keeps those.
+                                    idx_all = idx_all[np.argsort(priority_key[idx_all], kind="stable")]
+
+                                if idx_page is None:
+                                    idx_page = idx_all[start_idx:end_idx]
+                                if result_version is not None and lazy_order is not None:
+                                    result_set = catalog_result_sets.put_ordered(result_version, result_query, *lazy_order,
+                                                                                 total_filtered,
+                                                                                 session=getattr(session, "session_id", None))
+                                elif result_version is not None:
+                                    result_set = catalog_result_sets.put(result_version, result_query, idx_all,
+                                                                         session=getattr(session, "session_id", None))
+
+                                fast_result = _page_result(idx_page, total_filtered, end_idx, ra_deg[idx_page], dec_deg[idx_page],
+                                                           *_rows_xy(idx_page), radius_px[idx_page])
+                                if lod_aggregate is not None:
+                                    counts = lod_aggregate["counts"]
+                                    fast_result.update({
+                                        "total_filtered": int(counts.size),
+                                        "pagination": {"page": 1, "limit": int(counts.size), "total_items": int(counts.size),
+                                                       "total_pages": 1, "has_next": False, "has_prev": False},
+                                        "ra_page": lod_aggregate["ra"],
+                                        "dec_page": lod_aggregate["dec"],
+                                        "x_page": (lod_aggregate["x"] + 1.0).astype(np.float32),
+                                        "y_page": (lod_aggregate["y"] + 1.0).astype(np.float32),
+                                        "r_page": np.full(counts.size, 2.0 ** -lod_level / 2.0, dtype=np.float32),
+                                        "metadata_list": [{"__count": int(c), "__aggregate": True} for c in counts],
+                                        "meta_columns": [("__count", counts), ("__aggregate", np.ones(counts.size, dtype=bool))],
+                                    })
+            except HTTPException:
+                raise
             except Exception as e_fast:
                 # Fallback to slow path on any error
                 try:
@@ -12639,19 +15351,30 @@ async def catalog_binary(
                 "column_names": colnames_for_meta,
                 "column_units": column_units_for_header,
             }
-            header_json = json.dumps(header).encode('utf-8')
-            binary_buffer.write(struct.pack('<I', len(header_json)))
-            binary_buffer.write(header_json)
-
-            for i in range(len(ra_page)):
-                binary_buffer.write(struct.pack('<d', float(ra_page[i])))
-                binary_buffer.write(struct.pack('<d', float(dec_page[i])))
-                binary_buffer.write(struct.pack('<f', float(x_page[i])))
-                binary_buffer.write(struct.pack('<f', float(y_page[i])))
-                binary_buffer.write(struct.pack('<f', float(r_page[i])))
-                meta_json = json.dumps(metadata_list[i], separators=(',', ':'), allow_nan=False).encode('utf-8')
-                binary_buffer.write(struct.pack('<I', len(meta_json)))
-                binary_buffer.write(meta_json)
+            if lod_header is not None:
+                header["lod"] = lod_header
+            if layout == "columnar":
+                for key in ("field_info", "record_size"):
+                    header.pop(key)
+                header["version"] = 2
+                binary_buffer.write(_catalog_columnar_payload(header, [
+                    ("ra", ra_page), ("dec", dec_page), ("x_pixels", x_page), ("y_pixels", y_page),
+                    ("radius_pixels", r_page), *fast_result["meta_columns"],
+                ]))
+            else:
+                header_json = json.dumps(header).encode('utf-8')
+                binary_buffer.write(struct.pack('<I', len(header_json)))
+                binary_buffer.write(header_json)
+
+                for i in range(len(ra_page)):
+                    binary_buffer.write(struct.pack('<d', float(ra_page[i])))
+                    binary_buffer.write(struct.pack('<d', float(dec_page[i])))
+                    binary_buffer.write(struct.pack('<f', float(x_page[i])))
+                    binary_buffer.write(struct.pack('<f', float(y_page[i])))
+                    binary_buffer.write(struct.pack('<f', float(r_page[i])))
+                    meta_json = json.dumps(metadata_list[i], separators=(',', ':'), allow_nan=False).encode('utf-8')
+                    binary_buffer.write(struct.pack('<I', len(meta_json)))
+                    binary_buffer.write(meta_json)
         else:
             # Legacy slow path below (kept for search/filters/non-numeric coords)
             # Convert to numpy arrays for efficient processing
@@ -12753,17 +15476,13 @@ async def catalog_binary(
                 elif sort_by == 'dec':
                     sort_indices = np.argsort(dec_array[filtered_indices])
                 else:
-                    sort_values = []
-                    for idx in filtered_indices:
-                        val = metadata_list[idx].get(sort_by, 0)
-                        try:
-                            sort_values.append(float(val))
-                        except (ValueError, TypeError):
-                            sort_values.append(0)
-                    sort_indices = np.argsort(sort_values)
-                if sort_order == 'desc':
-                    sort_indices = sort_indices[::-1]
-                filtered_indices = filtered_indices[sort_indices]
+                    sort_indices = None
+                    column = _rows_to_query_columns(metadata_list, [sort_by])[sort_by]
+                    filtered_indices = _catalog_sort_indices(column, filtered_indices, sort_order == 'desc')
+                if sort_indices is not None:
+                    if sort_order == 'desc':
+                        sort_indices = sort_indices[::-1]
+                    filtered_indices = filtered_indices[sort_indices]
 
             total_filtered = len(filtered_indices)
             start_idx = (page - 1) * limit
@@ -12794,19 +15513,31 @@ async def catalog_binary(
                 "record_size": 28,
                 "column_units": column_units_for_header,
             }
-            header_json = json.dumps(header).encode('utf-8')
-            binary_buffer.write(struct.pack('<I', len(header_json)))
-            binary_buffer.write(header_json)
-
-            for idx in page_indices:
-                binary_buffer.write(struct.pack('<d', float(ra_array[idx])))
-                binary_buffer.write(struct.pack('<d', float(dec_array[idx])))
-                binary_buffer.write(struct.pack('<f', float(x_array[idx])))
-                binary_buffer.write(struct.pack('<f', float(y_array[idx])))
-                binary_buffer.write(struct.pack('<f', float(radius_array[idx])))
-                meta_json = json.dumps(metadata_list[idx]).encode('utf-8')
-                binary_buffer.write(struct.pack('<I', len(meta_json)))
-                binary_buffer.write(meta_json)
+            if layout == "columnar":
+                for key in ("field_info", "record_size"):
+                    header.pop(key)
+                header["version"] = 2
+                page_meta = [metadata_list[idx] for idx in page_indices]
+                meta_columns = _rows_to_query_columns(page_meta) if page_meta else {}
+                binary_buffer.write(_catalog_columnar_payload(header, [
+                    ("ra", ra_array[page_indices]), ("dec", dec_array[page_indices]),
+                    ("x_pixels", x_array[page_indices]), ("y_pixels", y_array[page_indices]),
+                    ("radius_pixels", radius_array[page_indices]), *meta_columns.items(),
+                ]))
+            else:
+                header_json = json.dumps(header).encode('utf-8')
+                binary_buffer.write(struct.pack('<I', len(header_json)))
+                binary_buffer.write(header_json)
+
+                for idx in page_indices:
+                    binary_buffer.write(struct.pack('<d', float(ra_array[idx])))
+                    binary_buffer.write(struct.pack('<d', float(dec_array[idx])))
+                    binary_buffer.write(struct.pack('<f', float(x_array[idx])))
+                    binary_buffer.write(struct.pack('<f', float(y_array[idx])))
+                    binary_buffer.write(struct.pack('<f', float(radius_array[idx])))
+                    meta_json = json.dumps(metadata_list[idx]).encode('utf-8')
+                    binary_buffer.write(struct.pack('<I', len(meta_json)))
+                    binary_buffer.write(meta_json)
         
         # Get binary data
         binary_data = binary_buffer.getvalue()
@@ -12849,6 +15580,8 @@ async def catalog_binary(
             }
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error in catalog_binary: {str(e)}")
         import traceback
@@ -12872,10 +15605,14 @@ async def catalog_with_flags(
     stats: bool = Query(False, description="Include column statistics"),
     ra_col: Optional[str] = Query(None, description="Override RA column name"),
     dec_col: Optional[str] = Query(None, description="Override DEC column name"),
-    size_col: Optional[str] = Query(None, description="Override size/radius column name")
+    size_col: Optional[str] = Query(None, description="Override size/radius column name"),
+    cursor: Optional[str] = Query(None, description="Cursor from a previous page's pagination; serves this page from its cached result set"),
 ):
     """
     Return catalog data with advanced filtering, pagination, and TopCat-like features (session-scoped).
+
+    The filtered, sorted rows are cached per query and image (see catalog_result_sets); the
+    pagination block carries a cursor and later pages are sliced from the cached rows.
     """
     catalogs_dir = Path(CATALOGS_DIRECTORY)
     # Normalize the catalog name: in the frontend we sometimes track catalogs as "catalogs/<file>".
@@ -12892,72 +15629,69 @@ async def catalog_with_flags(
         if catalog_table is None:
             raise HTTPException(status_code=404, detail=f"Could not load catalog '{catalog_name}'.")
 
-        boolean_columns = []
-        if len(catalog_table) > 0:
-            for col_name in catalog_table.colnames:
-                col = catalog_table[col_name]
-                if col.dtype.kind == 'b':
-                    boolean_columns.append(col_name)
-                elif col.dtype.kind in ('i', 'u'):
-                    unique_vals = np.unique(col[:min(len(col), 100)])
-                    if np.all(np.isin(unique_vals, [0, 1])):
-                        boolean_columns.append(col_name)
-                elif col.dtype.kind in ('S', 'U'):
-                    try:
-                        sample_vals = np.char.lower(col[:10].astype(str))
-                        true_false_vals = ['true', 'false', 't', 'f', 'yes', 'no', 'y', 'n', '1', '0']
-                        if np.any(np.isin(sample_vals, true_false_vals)):
-                            boolean_columns.append(col_name)
-                    except (TypeError, ValueError):
-                        continue
+        boolean_columns = _catalog_boolean_columns(catalog_name, catalogs_dir, catalog_table)
 
         if prevent_auto_load:
             return JSONResponse(content={"boolean_columns": boolean_columns})
 
-        # load_catalog_data reads overrides directly from request.query_params
-        # Allow absolute or files/... paths
-        path_arg = catalog_name
-        try:
-            base_dir = Path('.') .resolve()
-            direct = base_dir / catalog_name
-            if direct.is_file():
-                path_arg = str(direct)
-            else:
+        # Rows depend on the query (every parameter but the page) and on the image the session shows.
+        session = getattr(request.state, "session", None)
+        result_version = _catalog_result_version(catalog_name, catalogs_dir, session.data if session is not None else None)
+        result_query = ("flags",) + tuple(sorted((k, v) for k, v in request.query_params.items()
+                                                 if k not in ("page", "limit", "cursor", "prevent_auto_load")))
+        result_set = catalog_result_sets.get(result_version, result_query, cursor)
+        if result_set is not None:
+            filtered_total = len(result_set.records)
+        else:
+            # load_catalog_data reads overrides directly from request.query_params
+            # Allow absolute or files/... paths
+            path_arg = catalog_name
+            try:
+                base_dir = Path('.') .resolve()
+                direct = base_dir / catalog_name
+                if direct.is_file():
+                    path_arg = str(direct)
+                else:
+                    path_arg = str((catalogs_dir / catalog_name))
+            except Exception:
                 path_arg = str((catalogs_dir / catalog_name))
-        except Exception:
-            path_arg = str((catalogs_dir / catalog_name))
-        loop = asyncio.get_running_loop()
-        catalog_data = await loop.run_in_executor(
-            None,
-            lambda: load_catalog_data(path_arg, request=request)
-        )
-        if not catalog_data:
-            raise HTTPException(status_code=500, detail="Failed to process catalog. An image with WCS may be required for full data.")
-
-        full_data = table_to_serializable(catalog_table)
-        catalog_data_map = {f"{item['ra']:.6f}": item for item in catalog_data}
-        for item in full_data:
-            ra_key = f"{item.get('ra', ''):.6f}"
-            if ra_key in catalog_data_map:
-                item.update(catalog_data_map[ra_key])
-        
-        total_items = len(full_data)
-        filtered_data = apply_advanced_filters(full_data, search, filters)
-        filtered_total = len(filtered_data)
+            loop = asyncio.get_running_loop()
+            catalog_data = await loop.run_in_executor(
+                None,
+                lambda: load_catalog_data(path_arg, request=request)
+            )
+            if not catalog_data:
+                raise HTTPException(status_code=500, detail="Failed to process catalog. An image with WCS may be required for full data.")
+
+            full_data = table_to_serializable(catalog_table)
+            row_of = {id(item): i for i, item in enumerate(full_data)}
+            catalog_data_map = {f"{item['ra']:.6f}": item for item in catalog_data}
+            for item in full_data:
+                ra_key = f"{item.get('ra', ''):.6f}"
+                if ra_key in catalog_data_map:
+                    item.update(catalog_data_map[ra_key])
         
-        if sort_by and filtered_data:
-            filtered_data = apply_sorting(filtered_data, sort_by, sort_order)
+            total_items = len(full_data)
+            filtered_data = apply_advanced_filters(full_data, search, filters)
+            filtered_total = len(filtered_data)
         
-        if columns and filtered_data:
-            selected_columns = [col.strip() for col in columns.split(',')]
-            available_columns = list(filtered_data[0].keys())
-            valid_columns = [col for col in selected_columns if col in available_columns]
-            if valid_columns:
-                filtered_data = [{col: item.get(col) for col in valid_columns} for item in filtered_data]
+            if sort_by and filtered_data:
+                filtered_data = apply_sorting(filtered_data, sort_by, sort_order)
         
+            rows = np.fromiter((row_of[id(item)] for item in filtered_data), dtype=np.int64, count=len(filtered_data))
+            if columns and filtered_data:
+                selected_columns = [col.strip() for col in columns.split(',')]
+                available_columns = list(filtered_data[0].keys())
+                valid_columns = [col for col in selected_columns if col in available_columns]
+                if valid_columns:
+                    filtered_data = [{col: item.get(col) for col in valid_columns} for item in filtered_data]
+
+            result_set = catalog_result_sets.put(result_version, result_query, rows, records=filtered_data,
+                                                 session=getattr(session, "session_id", None))
+
         start_idx = (page - 1) * limit
         end_idx = start_idx + limit
-        paginated_data = filtered_data[start_idx:end_idx]
+        paginated_data = result_set.page(start_idx, end_idx) if result_set is not None else filtered_data[start_idx:end_idx]
         total_pages = (filtered_total + limit - 1) // limit
         
         response_data = {
@@ -12971,7 +15705,8 @@ async def catalog_with_flags(
                 "has_next": page < total_pages,
                 "has_prev": page > 1,
                 "showing_start": start_idx + 1 if paginated_data else 0,
-                "showing_end": min(end_idx, filtered_total)
+                "showing_end": min(end_idx, filtered_total),
+                "cursor": result_set.cursor if result_set is not None else None,
             },
             "filters": {
                 "search": search,
@@ -12990,90 +15725,929 @@ async def catalog_with_flags(
         return JSONResponse(content=response_data)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing catalog with flags: {str(e)}")
-def apply_advanced_filters(data: List[Dict], search: Optional[str], filters: Optional[str]) -> List[Dict]:
-    """Apply search and advanced column filters to data."""
-    filtered_data = data
-    
-    # Apply search filter
-    if search:
-        search_term = search.lower()
-        filtered_data = []
-        for item in data:
-            if any(search_term in str(value).lower() for value in item.values()):
-                filtered_data.append(item)
-    
-    # Apply advanced filters
-    if filters:
-        try:
-            filter_dict = json.loads(filters)
-            for column, filter_config in filter_dict.items():
-                filtered_data = apply_column_filter(filtered_data, column, filter_config)
-        except json.JSONDecodeError:
-            logger.warning(f"Invalid filter JSON: {filters}")
-    
-    return filtered_data
-def apply_column_filter(data: List[Dict], column: str, filter_config: Dict) -> List[Dict]:
-    """Apply filter to a specific column."""
-    if not data or column not in data[0]:
-        return data
-    
-    filter_type = filter_config.get('type', 'contains')
-    filter_value = filter_config.get('value')
-    
-    if filter_value is None:
-        return data
-    
-    filtered = []
-    for item in data:
-        value = item.get(column)
-        if value is None:
-            continue
-            
-        try:
-            if filter_type == 'contains':
-                if str(filter_value).lower() in str(value).lower():
-                    filtered.append(item)
-            elif filter_type == 'equals':
-                if str(value) == str(filter_value):
-                    filtered.append(item)
-            elif filter_type == 'greater_than':
-                if float(value) > float(filter_value):
-                    filtered.append(item)
-            elif filter_type == 'less_than':
-                if float(value) < float(filter_value):
-                    filtered.append(item)
-            elif filter_type == 'range':
-                min_val = filter_config.get('min')
-                max_val = filter_config.get('max')
-                val = float(value)
-                if (min_val is None or val >= float(min_val)) and \
-                   (max_val is None or val <= float(max_val)):
-                    filtered.append(item)
-        except (ValueError, TypeError):
-            continue
-    
-    return filtered
+# --- Columnar catalog query engine ---
+# Search terms and filters JSON compile to numpy boolean masks over whole
+# columns; sorting is an argsort of the column. Used by /catalog-binary/,
+# /catalog-binary-raw/ and the list-of-dicts helpers below.
+
+# Characters that can appear in the text form of a number; a search term with
+# anything else cannot match a numeric column, so those columns are skipped.
+_QUERY_NUMERIC_TEXT_CHARS = frozenset("0123456789.+-einaf")
+
+
+def _query_raw(values):
+    """(plain ndarray, validity mask) for a Column, MaskedColumn or array."""
+    if np.ma.isMaskedArray(values):
+        return np.asarray(np.ma.getdata(values)), ~np.ma.getmaskarray(values)
+    raw = np.asarray(values)
+    if raw.dtype.kind == 'O':
+        return raw, np.fromiter((v is not None for v in raw), dtype=bool, count=raw.size).reshape(raw.shape)
+    return raw, np.ones(raw.shape[:1], dtype=bool)
+
+
+def _query_text(raw: np.ndarray, lower: bool = True) -> np.ndarray:
+    if raw.dtype.kind == 'S':
+        text = np.char.decode(raw, 'utf-8', errors='ignore')
+    elif raw.dtype.kind == 'U':
+        text = raw
+    else:
+        text = raw.astype(str)
+    return np.char.lower(text) if lower else text
+
+
+def _query_floats(raw: np.ndarray):
+    """(float64 values, convertible mask); per-cell conversion only for text/object columns."""
+    if raw.dtype.kind in ('b', 'i', 'u', 'f'):
+        return raw.astype(np.float64, copy=False), np.ones(raw.shape[:1], dtype=bool)
+    try:
+        source = _query_text(raw, lower=False) if raw.dtype.kind in ('S', 'U') else raw
+        return source.astype(np.float64), np.ones(raw.shape[:1], dtype=bool)
+    except (TypeError, ValueError):
+        out = np.full(raw.shape[:1], np.nan)
+        ok = np.zeros(raw.shape[:1], dtype=bool)
+        for i, v in enumerate(raw):
+            try:
+                out[i] = float(v.decode('utf-8', errors='ignore') if isinstance(v, bytes) else v)
+                ok[i] = True
+            except (TypeError, ValueError):
+                continue
+        return out, ok
+
+
+def _query_contains(values, term: str, dictionary=None) -> np.ndarray:
+    """Case-insensitive substring match of term against every cell of a column."""
+    if dictionary is not None:
+        return dictionary.rows(dictionary.contains_codes(term))
+    raw, valid = _query_raw(values)
+    if raw.ndim != 1:
+        return np.zeros(len(raw), dtype=bool)
+    if raw.dtype.kind == 'b':
+        return np.where(raw, term in 'true', term in 'false') & valid
+    if raw.dtype.kind in ('i', 'u', 'f') and not set(term) <= _QUERY_NUMERIC_TEXT_CHARS:
+        return np.zeros(len(raw), dtype=bool)
+    return (np.char.find(_query_text(raw), term) >= 0) & valid
+
+
+def _query_column_name(colnames, name) -> Optional[str]:
+    if name in colnames:
+        return name
+    lowered = str(name).strip().lower()
+    return next((c for c in colnames if str(c).lower() == lowered), None)
+
+
+def _query_filter_mask(values, config: dict, dictionary=None) -> Optional[np.ndarray]:
+    """Mask for one filters-JSON entry, or None when the entry does not constrain anything."""
+    kind = config.get('type', 'contains')
+    value = config.get('value')
+    raw, valid = _query_raw(values)
+    if raw.ndim != 1:
+        return None
+    if kind == 'contains':
+        if value is None:
+            return None
+        return _query_contains(values, str(value).lower(), dictionary) & valid
+    if kind == 'starts_with':
+        if value is None:
+            return None
+        prefix = str(value).lower()
+        if dictionary is not None:
+            return dictionary.rows(dictionary.prefix_codes(prefix)) & valid
+        return np.char.startswith(_query_text(raw), prefix) & valid
+    if kind == 'equals':
+        if value is None:
+            return None
+        if raw.dtype.kind in ('b', 'i', 'u', 'f'):
+            try:
+                return (raw.astype(np.float64, copy=False) == float(value)) & valid
+            except (TypeError, ValueError):
+                pass
+        if dictionary is not None:
+            return dictionary.rows(dictionary.equal_codes(str(value))) & valid
+        return (_query_text(raw, lower=False) == str(value)) & valid
+    if kind in ('greater_than', 'less_than', 'range'):
+        bounds = {'greater_than': (value, None), 'less_than': (None, value)}.get(kind, (config.get('min'), config.get('max')))
+        if bounds == (None, None):
+            return None
+        nums, ok = _query_floats(raw)
+        cond = valid & ok
+        try:
+            if bounds[0] is not None:
+                cond &= (nums > float(bounds[0])) if kind == 'greater_than' else (nums >= float(bounds[0]))
+            if bounds[1] is not None:
+                cond &= (nums < float(bounds[1])) if kind == 'less_than' else (nums <= float(bounds[1]))
+        except (TypeError, ValueError):
+            return np.zeros(len(raw), dtype=bool)
+        return cond
+    return None
+
+
+def _catalog_query_mask(columns, nrows: int, search=None, filters=None,
+                        search_columns=None, dictionaries=None) -> np.ndarray:
+    """
+    Row mask for a search term (substring in any column) AND every filters entry.
+
+    columns maps name -> array-like (an astropy Table works as-is); filters is the
+    JSON string or dict {column: {type: contains|starts_with|equals|greater_than|less_than|range,
+    value|min|max}}. dictionaries maps string columns to their CatalogTextIndex, so text
+    matching is a lookup in the dictionary followed by a pass over the integer codes.
+    """
+    mask = np.ones(int(nrows), dtype=bool)
+    dictionaries = dictionaries or {}
+    colnames = list(getattr(columns, 'colnames', None) or columns.keys())
+    if search:
+        term = str(search).lower()
+        hit = np.zeros(int(nrows), dtype=bool)
+        for name in (search_columns if search_columns is not None else colnames):
+            try:
+                hit |= _query_contains(columns[name], term, dictionaries.get(name))
+            except Exception:
+                continue
+        mask &= hit
+    if filters:
+        if isinstance(filters, str):
+            try:
+                filters = json.loads(filters)
+            except json.JSONDecodeError:
+                logger.warning(f"Invalid filter JSON: {filters}")
+                filters = None
+        for column, config in (filters.items() if isinstance(filters, dict) else ()):
+            name = _query_column_name(colnames, column)
+            if name is None or not isinstance(config, dict):
+                continue
+            try:
+                cond = _query_filter_mask(columns[name], config, dictionaries.get(name))
+            except Exception:
+                continue
+            if cond is not None:
+                mask &= cond
+    return mask
+
+
+def _catalog_sort_indices(values, indices: np.ndarray, descending: bool = False, dictionary=None) -> np.ndarray:
+    """
+    Stable reorder of row indices by a column: numeric when every cell converts, else by text.
+    Masked and NaN cells go last in either direction.
+    """
+    raw, valid = _query_raw(values)
+    indices = np.asarray(indices, dtype=np.intp)
+    if raw.ndim != 1 or indices.size < 2:
+        return indices
+    sub = raw[indices]
+    missing = ~valid[indices]
+    nums, ok = _query_floats(sub) if raw.dtype.kind not in ('S', 'U') or dictionary is None else (None, None)
+    if ok is not None and ok[~missing].all():
+        missing |= np.isnan(nums)
+        keys = nums
+    elif dictionary is not None:
+        # Store dictionaries are sorted, so codes order rows exactly like the strings.
+        keys = dictionary.codes[indices]
+    else:
+        keys = _query_text(sub, lower=False)
+    if missing.any():
+        present = ~missing
+        return np.concatenate((_catalog_stable_order(indices[present], keys[present], descending), indices[missing]))
+    return _catalog_stable_order(indices, keys, descending)
+
+
+def _catalog_stable_order(indices: np.ndarray, keys: np.ndarray, descending: bool) -> np.ndarray:
+    if not descending:
+        return indices[np.argsort(keys, kind='stable')]
+    # Descending but still stable for ties, like sorted(..., reverse=True).
+    order = (keys.size - 1 - np.argsort(keys[::-1], kind='stable'))[::-1]
+    return indices[order]
+
+
+def _catalog_sort_order(catalog_name: str, catalogs_dir, catalog_table: Table, column: str, descending: bool = False,
+                        dictionary=None) -> Optional[np.ndarray]:
+    """
+    Cached stable permutation of every row of the catalog sorted by `column`, persisted next to
+    the column in the catalog store. None when the catalog has no store.
+    """
+    store = _catalog_store_for(catalog_name, catalogs_dir)
+    if store is None or column not in store.colnames or store.nrows != len(catalog_table):
+        return None
+    return store.sort_order(
+        column, descending,
+        lambda: _catalog_sort_indices(catalog_table[column], np.arange(store.nrows), descending, dictionary),
+    )
+
+
+def _catalog_sorted_page(order: np.ndarray, mask: Optional[np.ndarray], start: int, stop: int) -> np.ndarray:
+    """
+    Rows start:stop of the permutation `order` restricted to `mask`. The scan stops as soon as
+    the page is filled, so early pages cost about their share of the filtered rows.
+    """
+    if mask is None:
+        return np.asarray(order[start:stop], dtype=np.intp)
+    if stop <= start:
+        return np.zeros(0, dtype=np.intp)
+    pages, seen, pos = [], 0, 0
+    step = max(4096, 4 * stop)
+    while pos < len(order) and seen < stop:
+        chunk = np.asarray(order[pos:pos + step], dtype=np.intp)
+        hits = chunk[mask[chunk]]
+        if seen + hits.size > start:
+            pages.append(hits[max(0, start - seen):stop - seen])
+        seen += hits.size
+        pos += step
+        step *= 2
+    return np.concatenate(pages) if pages else np.zeros(0, dtype=np.intp)
+
+
+def _catalog_store_for(catalog_name: str, catalogs_dir) -> Optional["CatalogColumnStore"]:
+    """Columnar store of a catalog by name, or None when the store is disabled or cannot hold it."""
+    if not CATALOG_STORE_ENABLED:
+        return None
+    try:
+        path = _locate_catalog_file(catalog_name, Path(catalogs_dir))
+        return catalog_store.get(path) if path is not None else None
+    except Exception:
+        return None
+
+
+def _catalog_query_dictionaries(catalog_name: str, catalogs_dir) -> dict:
+    """CatalogTextIndex per dictionary-encoded text column of the catalog's store, when it has one."""
+    store = _catalog_store_for(catalog_name, catalogs_dir)
+    if store is None:
+        return {}
+    out = {}
+    for name in store.colnames:
+        index = store.text_index(name)
+        if index is not None:
+            out[name] = index
+    return out
+
+
+def _catalog_flag_indexes(catalog_name: str, catalogs_dir) -> dict:
+    """CatalogFlagIndex per flag column of the catalog's store, when it has one."""
+    store = _catalog_store_for(catalog_name, catalogs_dir)
+    if store is None:
+        return {}
+    return {name: store.flag_index(name) for name in store.flag_columns}
+
+
+def _catalog_boolean_columns(catalog_name: str, catalogs_dir, catalog_table: Table) -> list:
+    """
+    Columns the UI offers as true/false flags. Stored catalogs were checked value by value at
+    ingest; anything else is judged from a sample of its first rows.
+    """
+    store = _catalog_store_for(catalog_name, catalogs_dir)
+    if store is not None and store.nrows == len(catalog_table):
+        flagged = set(store.boolean_columns)
+        return [name for name in catalog_table.colnames if name in flagged]
+    boolean_columns = []
+    if len(catalog_table) > 0:
+        for col_name in catalog_table.colnames:
+            col = catalog_table[col_name]
+            dt = getattr(col, "dtype", None)
+            if dt is None:
+                continue
+            if dt.kind == 'b':
+                boolean_columns.append(col_name)
+            elif dt.kind in ('i', 'u'):
+                try:
+                    unique_vals = np.unique(col[:min(len(col), 100)])
+                    if np.all(np.isin(unique_vals, [0, 1])):
+                        boolean_columns.append(col_name)
+                except Exception:
+                    pass
+            elif dt.kind in ('S', 'U'):
+                try:
+                    sample_vals = np.char.lower(col[:10].astype(str))
+                    tf_vals = ['true', 'false', 't', 'f', 'yes', 'no', 'y', 'n', '1', '0']
+                    if np.any(np.isin(sample_vals, tf_vals)):
+                        boolean_columns.append(col_name)
+                except (TypeError, ValueError):
+                    continue
+    return boolean_columns
+
+
+# --- Catalog result sets ---
+# A page of /catalog-binary/, /catalog-binary-raw/ or /catalog-with-flags/ used
+# to redo the whole filter, sort and projection before slicing it. The ordered
+# rows of a query are kept here, keyed by the catalog file version, the display
+# geometry they were projected into and the query itself, and answered with an
+# opaque cursor. Later pages of the same query slice them.
+# Entries are dropped least recently used beyond CATALOG_RESULT_CACHE_MB, when
+# the catalog file changes and when the session that made them shows another image.
+
+CATALOG_RESULT_CACHE_MB = int(os.getenv('CATALOG_RESULT_CACHE_MB', '256'))
+
+
+def _catalog_result_rows(rows) -> np.ndarray:
+    """Row indices as int32 when they fit, to halve what a cached result set holds."""
+    rows = np.asarray(rows)
+    if rows.dtype != np.int32 and (rows.size == 0 or int(rows.max()) < 2 ** 31):
+        rows = rows.astype(np.int32)
+    return rows
+
+
+@dataclass
+class CatalogResultSet:
+    """
+    Ordered catalog rows matching one query; records holds the serialized rows where an endpoint needs them.
+    A result sorted by a stored sort order starts out lazy (rows None, order and mask set): the request
+    that made it only walked the order to its own page, and the rows are gathered when a later page is read.
+    """
+    cursor: str
+    version: tuple  # (catalog path, size, mtime_ns, display geometry fingerprint)
+    query: tuple
+    rows: Optional[np.ndarray]
+    size: int = 0
+    records: Optional[list] = None
+    session: Optional[str] = None
+    nbytes: int = 0
+    order: Optional[np.ndarray] = None
+    mask: Optional[np.ndarray] = None
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    def page(self, start: int, stop: int):
+        if self.records is not None:
+            return self.records[start:stop]
+        if self.rows is None:
+            with self._lock:
+                if self.rows is None:
+                    self.rows = _catalog_result_rows(_catalog_sorted_page(self.order, self.mask, 0, self.size))
+                    self.order = self.mask = None
+        return np.asarray(self.rows[start:stop], dtype=np.intp)
+
+
+class CatalogResultSetCache:
+    """CatalogResultSets by (version, query) and by cursor, bounded by their total size."""
+
+    def __init__(self, max_bytes: int = CATALOG_RESULT_CACHE_MB * 1024 * 1024):
+        self.max_bytes = max(0, int(max_bytes))
+        self._entries: "OrderedDict[tuple, CatalogResultSet]" = OrderedDict()
+        self._cursors: dict[str, tuple] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _drop(self, key) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._cursors.pop(entry.cursor, None)
+
+    def get(self, version: Optional[tuple], query: tuple, cursor: Optional[str] = None) -> Optional[CatalogResultSet]:
+        """
+        The result set for (version, query), else None. A cursor made for another query or
+        catalog version is a miss, so its rows are never served for this request.
+        """
+        if version is None:
+            return None
+        key = (version, query)
+        with self._lock:
+            cursor_key = self._cursors.get(cursor) if cursor else None
+            entry = self._entries.get(key) if cursor_key in (None, key) else None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, version: Optional[tuple], query: tuple, rows, records: Optional[list] = None,
+            session: Optional[str] = None) -> Optional[CatalogResultSet]:
+        if version is None:
+            return None
+        rows = _catalog_result_rows(rows)
+        nbytes = int(rows.nbytes)
+        if records:
+            # Rough size of row dicts: their JSON text, sampled, plus per-object overhead.
+            sample = records[:: max(1, len(records) // 64)]
+            per_row = sum(len(json.dumps(r, default=str)) for r in sample) / len(sample)
+            nbytes += int(len(records) * (3 * per_row + 200))
+        return self._store(CatalogResultSet(cursor=self._new_cursor(version, query), version=version, query=query,
+                                            rows=rows, size=int(rows.size), records=records, session=session,
+                                            nbytes=nbytes))
+
+    def put_ordered(self, version: Optional[tuple], query: tuple, order: np.ndarray, mask: Optional[np.ndarray],
+                    size: int, session: Optional[str] = None) -> Optional[CatalogResultSet]:
+        """
+        Cache the `size` rows of the stored sort order `order` that pass `mask` (None: all rows) without
+        gathering them yet; they are charged at what they will take once a later page gathers them.
+        """
+        if version is None:
+            return None
+        nbytes = 4 * int(size) + (int(mask.nbytes) if mask is not None else 0)
+        return self._store(CatalogResultSet(cursor=self._new_cursor(version, query), version=version, query=query,
+                                            rows=None, size=int(size), session=session, nbytes=nbytes,
+                                            order=order, mask=mask))
+
+    @staticmethod
+    def _new_cursor(version: tuple, query: tuple) -> str:
+        digest = hashlib.blake2b(repr((version, query)).encode("utf-8"), digest_size=12).hexdigest()
+        return f"{digest}{secrets.token_hex(4)}"
+
+    def _store(self, entry: CatalogResultSet) -> Optional[CatalogResultSet]:
+        if entry.nbytes > self.max_bytes:
+            return None
+        key = (entry.version, entry.query)
+        session = entry.session
+        with self._lock:
+            path, size, mtime_ns, geometry = entry.version
+            for old_key, old in list(self._entries.items()):
+                old_path, old_size, old_mtime, old_geometry = old.version
+                if old_key == key or (old_path == path and (old_size, old_mtime) != (size, mtime_ns)) or \
+                        (session is not None and old.session == session and old_geometry and old_geometry != geometry):
+                    self._drop(old_key)
+            self._entries[key] = entry
+            self._cursors[entry.cursor] = key
+            total = sum(e.nbytes for e in self._entries.values())
+            while total > self.max_bytes and self._entries:
+                _, evicted = self._entries.popitem(last=False)
+                self._cursors.pop(evicted.cursor, None)
+                total -= evicted.nbytes
+        return entry
+
+    def invalidate(self, path_like=None) -> None:
+        with self._lock:
+            if path_like is None:
+                self._entries.clear()
+                self._cursors.clear()
+                return
+            try:
+                path = str(Path(path_like).resolve())
+            except Exception:
+                path = str(path_like)
+            for key in [k for k, e in self._entries.items() if e.version[0] == path]:
+                self._drop(key)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses,
+                    "bytes": sum(e.nbytes for e in self._entries.values()), "max_bytes": self.max_bytes}
+
+
+catalog_result_sets = CatalogResultSetCache()
+
+
+def _catalog_result_version(catalog_name: str, catalogs_dir, session_data: Optional[dict] = None) -> Optional[tuple]:
+    """
+    Version a cached result set of this catalog is valid for: the file's path, size and mtime,
+    plus the session's display geometry when rows were projected into it. None if not found.
+    """
+    try:
+        path = _locate_catalog_file(catalog_name, Path(catalogs_dir))
+        if path is None:
+            return None
+        path = path.resolve()
+        st = path.stat()
+    except Exception:
+        return None
+    geometry = ""
+    if session_data is not None:
+        try:
+            geometry = _session_display_geometry(session_data).fingerprint
+        except Exception:
+            geometry = "none"
+    return (str(path), st.st_size, st.st_mtime_ns, geometry)
+
+
+# --- Catalog expression filters and selections ---
+# Row filters written as expressions, e.g.
+#   (flux_f200w > 5*err_f200w) & (class == 'star' | snr > 20)
+# '&', '|' and '~' read as and/or/not (so they bind looser than comparisons),
+# text compares are case-insensitive, and names that are not identifiers go in
+# backticks. Results are kept as bitmaps addressable by a selection handle.
+
+CATALOG_EXPRESSION_MAX_CHARS = 2000
+CATALOG_SELECTION_MAX = int(os.getenv('CATALOG_SELECTION_MAX', '64'))
+_CATALOG_EXPR_NUMERIC_FUNCTIONS = {
+    "abs": np.abs, "sqrt": np.sqrt, "log10": np.log10, "log": np.log, "exp": np.exp,
+}
+_CATALOG_EXPR_PREDICATES = {"isnan": np.isnan, "isfinite": np.isfinite}
+_CATALOG_EXPR_ALLOWED_NODES = (
+    ast.Expression, ast.BoolOp, ast.And, ast.Or, ast.UnaryOp, ast.Not, ast.USub, ast.UAdd,
+    ast.BinOp, ast.Add, ast.Sub, ast.Mult, ast.Div, ast.Pow, ast.Mod,
+    ast.Compare, ast.Eq, ast.NotEq, ast.Lt, ast.LtE, ast.Gt, ast.GtE,
+    ast.Call, ast.Name, ast.Load, ast.Constant,
+)
+_CATALOG_EXPR_LOGICAL_TOKENS = {"&": "and", "|": "or", "~": "not", "=": "=="}
+_CATALOG_EXPR_COMPARE = {
+    ast.Eq: np.equal, ast.NotEq: np.not_equal, ast.Lt: np.less,
+    ast.LtE: np.less_equal, ast.Gt: np.greater, ast.GtE: np.greater_equal,
+}
+_CATALOG_EXPR_ARITHMETIC = {
+    ast.Add: np.add, ast.Sub: np.subtract, ast.Mult: np.multiply,
+    ast.Div: np.true_divide, ast.Pow: np.power, ast.Mod: np.mod,
+}
+
+
+class CatalogExpression:
+    """
+    A validated, type-checked row filter over one catalog table (with numeric=True,
+    a value per row instead, e.g. a color such as mag_f115w - mag_f200w).
+
+    Parsing maps column references to placeholders, so any column name works
+    (including Python keywords such as 'class'); only comparisons, arithmetic,
+    and/or/not and a few functions are accepted, and each node is typed as
+    num/str/bool from the column dtypes before any data is touched.
+    """
+
+    def __init__(self, text: str, table: Table, dictionaries: Optional[dict] = None, flags: Optional[dict] = None,
+                 numeric: bool = False):
+        text = str(text or "").strip()
+        if not text:
+            raise HTTPException(status_code=400, detail="Expression is empty.")
+        if len(text) > CATALOG_EXPRESSION_MAX_CHARS:
+            raise HTTPException(status_code=400, detail="Expression is too long.")
+        self.table = table
+        self.dictionaries = dictionaries or {}
+        self.flags = flags or {}
+        self.columns: dict[str, str] = {}
+        self.tree = self._parse(text, list(table.colnames))
+        self._kinds: dict[int, str] = {}
+        if numeric:
+            if self._kind(self.tree.body) != "num":
+                raise HTTPException(status_code=400, detail="Expression must be a number per row.")
+        elif self._kind(self.tree.body) != "bool":
+            raise HTTPException(status_code=400, detail="Expression must be a condition (true/false per row).")
+        self.source = self._describe(self.tree.body)
+
+    # -- parsing ----------------------------------------------------------
+    def _placeholder(self, column: str) -> str:
+        for key, name in self.columns.items():
+            if name == column:
+                return key
+        key = f"__col{len(self.columns)}"
+        self.columns[key] = column
+        return key
+
+    def _parse(self, text: str, colnames: list) -> ast.Expression:
+        lower_names = {}
+        for name in colnames:
+            lower_names.setdefault(str(name).lower(), []).append(name)
+
+        def _quoted(match):
+            name = match.group(1)
+            if name not in colnames:
+                raise HTTPException(status_code=400, detail=f"Unknown column `{name}` in expression.")
+            return self._placeholder(name)
+
+        text = re.sub(r"`([^`]+)`", _quoted, text)
+        out = []
+        try:
+            for tok in tokenize.generate_tokens(io.StringIO(text).readline):
+                kind, value = tok.type, tok.string
+                if kind == tokenize.OP and value in _CATALOG_EXPR_LOGICAL_TOKENS:
+                    kind, value = (tokenize.NAME if value != "=" else tokenize.OP), _CATALOG_EXPR_LOGICAL_TOKENS[value]
+                elif kind == tokenize.NAME and not value.startswith("__col") and value not in ("and", "or", "not", "True", "False"):
+                    if value in colnames:
+                        value = self._placeholder(value)
+                    elif len(lower_names.get(value.lower(), [])) == 1:
+                        value = self._placeholder(lower_names[value.lower()][0])
+                    elif value.lower() in ("true", "false"):
+                        value = value.capitalize()
+                    elif value not in _CATALOG_EXPR_NUMERIC_FUNCTIONS and value not in _CATALOG_EXPR_PREDICATES and value != "contains":
+                        raise HTTPException(status_code=400, detail=f"Unknown column '{value}' in expression.")
+                elif kind == tokenize.ERRORTOKEN and value.strip():
+                    raise HTTPException(status_code=400, detail=f"Unexpected character '{value}' in expression.")
+                out.append((kind, value))
+            tree = ast.parse(tokenize.untokenize(out).strip(), mode="eval")
+        except HTTPException:
+            raise
+        except (SyntaxError, tokenize.TokenError) as e:
+            raise HTTPException(status_code=400, detail=f"Invalid expression: {getattr(e, 'msg', None) or e}")
+        for node in ast.walk(tree):
+            if not isinstance(node, _CATALOG_EXPR_ALLOWED_NODES):
+                raise HTTPException(status_code=400, detail=f"Unsupported syntax in expression: {type(node).__name__}")
+            if isinstance(node, ast.Constant) and not isinstance(node.value, (bool, int, float, str)):
+                raise HTTPException(status_code=400, detail="Only numbers, strings and true/false are allowed as constants.")
+            if isinstance(node, ast.Call) and (not isinstance(node.func, ast.Name) or node.keywords):
+                raise HTTPException(status_code=400, detail="Unsupported function call in expression.")
+        if not self.columns:
+            raise HTTPException(status_code=400, detail="Expression does not reference any column.")
+        return tree
+
+    # -- type checking ----------------------------------------------------
+    def _column_kind(self, name: str) -> str:
+        column = self.columns[name]
+        dtype = self.table[column].dtype
+        if len(self.table[column].shape) > 1:
+            raise HTTPException(status_code=400, detail=f"Column '{column}' holds arrays and cannot be used in expressions.")
+        if dtype.kind == "b":
+            return "bool"
+        if dtype.kind in ("i", "u", "f"):
+            return "num"
+        if dtype.kind in ("S", "U"):
+            return "str"
+        raise HTTPException(status_code=400, detail=f"Column '{column}' has unsupported type {dtype} for expressions.")
+
+    def _kind(self, node) -> str:
+        kind = self._infer(node)
+        self._kinds[id(node)] = kind
+        return kind
+
+    def _infer(self, node) -> str:
+        if isinstance(node, ast.Constant):
+            return "bool" if isinstance(node.value, bool) else ("str" if isinstance(node.value, str) else "num")
+        if isinstance(node, ast.Name):
+            if node.id not in self.columns:
+                raise HTTPException(status_code=400, detail=f"'{node.id}' is a function; call it with a column.")
+            return self._column_kind(node.id)
+        if isinstance(node, ast.BoolOp):
+            for value in node.values:
+                if self._kind(value) != "bool":
+                    raise HTTPException(status_code=400, detail=f"'{self._describe(value)}' is not a condition; and/or need conditions on both sides.")
+            return "bool"
+        if isinstance(node, ast.UnaryOp):
+            operand = self._kind(node.operand)
+            if isinstance(node.op, ast.Not):
+                if operand != "bool":
+                    raise HTTPException(status_code=400, detail=f"'not' needs a condition, got '{self._describe(node.operand)}'.")
+                return "bool"
+            if operand != "num":
+                raise HTTPException(status_code=400, detail=f"Sign change needs a number, got '{self._describe(node.operand)}'.")
+            return "num"
+        if isinstance(node, ast.BinOp):
+            for side in (node.left, node.right):
+                if self._kind(side) == "str":
+                    raise HTTPException(status_code=400, detail=f"Arithmetic on text '{self._describe(side)}' is not supported.")
+            return "num"
+        if isinstance(node, ast.Compare):
+            kinds = [self._kind(node.left)] + [self._kind(c) for c in node.comparators]
+            for op, left, right in zip(node.ops, kinds, kinds[1:]):
+                pair = {left, right}
+                if "str" in pair:
+                    if pair != {"str"}:
+                        raise HTTPException(status_code=400, detail=f"Cannot compare text with a number or flag in '{self._describe(node)}'.")
+                    if not isinstance(op, (ast.Eq, ast.NotEq)):
+                        raise HTTPException(status_code=400, detail=f"Text supports only == and != in '{self._describe(node)}'.")
+                elif "bool" in pair and not isinstance(op, (ast.Eq, ast.NotEq)):
+                    raise HTTPException(status_code=400, detail=f"Flags support only == and != in '{self._describe(node)}'.")
+            return "bool"
+        if isinstance(node, ast.Call):
+            name = node.func.id
+            args = [self._kind(a) for a in node.args]
+            if name == "contains":
+                if args != ["str", "str"] or not isinstance(node.args[1], ast.Constant):
+                    raise HTTPException(status_code=400, detail="contains() takes a text column and a quoted string.")
+                return "bool"
+            if name in _CATALOG_EXPR_PREDICATES or name in _CATALOG_EXPR_NUMERIC_FUNCTIONS:
+                if args != ["num"]:
+                    raise HTTPException(status_code=400, detail=f"{name}() takes one numeric argument.")
+                return "bool" if name in _CATALOG_EXPR_PREDICATES else "num"
+            allowed = sorted([*_CATALOG_EXPR_NUMERIC_FUNCTIONS, *_CATALOG_EXPR_PREDICATES, "contains"])
+            raise HTTPException(status_code=400, detail=f"Unknown function '{name}'; allowed: {', '.join(allowed)}")
+        raise HTTPException(status_code=400, detail=f"Unsupported syntax in expression: {type(node).__name__}")
+
+    def _describe(self, node) -> str:
+        text = ast.unparse(node)
+        for key, column in self.columns.items():
+            shown = column if column.isidentifier() else f"`{column}`"
+            text = re.sub(rf"\b{key}\b", shown, text)
+        return text
+
+    # -- evaluation -------------------------------------------------------
+    def evaluate(self) -> np.ndarray:
+        """Boolean row mask; rows whose inputs are masked or NaN never match."""
+        with np.errstate(all="ignore"):
+            values, valid = self._eval(self.tree.body)
+        mask = np.asarray(values, dtype=bool)
+        if valid is not None:
+            mask = mask & valid
+        return np.broadcast_to(mask, (len(self.table),)).copy()
+
+    def values(self) -> np.ndarray:
+        """float64 value per row of a numeric expression; NaN where an input is masked or NaN."""
+        with np.errstate(all="ignore"):
+            values, valid = self._eval(self.tree.body)
+        out = np.broadcast_to(np.asarray(values, dtype=np.float64), (len(self.table),)).copy()
+        if valid is not None:
+            out[~np.broadcast_to(valid, out.shape)] = np.nan
+        return out
+
+    @staticmethod
+    def _and_valid(a, b):
+        if a is None:
+            return b
+        if b is None:
+            return a
+        return a & b
+
+    def _text_compare(self, op, left, right):
+        """== / != between text operands; a dictionary column against a constant compares distinct values only."""
+        (lnode, lval, lvalid), (rnode, rval, rvalid) = left, right
+        func = _CATALOG_EXPR_COMPARE[type(op)]
+        for col_node, const_node, const, col_valid in ((lnode, rnode, rval, lvalid), (rnode, lnode, lval, rvalid)):
+            if isinstance(col_node, ast.Name) and isinstance(const_node, ast.Constant):
+                index = self.dictionaries.get(self.columns[col_node.id])
+                if index is not None and isinstance(const, str):
+                    return index.rows(index.compare_codes(type(op), const)), col_valid
+        return func(self._text_values(lval), self._text_values(rval)), self._and_valid(lvalid, rvalid)
+
+    @staticmethod
+    def _text_values(value):
+        return value if isinstance(value, str) else _query_text(value)
+
+    def _flag_compare(self, node):
+        """Mask for 'flag_column == / != constant' read from the column's flag bitmaps, or None."""
+        if len(node.ops) != 1 or not isinstance(node.ops[0], (ast.Eq, ast.NotEq)):
+            return None
+        for col_node, const_node in ((node.left, node.comparators[0]), (node.comparators[0], node.left)):
+            if isinstance(col_node, ast.Name) and isinstance(const_node, ast.Constant) and not isinstance(const_node.value, str):
+                index = self.flags.get(self.columns[col_node.id])
+                if index is None:
+                    return None
+                hit = index.value_bits(const_node.value)
+                if isinstance(node.ops[0], ast.NotEq):
+                    hit = index.valid_bits() & _bitmap_invert(hit, index.nrows)
+                return index.mask(hit)
+        return None
+
+    def _eval(self, node):
+        kind = self._kinds.get(id(node))
+        if isinstance(node, ast.Constant):
+            return (node.value.lower() if isinstance(node.value, str) else node.value), None
+        if isinstance(node, ast.Name):
+            index = self.flags.get(self.columns[node.id]) if kind == "bool" else None
+            if index is not None:
+                valid = index.valid_bits()
+                return index.mask(index.true_bits()), (None if _bitmap_count(valid) == index.nrows else index.mask(valid))
+            raw, valid = _query_raw(self.table[self.columns[node.id]])
+            if kind == "num" and raw.dtype.kind == "f":
+                valid = valid & np.isfinite(raw)
+            return raw, (None if valid.all() else valid)
+        if isinstance(node, ast.BoolOp):
+            result = None
+            for value in node.values:
+                vals, valid = self._eval(value)
+                vals = np.asarray(vals, dtype=bool) if valid is None else (np.asarray(vals, dtype=bool) & valid)
+                if result is None:
+                    result = vals
+                elif isinstance(node.op, ast.And):
+                    result = result & vals
+                else:
+                    result = result | vals
+            return result, None
+        if isinstance(node, ast.UnaryOp):
+            vals, valid = self._eval(node.operand)
+            if isinstance(node.op, ast.Not):
+                vals = np.asarray(vals, dtype=bool) if valid is None else (np.asarray(vals, dtype=bool) & valid)
+                return ~vals, None
+            return (np.negative(vals) if isinstance(node.op, ast.USub) else vals), valid
+        if isinstance(node, ast.BinOp):
+            lvals, lvalid = self._eval(node.left)
+            rvals, rvalid = self._eval(node.right)
+            return _CATALOG_EXPR_ARITHMETIC[type(node.op)](lvals, rvals), self._and_valid(lvalid, rvalid)
+        if isinstance(node, ast.Compare):
+            flagged = self._flag_compare(node)
+            if flagged is not None:
+                return flagged, None
+            result = None
+            left_node = node.left
+            left = self._eval(left_node)
+            for op, right_node in zip(node.ops, node.comparators):
+                right = self._eval(right_node)
+                if "str" in (self._kinds[id(left_node)], self._kinds[id(right_node)]):
+                    vals, valid = self._text_compare(op, (left_node, *left), (right_node, *right))
+                else:
+                    vals = _CATALOG_EXPR_COMPARE[type(op)](left[0], right[0])
+                    valid = self._and_valid(left[1], right[1])
+                vals = np.asarray(vals, dtype=bool) if valid is None else (np.asarray(vals, dtype=bool) & valid)
+                result = vals if result is None else (result & vals)
+                left_node, left = right_node, right
+            return result, None
+        if isinstance(node, ast.Call):
+            name = node.func.id
+            if name == "contains":
+                column_node, term = node.args
+                term = str(term.value).lower()
+                if isinstance(column_node, ast.Name):
+                    column = self.columns[column_node.id]
+                    return _query_contains(self.table[column], term, self.dictionaries.get(column)), None
+                return np.char.find(self._text_values(self._eval(column_node)[0]), term) >= 0, None
+            vals, valid = self._eval(node.args[0])
+            if name in _CATALOG_EXPR_PREDICATES:
+                raw = np.asarray(vals, dtype=np.float64)
+                return _CATALOG_EXPR_PREDICATES[name](raw), None
+            return _CATALOG_EXPR_NUMERIC_FUNCTIONS[name](vals), valid
+        raise HTTPException(status_code=400, detail=f"Unsupported syntax in expression: {type(node).__name__}")
+
+
+@dataclass
+class CatalogSelection:
+    """A row subset of one catalog version, stored as a packed bitmap (1 bit per row)."""
+    id: str
+    catalog: str
+    size: int
+    mtime_ns: int
+    nrows: int
+    count: int
+    bits: np.ndarray
+    expression: str
+    created: float = field(default_factory=time.time)
+
+    def mask(self) -> np.ndarray:
+        return np.unpackbits(self.bits, count=self.nrows).astype(bool)
+
+    def indices(self) -> np.ndarray:
+        return np.flatnonzero(self.mask())
+
+    def describe(self) -> dict:
+        return {"selection_id": self.id, "catalog": Path(self.catalog).name, "rows": self.nrows,
+                "count": self.count, "expression": self.expression, "bitmap_bytes": int(self.bits.nbytes)}
+
+
+_catalog_selections: "OrderedDict[str, CatalogSelection]" = OrderedDict()
+_catalog_selections_lock = threading.Lock()
+
+
+def _register_catalog_selection(catalog_path: Path, mask: np.ndarray, expression: str) -> CatalogSelection:
+    mask = np.asarray(mask, dtype=bool)
+    return _register_catalog_selection_bits(catalog_path, np.packbits(mask), int(mask.size), expression,
+                                            int(np.count_nonzero(mask)))
+
+
+def _register_catalog_selection_bits(catalog_path: Path, bits: np.ndarray, nrows: int, expression: str,
+                                     count: Optional[int] = None) -> CatalogSelection:
+    """Register a selection given as a packbits bitmap (as made by the flag indexes)."""
+    path = Path(catalog_path).resolve()
+    st = path.stat()
+    bits = np.ascontiguousarray(bits, dtype=np.uint8)
+    if count is None:
+        count = _bitmap_count(bits)
+    digest = hashlib.sha1(f"{path}|{st.st_size}|{st.st_mtime_ns}|{expression}".encode("utf-8"))
+    digest.update(bits.tobytes())
+    selection = CatalogSelection(
+        id=digest.hexdigest()[:16], catalog=str(path), size=st.st_size, mtime_ns=st.st_mtime_ns,
+        nrows=int(nrows), count=int(count), bits=bits, expression=expression,
+    )
+    with _catalog_selections_lock:
+        _catalog_selections[selection.id] = selection
+        _catalog_selections.move_to_end(selection.id)
+        while len(_catalog_selections) > CATALOG_SELECTION_MAX:
+            _catalog_selections.popitem(last=False)
+    return selection
+
+
+def get_catalog_selection(selection_id: str) -> CatalogSelection:
+    with _catalog_selections_lock:
+        selection = _catalog_selections.get(str(selection_id))
+        if selection is not None:
+            _catalog_selections.move_to_end(selection.id)
+    if selection is None:
+        raise HTTPException(status_code=404, detail=f"Unknown or expired selection '{selection_id}'.")
+    try:
+        st = Path(selection.catalog).stat()
+        current = (st.st_size, st.st_mtime_ns) == (selection.size, selection.mtime_ns)
+    except OSError:
+        current = False
+    if not current:
+        raise HTTPException(status_code=409, detail=f"Selection '{selection_id}' refers to a catalog that has changed since it was made.")
+    return selection
+
+
+def _catalog_selection_mask(selection_id: str, catalog_name: str, catalogs_dir, nrows: int) -> np.ndarray:
+    """Mask of a stored selection, checked against the catalog the caller is reading."""
+    selection = get_catalog_selection(selection_id)
+    path = _locate_catalog_file(catalog_name, Path(catalogs_dir))
+    if path is None or str(Path(path).resolve()) != selection.catalog or selection.nrows != int(nrows):
+        raise HTTPException(status_code=400, detail=f"Selection '{selection_id}' belongs to a different catalog.")
+    return selection.mask()
+
+
+def _rows_to_query_columns(data: List[Dict], keys=None) -> dict:
+    columns = {}
+    for key in (keys if keys is not None else data[0].keys()):
+        cells = [item.get(key) for item in data]
+        try:
+            arr = np.asarray(cells)
+            if arr.ndim != 1 or arr.dtype.kind not in ('b', 'i', 'u', 'f', 'U'):
+                raise ValueError
+        except Exception:
+            arr = np.empty(len(cells), dtype=object)
+            arr[:] = cells
+        columns[key] = arr
+    return columns
+
+
+def apply_advanced_filters(data: List[Dict], search: Optional[str], filters: Optional[str]) -> List[Dict]:
+    """Apply search and advanced column filters to data."""
+    if not data or (not search and not filters):
+        return data
+    mask = _catalog_query_mask(_rows_to_query_columns(data), len(data), search, filters)
+    return [data[i] for i in np.flatnonzero(mask)]
+
+
+def apply_column_filter(data: List[Dict], column: str, filter_config: Dict) -> List[Dict]:
+    """Apply filter to a specific column."""
+    if not data or column not in data[0]:
+        return data
+    cond = _query_filter_mask(_rows_to_query_columns(data, [column])[column], filter_config)
+    if cond is None:
+        return data
+    return [data[i] for i in np.flatnonzero(cond)]
 
 
 def apply_sorting(data: List[Dict], sort_by: str, sort_order: str) -> List[Dict]:
     """Apply sorting to data."""
     if not data or sort_by not in data[0]:
         return data
-    
-    try:
-        # Try numeric sort first
-        return sorted(
-            data,
-            key=lambda x: float(x.get(sort_by, 0)) if x.get(sort_by) is not None else 0,
-            reverse=(sort_order == "desc")
-        )
-    except (ValueError, TypeError):
-        # Fall back to string sort
-        return sorted(
-            data,
-            key=lambda x: str(x.get(sort_by, "")),
-            reverse=(sort_order == "desc")
-        )
+    column = _rows_to_query_columns(data, [sort_by])[sort_by]
+    order = _catalog_sort_indices(column, np.arange(len(data)), descending=(sort_order == "desc"))
+    return [data[i] for i in order]
 
 
 def calculate_column_stats(data: List[Dict]) -> Dict[str, Dict]:
@@ -13152,10 +16726,16 @@ async def catalog_metadata(catalog_name: str):
         if catalog_table is None:
             raise HTTPException(status_code=404, detail=f"Could not load catalog '{catalog_name}'.")
 
+        # Exact summaries computed when the catalog entered the columnar store
+        store = _catalog_store_for(catalog_name, catalogs_dir)
+        if store is not None and store.nrows != len(catalog_table):
+            store = None
+
         # Extract detailed column information
         columns_info = []
         for col_name in catalog_table.colnames:
             col = catalog_table[col_name]
+            summary = store.column_stats(col_name) if store is not None and col_name in store.colnames else None
             col_info = {
                 "name": col_name,
                 "dtype": str(col.dtype),
@@ -13176,8 +16756,16 @@ async def catalog_metadata(catalog_name: str):
                     
                     col_info["sample_values"] = [str(v) for v in sample_values]
                     
+                    if summary is not None and summary["kind"] == "numeric":
+                        if summary["count"]:
+                            col_info["stats"] = {key: summary[key] for key in ("min", "max", "mean", "std", "null_count")}
+                    elif summary is not None:
+                        col_info["unique_info"] = {
+                            "unique_count": summary["unique_count"],
+                            "unique_sample": [item["value"] for item in summary["top"][:5]],
+                        }
                     # Basic statistics for numeric columns
-                    if col_info["is_numeric"]:
+                    elif col_info["is_numeric"]:
                         try:
                             valid_data = col[~np.isnan(col.astype(float))]
                             if len(valid_data) > 0:
@@ -13249,7 +16837,13 @@ async def catalog_column_analysis(catalog_name: str, column_name: str, sample_si
             raise HTTPException(status_code=400, detail=f"Column '{column_name}' not found in catalog.")
 
         col_data = catalog_table[column_name]
-        
+
+        # Stored catalogs answer from the summary made at ingest, over every row.
+        store = _catalog_store_for(catalog_name, catalogs_dir)
+        summary = store.column_stats(column_name) if store is not None and store.nrows == len(catalog_table) else None
+        if summary is not None:
+            return JSONResponse(content=_catalog_column_analysis_from_summary(column_name, col_data, summary))
+
         # Sample data for analysis
         data_size = len(col_data)
         if data_size > sample_size:
@@ -13316,6 +16910,72 @@ async def catalog_column_analysis(catalog_name: str, column_name: str, sample_si
         logger.error(f"Error analyzing column: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error analyzing column: {str(e)}")
 
+def _catalog_column_analysis_from_summary(column_name: str, col_data, summary: dict) -> dict:
+    """/catalog-column-analysis/ response built from a stored column summary (exact, no sampling)."""
+    total = len(col_data)
+    analysis = {
+        "column_name": column_name,
+        "total_rows": total,
+        "sample_size": total,
+        "exact": True,
+        "dtype": str(col_data.dtype),
+        "unit": str(getattr(col_data, 'unit', '')),
+        "description": str(getattr(col_data, 'description', ''))
+    }
+    if summary["kind"] == "numeric":
+        if summary["count"]:
+            pct = summary["percentiles"]
+            analysis["numeric_stats"] = {
+                "count": summary["count"],
+                "null_count": summary["null_count"],
+                "inf_count": summary["inf_count"],
+                "min": summary["min"],
+                "max": summary["max"],
+                "mean": summary["mean"],
+                "median": pct[50],
+                "std": summary["std"],
+                "q25": pct[25],
+                "q75": pct[75],
+                "percentiles": pct,
+                "histogram": summary["histogram"],
+            }
+    else:
+        analysis["categorical_stats"] = {
+            "unique_count": summary["unique_count"],
+            "null_count": summary["null_count"],
+            "most_common": summary["top"],
+            "diversity_index": summary["unique_count"] / total if total > 0 else 0
+        }
+    return analysis
+
+
+@app.get("/catalog-column-suggest/{catalog_name:path}/{column_name}")
+async def catalog_column_suggest(
+    catalog_name: str,
+    column_name: str,
+    q: str = Query("", description="Text typed so far (case-insensitive)"),
+    mode: str = Query("prefix", regex="^(prefix|contains)$", description="prefix: values starting with q; contains: values containing q"),
+    limit: int = Query(10, ge=1, le=100),
+):
+    """Most frequent values of a text column matching what the user typed, for filter autocomplete."""
+    catalogs_dir = Path(CATALOGS_DIRECTORY)
+    store = _catalog_store_for(catalog_name, catalogs_dir)
+    if store is None:
+        raise HTTPException(status_code=404, detail=f"Catalog '{catalog_name}' has no column store.")
+    name = _query_column_name(store.colnames, column_name)
+    if name is None:
+        raise HTTPException(status_code=400, detail=f"Column '{column_name}' not found in catalog.")
+    index = store.text_index(name)
+    if index is None:
+        raise HTTPException(status_code=400, detail=f"Column '{name}' is not a text column.")
+    loop = asyncio.get_running_loop()
+    suggestions, matches = await loop.run_in_executor(app.state.thread_executor, index.suggest, q, mode, limit)
+    return JSONResponse(content={
+        "column": name, "query": q, "mode": mode, "distinct_matches": matches,
+        "suggestions": [{"value": value, "count": int(count)} for value, count in suggestions],
+    })
+
+
 def calculate_histogram(data, bins=CATALOG_ANALYSIS_HISTOGRAM_BINS):  # Updated
     """Calculate histogram data for numeric columns."""
     try:
@@ -13326,73 +16986,784 @@ def calculate_histogram(data, bins=CATALOG_ANALYSIS_HISTOGRAM_BINS):  # Updated
         }
     except:
         return None
-# Endpoint for exporting filtered data
-@app.get("/catalog-export/{catalog_name}")
-async def export_catalog_data(
-    catalog_name: str,
-    format: str = Query(DEFAULT_EXPORT_FORMAT, regex="^(csv|json|fits)$"),
-    search: Optional[str] = Query(None),
-    filters: Optional[str] = Query(None),
-    columns: Optional[str] = Query(None),
-    max_rows: int = Query(MAX_EXPORT_ROWS, le=50000)
-):
+
+
+# --- Plot aggregation ---
+# The plotter used to pull a whole catalog as JSON and draw one SVG node per
+# object. /plotter/aggregate/ answers with what gets drawn instead: counts or
+# means of a third quantity on rectangular or hexagonal bins, a 1D histogram,
+# or a smoothed density grid with the levels enclosing given fractions of the
+# objects, for columns or numeric expressions over the visible axis ranges.
+# Zooming asks again with the new ranges, and a view holding at most
+# max_points objects gets the objects themselves. The finite axis values of the
+# rows passing search/filters/selection/where are cached per catalog version,
+# so re-binning on zoom is one pass over arrays already in memory.
+
+PLOT_AGGREGATE_CACHE_MB = int(os.getenv('PLOT_AGGREGATE_CACHE_MB', '512'))
+PLOT_AGGREGATE_MAX_BINS = int(os.getenv('PLOT_AGGREGATE_MAX_BINS', '1024'))
+PLOT_AGGREGATE_POINTS = int(os.getenv('PLOT_AGGREGATE_POINTS', '20000'))
+_PLOT_DEFAULT_BINS = {"hist2d": 200, "hexbin": 60, "hist1d": 50, "density": 128}
+# Fractions of the objects inside the density contours: 1, 2 and 3 sigma of a 2D Gaussian.
+_PLOT_DENSITY_FRACTIONS = (0.393, 0.865, 0.989)
+_PLOT_CHUNK_ROWS = 1 << 21
+
+from scipy.ndimage import gaussian_filter
+
+
+@dataclass
+class PlotAxes:
     """
-    Export catalog data in various formats with applied filters.
+    Values of the plotted rows in axis units (log10 on log axes). Only rows with finite x and y
+    (positive on log axes) are kept; c is NaN where it is missing.
     """
-    # This would implement export functionality
-    # For now, return a placeholder
-    return JSONResponse(content={
-        "message": f"Export functionality for {format} format",
-        "catalog_name": catalog_name,
-        "applied_filters": {"search": search, "filters": filters, "columns": columns},
-        "max_rows": max_rows
-    })
+    rows: np.ndarray
+    x: np.ndarray
+    y: Optional[np.ndarray]
+    c: Optional[np.ndarray]
+    bounds: tuple  # (x_lo, x_hi, y_lo, y_hi) over every kept row
 
-@app.get("/file-size/{filepath:path}")
-async def get_file_size(filepath: str):
-    """Get the size of a file in the files directory."""
-    try:
-        # Base directory is "files"
-        base_dir = Path(FILES_DIRECTORY)  # Updated
-        
-        # Construct the full path
-        file_path = base_dir / filepath
-        
-        # Ensure the file exists
-        if not file_path.exists():
-            return JSONResponse(
-                status_code=404,
-                content={"error": f"File not found: {filepath}"}
-            )
-        
-        # Ensure the file is within the files directory (security check)
-        if ".." in Path(filepath).parts:
-            return JSONResponse(
-                status_code=403,
-                content={"error": "Access denied: file is outside the files directory"}
-            )
-        
-        # Get file size
-        file_size = file_path.stat().st_size
-        
-        return JSONResponse(content={
-            "path": filepath,
-            "size": file_size,
-            "formatted_size": format_file_size(file_size)
-        })
-    except Exception as e:
-        print(f"Error getting file size: {str(e)}")
-        return JSONResponse(
-            status_code=500,
-            content={"error": f"Failed to get file size: {str(e)}"}
-        )
+    @property
+    def nbytes(self) -> int:
+        return sum(int(a.nbytes) for a in (self.rows, self.x, self.y, self.c) if a is not None)
 
-# Helper function to format file size
-def format_file_size(bytes):
-    """Format file size in human-readable format."""
-    if bytes < 1024:
-        return f"{bytes} B"
-    elif bytes < 1024 * 1024:
+
+class PlotAggregateCache:
+    """PlotAxes and serialized aggregation results by (catalog version, request), bounded by their total size."""
+
+    def __init__(self, max_bytes: int = PLOT_AGGREGATE_CACHE_MB * 1024 * 1024):
+        self.max_bytes = max(0, int(max_bytes))
+        self._entries: "OrderedDict[tuple, object]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._load_locks: dict[tuple, threading.Lock] = {}
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _size(value) -> int:
+        return value.nbytes if isinstance(value, PlotAxes) else len(value)
+
+    def get(self, key: tuple, build):
+        """Value for key, where key[0] is a _catalog_result_version tuple; build() runs only on a miss."""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+        with load_lock:
+            with self._lock:
+                if key in self._entries:
+                    self.hits += 1
+                    return self._entries[key]
+                self.misses += 1
+            try:
+                value = build()
+            except BaseException:
+                with self._lock:
+                    self._load_locks.pop(key, None)
+                raise
+            size = self._size(value)
+            path, file_size, mtime_ns = key[0][:3]
+            # Store the value and retire the load lock together, so no caller can miss both.
+            with self._lock:
+                if size <= self.max_bytes:
+                    for old in [k for k in self._entries if k[0][0] == path and k[0][1:3] != (file_size, mtime_ns)]:
+                        self._entries.pop(old, None)
+                    self._entries[key] = value
+                    total = sum(self._size(v) for v in self._entries.values())
+                    while total > self.max_bytes and self._entries:
+                        _, evicted = self._entries.popitem(last=False)
+                        total -= self._size(evicted)
+                self._load_locks.pop(key, None)
+            return value
+
+    def invalidate(self, path_like=None) -> None:
+        with self._lock:
+            if path_like is None:
+                self._entries.clear()
+                return
+            try:
+                path = str(Path(path_like).resolve())
+            except Exception:
+                path = str(path_like)
+            for key in [k for k in self._entries if k[0][0] == path]:
+                self._entries.pop(key, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses,
+                    "bytes": sum(self._size(v) for v in self._entries.values()), "max_bytes": self.max_bytes}
+
+
+plot_aggregates = PlotAggregateCache()
+
+
+def _plot_axis_values(table: Table, text: str, dictionaries: dict, flags: dict) -> np.ndarray:
+    """float64 value per row of a column or numeric expression; NaN where it is missing."""
+    if text in table.colnames:
+        raw, valid = _query_raw(table[text])
+        if raw.ndim != 1 or raw.dtype.kind not in ('b', 'i', 'u', 'f'):
+            raise HTTPException(status_code=400, detail=f"Column '{text}' is not numeric and cannot be plotted.")
+        values = raw.astype(np.float64)
+        if not valid.all():
+            values[~valid] = np.nan
+        return values
+    return CatalogExpression(text, table, dictionaries, flags, numeric=True).values()
+
+
+def _plot_prepare_axes(catalog_name: str, catalogs_dir, table: Table, x: str, y: Optional[str], c: Optional[str],
+                       x_log: bool, y_log: bool, search=None, filters=None, selection=None, where=None) -> PlotAxes:
+    t0 = time.perf_counter()
+    nrows = len(table)
+    dictionaries = _catalog_query_dictionaries(catalog_name, catalogs_dir)
+    flags = _catalog_flag_indexes(catalog_name, catalogs_dir)
+    keep = np.ones(nrows, dtype=bool)
+    if search or filters:
+        keep &= _catalog_query_mask(table, nrows, search, filters, dictionaries=dictionaries)
+    if selection:
+        keep &= _catalog_selection_mask(selection, catalog_name, catalogs_dir, nrows)
+    if where:
+        keep &= CatalogExpression(where, table, dictionaries, flags).evaluate()
+    axes = []
+    for text, log in ((x, x_log), (y, y_log)):
+        if text is None:
+            axes.append(None)
+            continue
+        values = _plot_axis_values(table, text, dictionaries, flags)
+        with np.errstate(invalid="ignore"):
+            keep &= (values > 0) if log else np.isfinite(values)
+        axes.append((values, log))
+    rows = np.flatnonzero(keep)
+    if nrows < 2 ** 31:
+        rows = rows.astype(np.int32)
+    out = []
+    for axis in axes:
+        if axis is None:
+            out.append(None)
+            continue
+        values = axis[0][rows]
+        if axis[1]:
+            np.log10(values, out=values)
+        out.append(values)
+    xv, yv = out
+    cv = _plot_axis_values(table, c, dictionaries, flags)[rows] if c else None
+    if cv is not None:
+        cv[~np.isfinite(cv)] = np.nan
+    bounds = (float(xv.min()) if rows.size else 0.0, float(xv.max()) if rows.size else 1.0,
+              float(yv.min()) if rows.size and yv is not None else 0.0,
+              float(yv.max()) if rows.size and yv is not None else 1.0)
+    print(f"[plot_aggregate] Prepared {', '.join(t for t in (x, y, c) if t)} of {Path(catalog_name).name} "
+          f"({rows.size} of {nrows} rows) in {time.perf_counter() - t0:.2f}s")
+    return PlotAxes(rows=rows, x=xv, y=yv, c=cv, bounds=bounds)
+
+
+def _plot_range(lo: Optional[float], hi: Optional[float], log: bool, auto: tuple, axis: str) -> tuple:
+    """Axis range in axis units from optional limits in data units; missing ends come from the data."""
+    limits = []
+    for value, fallback in ((lo, auto[0]), (hi, auto[1])):
+        if value is None:
+            limits.append(fallback)
+        elif log and value <= 0:
+            raise HTTPException(status_code=400, detail=f"{axis} limits must be positive on a log axis.")
+        else:
+            limits.append(math.log10(value) if log else float(value))
+    lo, hi = limits
+    if lo == hi:
+        lo, hi = lo - 0.5, hi + 0.5
+    if not lo < hi:
+        raise HTTPException(status_code=400, detail=f"{axis} minimum must be below its maximum.")
+    return lo, hi
+
+
+def _plot_bin_index(values: np.ndarray, lo: float, hi: float, n: int) -> np.ndarray:
+    """Bin of each value for n equal bins over [lo, hi]; hi falls in the last bin."""
+    idx = ((values - lo) * (n / (hi - lo))).astype(np.int64)
+    np.clip(idx, 0, n - 1, out=idx)
+    return idx
+
+
+def _plot_hex_index(x: np.ndarray, y: np.ndarray, bounds: tuple, nx: int, ny: int) -> np.ndarray:
+    """
+    Hexagon of each point on matplotlib's hexbin lattice: (nx + 1) x (ny + 1) centers at the
+    grid corners, numbered first, then nx x ny centers offset by half a cell.
+    """
+    x0, x1, y0, y1 = bounds
+    xs = (x - x0) * (nx / (x1 - x0))
+    ys = (y - y0) * (ny / (y1 - y0))
+    ix1 = np.clip(np.round(xs), 0, nx).astype(np.int64)
+    iy1 = np.clip(np.round(ys), 0, ny).astype(np.int64)
+    ix2 = np.clip(np.floor(xs), 0, nx - 1).astype(np.int64)
+    iy2 = np.clip(np.floor(ys), 0, ny - 1).astype(np.int64)
+    d1 = (xs - ix1) ** 2 + 3.0 * (ys - iy1) ** 2
+    d2 = (xs - ix2 - 0.5) ** 2 + 3.0 * (ys - iy2 - 0.5) ** 2
+    return np.where(d1 < d2, ix1 * (ny + 1) + iy1, (nx + 1) * (ny + 1) + ix2 * ny + iy2)
+
+
+def _plot_bincount(axes: PlotAxes, inside: np.ndarray, cells, size: int, mean: bool) -> tuple:
+    """
+    (counts, means of c or None) per cell for the rows marked inside; cells(x, y) numbers the
+    cell of each row. Runs over _PLOT_CHUNK_ROWS rows at a time to bound temporary memory.
+    """
+    counts = np.zeros(size, dtype=np.int64)
+    sums = np.zeros(size) if mean else None
+    used = np.zeros(size, dtype=np.int64) if mean else None
+    for start in range(0, axes.rows.size, _PLOT_CHUNK_ROWS):
+        stop = start + _PLOT_CHUNK_ROWS
+        chunk = inside[start:stop]
+        hit = slice(start, stop) if chunk.all() else np.flatnonzero(chunk) + start
+        if isinstance(hit, np.ndarray) and not hit.size:
+            continue
+        flat = cells(axes.x[hit], None if axes.y is None else axes.y[hit])
+        counts += np.bincount(flat, minlength=size)
+        if mean:
+            cv = axes.c[hit]
+            ok = ~np.isnan(cv)
+            used += np.bincount(flat[ok], minlength=size)
+            sums += np.bincount(flat[ok], weights=cv[ok], minlength=size)
+    if not mean:
+        return counts, None
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return counts, sums / used
+
+
+def _plot_density_levels(grid: np.ndarray, fractions) -> list:
+    """Grid values whose contours enclose each fraction of the total (highest cells first)."""
+    flat = np.sort(grid, axis=None)[::-1]
+    cum = np.cumsum(flat)
+    if not flat.size or cum[-1] <= 0:
+        return [None for _ in fractions]
+    return [float(flat[min(int(np.searchsorted(cum, f * cum[-1])), flat.size - 1)]) for f in fractions]
+
+
+def _plot_list(values: np.ndarray) -> list:
+    """Plain list for JSON; NaN and infinities become null."""
+    out = values.tolist()
+    if values.dtype.kind == 'f':
+        for i in np.flatnonzero(~np.isfinite(values)).tolist():
+            out[i] = None
+    return out
+
+
+def _plot_aggregate(axes: PlotAxes, kind: str, mean: bool, nx: int, ny: int, x_range: tuple,
+                    y_range: Optional[tuple], smooth: float, max_points: int) -> dict:
+    """Aggregation of the rows of axes inside the view, as the JSON body of /plotter/aggregate/."""
+    with np.errstate(invalid="ignore"):
+        inside = (axes.x >= x_range[0]) & (axes.x <= x_range[1])
+        if y_range is not None:
+            inside &= (axes.y >= y_range[0]) & (axes.y <= y_range[1])
+    count = int(np.count_nonzero(inside))
+    out = {"in_view": count}
+    if kind != "hist1d" and count <= max_points:
+        hit = np.flatnonzero(inside)
+        out["mode"] = "points"
+        out["points"] = {"x": _plot_list(axes.x[hit]), "y": _plot_list(axes.y[hit]),
+                         "c": _plot_list(axes.c[hit]) if axes.c is not None else None,
+                         "rows": axes.rows[hit].tolist()}
+        return out
+    out["mode"] = "binned"
+    if kind == "hist1d":
+        counts, means = _plot_bincount(axes, inside, lambda x, _: _plot_bin_index(x, *x_range, nx), nx, mean)
+        out.update(edges=np.linspace(x_range[0], x_range[1], nx + 1).tolist(), counts=counts.tolist(),
+                   mean=_plot_list(means) if means is not None else None)
+    elif kind == "hexbin":
+        # Padded like matplotlib so the hexagons cover both ends of the X range despite round-off.
+        pad = 1e-9 * (x_range[1] - x_range[0])
+        bounds = (x_range[0] - pad, x_range[1] + pad, *y_range)
+        size = (nx + 1) * (ny + 1) + nx * ny
+        counts, means = _plot_bincount(axes, inside, lambda x, y: _plot_hex_index(x, y, bounds, nx, ny), size, mean)
+        cells = np.flatnonzero(counts)
+        first = cells < (nx + 1) * (ny + 1)
+        second = cells - (nx + 1) * (ny + 1)
+        sx = (bounds[1] - bounds[0]) / nx
+        sy = (bounds[3] - bounds[2]) / ny
+        hx = np.where(first, cells // (ny + 1), second // ny + 0.5) * sx + bounds[0]
+        hy = np.where(first, cells % (ny + 1), second % ny + 0.5) * sy + bounds[2]
+        out.update(nx=nx, ny=ny, sx=sx, sy=sy, hex_x=hx.tolist(), hex_y=hy.tolist(), counts=counts[cells].tolist(),
+                   mean=_plot_list(means[cells]) if means is not None else None)
+    else:
+        def cells(x, y):
+            return _plot_bin_index(y, *y_range, ny) * nx + _plot_bin_index(x, *x_range, nx)
+
+        counts, means = _plot_bincount(axes, inside, cells, nx * ny, mean and kind == "hist2d")
+        out.update(nx=nx, ny=ny)
+        if kind == "density":
+            grid = counts.reshape(ny, nx).astype(np.float64)
+            if smooth > 0:
+                grid = gaussian_filter(grid, smooth, mode="constant")
+            out.update(grid=np.round(grid.ravel(), 4).tolist(), fractions=list(_PLOT_DENSITY_FRACTIONS),
+                       levels=_plot_density_levels(grid, _PLOT_DENSITY_FRACTIONS))
+        else:
+            out.update(counts=counts.tolist(), mean=_plot_list(means) if means is not None else None)
+    return out
+
+
+@app.get("/plotter/aggregate/{catalog_name:path}")
+async def plotter_aggregate(
+    catalog_name: str,
+    x: str = Query(..., description="Column or numeric expression on the X axis"),
+    y: Optional[str] = Query(None, description="Column or numeric expression on the Y axis (not used by hist1d)"),
+    kind: str = Query("hist2d", regex="^(hist2d|hexbin|hist1d|density)$"),
+    c: Optional[str] = Query(None, description="Column or numeric expression averaged per bin (stat=mean) and returned with points"),
+    stat: str = Query("count", regex="^(count|mean)$"),
+    bins: Optional[int] = Query(None, ge=1, description="Bins along X (hexagons across for hexbin)"),
+    bins_y: Optional[int] = Query(None, ge=1, description="Bins along Y (default: square cells, regular hexagons)"),
+    x_min: Optional[float] = Query(None),
+    x_max: Optional[float] = Query(None),
+    y_min: Optional[float] = Query(None),
+    y_max: Optional[float] = Query(None),
+    x_scale: str = Query("linear", regex="^(linear|log)$"),
+    y_scale: str = Query("linear", regex="^(linear|log)$"),
+    smooth: float = Query(1.5, ge=0, le=32, description="Gaussian smoothing of the density grid, in bins"),
+    max_points: int = Query(PLOT_AGGREGATE_POINTS, ge=0, description="Return the objects themselves when the view holds at most this many"),
+    search: Optional[str] = Query(None, description="Search term, as in the catalog viewer"),
+    filters: Optional[str] = Query(None, description="JSON column filters, as in the catalog viewer"),
+    selection: Optional[str] = Query(None, description="Selection handle from /range-search/ to restrict rows"),
+    where: Optional[str] = Query(None, description="Row filter expression, as in /range-search/"),
+):
+    """
+    Binned counts or means of a catalog for the plotter, over the visible axis ranges.
+
+    Coordinates in the response are in axis units (log10 of the value on log axes); limits
+    are given in data units. mode is "points" with the objects (x, y, c and row index) when
+    the view holds at most max_points of them, else "binned" with the aggregation.
+    """
+    if kind != "hist1d" and not y:
+        raise HTTPException(status_code=400, detail=f"{kind} needs a Y axis.")
+    if stat == "mean" and not c:
+        raise HTTPException(status_code=400, detail="stat=mean needs a column or expression in c.")
+    if kind == "hist1d":
+        y = None
+    catalogs_dir = Path(CATALOGS_DIRECTORY)
+    version = _catalog_result_version(catalog_name, catalogs_dir)
+    if version is None:
+        raise HTTPException(status_code=404, detail=f"Could not load catalog '{catalog_name}'.")
+    nx = min(bins or _PLOT_DEFAULT_BINS[kind], PLOT_AGGREGATE_MAX_BINS)
+    if kind == "hexbin":
+        ny = bins_y or max(1, int(round(nx / math.sqrt(3))))
+    else:
+        ny = bins_y or nx
+    ny = min(ny, PLOT_AGGREGATE_MAX_BINS)
+    x_log, y_log = x_scale == "log", y_scale == "log"
+    prepared = (version, "axes", x, y, c, x_log, y_log, search, filters, selection, where)
+
+    def compute():
+        def prepare():
+            table = get_astropy_table_from_catalog(catalog_name, catalogs_dir)
+            if table is None:
+                raise HTTPException(status_code=404, detail=f"Could not load catalog '{catalog_name}'.")
+            return _plot_prepare_axes(catalog_name, catalogs_dir, table, x, y, c, x_log, y_log,
+                                      search, filters, selection, where)
+
+        axes = plot_aggregates.get(prepared, prepare)
+        x_range = _plot_range(x_min, x_max, x_log, axes.bounds[:2], "X")
+        y_range = _plot_range(y_min, y_max, y_log, axes.bounds[2:], "Y") if y is not None else None
+        key = (version, "result", *prepared[2:], kind, stat, nx, ny, x_range, y_range, smooth, max_points)
+
+        def aggregate():
+            body = _plot_aggregate(axes, kind, stat == "mean", nx, ny, x_range, y_range, smooth, max_points)
+            data_range = [[axes.bounds[0], axes.bounds[1]]] + ([[axes.bounds[2], axes.bounds[3]]] if y is not None else [])
+            body.update(kind=kind, stat=stat, x=x, y=y, c=c, x_scale=x_scale, y_scale=y_scale,
+                        x_range=list(x_range), y_range=list(y_range) if y_range else None,
+                        data_range=data_range, total=int(axes.rows.size))
+            return json.dumps(body, separators=(',', ':')).encode("utf-8")
+
+        return plot_aggregates.get(key, aggregate)
+
+    loop = asyncio.get_running_loop()
+    body = await loop.run_in_executor(app.state.thread_executor, compute)
+    return Response(content=body, media_type="application/json")
+
+
+# --- Catalog export ---
+# /catalog-export/ streams the rows the catalog viewer would list (same search,
+# filters, selection and sort) as CSV, a FITS binary table, Parquet or a
+# VOTable. Row indices are produced CATALOG_EXPORT_CHUNK_ROWS at a time and each
+# chunk is gathered straight from the columns (memory maps for stored catalogs)
+# and encoded before the next one is read, so memory stays flat however many
+# rows are exported.
+
+CATALOG_EXPORT_CHUNK_ROWS = int(os.getenv('CATALOG_EXPORT_CHUNK_ROWS', '65536'))
+
+import csv
+import itertools
+from xml.sax.saxutils import escape as xml_escape, quoteattr
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+    _PYARROW_AVAILABLE = True
+except Exception:
+    pyarrow = None
+    _PYARROW_AVAILABLE = False
+
+_CATALOG_EXPORT_MEDIA_TYPES = {
+    "csv": ("text/csv", ".csv"),
+    "fits": ("application/fits", ".fits"),
+    "parquet": ("application/vnd.apache.parquet", ".parquet"),
+    "votable": ("application/x-votable+xml", ".vot"),
+}
+
+
+def _catalog_export_batches(nrows: int, mask: Optional[np.ndarray], order, limit: int):
+    """
+    Row indices to export in output order, a chunk at a time: `order` (a permutation, or a
+    list of rows) when sorting, else 0..nrows-1, keeping rows allowed by `mask`, at most `limit`.
+    """
+    step = max(1, CATALOG_EXPORT_CHUNK_ROWS)
+    total = nrows if order is None else len(order)
+    remaining = limit
+    for start in range(0, total, step):
+        if remaining <= 0:
+            return
+        stop = min(start + step, total)
+        if order is not None:
+            idx = np.asarray(order[start:stop], dtype=np.intp)
+            if mask is not None:
+                idx = idx[mask[idx]]
+        elif mask is not None:
+            idx = start + np.flatnonzero(mask[start:stop])
+        else:
+            idx = np.arange(start, stop, dtype=np.intp)
+        idx = idx[:remaining]
+        remaining -= idx.size
+        if idx.size:
+            yield idx
+
+
+def _catalog_export_chunk(table: Table, name: str, idx: np.ndarray):
+    """(values, valid) of column `name` at rows `idx`; bytes are decoded to str."""
+    raw, valid = _query_raw(table[name][idx])
+    if raw.dtype.kind == 'S':
+        raw = _query_text(raw, lower=False)
+    return raw, valid
+
+
+def _catalog_export_cells(raw: np.ndarray, valid: np.ndarray) -> list:
+    """Python values of a chunk for text formats; None marks a missing cell."""
+    if raw.ndim > 1:
+        cells = [' '.join(map(str, row)) for row in raw.reshape(len(raw), -1).tolist()]
+    else:
+        cells = raw.tolist()
+    if not valid.all():
+        for i in np.flatnonzero(~valid).tolist():
+            cells[i] = None
+    return cells
+
+
+def _catalog_export_csv(table: Table, names: list, batches):
+    buf = io.StringIO()
+    writer = csv.writer(buf, lineterminator='\n')
+    writer.writerow(names)
+    for idx in batches:
+        columns = [_catalog_export_cells(*_catalog_export_chunk(table, name, idx)) for name in names]
+        writer.writerows(zip(*columns))
+        yield buf.getvalue().encode('utf-8')
+        buf.seek(0)
+        buf.truncate()
+    if buf.tell():
+        yield buf.getvalue().encode('utf-8')
+
+
+def _catalog_export_fits_column(table: Table, name: str):
+    """fits.Column describing `name` (no data) and the TNULL used for its masked integers."""
+    col = table[name]
+    dtype = col.dtype
+    shape = tuple(col.shape[1:])
+    repeat = int(np.prod(shape)) if shape else 1
+    masked = getattr(col, 'mask', None) is not None and bool(np.any(col.mask))
+    null = None
+    if dtype.kind in ('U', 'S'):
+        if shape:
+            raise HTTPException(status_code=400, detail=f"Column '{name}' holds string arrays, which FITS export does not support.")
+        width = max(1, dtype.itemsize // (4 if dtype.kind == 'U' else 1))
+        fmt = f"{width}A"
+    elif dtype.kind == 'b':
+        fmt = f"{repeat}L"
+    elif dtype.kind in ('i', 'u'):
+        # FITS bytes are unsigned and its wider integers signed: int8 and uint16/32 widen.
+        if dtype.kind == 'u':
+            code = {1: 'B', 2: 'J', 4: 'K', 8: 'K'}[dtype.itemsize]
+        else:
+            code = {1: 'I', 2: 'I', 4: 'J', 8: 'K'}[dtype.itemsize]
+        size = {'B': 1, 'I': 2, 'J': 4, 'K': 8}[code]
+        fmt = f"{repeat}{code}"
+        if masked:
+            null = 255 if code == 'B' else int(np.iinfo(f'i{size}').min)
+    elif dtype.kind == 'f':
+        fmt = f"{repeat}{'E' if dtype.itemsize <= 4 else 'D'}"
+    else:
+        raise HTTPException(status_code=400, detail=f"Column '{name}' has a type ({dtype}) FITS export does not support.")
+    unit = str(col.unit) if getattr(col, 'unit', None) is not None else None
+    dim = '(' + ','.join(str(s) for s in reversed(shape)) + ')' if len(shape) > 1 else None
+    return fits.Column(name=name, format=fmt, unit=unit, null=null, dim=dim), null
+
+
+def _catalog_export_fits(table: Table, names: list, batches, nrows: int):
+    """Primary HDU plus one BINTABLE whose rows are written chunk by chunk in FITS byte order."""
+    described = [_catalog_export_fits_column(table, name) for name in names]
+    hdu = fits.BinTableHDU.from_columns(fits.ColDefs([c for c, _ in described]), nrows=0)
+    hdu.header['NAXIS2'] = nrows
+    layout = hdu.data.dtype.newbyteorder('>')
+    yield fits.PrimaryHDU().header.tostring().encode('ascii')
+    yield hdu.header.tostring().encode('ascii')
+    written = 0
+    for idx in batches:
+        rec = np.zeros(idx.size, dtype=layout)
+        for name, (column, null) in zip(names, described):
+            raw, valid = _catalog_export_chunk(table, name, idx)
+            field = rec[name]
+            if raw.dtype.kind == 'U':
+                field[...] = np.char.encode(raw, 'ascii', errors='replace')
+            elif raw.dtype.kind == 'b':
+                flags = np.where(raw, ord('T'), ord('F')).astype(np.uint8)
+                flags[~valid] = 0
+                field[...] = flags.reshape(field.shape)
+            else:
+                field[...] = raw.reshape(field.shape)
+                if not valid.all():
+                    field[~valid] = np.nan if raw.dtype.kind == 'f' else null
+        yield rec.tobytes()
+        written += idx.size
+    if written != nrows:
+        print(f"[catalog_export] FITS export wrote {written} rows, header announced {nrows}")
+    yield b'\0' * (-written * layout.itemsize % 2880)
+
+
+def _catalog_export_arrow(raw: np.ndarray, valid: np.ndarray):
+    missing = None if valid.all() else ~valid
+    if raw.ndim > 1:
+        flat = pyarrow.array(np.ascontiguousarray(raw).reshape(-1))
+        out = pyarrow.FixedSizeListArray.from_arrays(flat, int(np.prod(raw.shape[1:])))
+        return out if missing is None else pyarrow.array(
+            [None if m else v for v, m in zip(out.to_pylist(), missing)], type=out.type)
+    if raw.dtype.kind == 'U':
+        return pyarrow.array(raw.tolist(), type=pyarrow.string(), mask=missing)
+    return pyarrow.array(raw, mask=missing)
+
+
+class _CatalogExportSink(io.RawIOBase):
+    """Write-only file collecting what ParquetWriter emits until the generator drains it."""
+
+    def __init__(self):
+        self._parts = []
+        self._pos = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        data = bytes(data)
+        self._parts.append(data)
+        self._pos += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._pos
+
+    def drain(self) -> bytes:
+        out = b''.join(self._parts)
+        self._parts.clear()
+        return out
+
+
+def _catalog_export_parquet(table: Table, names: list, batches):
+    """One Parquet row group per chunk; the schema comes from the first chunk."""
+    sink = _CatalogExportSink()
+    writer = None
+    try:
+        for idx in itertools.chain(batches, [None]):
+            if idx is None:
+                if writer is not None:
+                    break
+                idx = np.zeros(0, dtype=np.intp)
+            arrays = [_catalog_export_arrow(*_catalog_export_chunk(table, name, idx)) for name in names]
+            batch = pyarrow.Table.from_arrays(arrays, names=names)
+            if writer is None:
+                writer = pyarrow.parquet.ParquetWriter(sink, batch.schema)
+            writer.write_table(batch.cast(writer.schema))
+            yield sink.drain()
+    finally:
+        if writer is not None:
+            writer.close()
+    yield sink.drain()
+
+
+def _catalog_export_votable_field(table: Table, name: str) -> str:
+    col = table[name]
+    dtype = col.dtype
+    shape = tuple(col.shape[1:])
+    if dtype.kind in ('U', 'S'):
+        datatype, arraysize = ('unicodeChar' if dtype.kind == 'U' else 'char'), '*'
+    else:
+        datatype = {'b': 'boolean', 'f4': 'float', 'f2': 'float', 'i1': 'short', 'u1': 'unsignedByte',
+                    'i2': 'short', 'u2': 'int', 'i4': 'int', 'u4': 'long', 'i8': 'long', 'u8': 'long'}.get(
+            'b' if dtype.kind == 'b' else f"{dtype.kind}{dtype.itemsize}", 'double')
+        arraysize = 'x'.join(str(s) for s in reversed(shape)) if shape else None
+    attrs = f'name={quoteattr(name)} datatype="{datatype}"'
+    if arraysize:
+        attrs += f' arraysize="{arraysize}"'
+    if getattr(col, 'unit', None) is not None:
+        attrs += f' unit={quoteattr(str(col.unit))}'
+    return f'<FIELD {attrs}/>\n'
+
+
+def _catalog_export_votable(table: Table, names: list, batches, title: str):
+    """TABLEDATA VOTable; empty cells are nulls."""
+    fields = ''.join(_catalog_export_votable_field(table, name) for name in names)
+    yield ('<?xml version="1.0" encoding="UTF-8"?>\n'
+           '<VOTABLE version="1.4" xmlns="http://www.ivoa.net/xml/VOTable/v1.3">\n'
+           f'<RESOURCE>\n<TABLE name={quoteattr(title)}>\n{fields}<DATA>\n<TABLEDATA>\n').encode('utf-8')
+    for idx in batches:
+        columns = []
+        for name in names:
+            raw, valid = _catalog_export_chunk(table, name, idx)
+            if raw.dtype.kind == 'f':
+                # NaN is written as an empty (null) cell.
+                valid = valid & ~np.isnan(raw).reshape(len(raw), -1).any(axis=1)
+            cells = _catalog_export_cells(raw, valid)
+            if raw.dtype.kind == 'b':
+                cells = [None if c is None else ('T' if c else 'F') for c in cells]
+            columns.append(['' if c is None else xml_escape(str(c)) for c in cells])
+        yield ''.join('<TR><TD>' + '</TD><TD>'.join(row) + '</TD></TR>\n' for row in zip(*columns)).encode('utf-8')
+    yield '</TABLEDATA>\n</DATA>\n</TABLE>\n</RESOURCE>\n</VOTABLE>\n'.encode('utf-8')
+
+
+@app.get("/catalog-export/{catalog_name:path}")
+async def export_catalog_data(
+    catalog_name: str,
+    format: str = Query(DEFAULT_EXPORT_FORMAT, regex="^(csv|fits|parquet|votable)$"),
+    search: Optional[str] = Query(None, description="Search term, as in the catalog viewer"),
+    filters: Optional[str] = Query(None, description="JSON column filters, as in the catalog viewer"),
+    columns: Optional[str] = Query(None, description="Comma-separated columns to export (default: all)"),
+    sort_by: Optional[str] = Query(None, description="Column to sort by"),
+    sort_order: str = Query("asc", regex="^(asc|desc)$"),
+    selection: Optional[str] = Query(None, description="Selection handle from /range-search/ to restrict rows"),
+    max_rows: Optional[int] = Query(None, ge=1, description="Export at most this many rows (default: MAX_EXPORT_ROWS, 0 = all)"),
+):
+    """
+    Stream the rows of a catalog that match the viewer's search/filters/selection, in the
+    viewer's sort order, as CSV, FITS, Parquet or VOTable.
+    """
+    if format == 'parquet' and not _PYARROW_AVAILABLE:
+        raise HTTPException(status_code=400, detail="Parquet export needs the 'pyarrow' package.")
+    catalogs_dir = Path(CATALOGS_DIRECTORY)
+    try:
+        base_dir = Path(".").resolve()
+        if (base_dir / catalog_name).is_file():
+            catalogs_dir = base_dir
+        elif (base_dir / UPLOADS_DIRECTORY / catalog_name).is_file():
+            catalogs_dir = base_dir / UPLOADS_DIRECTORY
+        elif (base_dir / FILES_DIRECTORY / catalog_name).is_file() and not (base_dir / CATALOGS_DIRECTORY / catalog_name).is_file():
+            catalogs_dir = base_dir / FILES_DIRECTORY
+    except Exception:
+        pass
+
+    loop = asyncio.get_running_loop()
+    table = await loop.run_in_executor(app.state.thread_executor, get_astropy_table_from_catalog, catalog_name, catalogs_dir)
+    if table is None:
+        raise HTTPException(status_code=404, detail=f"Could not load catalog '{catalog_name}'.")
+
+    if columns:
+        names = [c.strip() for c in columns.split(",") if c.strip()]
+        unknown = [c for c in names if c not in table.colnames]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown columns: {', '.join(unknown)}")
+    else:
+        names = list(table.colnames)
+    if sort_by and sort_by not in table.colnames:
+        raise HTTPException(status_code=400, detail=f"Unknown sort column '{sort_by}'.")
+
+    def select():
+        nrows = len(table)
+        dictionaries = _catalog_query_dictionaries(catalog_name, catalogs_dir) if (search or filters or sort_by) else {}
+        mask = None
+        if search or filters:
+            mask = _catalog_query_mask(table, nrows, search, filters, search_columns=names, dictionaries=dictionaries)
+        if selection:
+            allowed = _catalog_selection_mask(selection, catalog_name, catalogs_dir, nrows)
+            mask = allowed if mask is None else mask & allowed
+        count = nrows if mask is None else int(np.count_nonzero(mask))
+        order = None
+        if sort_by:
+            order = _catalog_sort_order(catalog_name, catalogs_dir, table, sort_by, sort_order == 'desc',
+                                        dictionaries.get(sort_by))
+            if order is None:
+                rows = np.arange(nrows) if mask is None else np.flatnonzero(mask)
+                order = _catalog_sort_indices(table[sort_by], rows, sort_order == 'desc', dictionaries.get(sort_by))
+                mask = None
+        return mask, order, count
+
+    mask, order, count = await loop.run_in_executor(app.state.thread_executor, select)
+    limit = max_rows if max_rows is not None else int(MAX_EXPORT_ROWS or 0)
+    if limit > 0:
+        count = min(count, limit)
+    batches = _catalog_export_batches(len(table), mask, order, count)
+
+    stem = Path(catalog_name).stem or "catalog"
+    if format == 'csv':
+        body = _catalog_export_csv(table, names, batches)
+    elif format == 'fits':
+        body = _catalog_export_fits(table, names, batches, count)
+    elif format == 'parquet':
+        body = _catalog_export_parquet(table, names, batches)
+    else:
+        body = _catalog_export_votable(table, names, batches, stem)
+    if format == 'fits':
+        # Column types are checked when the header is made; fail with a 400 before streaming starts.
+        first = next(body)
+        body = itertools.chain([first], body)
+    media_type, suffix = _CATALOG_EXPORT_MEDIA_TYPES[format]
+    print(f"[catalog_export] {catalog_name}: {count} rows x {len(names)} columns as {format}")
+    return StreamingResponse(body, media_type=media_type, headers={
+        "Content-Disposition": f'attachment; filename="{stem}_export{suffix}"',
+        "X-Export-Rows": str(count),
+    })
+
+@app.get("/file-size/{filepath:path}")
+async def get_file_size(filepath: str):
+    """Get the size of a file in the files directory."""
+    try:
+        # Base directory is "files"
+        base_dir = Path(FILES_DIRECTORY)  # Updated
+        
+        # Construct the full path
+        file_path = base_dir / filepath
+        
+        # Ensure the file exists
+        if not file_path.exists():
+            return JSONResponse(
+                status_code=404,
+                content={"error": f"File not found: {filepath}"}
+            )
+        
+        # Ensure the file is within the files directory (security check)
+        if ".." in Path(filepath).parts:
+            return JSONResponse(
+                status_code=403,
+                content={"error": "Access denied: file is outside the files directory"}
+            )
+        
+        # Get file size
+        file_size = file_path.stat().st_size
+        
+        return JSONResponse(content={
+            "path": filepath,
+            "size": file_size,
+            "formatted_size": format_file_size(file_size)
+        })
+    except Exception as e:
+        print(f"Error getting file size: {str(e)}")
+        return JSONResponse(
+            status_code=500,
+            content={"error": f"Failed to get file size: {str(e)}"}
+        )
+
+# Helper function to format file size
+def format_file_size(bytes):
+    """Format file size in human-readable format."""
+    if bytes < 1024:
+        return f"{bytes} B"
+    elif bytes < 1024 * 1024:
         return f"{bytes / 1024:.1f} KB"
     elif bytes < 1024 * 1024 * 1024:
         return f"{bytes / (1024 * 1024):.1f} MB"
@@ -13426,77 +17797,1659 @@ from astropy.table import Table
 from astropy.io import fits
 
 
-def _catalog_column_units_map(table) -> dict:
-    """Map column name -> unit string from an Astropy Table (for overlay value suffixes)."""
-    out = {}
-    if table is None:
-        return out
+def _catalog_column_units_map(table) -> dict:
+    """Map column name -> unit string from an Astropy Table (for overlay value suffixes)."""
+    out = {}
+    if table is None:
+        return out
+    try:
+        for cn in table.colnames:
+            col = table[cn]
+            u = getattr(col, "unit", None)
+            if u is None:
+                continue
+            s = str(u).strip()
+            if not s:
+                continue
+            sl = s.lower()
+            if sl in ("none", "---", "dimensionless", "unitless"):
+                continue
+            out[str(cn)] = s
+    except Exception:
+        pass
+    return out
+
+
+def resolve_catalog_file_path(catalog_name: str) -> Optional[Path]:
+    """Resolve a catalog reference to an on-disk FITS path (catalogs/, files/uploads/, files/)."""
+    base_dir = Path(".").resolve()
+    norm_name = unquote(str(catalog_name)).replace("\\", "/").strip()
+    if not norm_name:
+        return None
+
+    basename = Path(norm_name).name
+    candidates: list[Path] = []
+
+    if norm_name.startswith(f"{FILES_DIRECTORY}/"):
+        candidates.append(base_dir / norm_name)
+    if norm_name.startswith(f"{CATALOGS_DIRECTORY}/"):
+        candidates.append(base_dir / norm_name)
+    if norm_name.startswith(f"{UPLOADS_DIRECTORY}/"):
+        candidates.append(base_dir / norm_name)
+    try:
+        if Path(norm_name).is_absolute():
+            candidates.append(Path(norm_name))
+    except Exception:
+        pass
+
+    for name_variant in (norm_name, norm_name.replace(" ", "+"), basename, basename.replace(" ", "+")):
+        candidates.extend([
+            base_dir / name_variant,
+            base_dir / CATALOGS_DIRECTORY / name_variant,
+            base_dir / UPLOADS_DIRECTORY / name_variant,
+            base_dir / FILES_DIRECTORY / name_variant,
+        ])
+
+    seen: set[str] = set()
+    for cand in candidates:
+        try:
+            key = str(cand.resolve()).lower()
+        except Exception:
+            key = str(cand).lower()
+        if key in seen:
+            continue
+        seen.add(key)
+        try:
+            if cand.is_file():
+                return cand
+        except Exception:
+            continue
+    return None
+
+
+# --- Columnar catalog store ---
+# Catalogs are converted once into one .npy file per column (plus a sorted
+# string dictionary and per-row codes for every text column) and read back as
+# memory maps, so endpoints get columns without re-parsing the FITS/ASCII
+# source on every request. Each column's summary (moments, percentiles and
+# histogram, or distinct values and top-k for text) is computed in the same
+# pass and kept in meta.json, and flag columns (booleans, true/false text and
+# integers with few distinct values) get compressed bitmaps per value. Sort
+# orders and text indexes are derived from the stored columns on first use and
+# saved beside them. meta.json also fingerprints the source (table layout and a
+# digest of the stored rows' bytes), so a source that only gained rows at its end
+# can be extended instead of stored again (see CatalogStoreCache.refresh).
+
+CATALOG_STORE_ENABLED = os.getenv('CATALOG_STORE_ENABLED', '1').lower() not in ('0', 'false', 'no')
+CATALOG_STORE_DIRECTORY = os.getenv('CATALOG_STORE_DIRECTORY', '.catalog_store')
+CATALOG_STORE_MAX_OPEN = int(os.getenv('CATALOG_STORE_MAX_OPEN', '32'))
+# Largest dictionary kept for a text column; 0 encodes every text column whatever its cardinality.
+CATALOG_STORE_DICTIONARY_MAX = int(os.getenv('CATALOG_STORE_DICTIONARY_MAX', '0'))
+CATALOG_STORE_STATS_TOP_K = int(os.getenv('CATALOG_STORE_STATS_TOP_K', '20'))
+CATALOG_TEXT_INDEX_MAX_GRAMS = int(os.getenv('CATALOG_TEXT_INDEX_MAX_GRAMS', '200000000'))
+# Integer columns with at most this many distinct values (spanning < 65536) are indexed as flags; 0 disables.
+CATALOG_FLAG_INDEX_MAX_VALUES = int(os.getenv('CATALOG_FLAG_INDEX_MAX_VALUES', '64'))
+# Bytes of a source sampled (in 64 KiB blocks spread over the stored rows) to recognise appends; 0 disables.
+CATALOG_STORE_FINGERPRINT_MB = int(os.getenv('CATALOG_STORE_FINGERPRINT_MB', '8'))
+_CATALOG_STORE_FORMAT = 4
+_CATALOG_FINGERPRINT_BLOCK = 1 << 16
+# Percentiles kept per numeric column; stored at 0, 1, ..., 100.
+_CATALOG_STORE_PERCENTILES = np.arange(101, dtype=float)
+_CATALOG_FITS_SUFFIXES = ('.fits', '.fit', '.fts', '.fits.gz', '.fit.gz', '.fts.gz')
+
+
+class _CatalogStoreUnsupported(ValueError):
+    """The catalog has columns the store cannot hold (variable-length arrays, objects)."""
+
+
+def _is_fits_catalog(path: Path) -> bool:
+    if path.name.lower().endswith(_CATALOG_FITS_SUFFIXES):
+        return True
+    try:
+        with open(path, "rb") as fh:
+            return fh.read(6) == b"SIMPLE"
+    except Exception:
+        return False
+
+
+def _catalog_default_table_hdu(path: Path) -> int:
+    """Index of the table HDU get_astropy_table_from_catalog picks: first BINTABLE, else first TABLE."""
+    hdus = fits_metadata_cache.get(path).hdus
+    xtensions = [
+        "" if meta.compressed else str(meta.header.get("XTENSION", "") or "").strip().upper()
+        for meta in hdus
+    ]
+    for wanted in ("BINTABLE", "TABLE"):
+        for meta, xtension in zip(hdus, xtensions):
+            if xtension == wanted:
+                return meta.index
+    return -1
+
+
+def _read_ascii_catalog_table(path: Path) -> Table:
+    try:
+        return Table.read(path, format='ascii')
+    except Exception:
+        try:
+            return Table.read(path, format='csv')
+        except Exception:
+            return Table.read(path, format='tab')
+
+
+def _catalog_numeric_summary(values: np.ndarray, valid: np.ndarray) -> dict:
+    data = values[valid] if not valid.all() else values
+    finite = np.isfinite(data) if data.dtype.kind == 'f' else None
+    if finite is not None and not finite.all():
+        nan_count = int(np.count_nonzero(np.isnan(data)))
+        inf_count = int(data.size - nan_count - np.count_nonzero(finite))
+        data = data[finite]
+    else:
+        nan_count = inf_count = 0
+    summary = {"kind": "numeric", "count": int(data.size), "null_count": int(values.size - data.size - inf_count),
+               "nan_count": nan_count, "inf_count": inf_count,
+               "min": None, "max": None, "mean": None, "std": None, "percentiles": None, "histogram": None}
+    if data.size:
+        as_float = data.astype(np.float64, copy=False)
+        summary.update({
+            "min": float(data.min()), "max": float(data.max()),
+            "mean": float(as_float.mean()), "std": float(as_float.std()),
+            "percentiles": [float(v) for v in np.percentile(as_float, _CATALOG_STORE_PERCENTILES)],
+        })
+        counts, edges = np.histogram(as_float, bins=CATALOG_ANALYSIS_HISTOGRAM_BINS)
+        summary["histogram"] = {"bins": [float(v) for v in edges], "counts": [int(v) for v in counts]}
+    return summary
+
+
+def _catalog_categorical_summary(distinct: np.ndarray, counts: np.ndarray, count: int, null_count: int) -> dict:
+    top = np.argsort(-counts, kind='stable')[:max(0, CATALOG_STORE_STATS_TOP_K)]
+    text = distinct[top]
+    if text.dtype.kind == 'S':
+        text = np.char.decode(text, 'utf-8', errors='ignore')
+    return {"kind": "categorical", "count": int(count), "null_count": int(null_count),
+            "unique_count": int(len(distinct)),
+            "top": [{"value": str(v), "count": int(c)} for v, c in zip(text.tolist(), counts[top].tolist())]}
+
+
+def _catalog_column_summary(arr: np.ndarray, mask=None, dictionary=None, codes=None) -> Optional[dict]:
+    """Exact summary of a 1-D column written to the store, or None for array-valued columns."""
+    if arr.ndim != 1:
+        return None
+    valid = ~mask if mask is not None else np.ones(arr.shape, dtype=bool)
+    if arr.dtype.kind in ('i', 'u', 'f'):
+        return _catalog_numeric_summary(arr, valid)
+    n_valid = int(np.count_nonzero(valid))
+    if arr.dtype.kind == 'b':
+        n_true = int(np.count_nonzero(arr & valid))
+        distinct, counts = np.array([True, False]), np.array([n_true, n_valid - n_true])
+    elif arr.dtype.kind in ('U', 'S'):
+        if dictionary is None:
+            dictionary, codes = np.unique(arr, return_inverse=True)
+        distinct, counts = dictionary, np.bincount(codes[valid], minlength=len(dictionary))
+    else:
+        return None
+    present = counts > 0
+    return _catalog_categorical_summary(distinct[present], counts[present], n_valid, arr.size - n_valid)
+
+
+def _write_catalog_store_column(directory: Path, index: int, name: str, values, unit, mask=None, encoded=None) -> dict:
+    """Write one column and its dictionary, summary and flag index; encoded is a known (dictionary, codes)."""
+    arr = np.asarray(values)
+    if arr.dtype.kind == 'O':
+        raise _CatalogStoreUnsupported(f"column '{name}' has variable-length or object values")
+    if arr.dtype.byteorder not in ('=', '|'):
+        arr = arr.astype(arr.dtype.newbyteorder('='))
+    entry = {"name": str(name), "file": f"c{index:04d}.npy", "dtype": arr.dtype.str,
+             "unit": str(unit).strip() if unit is not None and str(unit).strip() else None,
+             "mask": None, "dictionary": None, "stats": None, "flags": None}
+    np.save(directory / entry["file"], arr, allow_pickle=False)
+    if mask is not None:
+        mask = np.asarray(mask, dtype=bool)
+        if mask.shape == arr.shape and mask.any():
+            entry["mask"] = f"c{index:04d}.mask.npy"
+            np.save(directory / entry["mask"], mask, allow_pickle=False)
+        else:
+            mask = None
+    dictionary = codes = None
+    if arr.dtype.kind in ('U', 'S') and arr.ndim == 1:
+        dictionary, codes = encoded if encoded is not None else np.unique(arr, return_inverse=True)
+        if not CATALOG_STORE_DICTIONARY_MAX or len(dictionary) <= CATALOG_STORE_DICTIONARY_MAX:
+            code_dtype = np.uint16 if len(dictionary) <= np.iinfo(np.uint16).max else np.int32
+            entry["dictionary"] = {"codes": f"c{index:04d}.codes.npy", "values": f"c{index:04d}.dict.npy",
+                                   "size": int(len(dictionary))}
+            np.save(directory / entry["dictionary"]["codes"], codes.astype(code_dtype, copy=False), allow_pickle=False)
+            np.save(directory / entry["dictionary"]["values"], dictionary, allow_pickle=False)
+    try:
+        entry["stats"] = _catalog_column_summary(arr, mask, dictionary, codes)
+    except Exception as e:
+        print(f"[catalog_store] No summary for column '{name}': {e}")
+    try:
+        entry["flags"] = _write_catalog_flag_index(directory, index, arr, mask, dictionary, codes)
+    except Exception as e:
+        print(f"[catalog_store] No flag index for column '{name}': {e}")
+    return entry
+
+
+def _build_catalog_store(path: Path, hdu_index: int, is_fits: bool, directory: Path) -> dict:
+    """Write every column of the source catalog into directory and return the metadata document."""
+    columns = []
+    if is_fits:
+        with fits.open(path, memmap=True) as hdul:
+            hdu = hdul[hdu_index]
+            data = hdu.data
+            nrows = 0 if data is None else len(data)
+            for i, col in enumerate(hdu.columns):
+                values = data.field(col.name) if data is not None else np.zeros(0)
+                columns.append(_write_catalog_store_column(directory, i, col.name, values, col.unit))
+                del values
+    else:
+        table = _read_ascii_catalog_table(path)
+        nrows = len(table)
+        for i, name in enumerate(table.colnames):
+            col = table[name]
+            mask = getattr(col, "mask", None)
+            values = col.data.data if mask is not None else col.data
+            columns.append(_write_catalog_store_column(directory, i, name, values, col.unit, mask))
+    return {"format": _CATALOG_STORE_FORMAT, "source": str(path), "kind": "fits" if is_fits else "ascii",
+            "hdu": int(hdu_index), "nrows": int(nrows), "columns": columns}
+
+
+def _catalog_region_digest(path: Path, start: int, end: int) -> str:
+    """Digest of bytes [start, end) of a file: all of them when few, else blocks spread evenly over them."""
+    block = _CATALOG_FINGERPRINT_BLOCK
+    count = max(2, CATALOG_STORE_FINGERPRINT_MB * 1024 * 1024 // block)
+    if end - start <= count * block:
+        offsets = range(start, end, block)
+    else:
+        offsets = np.unique(np.linspace(start, end - block, count).astype(np.int64)).tolist()
+    digest = hashlib.blake2b(f"{start}:{end}".encode("utf-8"), digest_size=16)
+    with open(path, "rb") as fh:
+        for offset in offsets:
+            fh.seek(offset)
+            digest.update(fh.read(min(block, end - offset)))
+    return digest.hexdigest()
+
+
+def _catalog_fits_layout(path: Path, hdu_index: int) -> Optional[dict]:
+    """Data offset, row width, heap size and column definitions of a FITS table HDU."""
+    with fits.open(path, memmap=True) as hdul:
+        hdu = hdul[hdu_index]
+        info = hdul.fileinfo(hdu_index) or {}
+        if not isinstance(hdu, (fits.BinTableHDU, fits.TableHDU)) or info.get("datLoc") is None:
+            return None
+        definitions = repr([(c.name, c.format, c.unit, c.bscale, c.bzero, c.dim, c.null) for c in hdu.columns])
+        return {"offset": int(info["datLoc"]), "row_bytes": int(hdu.header.get("NAXIS1", 0)),
+                "pcount": int(hdu.header.get("PCOUNT", 0) or 0),
+                "columns": hashlib.sha1(definitions.encode("utf-8")).hexdigest()}
+
+
+def _catalog_source_fingerprint(meta: dict, size: int) -> Optional[dict]:
+    """
+    What appending rows to the store's source (of `size` bytes when stored) leaves unchanged: the
+    table layout and a digest of the stored rows' bytes. None when appends can't be recognised.
+    """
+    if CATALOG_STORE_FINGERPRINT_MB <= 0:
+        return None
+    path = Path(meta["source"])
+    if meta["kind"] == "fits":
+        if path.name.lower().endswith('.gz'):
+            return None
+        fingerprint = _catalog_fits_layout(path, int(meta["hdu"]))
+        if fingerprint is None or fingerprint["pcount"]:
+            return None
+        start = fingerprint["offset"]
+        end = start + fingerprint["row_bytes"] * int(meta["nrows"])
+    else:
+        with open(path, "rb") as fh:
+            header = fh.readline()
+            fh.seek(max(0, size - 1))
+            if fh.read(1) != b"\n":
+                return None
+        fingerprint, start, end = {"header": len(header)}, 0, int(size)
+    fingerprint["digest"] = _catalog_region_digest(path, start, end)
+    return fingerprint
+
+
+def _catalog_appended_tail(path: Path, meta: dict) -> Optional[dict]:
+    """
+    {column: (values, mask)} of the rows appended to a store's source since it was stored, or
+    None when the source changed in any other way (or the store has no fingerprint).
+    """
+    fingerprint = meta.get("fingerprint")
+    if not fingerprint:
+        return None
+    nrows = int(meta["nrows"])
+    names = [c["name"] for c in meta["columns"]]
+    if meta["kind"] == "fits":
+        layout = _catalog_fits_layout(path, int(meta["hdu"]))
+        if layout is None or any(layout[k] != fingerprint[k] for k in ("offset", "row_bytes", "pcount", "columns")):
+            return None
+        start = fingerprint["offset"]
+        if _catalog_region_digest(path, start, start + fingerprint["row_bytes"] * nrows) != fingerprint["digest"]:
+            return None
+        with fits.open(path, memmap=True) as hdul:
+            data = hdul[int(meta["hdu"])].data
+            if data is None or len(data) < nrows:
+                return None
+            tail = data[nrows:]
+            return {name: (np.array(tail.field(name)), None) for name in names}
+    size = int(meta["size"])
+    if path.stat().st_size < size or _catalog_region_digest(path, 0, size) != fingerprint["digest"]:
+        return None
+    with open(path, "rb") as fh:
+        header = fh.read(fingerprint["header"])
+        fh.seek(size)
+        text = fh.read()
+    if not text.strip():
+        return {}
+    table = _read_ascii_catalog_table((header + text).decode("utf-8", errors="replace"))
+    if list(table.colnames) != names:
+        return None
+    out = {}
+    for name in names:
+        col = table[name]
+        mask = getattr(col, "mask", None)
+        out[name] = (np.asarray(col.data.data if mask is not None else col.data), mask)
+    return out
+
+
+def _catalog_sort_keys(values: np.ndarray, mask=None, codes=None) -> tuple:
+    """(float keys, missing rows) a stored sort order of the column is ordered by, or (None, None)."""
+    if codes is not None:
+        keys = np.asarray(codes, dtype=np.float64)
+        missing = np.zeros(keys.size, dtype=bool)
+    elif values.ndim == 1 and values.dtype.kind in ('b', 'i', 'u', 'f'):
+        keys = values.astype(np.float64)
+        missing = np.isnan(keys)
+    else:
+        return None, None
+    if mask is not None:
+        missing |= mask
+    return keys, missing
+
+
+def _catalog_merge_sort_order(order: np.ndarray, keys: np.ndarray, missing: np.ndarray, old_nrows: int,
+                              descending: bool) -> np.ndarray:
+    """
+    Extend a stable sort order of the first old_nrows rows (as _catalog_sort_indices makes it:
+    missing rows last, in row order) to the rows appended after them, without sorting it again.
+    """
+    present = int(np.count_nonzero(~missing[:old_nrows]))
+    head, head_missing = np.asarray(order[:present], dtype=np.int64), np.asarray(order[present:], dtype=np.int64)
+    tail = np.arange(old_nrows, keys.size, dtype=np.int64)
+    tail_missing = tail[missing[old_nrows:]]
+    tail = tail[~missing[old_nrows:]]
+    tail = _catalog_stable_order(tail, keys[tail], descending)
+    sign = -1.0 if descending else 1.0
+    # Ties keep row order, so appended rows go after every stored row with the same key.
+    positions = np.searchsorted(sign * keys[head], sign * keys[tail], side='right')
+    return np.concatenate((np.insert(head, positions, tail), head_missing, tail_missing))
+
+
+def _catalog_merge_dictionary(codes: np.ndarray, dictionary: np.ndarray, values: np.ndarray) -> tuple:
+    """
+    (dictionary, codes) of a stored text column followed by `values`. Only values missing from
+    the sorted dictionary are inserted into it, and stored codes shift past them in one pass.
+    """
+    added, added_codes = np.unique(values, return_inverse=True)
+    positions = np.searchsorted(dictionary, added)
+    known = np.zeros(len(added), dtype=bool)
+    inside = positions < len(dictionary)
+    known[inside] = dictionary[positions[inside]] == added[inside]
+    if known.all():
+        return dictionary, np.concatenate((codes, positions[added_codes]))
+    dtype = np.result_type(dictionary.dtype, added.dtype)
+    union = np.insert(dictionary.astype(dtype, copy=False), positions[~known], added[~known])
+    shift = np.cumsum(np.bincount(positions[~known], minlength=len(dictionary) + 1))[:len(dictionary)]
+    return union, np.concatenate(((np.arange(len(dictionary)) + shift)[codes], np.searchsorted(union, added)[added_codes]))
+
+
+def _extend_catalog_store(store: "CatalogColumnStore", tail: dict, directory: Path) -> Optional[dict]:
+    """
+    Write into directory the store of a catalog that gained the rows in `tail` (see
+    _catalog_appended_tail) and return its metadata document, or None when a column's type
+    changed. Text dictionaries are merged instead of sorted again and saved sort orders are
+    merged with the sorted tail; summaries and flag bitmaps are recomputed from the columns.
+    """
+    added = None
+    columns = []
+    for i, entry in enumerate(store.meta["columns"]):
+        name = entry["name"]
+        stored = store._load(entry["file"])
+        values, mask = tail.get(name, (stored[:0], None))
+        values = np.asarray(values)
+        if values.dtype.byteorder not in ('=', '|'):
+            values = values.astype(values.dtype.newbyteorder('='))
+        if values.dtype.kind != stored.dtype.kind or values.shape[1:] != stored.shape[1:]:
+            return None
+        if added is None:
+            added = len(values)
+        elif len(values) != added:
+            return None
+        merged = np.concatenate((stored, values))
+        merged_mask = None
+        if entry.get("mask") or (mask is not None and np.any(mask)):
+            stored_mask = store._load(entry["mask"]) if entry.get("mask") else np.zeros(len(stored), dtype=bool)
+            tail_mask = np.asarray(mask, dtype=bool) if mask is not None else np.zeros(len(values), dtype=bool)
+            merged_mask = np.concatenate((stored_mask, tail_mask))
+        encoded = None
+        if entry.get("dictionary"):
+            encoded = _catalog_merge_dictionary(*store.dictionary(name), values)
+        columns.append(_write_catalog_store_column(directory, i, name, merged, entry.get("unit"), merged_mask, encoded))
+        codes = encoded[1] if encoded is not None and columns[-1]["dictionary"] else None
+        for direction in ("asc", "desc"):
+            filename = f"{Path(entry['file']).stem}.{direction}.order.npy"
+            if not (store.directory / filename).is_file():
+                continue
+            keys, missing = _catalog_sort_keys(merged, merged_mask, codes)
+            if keys is None:
+                continue
+            order = _catalog_merge_sort_order(store._load(filename), keys, missing, store.nrows, direction == 'desc')
+            np.save(directory / filename, order.astype(np.int32 if len(merged) < 2 ** 31 else np.int64), allow_pickle=False)
+        del merged, merged_mask, encoded
+    meta = {k: v for k, v in store.meta.items() if k not in ("size", "mtime_ns", "fingerprint", "extended_from")}
+    meta.update({"nrows": store.nrows + (added or 0), "columns": columns,
+                 "extended_from": [store.meta.get("size"), store.meta.get("mtime_ns"), store.nrows]})
+    return meta
+
+
+def _catalog_text_grams(fold: np.ndarray) -> list:
+    """
+    Trigram postings of a sorted, case-folded dictionary: [grams, offsets, positions], where the
+    dictionary positions holding trigram grams[i] are positions[offsets[i]:offsets[i + 1]].
+    """
+    empty = [np.zeros(0, dtype=np.uint64), np.zeros(1, dtype=np.int64), np.zeros(0, dtype=np.int32)]
+    width = fold.dtype.itemsize // 4
+    if fold.dtype.kind != 'U' or width < 3 or not len(fold):
+        return empty
+    if int(np.maximum(np.char.str_len(fold) - 2, 0).sum()) > CATALOG_TEXT_INDEX_MAX_GRAMS:
+        return empty
+    keys, positions = [], []
+    step = max(1, 4_000_000 // width)
+    for start in range(0, len(fold), step):
+        chars = np.ascontiguousarray(fold[start:start + step]).view(np.uint32).reshape(-1, width).astype(np.uint64)
+        # Three code points (21 bits each) packed into one key; trailing NULs are padding.
+        grams = (chars[:, :-2] << np.uint64(42)) | (chars[:, 1:-1] << np.uint64(21)) | chars[:, 2:]
+        present = chars[:, 2:] != 0
+        keys.append(grams[present])
+        positions.append(np.broadcast_to(np.arange(start, start + len(chars), dtype=np.int32)[:, None],
+                                         grams.shape)[present])
+    keys, positions = np.concatenate(keys), np.concatenate(positions)
+    # Positions ascend in row-major order, so a stable sort leaves each posting list sorted.
+    order = np.argsort(keys, kind='stable')
+    keys, positions = keys[order], positions[order]
+    first = np.ones(len(keys), dtype=bool)
+    first[1:] = (keys[1:] != keys[:-1]) | (positions[1:] != positions[:-1])
+    keys, positions = keys[first], positions[first]
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]]) if len(keys) else np.zeros(0, dtype=np.int64)
+    return [keys[starts], np.r_[starts, len(keys)].astype(np.int64), positions]
+
+
+# Flag indexes: one roaring-style bitmap per distinct value of a flag column. Rows
+# are split into chunks of 65536; a value's rows in a chunk are kept as sorted
+# uint16 offsets when there are few of them, else as an 8 KiB bitmap. Lookups
+# produce numpy packbits bitmaps, which are ANDed/ORed/inverted byte-wise.
+_CATALOG_BITMAP_CHUNK = 1 << 16
+_CATALOG_BITMAP_ARRAY_MAX = 4096
+_CATALOG_FLAG_TRUE_TEXT = ('true', 't', 'yes', 'y', '1')
+_CATALOG_FLAG_FALSE_TEXT = ('false', 'f', 'no', 'n', '0', '')
+
+
+def _catalog_flag_codes(arr: np.ndarray, mask=None, dictionary=None, codes=None):
+    """
+    (distinct values, value position per row (-1 for masked rows), which values read as true,
+    whether the column is boolean) for a flag column, or None when the column is not one.
+    """
+    if arr.ndim != 1 or not arr.size:
+        return None
+    valid = ~mask if mask is not None else None
+    if arr.dtype.kind == 'b':
+        values, rows, truth, boolean = np.array([False, True]), arr.astype(np.int16), np.array([False, True]), True
+    elif arr.dtype.kind in ('i', 'u') and CATALOG_FLAG_INDEX_MAX_VALUES > 0:
+        present = arr if valid is None else arr[valid]
+        if not present.size:
+            return None
+        lo, hi = int(present.min()), int(present.max())
+        if hi - lo >= _CATALOG_BITMAP_CHUNK:
+            return None
+        slots = np.flatnonzero(np.bincount((present - lo).astype(np.int64, copy=False), minlength=hi - lo + 1))
+        if len(slots) > CATALOG_FLAG_INDEX_MAX_VALUES:
+            return None
+        lookup = np.full(hi - lo + 1, -1, dtype=np.int16)
+        lookup[slots] = np.arange(len(slots), dtype=np.int16)
+        values = (slots + lo).astype(arr.dtype)
+        rows = lookup[np.clip(arr.astype(np.int64, copy=False) - lo, 0, hi - lo)]
+        truth, boolean = values != 0, bool(np.isin(values, [0, 1]).all())
+    elif arr.dtype.kind in ('U', 'S') and dictionary is not None and len(dictionary) <= 16:
+        folded = np.char.strip(_query_text(np.asarray(dictionary)))
+        if not np.isin(folded, _CATALOG_FLAG_TRUE_TEXT + _CATALOG_FLAG_FALSE_TEXT).all() or not (folded != '').any():
+            return None
+        values, rows, boolean = np.asarray(dictionary), np.asarray(codes).astype(np.int16), True
+        truth = np.isin(folded, _CATALOG_FLAG_TRUE_TEXT)
+    else:
+        return None
+    if valid is not None:
+        rows = np.where(valid, rows, np.int16(-1))
+    return values, rows, truth, boolean
+
+
+def _catalog_bitmap_containers(rows_codes: np.ndarray, nrows: int) -> list:
+    """
+    [containers, arrays, bitmaps] for per-value bitmaps of rows_codes (value position per row,
+    -1 skipped). containers is (n, 5) int64: value, chunk, dense, offset, rows; a sparse
+    container's rows are arrays[offset:offset + rows] and a dense one is bitmaps[offset].
+    """
+    rows = np.flatnonzero(rows_codes >= 0)
+    codes = rows_codes[rows]
+    # A stable sort keeps rows ascending within each value; small integer keys sort by radix.
+    order = np.argsort(codes, kind='stable')
+    rows, codes = rows[order], codes[order].astype(np.int64)
+    nchunks = max(1, -(-int(nrows) // _CATALOG_BITMAP_CHUNK))
+    keys = codes * nchunks + (rows >> 16)
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]]) if rows.size else np.zeros(0, dtype=np.int64)
+    cards = np.diff(np.r_[starts, rows.size])
+    dense = cards > _CATALOG_BITMAP_ARRAY_MAX
+    low = (rows & (_CATALOG_BITMAP_CHUNK - 1)).astype(np.uint16)
+    arrays = low[np.repeat(~dense, cards)]
+    offsets = np.zeros(len(starts), dtype=np.int64)
+    offsets[~dense] = np.r_[0, np.cumsum(cards[~dense])[:-1]] if (~dense).any() else []
+    offsets[dense] = np.arange(int(dense.sum()))
+    bitmaps = np.zeros((int(dense.sum()), _CATALOG_BITMAP_CHUNK // 8), dtype=np.uint8)
+    for i, start in enumerate(starts[dense]):
+        bits = np.zeros(_CATALOG_BITMAP_CHUNK, dtype=bool)
+        bits[low[start:start + cards[dense][i]]] = True
+        bitmaps[i] = np.packbits(bits)
+    containers = np.stack([codes[starts], rows[starts] >> 16, dense.astype(np.int64), offsets, cards], axis=1) \
+        if len(starts) else np.zeros((0, 5), dtype=np.int64)
+    return [containers.astype(np.int64), arrays, bitmaps]
+
+
+def _write_catalog_flag_index(directory: Path, index: int, arr: np.ndarray, mask=None, dictionary=None, codes=None) -> Optional[dict]:
+    """Write the bitmaps of a flag column beside it and return their metadata entry, or None."""
+    found = _catalog_flag_codes(arr, mask, dictionary, codes)
+    if found is None:
+        return None
+    values, rows_codes, truth, boolean = found
+    containers, arrays, bitmaps = _catalog_bitmap_containers(rows_codes, arr.size)
+    entry = {"boolean": bool(boolean), "count": int(len(values)), "bytes": int(arrays.nbytes + bitmaps.nbytes)}
+    for kind, data in (("values", values), ("truth", truth), ("containers", containers), ("arrays", arrays), ("bitmaps", bitmaps)):
+        entry[kind] = f"c{index:04d}.flag.{kind}.npy"
+        np.save(directory / entry[kind], np.asarray(data), allow_pickle=False)
+    return entry
+
+
+_BITMAP_POPCOUNT = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1).sum(axis=1).astype(np.int64)
+
+
+def _bitmap_count(bits: np.ndarray) -> int:
+    """Rows set in a packbits bitmap."""
+    return int(_BITMAP_POPCOUNT[bits].sum()) if bits.size else 0
+
+
+def _bitmap_invert(bits: np.ndarray, nrows: int) -> np.ndarray:
+    """NOT of a packbits bitmap over nrows rows (padding bits stay clear)."""
+    out = np.invert(bits)
+    if nrows % 8 and out.size:
+        out[-1] &= np.uint8((0xFF << (8 - nrows % 8)) & 0xFF)
+    return out
+
+
+class CatalogFlagIndex:
+    """
+    Bitmaps of one flag column of a store: `values` are its distinct values, `truth` says which
+    of them read as set (non-zero, true, yes, ...). bits() ORs the bitmaps of some values into a
+    packbits bitmap over every row; masked rows are in none of them.
+    """
+
+    def __init__(self, name: str, nrows: int, values: np.ndarray, truth: np.ndarray, containers: np.ndarray,
+                 arrays: np.ndarray, bitmaps: np.ndarray, boolean: bool):
+        self.name = name
+        self.nrows = int(nrows)
+        self.values = values
+        self.truth = np.asarray(truth, dtype=bool)
+        self.containers = containers
+        self.arrays = arrays
+        self.bitmaps = bitmaps
+        self.boolean = bool(boolean)
+
+    @property
+    def counts(self) -> np.ndarray:
+        """Rows holding each value."""
+        return np.bincount(self.containers[:, 0], weights=self.containers[:, 4], minlength=len(self.values)).astype(np.int64)
+
+    def positions(self, value) -> np.ndarray:
+        """Positions in `values` equal to value: numerically, or case-insensitively for text."""
+        if self.values.dtype.kind in ('U', 'S'):
+            text = np.char.strip(_query_text(np.asarray(self.values)))
+            wanted = str(value).strip().lower()
+            if isinstance(value, (bool, np.bool_)) or wanted in _CATALOG_FLAG_TRUE_TEXT + _CATALOG_FLAG_FALSE_TEXT:
+                is_true = bool(value) if isinstance(value, (bool, np.bool_)) else wanted in _CATALOG_FLAG_TRUE_TEXT
+                return np.flatnonzero(self.truth == is_true)
+            return np.flatnonzero(text == wanted)
+        try:
+            return np.flatnonzero(self.values.astype(np.float64) == float(value))
+        except (TypeError, ValueError):
+            return np.zeros(0, dtype=np.int64)
+
+    def bits(self, positions) -> np.ndarray:
+        nbytes = (self.nrows + 7) // 8
+        nchunks = max(1, -(-self.nrows // _CATALOG_BITMAP_CHUNK))
+        out = np.zeros(nchunks * (_CATALOG_BITMAP_CHUNK // 8), dtype=np.uint8)
+        chunks = out.reshape(nchunks, -1)
+        chosen = self.containers[np.isin(self.containers[:, 0], np.asarray(positions, dtype=np.int64))]
+        dense = chosen[chosen[:, 2] == 1]
+        # One value has at most one container per chunk, so each value's dense chunks are written in one step.
+        for value in np.unique(dense[:, 0]):
+            part = dense[dense[:, 0] == value]
+            chunks[part[:, 1]] |= self.bitmaps[part[:, 3]]
+        sparse = chosen[chosen[:, 2] == 0]
+        if len(sparse):
+            cards = sparse[:, 4]
+            total = int(cards.sum())
+            starts = np.repeat(sparse[:, 3] - np.r_[0, np.cumsum(cards)[:-1]], cards)
+            rows = (np.repeat(sparse[:, 1] << 16, cards) + self.arrays[np.arange(total) + starts]).astype(np.int64)
+            if total * 16 > self.nrows:
+                hit = np.zeros(out.size * 8, dtype=bool)
+                hit[rows] = True
+                out |= np.packbits(hit)
+            else:
+                # Rows are distinct, so summing their bit weights per byte is the same as ORing them.
+                weights = np.bincount(rows >> 3, weights=np.right_shift(128, rows & 7), minlength=0)
+                out[:weights.size] |= weights.astype(np.uint8)
+        return out[:nbytes]
+
+    def true_bits(self) -> np.ndarray:
+        return self.bits(np.flatnonzero(self.truth))
+
+    def value_bits(self, value) -> np.ndarray:
+        return self.bits(self.positions(value))
+
+    def valid_bits(self) -> np.ndarray:
+        return self.bits(np.arange(len(self.values)))
+
+    def mask(self, bits: np.ndarray) -> np.ndarray:
+        return np.unpackbits(bits, count=self.nrows).astype(bool)
+
+
+class CatalogTextIndex:
+    """
+    Lookups over one dictionary-encoded text column of a store. `values` is the sorted
+    dictionary and `codes` the code of every row. The case-folded values are kept sorted too
+    (`fold`, with `fold_codes` mapping positions back to codes), so prefixes, case-insensitive
+    equality and comparisons are binary searches, and a trigram index narrows substring
+    matches to a few candidates before they are checked. Every lookup yields codes, which
+    rows() turns into a row mask.
+    """
+
+    def __init__(self, store: "CatalogColumnStore", name: str, codes: np.ndarray, values: np.ndarray):
+        self.store = store
+        self.name = name
+        self.codes = codes
+        self.values = values
+
+    def _folded(self) -> list:
+        return self.store.derived(self.name, ("fold", "fold_codes", "counts"), self._build_fold, "case-folded dictionary")
+
+    def _build_fold(self) -> list:
+        text = _query_text(np.asarray(self.values))
+        fold_codes = np.argsort(text, kind='stable').astype(np.int32)
+        column = self.store.column(self.name)
+        valid = ~np.ma.getmaskarray(column) if np.ma.isMaskedArray(column) else None
+        counts = np.bincount(self.codes if valid is None else self.codes[valid], minlength=len(self.values))
+        return [text[fold_codes], fold_codes, counts.astype(np.int64)]
+
+    @property
+    def fold(self) -> np.ndarray:
+        return self._folded()[0]
+
+    @property
+    def fold_codes(self) -> np.ndarray:
+        return self._folded()[1]
+
+    @property
+    def counts(self) -> np.ndarray:
+        """Rows (unmasked) holding each dictionary value."""
+        return self._folded()[2]
+
+    def rows(self, codes) -> np.ndarray:
+        codes = np.asarray(codes, dtype=np.int64)
+        if codes.size == 1:
+            return self.codes == codes[0]
+        hit = np.zeros(len(self.values), dtype=bool)
+        hit[codes] = True
+        return hit[self.codes]
+
+    def text(self, codes) -> list:
+        values = np.asarray(self.values[np.asarray(codes, dtype=np.int64)])
+        return _query_text(values, lower=False).tolist()
+
+    def equal_codes(self, value: str) -> np.ndarray:
+        """Code of the exact (case-sensitive) value, if present."""
+        values = self.values
+        if values.dtype.kind == 'S':
+            value = value.encode('utf-8')
+        i = int(np.searchsorted(values, value))
+        return np.array([i] if i < len(values) and values[i] == value else [], dtype=np.int64)
+
+    def compare_codes(self, op, term: str) -> np.ndarray:
+        """Codes whose case-folded value compares to term by op (an ast comparison operator type)."""
+        fold = self.fold
+        lo, hi = int(np.searchsorted(fold, term, 'left')), int(np.searchsorted(fold, term, 'right'))
+        ranges = {ast.Eq: [(lo, hi)], ast.NotEq: [(0, lo), (hi, len(fold))], ast.Lt: [(0, lo)],
+                  ast.LtE: [(0, hi)], ast.Gt: [(hi, len(fold))], ast.GtE: [(lo, len(fold))]}[op]
+        return np.concatenate([self.fold_codes[a:b] for a, b in ranges]).astype(np.int64)
+
+    def _prefix_positions(self, prefix: str) -> slice:
+        fold = self.fold
+        lo = int(np.searchsorted(fold, prefix, 'left'))
+        return slice(lo, int(np.searchsorted(fold, prefix + '\U0010ffff', 'left')))
+
+    def prefix_codes(self, prefix: str) -> np.ndarray:
+        return np.asarray(self.fold_codes[self._prefix_positions(prefix)], dtype=np.int64)
+
+    def _contains_positions(self, term: str) -> np.ndarray:
+        fold = self.fold
+        if len(term) < 3:
+            return np.flatnonzero(np.char.find(fold, term) >= 0)
+        grams, offsets, positions = self.store.derived(self.name, ("grams", "gram_offsets", "gram_positions"),
+                                                       lambda: _catalog_text_grams(self.fold), "trigram index")
+        if not len(grams):
+            return np.flatnonzero(np.char.find(fold, term) >= 0)
+        chars = np.frombuffer(term.encode('utf-32-le'), dtype=np.uint32).astype(np.uint64)
+        wanted = np.unique((chars[:-2] << np.uint64(42)) | (chars[1:-1] << np.uint64(21)) | chars[2:])
+        slots = np.searchsorted(grams, wanted)
+        if (slots >= len(grams)).any() or (grams[np.minimum(slots, len(grams) - 1)] != wanted).any():
+            return np.zeros(0, dtype=np.int64)
+        lists = sorted((positions[offsets[i]:offsets[i + 1]] for i in slots), key=len)
+        candidates = np.asarray(lists[0])
+        for other in lists[1:]:
+            if not candidates.size:
+                break
+            candidates = np.intersect1d(candidates, other, assume_unique=True)
+        return candidates[np.char.find(fold[candidates], term) >= 0]
+
+    def contains_codes(self, term: str) -> np.ndarray:
+        """Codes whose value contains term (already lower-case)."""
+        return np.asarray(self.fold_codes[self._contains_positions(term)], dtype=np.int64)
+
+    def suggest(self, query: str, mode: str = "prefix", limit: int = 10) -> tuple:
+        """(most frequent matching values as [(text, rows)], number of distinct matches)."""
+        term = str(query).lower()
+        codes = self.prefix_codes(term) if mode == "prefix" else self.contains_codes(term)
+        counts = self.counts[codes]
+        present = counts > 0
+        codes, counts = codes[present], counts[present]
+        top = np.argsort(-counts, kind='stable')[:max(0, int(limit))]
+        return list(zip(self.text(codes[top]), counts[top].tolist())), int(codes.size)
+
+
+class CatalogColumnStore:
+    """Read side of one stored catalog: memory-mapped columns, string dictionaries and units."""
+
+    def __init__(self, directory: Path, meta: dict):
+        self.directory = directory
+        self.meta = meta
+        self._entries = {c["name"]: c for c in meta["columns"]}
+        self._arrays: dict[str, np.ndarray] = {}
+        self._lock = threading.Lock()
+        self._build_locks: dict[str, threading.Lock] = {}
+        self._text_indexes: dict[str, CatalogTextIndex] = {}
+        self._flag_indexes: dict[str, CatalogFlagIndex] = {}
+
+    @property
+    def colnames(self) -> list:
+        return [c["name"] for c in self.meta["columns"]]
+
+    @property
+    def nrows(self) -> int:
+        return int(self.meta["nrows"])
+
+    @property
+    def hdu_index(self) -> int:
+        return int(self.meta["hdu"])
+
+    @property
+    def units(self) -> dict:
+        return {c["name"]: c["unit"] for c in self.meta["columns"] if c.get("unit")}
+
+    @property
+    def boolean_columns(self) -> list:
+        """Columns detected as true/false flags when the catalog was stored."""
+        return [c["name"] for c in self.meta["columns"] if (c.get("flags") or {}).get("boolean")]
+
+    @property
+    def flag_columns(self) -> list:
+        """Columns with a flag index (booleans and integers with few distinct values)."""
+        return [c["name"] for c in self.meta["columns"] if c.get("flags")]
+
+    def _load(self, filename: str) -> np.ndarray:
+        with self._lock:
+            arr = self._arrays.get(filename)
+            if arr is None:
+                # Copy-on-write maps share the page cache; an in-place edit by a caller never reaches disk.
+                arr = np.load(self.directory / filename, mmap_mode='c', allow_pickle=False)
+                self._arrays[filename] = arr
+            return arr
+
+    def column(self, name: str):
+        entry = self._entries[name]
+        values = self._load(entry["file"])
+        if entry.get("mask"):
+            return np.ma.MaskedArray(values, mask=self._load(entry["mask"]), copy=False)
+        return values
+
+    def column_stats(self, name: str) -> Optional[dict]:
+        """Summary computed when the column was stored (see _catalog_column_summary), or None."""
+        return self._entries[name].get("stats")
+
+    def dictionary(self, name: str):
+        """(codes, values) for a dictionary-encoded string column, or None."""
+        encoded = self._entries[name].get("dictionary")
+        if not encoded:
+            return None
+        return self._load(encoded["codes"]), self._load(encoded["values"])
+
+    def sort_order(self, name: str, descending: bool, build) -> np.ndarray:
+        """Row permutation sorting column `name`, made by build() on first use (see derived())."""
+        direction = 'desc' if descending else 'asc'
+        dtype = np.int32 if self.nrows < 2 ** 31 else np.int64
+        return self.derived(name, (f"{direction}.order",), lambda: [np.asarray(build(), dtype=dtype)],
+                            f"{direction} sort order")[0]
+
+    def text_index(self, name: str) -> Optional[CatalogTextIndex]:
+        """CatalogTextIndex over a dictionary-encoded text column, or None for other columns."""
+        encoded = self.dictionary(name)
+        if encoded is None:
+            return None
+        with self._lock:
+            index = self._text_indexes.get(name)
+            if index is None:
+                index = self._text_indexes[name] = CatalogTextIndex(self, name, *encoded)
+            return index
+
+    def flag_index(self, name: str) -> Optional[CatalogFlagIndex]:
+        """CatalogFlagIndex of a flag column, or None for other columns."""
+        flags = self._entries[name].get("flags")
+        if not flags:
+            return None
+        with self._lock:
+            index = self._flag_indexes.get(name)
+        if index is None:
+            arrays = [self._load(flags[kind]) for kind in ("values", "truth", "containers", "arrays", "bitmaps")]
+            index = CatalogFlagIndex(name, self.nrows, *arrays, boolean=flags.get("boolean"))
+            with self._lock:
+                index = self._flag_indexes.setdefault(name, index)
+        return index
+
+    def derived(self, name: str, kinds, build, label: str) -> list:
+        """
+        Arrays derived from column `name`, made together by build() on first use and saved beside
+        the column as <cNNNN>.<kind>.npy. The store directory is keyed by the source's size and
+        mtime, so an edited catalog never sees stale ones.
+        """
+        stem = Path(self._entries[name]['file']).stem
+        filenames = [f"{stem}.{kind}.npy" for kind in kinds]
+        with self._lock:
+            arrays = [self._arrays.get(filename) for filename in filenames]
+            if all(arr is not None for arr in arrays):
+                return arrays
+            build_lock = self._build_locks.setdefault(filenames[0], threading.Lock())
+        with build_lock:
+            if all((self.directory / filename).is_file() for filename in filenames):
+                return [self._load(filename) for filename in filenames]
+            t0 = time.perf_counter()
+            arrays = build()
+            try:
+                for filename, arr in zip(filenames, arrays):
+                    tmp = self.directory / f".{filename}.{os.getpid()}.{threading.get_ident()}.tmp"
+                    try:
+                        with open(tmp, "wb") as fh:
+                            np.save(fh, arr, allow_pickle=False)
+                        os.replace(tmp, self.directory / filename)
+                    finally:
+                        tmp.unlink(missing_ok=True)
+            except OSError as e:
+                print(f"[catalog_store] Keeping the {label} of '{name}' in memory only: {e}")
+                with self._lock:
+                    self._arrays.update(zip(filenames, arrays))
+                return arrays
+            print(f"[catalog_store] Built the {label} of '{name}' ({self.nrows} rows) in {time.perf_counter() - t0:.2f}s")
+            return [self._load(filename) for filename in filenames]
+
+    def table(self, names=None) -> Table:
+        cols = []
+        for name in (names if names is not None else self.colnames):
+            entry = self._entries[name]
+            values = self._load(entry["file"])
+            try:
+                unit = u.Unit(entry["unit"], parse_strict='silent') if entry.get("unit") else None
+            except Exception:
+                unit = None
+            if entry.get("mask"):
+                cols.append(MaskedColumn(data=values, mask=self._load(entry["mask"]), name=name, unit=unit, copy=False))
+            else:
+                cols.append(Column(data=values, name=name, unit=unit, copy=False))
+        return Table(cols, copy=False)
+
+
+class CatalogStoreCache:
+    """Opened catalog stores keyed by (resolved path, HDU); converts the source on first use."""
+
+    def __init__(self, root: str = CATALOG_STORE_DIRECTORY, max_open: int = CATALOG_STORE_MAX_OPEN):
+        self.root = Path(root)
+        self.max_open = max(1, int(max_open))
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.RLock()
+        self._load_locks: dict[str, threading.Lock] = {}
+        self.hits = 0
+        self.misses = 0
+        self.builds = 0
+        self.extends = 0
+
+    def _lookup(self, key: str, size: int, mtime_ns: int):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] != size or entry[1] != mtime_ns:
+            self._entries.pop(key, None)
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _remember(self, key: str, st, store) -> None:
+        with self._lock:
+            self._entries[key] = (st.st_size, st.st_mtime_ns, store)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_open:
+                self._entries.popitem(last=False)
+
+    def get(self, path_like, hdu_index: Optional[int] = None) -> Optional[CatalogColumnStore]:
+        """Store for a catalog, or None when it has no table HDU or holds unsupported columns."""
+        path = Path(path_like).resolve()
+        if not path.is_file():
+            return None
+        st = path.stat()
+        is_fits = _is_fits_catalog(path)
+        if not is_fits:
+            hdu_index = 0
+        elif hdu_index is None:
+            hdu_index = _catalog_default_table_hdu(path)
+        if hdu_index < 0:
+            return None
+        key = f"{path}#{hdu_index}"
+        with self._lock:
+            # An older version of the store is extended when the source only gained rows.
+            previous = (self._entries.get(key) or (None, None, None))[2]
+            entry = self._lookup(key, st.st_size, st.st_mtime_ns)
+            if entry is not None:
+                self.hits += 1
+                return entry[2]
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+        with load_lock:
+            with self._lock:
+                entry = self._lookup(key, st.st_size, st.st_mtime_ns)
+                if entry is not None:
+                    self.hits += 1
+                    return entry[2]
+                self.misses += 1
+            try:
+                store, _ = self._load(path, st, hdu_index, is_fits, previous)
+            except BaseException:
+                with self._lock:
+                    self._load_locks.pop(key, None)
+                raise
+            # _lock is reentrant: remember the store and retire the load lock in one acquisition.
+            with self._lock:
+                self._remember(key, st, store)
+                self._load_locks.pop(key, None)
+            return store
+
+    def refresh(self, path_like, hdu_index: int, previous: Optional[CatalogColumnStore] = None) -> tuple:
+        """
+        Bring the store of a changed catalog up to date ahead of the requests for it: (store, rows
+        appended), where rows appended is None unless `previous`, the store of an earlier version,
+        was extended instead of the source being stored again. Requests arriving meanwhile wait for
+        the new version rather than seeing a partial one.
+        """
+        path = Path(path_like).resolve()
+        key = f"{path}#{hdu_index}"
+        with self._lock:
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+        with load_lock:
+            try:
+                st = path.stat()
+                with self._lock:
+                    entry = self._lookup(key, st.st_size, st.st_mtime_ns)
+                    if entry is not None:
+                        self._load_locks.pop(key, None)
+                if entry is not None:
+                    # A request may have extended it already.
+                    store = entry[2]
+                    extended = (store is not None and previous is not None and store.meta.get("extended_from") ==
+                                [previous.meta.get("size"), previous.meta.get("mtime_ns"), previous.nrows])
+                    return store, (store.nrows - previous.nrows if extended else None)
+                store, added = self._load(path, st, hdu_index, _is_fits_catalog(path), previous)
+            except BaseException:
+                with self._lock:
+                    self._load_locks.pop(key, None)
+                raise
+            with self._lock:
+                self._remember(key, st, store)
+                self._load_locks.pop(key, None)
+            return store, added
+
+    def _load(self, path: Path, st, hdu_index: int, is_fits: bool, previous: Optional[CatalogColumnStore]) -> tuple:
+        store = added = None
+        if previous is not None and previous.hdu_index == hdu_index:
+            try:
+                store, added = self._extend(path, st, previous)
+            except Exception as e:
+                print(f"[catalog_store] Could not extend the store of {path.name}: {e}")
+        if store is None:
+            try:
+                store = self._open_or_build(path, st, hdu_index, is_fits)
+            except _CatalogStoreUnsupported as e:
+                print(f"[catalog_store] {path.name}: {e}; serving from the source file")
+        return store, added
+
+    def _extend(self, path: Path, st, previous: CatalogColumnStore) -> tuple:
+        """(store, rows appended) made from `previous` when the source only gained rows, else (None, None)."""
+        tail = _catalog_appended_tail(path, previous.meta)
+        if tail is None:
+            return None, None
+        stem, name = self._version_name(path, st, previous.hdu_index)
+        if (self.root / name / "meta.json").is_file():
+            return None, None
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = self.root / f".{name}.{os.getpid()}.{threading.get_ident()}.tmp"
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir()
+        t0 = time.perf_counter()
+        try:
+            meta = _extend_catalog_store(previous, tail, tmp)
+            if meta is None:
+                shutil.rmtree(tmp, ignore_errors=True)
+                return None, None
+            meta = self._publish(tmp, stem, name, meta, st)
+        except Exception:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+        added = int(meta["nrows"]) - previous.nrows
+        with self._lock:
+            self.extends += 1
+        print(f"[catalog_store] Extended {path.name} by {added} rows (HDU {previous.hdu_index}, "
+              f"{meta['nrows']} rows) in {time.perf_counter() - t0:.2f}s")
+        return CatalogColumnStore(self.root / name, meta), added
+
+    def versions(self) -> list:
+        """(source path, HDU, size, mtime_ns, store) of every open store."""
+        with self._lock:
+            return [(key.rsplit("#", 1)[0], int(key.rsplit("#", 1)[1]), entry[0], entry[1], entry[2])
+                    for key, entry in self._entries.items()]
+
+    @staticmethod
+    def _version_name(path: Path, st, hdu_index: int) -> tuple:
+        stem = hashlib.sha1(f"{path}#{hdu_index}".encode("utf-8")).hexdigest()[:16]
+        return stem, f"{stem}-{st.st_size}-{st.st_mtime_ns}"
+
+    def _publish(self, tmp: Path, stem: str, name: str, meta: dict, st) -> dict:
+        """Move a fully written store directory into place and drop older versions of the same source."""
+        meta["size"], meta["mtime_ns"] = int(st.st_size), int(st.st_mtime_ns)
+        try:
+            meta["fingerprint"] = _catalog_source_fingerprint(meta, st.st_size)
+        except Exception as e:
+            print(f"[catalog_store] No fingerprint for {Path(meta['source']).name}: {e}")
+            meta["fingerprint"] = None
+        (tmp / "meta.json").write_text(json.dumps(meta))
+        try:
+            os.replace(tmp, self.root / name)
+        except OSError:
+            # Another worker published the same version first; keep theirs.
+            shutil.rmtree(tmp, ignore_errors=True)
+            meta = json.loads((self.root / name / "meta.json").read_text())
+        for stale in self.root.glob(f"{stem}-*"):
+            if stale.name != name:
+                shutil.rmtree(stale, ignore_errors=True)
+        with self._lock:
+            self.builds += 1
+        return meta
+
+    def _open_or_build(self, path: Path, st, hdu_index: int, is_fits: bool) -> CatalogColumnStore:
+        stem, name = self._version_name(path, st, hdu_index)
+        final = self.root / name
+        meta_path = final / "meta.json"
+        if meta_path.is_file():
+            try:
+                meta = json.loads(meta_path.read_text())
+                if meta.get("format") == _CATALOG_STORE_FORMAT:
+                    return CatalogColumnStore(final, meta)
+            except Exception:
+                pass
+            shutil.rmtree(final, ignore_errors=True)
+
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = self.root / f".{name}.{os.getpid()}.{threading.get_ident()}.tmp"
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir()
+        t0 = time.perf_counter()
+        try:
+            meta = self._publish(tmp, stem, name, _build_catalog_store(path, hdu_index, is_fits, tmp), st)
+        except Exception:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+        print(f"[catalog_store] Stored {path.name} (HDU {hdu_index}, {meta['nrows']} rows, "
+              f"{len(meta['columns'])} columns) in {time.perf_counter() - t0:.2f}s")
+        return CatalogColumnStore(final, meta)
+
+    def adopt(self, path_like, directory: Path, meta: dict, hdu_index: int = 0) -> CatalogColumnStore:
+        """
+        Publish a store that was written elsewhere (see CatalogUploadIngest) as the store of the
+        source file in its current version, so the next get() for it is a hit.
+        """
+        path = Path(path_like).resolve()
+        st = path.stat()
+        stem, name = self._version_name(path, st, hdu_index)
+        meta = self._publish(Path(directory), stem, name, meta, st)
+        store = CatalogColumnStore(self.root / name, meta)
+        self._remember(f"{path}#{hdu_index}", st, store)
+        return store
+
+    def invalidate(self, path_like=None) -> None:
+        with self._lock:
+            if path_like is None:
+                self._entries.clear()
+                return
+            try:
+                prefix = f"{Path(path_like).resolve()}#"
+            except Exception:
+                prefix = f"{path_like}#"
+            for key in [k for k in self._entries if k.startswith(prefix)]:
+                self._entries.pop(key, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"open": len(self._entries), "max_open": self.max_open, "hits": self.hits,
+                    "misses": self.misses, "builds": self.builds, "extends": self.extends,
+                    "directory": str(self.root)}
+
+
+catalog_store = CatalogStoreCache()
+
+
+def _catalog_store_table(catalog_path, hdu_index: Optional[int] = None) -> Optional[Table]:
+    """Table backed by the columnar store, or None so the caller reads the source itself."""
+    if not CATALOG_STORE_ENABLED:
+        return None
+    try:
+        store = catalog_store.get(catalog_path, hdu_index)
+        return store.table() if store is not None else None
+    except Exception as e:
+        print(f"[catalog_store] Could not use store for {catalog_path}: {e}")
+        return None
+
+
+# --- Streaming catalog ingestion ---
+# Uploads are written to disk block by block as they arrive. Delimited text
+# catalogs are also parsed on the way in: every chunk of complete lines is read
+# with the reader astropy guessed for the first chunk, column types widen as
+# later chunks require (int -> float -> text), and the parsed chunks are spilled
+# into a scratch store directory. Once the last byte lands the columns are
+# assembled and the directory is adopted by catalog_store under the upload's
+# final size and mtime, so the first request for the catalog is a store hit.
+# FITS catalogs (and text the chunk reader can't handle) are stored from the
+# finished file instead. Progress goes out over the /ws/system-stats socket.
+
+from astropy.io import ascii as ascii_io
+
+CATALOG_INGEST_CHUNK_BYTES = int(os.getenv('CATALOG_INGEST_CHUNK_BYTES', str(32 * 1024 * 1024)))
+CATALOG_INGEST_PROGRESS_INTERVAL = float(os.getenv('CATALOG_INGEST_PROGRESS_INTERVAL', '0.5'))
+_UPLOAD_BLOCK_BYTES = 4 * 1024 * 1024
+# Readers whose chunks can be parsed on their own, given the column names.
+_CATALOG_INGEST_FORMATS = ('basic', 'csv', 'tab', 'no_header', 'commented_header')
+_CATALOG_INGEST_KIND_RANK = {'i': 0, 'f': 1, 'U': 2}
+_CATALOG_INGEST_KIND_DTYPE = {'i': np.int64, 'f': np.float64, 'U': str}
+
+
+class _CatalogIngestFallback(ValueError):
+    """The upload can't be parsed chunk by chunk; store the finished file the usual way."""
+
+
+def _ingest_column_values(col) -> np.ndarray:
+    """Plain values of a parsed column; masked cells keep the reader's fill value."""
+    return np.asarray(col.data.data if getattr(col, "mask", None) is not None else col.data)
+
+
+class CatalogUploadIngest:
+    """
+    One upload in flight: feed() appends a block to the file (and parses the complete lines
+    of a text catalog), finish() renames the file into place and returns its catalog store.
+    """
+
+    def __init__(self, path: Path, upload_id: str, total_bytes: Optional[int] = None,
+                 catalog: bool = True, notify=None):
+        self.path = path
+        self.upload_id = upload_id
+        self.total_bytes = total_bytes
+        self.catalog = catalog
+        self.notify = notify
+        self.bytes = 0
+        self.rows = 0
+        self._partial = path.with_name(f".{path.name}.partial")
+        self._fh = open(self._partial, "wb")
+        self._pending = bytearray()
+        self._offset = 0          # file offset of the first byte in _pending
+        self._chunks = []         # (file offset, length, per-column kind or None when all empty)
+        self._read_kwargs = None
+        self._colnames = None
+        self._kinds = None
+        self._masked = None
+        self._last_notice = 0.0
+        self._scratch = None
+        lowered = path.name.lower()
+        if catalog and CATALOG_STORE_ENABLED and not lowered.endswith(_CATALOG_FITS_SUFFIXES + ('.gz',)):
+            self._scratch = catalog_store.root / f".ingest-{upload_id}.tmp"
+            shutil.rmtree(self._scratch, ignore_errors=True)
+            (self._scratch / "spill").mkdir(parents=True)
+
+    def _progress(self, stage: str, fraction: Optional[float] = None, force: bool = False) -> None:
+        if self.notify is None:
+            return
+        now = time.monotonic()
+        if not force and now - self._last_notice < CATALOG_INGEST_PROGRESS_INTERVAL:
+            return
+        self._last_notice = now
+        if fraction is None and self.total_bytes:
+            fraction = self.bytes / max(1, self.total_bytes)
+        self.notify({"type": "catalog_ingest", "upload_id": self.upload_id, "filename": self.path.name,
+                     "stage": stage, "bytes": self.bytes, "total_bytes": self.total_bytes, "rows": self.rows,
+                     "progress": None if fraction is None else round(100.0 * min(1.0, fraction), 1)})
+
+    def _drop_scratch(self, reason) -> None:
+        if self._scratch is not None:
+            print(f"[catalog_ingest] {self.path.name}: {reason}; storing the finished file instead")
+            shutil.rmtree(self._scratch, ignore_errors=True)
+            self._scratch = None
+            self._pending = bytearray()
+
+    def feed(self, data: bytes) -> None:
+        self._fh.write(data)
+        self.bytes += len(data)
+        if self._scratch is not None:
+            if not self._chunks and not self._pending and data[:6] == b"SIMPLE":
+                self._drop_scratch("FITS content")
+            else:
+                self._pending += data
+                if len(self._pending) >= CATALOG_INGEST_CHUNK_BYTES:
+                    self._parse_pending(self._pending.rfind(b"\n") + 1)
+        self._progress("receiving")
+
+    def _parse_pending(self, length: int) -> None:
+        if length <= 0:
+            return
+        text = bytes(self._pending[:length])
+        del self._pending[:length]
+        try:
+            table = self._read_chunk(text, first=not self._chunks)
+            kinds = self._spill(table, len(self._chunks))
+        except Exception as e:
+            self._drop_scratch(e)
+            return
+        self._chunks.append((self._offset, length, kinds))
+        self._offset += length
+        self.rows += len(table)
+
+    def _read_chunk(self, text: bytes, first: bool, as_text=()) -> Table:
+        """Parse one chunk of complete lines; columns in as_text are read as strings, verbatim."""
+        decoded = text.decode("utf-8", errors="replace")
+        if first and self._read_kwargs is None:
+            table = Table.read(decoded, format='ascii')
+            guessed = [t for t in ascii_io.get_read_trace() if str(t.get("status", "")).startswith("Success")]
+            if not guessed:
+                raise _CatalogIngestFallback("no reader guess was recorded")
+            kwargs = dict(guessed[-1]["kwargs"])
+            reader_cls = kwargs.pop("reader_cls", None) or guessed[-1].get("reader_cls")
+            kwargs.pop("strict_names", None)
+            kwargs.pop("fast_reader", None)
+            fmt = getattr(reader_cls, "_format_name", "") or ""
+            base = fmt[len("fast_"):] if fmt.startswith("fast_") else fmt
+            if base not in _CATALOG_INGEST_FORMATS:
+                raise _CatalogIngestFallback(f"'{fmt or reader_cls}' tables are not read in chunks")
+            self._read_kwargs = (fmt, base, kwargs)
+            self._colnames = list(table.colnames)
+            return table
+        fmt, base, kwargs = self._read_kwargs
+        if as_text:
+            kwargs = dict(kwargs, fast_reader=False,
+                          converters={name: [ascii_io.convert_numpy(str)] for name in as_text})
+            fmt = base
+        if first:
+            # The first chunk still carries the header (and any leading comments).
+            table = ascii_io.read(decoded, format=fmt, guess=False, **kwargs)
+        elif base in ('no_header', 'commented_header'):
+            table = ascii_io.read(decoded, format='no_header' if base == 'commented_header' else fmt, guess=False,
+                                  names=self._colnames, **kwargs)
+        else:
+            delimiter = kwargs.get("delimiter") or {'csv': ',', 'tab': '\t'}.get(base, ' ')
+            quote = kwargs.get("quotechar") or '"'
+            header = delimiter.join(f"{quote}{name}{quote}" for name in self._colnames)
+            table = ascii_io.read(f"{header}\n{decoded}", format=fmt, guess=False, **kwargs)
+        if list(table.colnames) != self._colnames:
+            raise _CatalogIngestFallback(f"a chunk parsed with columns {table.colnames[:5]}...")
+        return table
+
+    def _spill(self, table: Table, index: int) -> list:
+        if self._kinds is None:
+            self._kinds = [None] * len(self._colnames)
+            self._masked = [False] * len(self._colnames)
+        arrays, kinds = {}, []
+        for i, name in enumerate(self._colnames):
+            mask = getattr(table[name], "mask", None)
+            values = _ingest_column_values(table[name])
+            if values.ndim != 1 or values.dtype.kind not in _CATALOG_INGEST_KIND_RANK:
+                raise _CatalogIngestFallback(f"column '{name}' parsed as {values.dtype}")
+            arrays[f"v{i}"] = values
+            kind = values.dtype.kind
+            if mask is not None and np.any(mask):
+                arrays[f"m{i}"] = np.asarray(mask, dtype=bool)
+                self._masked[i] = True
+                if np.all(mask):
+                    # An all-empty chunk says nothing about the column's type.
+                    kind = None
+            kinds.append(kind)
+            if kind is not None and (self._kinds[i] is None or
+                                     _CATALOG_INGEST_KIND_RANK[kind] > _CATALOG_INGEST_KIND_RANK[self._kinds[i]]):
+                self._kinds[i] = kind
+        np.savez(self._scratch / "spill" / f"k{index:05d}.npz", **arrays)
+        return kinds
+
+    def _retext_chunks(self) -> None:
+        """Re-read, as verbatim text, the chunks where a column that ended up text parsed as numbers."""
+        with open(self.path, "rb") as fh:
+            for index, (offset, length, kinds) in enumerate(self._chunks):
+                names = [name for name, kind, final in zip(self._colnames, kinds, self._kinds)
+                         if final == 'U' and kind not in (None, 'U')]
+                if not names:
+                    continue
+                fh.seek(offset)
+                table = self._read_chunk(fh.read(length), first=index == 0, as_text=names)
+                spill = self._scratch / "spill" / f"k{index:05d}.npz"
+                with np.load(spill, allow_pickle=False) as part:
+                    arrays = {key: part[key] for key in part.files}
+                for name in names:
+                    arrays[f"v{self._colnames.index(name)}"] = _ingest_column_values(table[name])
+                np.savez(spill, **arrays)
+
+    def _assemble(self) -> dict:
+        self._retext_chunks()
+        spill = self._scratch / "spill"
+        columns = []
+        for i, name in enumerate(self._colnames):
+            kind = self._kinds[i] or 'i'
+            parts, masks = [], []
+            for index in range(len(self._chunks)):
+                with np.load(spill / f"k{index:05d}.npz", allow_pickle=False) as part:
+                    values = part[f"v{i}"]
+                    mask = part[f"m{i}"] if f"m{i}" in part.files else np.zeros(len(values), dtype=bool)
+                if values.dtype.kind != kind:
+                    values = values.astype(_CATALOG_INGEST_KIND_DTYPE[kind])
+                parts.append(values)
+                masks.append(mask)
+            values = np.concatenate(parts) if parts else np.zeros(0, dtype=_CATALOG_INGEST_KIND_DTYPE[kind])
+            mask = np.concatenate(masks) if self._masked[i] else None
+            del parts, masks
+            columns.append(_write_catalog_store_column(self._scratch, i, name, values, None, mask))
+            del values, mask
+            self._progress("indexing", (i + 1) / max(1, len(self._colnames)))
+        shutil.rmtree(spill, ignore_errors=True)
+        return {"format": _CATALOG_STORE_FORMAT, "source": str(self.path.resolve()), "kind": "ascii",
+                "hdu": 0, "nrows": int(self.rows), "columns": columns}
+
+    def finish(self) -> Optional[CatalogColumnStore]:
+        """Close and rename the upload; return its catalog store (None for non-catalog uploads)."""
+        self._fh.close()
+        if self._scratch is not None and self._pending:
+            tail = bytes(self._pending)
+            self._pending = bytearray(tail if tail.endswith(b"\n") else tail + b"\n")
+            self._parse_pending(len(self._pending))
+        os.replace(self._partial, self.path)
+        self._progress("indexing", 0.0, force=True)
+        store = None
+        t0 = time.perf_counter()
+        if self._scratch is not None and self._colnames is not None:
+            try:
+                store = catalog_store.adopt(self.path, self._scratch, self._assemble())
+                print(f"[catalog_ingest] Stored {self.path.name} while uploading ({self.rows} rows, "
+                      f"{len(self._colnames)} columns; assembled in {time.perf_counter() - t0:.2f}s)")
+            except Exception as e:
+                self._drop_scratch(e)
+        if self._scratch is not None:
+            shutil.rmtree(self._scratch, ignore_errors=True)
+            self._scratch = None
+        if store is None and self.catalog and CATALOG_STORE_ENABLED:
+            try:
+                store = catalog_store.get(self.path)
+            except Exception as e:
+                print(f"[catalog_ingest] {self.path.name} is saved but could not be stored: {e}")
+        if store is not None:
+            self.rows = store.nrows
+        self._progress("ready", 1.0, force=True)
+        return store
+
+    def abort(self, reason="") -> None:
+        try:
+            self._fh.close()
+        except Exception:
+            pass
+        self._partial.unlink(missing_ok=True)
+        if self._scratch is not None:
+            shutil.rmtree(self._scratch, ignore_errors=True)
+            self._scratch = None
+        self._progress("error", force=True)
+        if reason:
+            print(f"[catalog_ingest] Upload of {self.path.name} failed: {reason}")
+
+
+def _ingest_notifier(loop):
+    """notify callback for CatalogUploadIngest: broadcast from worker threads on the event loop."""
+    def notify(payload: dict) -> None:
+        try:
+            asyncio.run_coroutine_threadsafe(manager.broadcast(json.dumps(payload)), loop)
+        except Exception:
+            pass
+    return notify
+
+
+async def _receive_upload(request: Request, destination, catalog: bool):
+    """
+    Stream an upload into destination(original filename) -> Path. Accepts multipart form data
+    (field 'file') or a raw request body named by ?filename=. Returns (ingest, store).
+    """
+    if request.headers.get("content-type", "").startswith("multipart/form-data"):
+        form = await request.form()
+        upload = form.get("file")
+        if upload is None or not hasattr(upload, "read"):
+            raise HTTPException(status_code=400, detail="Missing 'file' field")
+        filename, total = upload.filename or "upload", getattr(upload, "size", None)
+
+        async def blocks():
+            while True:
+                block = await upload.read(_UPLOAD_BLOCK_BYTES)
+                if not block:
+                    break
+                yield block
+    else:
+        filename = request.query_params.get("filename") or request.headers.get("x-filename")
+        if not filename:
+            raise HTTPException(status_code=400, detail="Raw uploads need a ?filename= parameter")
+        length = request.headers.get("content-length")
+        total = int(length) if length and length.isdigit() else None
+        blocks = request.stream
+    upload_id = re.sub(r'[^\w\-]', '', request.query_params.get("upload_id") or "") or uuid.uuid4().hex[:12]
+    loop = asyncio.get_running_loop()
+    ingest = CatalogUploadIngest(destination(Path(filename).name), upload_id, total, catalog=catalog,
+                                 notify=_ingest_notifier(loop))
     try:
-        for cn in table.colnames:
-            col = table[cn]
-            u = getattr(col, "unit", None)
-            if u is None:
-                continue
-            s = str(u).strip()
-            if not s:
-                continue
-            sl = s.lower()
-            if sl in ("none", "---", "dimensionless", "unitless"):
-                continue
-            out[str(cn)] = s
-    except Exception:
-        pass
-    return out
-
+        buffered = bytearray()
+        async for data in blocks():
+            buffered += data
+            if len(buffered) >= _UPLOAD_BLOCK_BYTES:
+                await loop.run_in_executor(app.state.thread_executor, ingest.feed, bytes(buffered))
+                buffered.clear()
+        if buffered:
+            await loop.run_in_executor(app.state.thread_executor, ingest.feed, bytes(buffered))
+        store = await loop.run_in_executor(app.state.thread_executor, ingest.finish)
+    except BaseException as e:
+        ingest.abort(e)
+        raise
+    return ingest, store
 
-def resolve_catalog_file_path(catalog_name: str) -> Optional[Path]:
-    """Resolve a catalog reference to an on-disk FITS path (catalogs/, files/uploads/, files/)."""
-    base_dir = Path(".").resolve()
-    norm_name = unquote(str(catalog_name)).replace("\\", "/").strip()
-    if not norm_name:
-        return None
 
-    basename = Path(norm_name).name
-    candidates: list[Path] = []
+# --- Catalog table cache ---
+# Every endpoint that needs a catalog as a Table goes through catalog_table_cache:
+# one bounded LRU (entry count and bytes), invalidated by source size/mtime.
 
-    if norm_name.startswith(f"{FILES_DIRECTORY}/"):
-        candidates.append(base_dir / norm_name)
-    if norm_name.startswith(f"{CATALOGS_DIRECTORY}/"):
-        candidates.append(base_dir / norm_name)
-    if norm_name.startswith(f"{UPLOADS_DIRECTORY}/"):
-        candidates.append(base_dir / norm_name)
-    try:
-        if Path(norm_name).is_absolute():
-            candidates.append(Path(norm_name))
-    except Exception:
-        pass
+CATALOG_CACHE_MAX_MB = int(os.getenv('CATALOG_CACHE_MAX_MB', '1024'))
+CATALOG_CACHE_MAX_ENTRIES = int(os.getenv('CATALOG_CACHE_MAX_ENTRIES', '64'))
 
-    for name_variant in (norm_name, norm_name.replace(" ", "+"), basename, basename.replace(" ", "+")):
-        candidates.extend([
-            base_dir / name_variant,
-            base_dir / CATALOGS_DIRECTORY / name_variant,
-            base_dir / UPLOADS_DIRECTORY / name_variant,
-            base_dir / FILES_DIRECTORY / name_variant,
-        ])
 
-    seen: set[str] = set()
-    for cand in candidates:
+def _table_nbytes(table: Table) -> int:
+    total = 0
+    for name in table.colnames:
+        col = table[name]
         try:
-            key = str(cand.resolve()).lower()
+            total += int(col.data.nbytes)
+            mask = getattr(col, "mask", None)
+            if mask is not None:
+                total += int(np.asarray(mask).nbytes)
         except Exception:
-            key = str(cand).lower()
-        if key in seen:
             continue
-        seen.add(key)
+    return total
+
+
+@dataclass
+class _CatalogTableEntry:
+    size: int
+    mtime_ns: int
+    nbytes: int
+    table: Table
+
+
+class CatalogTableCache:
+    """Bounded LRU of catalog Tables keyed by resolved path, with single-flight loads and metrics."""
+
+    def __init__(self, max_bytes: int = CATALOG_CACHE_MAX_MB * 1024 * 1024,
+                 max_entries: int = CATALOG_CACHE_MAX_ENTRIES):
+        self.max_bytes = max(0, int(max_bytes))
+        self.max_entries = max(1, int(max_entries))
+        self._entries: "OrderedDict[str, _CatalogTableEntry]" = OrderedDict()
+        self._lock = threading.RLock()
+        self._load_locks: dict[str, threading.Lock] = {}
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.load_failures = 0
+        self.load_seconds = 0.0
+
+    def _drop(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.bytes -= entry.nbytes
+
+    def _lookup(self, key: str, size: int, mtime_ns: int) -> Optional[_CatalogTableEntry]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.size != size or entry.mtime_ns != mtime_ns:
+            self._drop(key)
+            self.invalidations += 1
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def get(self, catalog_name: str, catalogs_dir_path=None) -> Optional[Table]:
+        path = _locate_catalog_file(catalog_name, Path(catalogs_dir_path or CATALOGS_DIRECTORY))
+        if path is None:
+            return None
         try:
-            if cand.is_file():
-                return cand
-        except Exception:
-            continue
-    return None
+            path = Path(path).resolve()
+            st = path.stat()
+        except OSError:
+            return None
+        key = str(path)
+        with self._lock:
+            entry = self._lookup(key, st.st_size, st.st_mtime_ns)
+            if entry is not None:
+                self.hits += 1
+                return entry.table
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+        # Single-flight: concurrent requests for the same catalog wait for one read.
+        with load_lock:
+            with self._lock:
+                entry = self._lookup(key, st.st_size, st.st_mtime_ns)
+                if entry is not None:
+                    self.hits += 1
+                    return entry.table
+                self.misses += 1
+            t0 = time.perf_counter()
+            try:
+                table = _read_catalog_table(path, catalog_name)
+            except BaseException:
+                with self._lock:
+                    self.load_seconds += time.perf_counter() - t0
+                    self._load_locks.pop(key, None)
+                raise
+            nbytes = _table_nbytes(table) if table is not None else 0
+            # Publish the entry and retire the load lock together, so no caller can miss both.
+            with self._lock:
+                self.load_seconds += time.perf_counter() - t0
+                if table is None:
+                    self.load_failures += 1
+                elif nbytes <= self.max_bytes:
+                    self._drop(key)
+                    self._entries[key] = _CatalogTableEntry(st.st_size, st.st_mtime_ns, nbytes, table)
+                    self.bytes += nbytes
+                    while self._entries and (len(self._entries) > self.max_entries or self.bytes > self.max_bytes):
+                        oldest = next(iter(self._entries))
+                        self._drop(oldest)
+                        self.evictions += 1
+                self._load_locks.pop(key, None)
+            return table
+
+    def invalidate(self, path_like=None) -> None:
+        with self._lock:
+            if path_like is None:
+                self._entries.clear()
+                self.bytes = 0
+                return
+            try:
+                key = str(Path(path_like).resolve())
+            except Exception:
+                key = str(path_like)
+            self._drop(key)
 
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits / lookups) if lookups else None,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "load_failures": self.load_failures,
+                "load_seconds": round(self.load_seconds, 3),
+            }
 
-def get_astropy_table_from_catalog(catalog_name: str, catalogs_dir_path: Path) -> Optional[Table]:
+
+catalog_table_cache = CatalogTableCache()
+
+
+def _locate_catalog_file(catalog_name: str, catalogs_dir_path: Path) -> Optional[Path]:
    catalog_file_path = resolve_catalog_file_path(catalog_name)
    if catalog_file_path is None:
        # Legacy fallback: name relative to catalogs_dir_path only
@@ -13525,8 +19478,14 @@ def get_astropy_table_from_catalog(catalog_name: str, catalogs_dir_path: Path) -
            else:
                print(f"[get_astropy_table_from_catalog] Catalog file {catalog_file_path_as_is} (and with '+' replacements) does not exist.")
                return None
-   else:
-       print(f"[get_astropy_table_from_catalog] Resolved catalog file: {catalog_file_path}")
+   return catalog_file_path
+
+
+def _read_catalog_table(catalog_file_path: Path, catalog_name: str) -> Optional[Table]:
+   print(f"[get_astropy_table_from_catalog] Loading catalog file: {catalog_file_path}")
+   table = _catalog_store_table(catalog_file_path)
+   if table is not None:
+       return table
 
    try:
        with fits.open(catalog_file_path) as hdul:
@@ -13562,6 +19521,612 @@ def get_astropy_table_from_catalog(catalog_name: str, catalogs_dir_path: Path) -
        import traceback
        traceback.print_exc()
        return None
+
+
+def get_astropy_table_from_catalog(catalog_name: str, catalogs_dir_path: Path) -> Optional[Table]:
+   """Catalog as an Astropy Table, shared through catalog_table_cache (tables must not be mutated)."""
+   return catalog_table_cache.get(catalog_name, catalogs_dir_path)
+
+
+# --- Catalog spatial index ---
+# One KD-tree over the unit vectors of a catalog's RA/Dec answers cone, box, polygon and
+# nearest-neighbour queries without scanning every row. Coordinates are saved next to the
+# columnar store, so a restart rebuilds only the tree and not the coordinate parsing.
+
+CATALOG_SPATIAL_MAX_OPEN = int(os.getenv('CATALOG_SPATIAL_MAX_OPEN', '16'))
+CATALOG_SPATIAL_PERSIST = os.getenv('CATALOG_SPATIAL_PERSIST', '1').lower() not in ('0', 'false', 'no')
+CATALOG_SPATIAL_MIN_ROWS = int(os.getenv('CATALOG_SPATIAL_MIN_ROWS', '20000'))
+CATALOG_SPATIAL_FOOTPRINT_SAMPLES = int(os.getenv('CATALOG_SPATIAL_FOOTPRINT_SAMPLES', '16'))
+_CATALOG_SPATIAL_FORMAT = 1
+
+
+def _radec_to_unit(ra_deg, dec_deg) -> np.ndarray:
+    ra = np.radians(np.asarray(ra_deg, dtype=float))
+    dec = np.radians(np.asarray(dec_deg, dtype=float))
+    cosd = np.cos(dec)
+    return np.stack((cosd * np.cos(ra), cosd * np.sin(ra), np.sin(dec)), axis=-1)
+
+
+def _unit_to_radec(xyz) -> tuple:
+    xyz = np.asarray(xyz, dtype=float)
+    ra = np.degrees(np.arctan2(xyz[..., 1], xyz[..., 0])) % 360.0
+    dec = np.degrees(np.arcsin(np.clip(xyz[..., 2], -1.0, 1.0)))
+    return ra, dec
+
+
+def _chord_for_angle(radius_deg: float) -> float:
+    return 2.0 * np.sin(np.radians(min(max(float(radius_deg), 0.0), 180.0)) / 2.0)
+
+
+def _angle_for_chord(chord) -> np.ndarray:
+    return np.degrees(2.0 * np.arcsin(np.clip(np.asarray(chord, dtype=float) / 2.0, 0.0, 1.0)))
+
+
+def _sky_cap(ra_deg, dec_deg, center=None) -> tuple:
+    """(center_ra, center_dec, radius_deg) of a cap holding every given point."""
+    xyz = _radec_to_unit(ra_deg, dec_deg).reshape(-1, 3)
+    if center is None:
+        mean = xyz.sum(axis=0)
+        norm = float(np.linalg.norm(mean))
+        if not np.isfinite(norm) or norm < 1e-12:
+            return 0.0, 0.0, 180.0
+        center_xyz = mean / norm
+    else:
+        center_xyz = _radec_to_unit(center[0], center[1])
+    radius = float(_angle_for_chord(np.linalg.norm(xyz - center_xyz, axis=1)).max()) if len(xyz) else 0.0
+    ra_c, dec_c = _unit_to_radec(center_xyz)
+    return float(ra_c), float(dec_c), radius
+
+
+def _display_footprint_cap(wcs, width: float, height: float, to_wcs_pixels, samples: int = CATALOG_SPATIAL_FOOTPRINT_SAMPLES,
+                           x0: float = 0.0, y0: float = 0.0):
+    """
+    Sky cap enclosing the displayed rectangle [x0, x0 + width) x [y0, y0 + height), or None when
+    it cannot be bounded (off-sky corners, areas wider than a hemisphere). to_wcs_pixels maps
+    display pixels to pixels of wcs.
+    """
+    try:
+        n = max(2, int(samples))
+        # Half a pixel of padding around the continuous rectangle.
+        xs = np.linspace(x0 - 0.5, x0 + float(width) + 0.5, n + 1)
+        ys = np.linspace(y0 - 0.5, y0 + float(height) + 0.5, n + 1)
+        border_x = np.concatenate((xs, xs, np.full(n + 1, xs[0]), np.full(n + 1, xs[-1])))
+        border_y = np.concatenate((np.full(n + 1, ys[0]), np.full(n + 1, ys[-1]), ys, ys))
+        wx, wy = to_wcs_pixels(np.append(border_x, x0 + width / 2.0), np.append(border_y, y0 + height / 2.0))
+        ra, dec = wcs.all_pix2world(np.asarray(wx, dtype=float), np.asarray(wy, dtype=float), 0)
+        ra = np.asarray(ra, dtype=float)
+        dec = np.asarray(dec, dtype=float)
+        if not (np.all(np.isfinite(ra)) and np.all(np.isfinite(dec))):
+            return None
+        ra_c, dec_c, radius = _sky_cap(ra[:-1], dec[:-1], center=(ra[-1], dec[-1]))
+    except Exception:
+        return None
+    # Margin for WCS distortion between border samples; the exact pixel test still runs on the candidates.
+    radius = radius * 1.05 + 1e-6
+    if radius >= 90.0:
+        return None
+    return ra_c, dec_c, radius
+
+
+def _points_in_polygon(px, py, vx, vy) -> np.ndarray:
+    """Even-odd test of points (px, py) against the closed polygon (vx, vy)."""
+    px = np.asarray(px, dtype=float)
+    py = np.asarray(py, dtype=float)
+    inside = np.zeros(px.shape, dtype=bool)
+    x0, y0 = vx[-1], vy[-1]
+    for x1, y1 in zip(vx, vy):
+        if y0 != y1:
+            crosses = (y1 > py) != (y0 > py)
+            x_at = x1 + (py - y1) * (x0 - x1) / (y0 - y1)
+            inside ^= crosses & (px < x_at)
+        x0, y0 = x1, y1
+    return inside
+
+
+class CatalogSpatialIndex:
+    """KD-tree over the unit vectors of one catalog's positions; query results are catalog row indices."""
+
+    def __init__(self, rows: np.ndarray, ra_deg: np.ndarray, dec_deg: np.ndarray, nrows: int):
+        from scipy.spatial import cKDTree
+        self.rows = np.asarray(rows, dtype=np.int64)
+        self.ra = np.asarray(ra_deg, dtype=float)
+        self.dec = np.asarray(dec_deg, dtype=float)
+        self.nrows = int(nrows)
+        self.xyz = _radec_to_unit(self.ra, self.dec).reshape(-1, 3)
+        self.tree = cKDTree(self.xyz, balanced_tree=False) if len(self.rows) else None
+
+    def __len__(self) -> int:
+        return int(len(self.rows))
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.rows.nbytes + self.ra.nbytes + self.dec.nbytes + 2 * self.xyz.nbytes)
+
+    def coordinates(self, rows) -> tuple:
+        """Indexed (ra, dec) in degrees for rows returned by a query."""
+        positions = np.searchsorted(self.rows, np.asarray(rows, dtype=np.int64))
+        return self.ra[positions], self.dec[positions]
+
+    def _cap_positions(self, ra: float, dec: float, radius_deg: float) -> np.ndarray:
+        if self.tree is None:
+            return np.zeros(0, dtype=np.intp)
+        if radius_deg >= 180.0:
+            return np.arange(len(self.rows), dtype=np.intp)
+        # Pad the chord slightly; callers apply the exact test to the candidates.
+        found = self.tree.query_ball_point(_radec_to_unit(ra, dec), _chord_for_angle(radius_deg) * (1 + 1e-9) + 1e-12)
+        positions = np.asarray(found, dtype=np.intp)
+        positions.sort()
+        return positions
+
+    def _separations(self, ra: float, dec: float, positions: np.ndarray) -> np.ndarray:
+        return _angle_for_chord(np.linalg.norm(self.xyz[positions] - _radec_to_unit(ra, dec), axis=1))
+
+    def cone(self, ra: float, dec: float, radius_deg: float, sort: bool = True) -> tuple:
+        """(rows, separations in degrees) within radius_deg, nearest first when sort is set."""
+        positions = self._cap_positions(ra, dec, radius_deg)
+        sep = self._separations(ra, dec, positions)
+        keep = sep <= float(radius_deg)
+        positions, sep = positions[keep], sep[keep]
+        if sort:
+            order = np.argsort(sep, kind="stable")
+            positions, sep = positions[order], sep[order]
+        return self.rows[positions], sep
+
+    def nearest(self, ra: float, dec: float, k: int = 1, max_radius_deg: Optional[float] = None) -> tuple:
+        """(rows, separations in degrees) of up to k nearest sources, optionally within max_radius_deg."""
+        k = min(int(k), len(self.rows))
+        if k <= 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=float)
+        bound = np.inf if max_radius_deg is None else _chord_for_angle(max_radius_deg) * (1 + 1e-9) + 1e-12
+        dist, positions = self.tree.query(_radec_to_unit(ra, dec), k=k, distance_upper_bound=bound)
+        dist = np.atleast_1d(dist)
+        positions = np.atleast_1d(positions)
+        found = positions < len(self.rows)
+        positions = positions[found].astype(np.intp)
+        sep = _angle_for_chord(dist[found])
+        if max_radius_deg is not None:
+            keep = sep <= float(max_radius_deg)
+            positions, sep = positions[keep], sep[keep]
+        return self.rows[positions], sep
+
+    def nearest_each(self, xyz: np.ndarray, max_radius_deg: Optional[float] = None) -> tuple:
+        """(rows, separations in degrees) of the nearest source to each unit vector in xyz; row -1 where none is within max_radius_deg."""
+        xyz = np.asarray(xyz, dtype=float).reshape(-1, 3)
+        rows = np.full(len(xyz), -1, dtype=np.int64)
+        sep = np.full(len(xyz), np.inf)
+        if self.tree is None or not len(xyz):
+            return rows, sep
+        bound = np.inf if max_radius_deg is None else _chord_for_angle(max_radius_deg) * (1 + 1e-9) + 1e-12
+        dist, positions = self.tree.query(xyz, k=1, distance_upper_bound=bound)
+        found = positions < len(self.rows)
+        sep[found] = _angle_for_chord(dist[found])
+        if max_radius_deg is not None:
+            found &= sep <= float(max_radius_deg)
+        rows[found] = self.rows[positions[found]]
+        return rows, sep
+
+    def pairs(self, xyz: np.ndarray, radius_deg: float, k: int = 8, workers: int = 1) -> tuple:
+        """
+        (query positions, rows, separations in degrees) of every indexed source within radius_deg
+        of the unit vectors xyz. Points whose k nearest neighbours all fall inside the radius are
+        queried again with a larger k, so dense fields stay exact without a ball query per point.
+        """
+        xyz = np.asarray(xyz, dtype=float).reshape(-1, 3)
+        if self.tree is None or not len(xyz):
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0, dtype=float)
+        bound = _chord_for_angle(radius_deg) * (1 + 1e-9) + 1e-12
+        k = max(1, min(int(k), len(self.rows)))
+        todo = np.arange(len(xyz), dtype=np.int64)
+        found = []
+        while todo.size:
+            dist, positions = self.tree.query(xyz[todo], k=k, distance_upper_bound=bound, workers=workers)
+            dist = dist.reshape(len(todo), k)
+            positions = positions.reshape(len(todo), k)
+            hit = np.isfinite(dist)
+            saturated = hit[:, -1] if k < len(self.rows) else np.zeros(len(todo), dtype=bool)
+            qi, kj = np.nonzero(hit & ~saturated[:, None])
+            found.append((todo[qi], positions[qi, kj], dist[qi, kj]))
+            todo = todo[saturated]
+            k = min(k * 4, len(self.rows))
+        query = np.concatenate([f[0] for f in found])
+        positions = np.concatenate([f[1] for f in found]).astype(np.intp)
+        sep = _angle_for_chord(np.concatenate([f[2] for f in found]))
+        keep = sep <= float(radius_deg)
+        return query[keep], self.rows[positions[keep]], sep[keep]
+
+    def box(self, ra_min: float, ra_max: float, dec_min: float, dec_max: float) -> np.ndarray:
+        """Rows with dec_min <= Dec <= dec_max and RA in [ra_min, ra_max] (wrapping through 0 when ra_min > ra_max)."""
+        full_ra = float(ra_max) - float(ra_min) >= 360.0
+        ra_min, ra_max = float(ra_min) % 360.0, float(ra_max) % 360.0
+        dec_min, dec_max = max(float(dec_min), -90.0), min(float(dec_max), 90.0)
+        span = 360.0 if full_ra else (ra_max - ra_min) % 360.0
+        edge = np.linspace(0.0, 1.0, 65)
+        border_ra = np.concatenate((ra_min + span * edge, ra_min + span * edge, np.full(65, ra_min), np.full(65, ra_min + span)))
+        border_dec = np.concatenate((np.full(65, dec_min), np.full(65, dec_max),
+                                     dec_min + (dec_max - dec_min) * edge, dec_min + (dec_max - dec_min) * edge))
+        ra_c, dec_c, radius = _sky_cap(border_ra, border_dec, center=(ra_min + span / 2.0, (dec_min + dec_max) / 2.0))
+        positions = self._cap_positions(ra_c, dec_c, 180.0 if radius >= 90.0 else radius * 1.01 + 1e-6)
+        ra = self.ra[positions] % 360.0
+        dec = self.dec[positions]
+        if full_ra:
+            in_ra = np.ones(len(positions), dtype=bool)
+        elif ra_min <= ra_max:
+            in_ra = (ra >= ra_min) & (ra <= ra_max)
+        else:
+            in_ra = (ra >= ra_min) | (ra <= ra_max)
+        return self.rows[positions[in_ra & (dec >= dec_min) & (dec <= dec_max)]]
+
+    def polygon(self, ra_vertices, dec_vertices) -> np.ndarray:
+        """Rows inside a polygon with great-circle edges; the polygon must fit in a hemisphere."""
+        ra_v = np.asarray(ra_vertices, dtype=float)
+        dec_v = np.asarray(dec_vertices, dtype=float)
+        if ra_v.size < 3 or ra_v.shape != dec_v.shape or not (np.all(np.isfinite(ra_v)) and np.all(np.isfinite(dec_v))):
+            raise ValueError("A polygon needs at least three finite (ra, dec) vertices.")
+        ra_c, dec_c, radius = _sky_cap(ra_v, dec_v)
+        if radius >= 89.0:
+            raise ValueError("The polygon must fit within a hemisphere.")
+        positions = self._cap_positions(ra_c, dec_c, radius)
+        # A gnomonic projection about the cap centre keeps great-circle edges straight.
+        center = _radec_to_unit(ra_c, dec_c)
+        east = np.cross([0.0, 0.0, 1.0], center)
+        east = east / np.linalg.norm(east) if np.linalg.norm(east) > 1e-12 else np.array([0.0, 1.0, 0.0])
+        north = np.cross(center, east)
+
+        def _plane(xyz):
+            depth = xyz @ center
+            return (xyz @ east) / depth, (xyz @ north) / depth
+
+        vx, vy = _plane(_radec_to_unit(ra_v, dec_v))
+        px, py = _plane(self.xyz[positions])
+        return self.rows[positions[_points_in_polygon(px, py, vx, vy)]]
+
+
+class CatalogSpatialIndexCache:
+    """Spatial indexes keyed by (catalog path, RA column, Dec column, coordinate convention)."""
+
+    def __init__(self, max_open: int = CATALOG_SPATIAL_MAX_OPEN, root: str = CATALOG_STORE_DIRECTORY):
+        self.max_open = max(1, int(max_open))
+        self.root = Path(root) / "spatial"
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.RLock()
+        self._load_locks: dict[str, threading.Lock] = {}
+        self.hits = 0
+        self.misses = 0
+        self.builds = 0
+        self.disk_loads = 0
+        self.build_seconds = 0.0
+
+    def _lookup(self, key: str, size: int, mtime_ns: int):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] != size or entry[1] != mtime_ns:
+            self._entries.pop(key, None)
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def get(self, path_like, ra_col: str, dec_col: str, coordinates, convention: str = "degrees") -> CatalogSpatialIndex:
+        """
+        Index for a catalog's positions. coordinates() returns (ra_deg, dec_deg) arrays with one
+        value per row (NaN where unusable) and is only called when nothing is cached or saved.
+        """
+        path = Path(path_like).resolve()
+        st = path.stat()
+        key = f"{path}#{ra_col}#{dec_col}#{convention}"
+        with self._lock:
+            entry = self._lookup(key, st.st_size, st.st_mtime_ns)
+            if entry is not None:
+                self.hits += 1
+                return entry[2]
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+        with load_lock:
+            with self._lock:
+                entry = self._lookup(key, st.st_size, st.st_mtime_ns)
+                if entry is not None:
+                    self.hits += 1
+                    return entry[2]
+                self.misses += 1
+            t0 = time.perf_counter()
+            try:
+                index = self._load_or_build(key, st, coordinates)
+            except BaseException:
+                with self._lock:
+                    self.build_seconds += time.perf_counter() - t0
+                    self._load_locks.pop(key, None)
+                raise
+            # _lock is reentrant: remember the index and retire the load lock in one acquisition.
+            with self._lock:
+                self.build_seconds += time.perf_counter() - t0
+                self._remember(key, st.st_size, st.st_mtime_ns, index, (ra_col, dec_col, convention))
+                self._load_locks.pop(key, None)
+            return index
+
+    def _remember(self, key: str, size: int, mtime_ns: int, index: CatalogSpatialIndex, columns: tuple) -> None:
+        with self._lock:
+            self._entries[key] = (size, mtime_ns, index, columns)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_open:
+                self._entries.popitem(last=False)
+
+    def _saved_path(self, key: str, size: int, mtime_ns: int) -> tuple:
+        stem = hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+        return stem, self.root / f"{stem}-{size}-{mtime_ns}.npz"
+
+    def _load_or_build(self, key: str, st, coordinates) -> CatalogSpatialIndex:
+        stem, final = self._saved_path(key, st.st_size, st.st_mtime_ns)
+        if CATALOG_SPATIAL_PERSIST and final.is_file():
+            try:
+                with np.load(final, allow_pickle=False) as saved:
+                    if int(saved["format"]) == _CATALOG_SPATIAL_FORMAT:
+                        index = CatalogSpatialIndex(saved["rows"], saved["ra"], saved["dec"], int(saved["nrows"]))
+                        with self._lock:
+                            self.disk_loads += 1
+                        return index
+            except Exception:
+                pass
+            final.unlink(missing_ok=True)
+
+        ra_deg, dec_deg = coordinates()
+        ra_deg = np.asarray(ra_deg, dtype=float)
+        dec_deg = np.asarray(dec_deg, dtype=float)
+        valid = np.isfinite(ra_deg) & np.isfinite(dec_deg) & (np.abs(dec_deg) <= 90.0)
+        rows = np.nonzero(valid)[0].astype(np.int64)
+        index = CatalogSpatialIndex(rows, ra_deg[rows] % 360.0, dec_deg[rows], int(ra_deg.size))
+        with self._lock:
+            self.builds += 1
+        self._save(key, stem, final, index)
+        return index
+
+    def _save(self, key: str, stem: str, final: Path, index: CatalogSpatialIndex) -> None:
+        if CATALOG_SPATIAL_PERSIST:
+            try:
+                self.root.mkdir(parents=True, exist_ok=True)
+                tmp = self.root / f".{final.name}.{os.getpid()}.{threading.get_ident()}.tmp.npz"
+                np.savez(tmp, format=_CATALOG_SPATIAL_FORMAT, nrows=index.nrows, rows=index.rows, ra=index.ra, dec=index.dec)
+                os.replace(tmp, final)
+                for stale in self.root.glob(f"{stem}-*.npz"):
+                    if stale.name != final.name:
+                        stale.unlink(missing_ok=True)
+            except Exception as e:
+                print(f"[catalog_spatial] Could not save index for {key}: {e}")
+
+    def extend(self, path_like, version: tuple, old_nrows: int, tail_coordinates) -> int:
+        """
+        Carry the open indexes of a catalog whose first old_nrows rows are unchanged over to the
+        version (size, mtime_ns) of it: positions already indexed are kept and only the appended
+        rows' are added, from tail_coordinates(ra_col, dec_col, convention) -> (ra_deg, dec_deg)
+        of rows old_nrows on, or None to drop that index. Returns how many were carried over.
+        """
+        path = Path(path_like).resolve()
+        prefix = f"{path}#"
+        with self._lock:
+            found = [(key, entry) for key, entry in self._entries.items() if key.startswith(prefix)]
+        carried = 0
+        for key, (size, mtime_ns, index, columns) in found:
+            if (size, mtime_ns) == tuple(version):
+                continue
+            t0 = time.perf_counter()
+            coordinates = tail_coordinates(*columns) if index.nrows == old_nrows else None
+            if coordinates is None:
+                with self._lock:
+                    self._entries.pop(key, None)
+                continue
+            ra_deg = np.asarray(coordinates[0], dtype=float)
+            dec_deg = np.asarray(coordinates[1], dtype=float)
+            valid = np.isfinite(ra_deg) & np.isfinite(dec_deg) & (np.abs(dec_deg) <= 90.0)
+            rows = np.nonzero(valid)[0]
+            extended = CatalogSpatialIndex(np.concatenate((index.rows, rows + old_nrows)),
+                                           np.concatenate((index.ra, ra_deg[rows] % 360.0)),
+                                           np.concatenate((index.dec, dec_deg[rows])), old_nrows + int(ra_deg.size))
+            stem, final = self._saved_path(key, *version)
+            self._save(key, stem, final, extended)
+            self._remember(key, *version, extended, columns)
+            with self._lock:
+                self.builds += 1
+                self.build_seconds += time.perf_counter() - t0
+            carried += 1
+        return carried
+
+    def invalidate(self, path_like=None) -> None:
+        with self._lock:
+            if path_like is None:
+                self._entries.clear()
+                return
+            try:
+                prefix = f"{Path(path_like).resolve()}#"
+            except Exception:
+                prefix = f"{path_like}#"
+            for key in [k for k in self._entries if k.startswith(prefix)]:
+                self._entries.pop(key, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"open": len(self._entries), "max_open": self.max_open, "hits": self.hits,
+                    "misses": self.misses, "builds": self.builds, "disk_loads": self.disk_loads,
+                    "build_seconds": round(self.build_seconds, 3),
+                    "bytes": sum(entry[2].nbytes for entry in self._entries.values())}
+
+
+catalog_spatial_index = CatalogSpatialIndexCache()
+
+
+def _catalog_degrees(values) -> np.ndarray:
+    """Numeric (or numeric-text) coordinate column as float degrees, NaN where masked."""
+    arr = np.ma.asarray(values)
+    data = np.asarray(arr.data)
+    if data.dtype.kind == 'S':
+        data = np.char.decode(data)
+    out = np.array(data, dtype=float)
+    mask = np.ma.getmaskarray(arr)
+    if mask.any():
+        out[mask] = np.nan
+    return out
+
+
+def _catalog_spatial_index(catalog_name: str, catalogs_dir, catalog_table: Table, ra_col: str, dec_col: str) -> Optional[CatalogSpatialIndex]:
+    """Spatial index over plain-degree RA/Dec columns, or None when the catalog cannot be indexed."""
+    path = _locate_catalog_file(catalog_name, Path(catalogs_dir))
+    if path is None or not Path(path).is_file():
+        return None
+    try:
+        return catalog_spatial_index.get(
+            path, ra_col, dec_col,
+            lambda: (_catalog_degrees(catalog_table[ra_col]), _catalog_degrees(catalog_table[dec_col])),
+        )
+    except Exception as e:
+        print(f"[catalog_spatial] No spatial index for {catalog_name} ({ra_col}, {dec_col}): {e}")
+        return None
+
+
+# --- Catalog watcher ---
+# Pipelines rewrite catalogs while pages have them open. The sources of open
+# catalog stores are polled for size/mtime changes, and a change is acted on once
+# the file has held still for one poll, in the background rather than on the next
+# request. A source that only gained rows at its end extends its store, sort
+# orders and spatial indexes; anything else is stored again. The new version is
+# swapped in whole, the per-version caches let go of the old one, and connected
+# pages get a "catalog_updated" notice over the /ws/system-stats socket.
+
+CATALOG_WATCH_INTERVAL = float(os.getenv('CATALOG_WATCH_INTERVAL', '5'))  # seconds; 0 disables
+
+
+def _catalog_watch_name(path: Path) -> str:
+    """Catalog name pages use for a source: relative to the working directory when inside it."""
+    try:
+        return Path(path).resolve().relative_to(Path.cwd().resolve()).as_posix()
+    except ValueError:
+        return str(path)
+
+
+class CatalogWatcher:
+    """Polls the sources of open catalog stores and refreshes the stores whose source changed."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._known: dict[str, tuple] = {}    # "path#hdu" -> (size, mtime_ns, store) last refreshed or seen
+        self._pending: dict[str, tuple] = {}  # "path#hdu" -> (size, mtime_ns) seen changing at the last poll
+        self.polls = 0
+        self.refreshes = 0
+        self.appends = 0
+        self.failures = 0
+        self.refresh_seconds = 0.0
+
+    def poll(self) -> list:
+        """Refresh every watched catalog that changed and then held still; returns the notices to send."""
+        opened = {f"{path}#{hdu}": (size, mtime_ns, store) for path, hdu, size, mtime_ns, store in catalog_store.versions()}
+        with self._lock:
+            self.polls += 1
+            keys = list(dict.fromkeys(list(self._known) + list(opened)))
+        notices = []
+        for key in keys:
+            path, hdu = key.rsplit("#", 1)
+            known = self._known.get(key) or opened[key]
+            try:
+                st = os.stat(path)
+            except OSError:
+                self._forget(key)
+                continue
+            current = (st.st_size, st.st_mtime_ns)
+            if current == known[:2]:
+                if key in opened:
+                    self._known[key] = known
+                    self._pending.pop(key, None)
+                else:
+                    # Evicted from the store cache and unchanged: no longer open anywhere.
+                    self._forget(key)
+                continue
+            if self._pending.get(key) != current:
+                self._known[key] = known
+                self._pending[key] = current
+                continue
+            self._pending.pop(key, None)
+            notice = self._refresh(key, Path(path), int(hdu), known)
+            if notice is not None:
+                notices.append(notice)
+        return notices
+
+    def _forget(self, key: str) -> None:
+        self._known.pop(key, None)
+        self._pending.pop(key, None)
+
+    def _refresh(self, key: str, path: Path, hdu_index: int, known: tuple) -> Optional[dict]:
+        t0 = time.perf_counter()
+        previous = known[2]
+        try:
+            store, added = catalog_store.refresh(path, hdu_index, previous)
+            if store is not None:
+                version = (int(store.meta["size"]), int(store.meta["mtime_ns"]))
+            else:
+                st = path.stat()
+                version = (st.st_size, st.st_mtime_ns)
+        except Exception as e:
+            with self._lock:
+                self.failures += 1
+            self._forget(key)
+            print(f"[catalog_watch] Could not refresh {path.name}: {e}")
+            return None
+        self._known[key] = (*version, store)
+        catalog_table_cache.invalidate(path)
+        carried = 0
+        if added is not None:
+            def _tail(ra_col, dec_col, convention):
+                if convention != "degrees" or ra_col not in store.colnames or dec_col not in store.colnames:
+                    return None
+                return (_catalog_degrees(store.column(ra_col)[previous.nrows:]),
+                        _catalog_degrees(store.column(dec_col)[previous.nrows:]))
+            try:
+                carried = catalog_spatial_index.extend(path, version, previous.nrows, _tail)
+            except Exception as e:
+                print(f"[catalog_watch] Could not extend the spatial indexes of {path.name}: {e}")
+                catalog_spatial_index.invalidate(path)
+        else:
+            catalog_spatial_index.invalidate(path)
+        catalog_tile_sources.invalidate(path)
+        catalog_result_sets.invalidate(path)
+        plot_aggregates.invalidate(path)
+        elapsed = time.perf_counter() - t0
+        with self._lock:
+            self.refreshes += 1
+            self.appends += added is not None
+            self.refresh_seconds += elapsed
+        nrows = store.nrows if store is not None else None
+        previous_nrows = previous.nrows if previous is not None else None
+        print(f"[catalog_watch] {path.name} changed: " +
+              (f"{added} rows appended ({carried} spatial indexes kept)" if added is not None else "stored again") +
+              f" in {elapsed:.2f}s")
+        return {"type": "catalog_updated", "catalog": _catalog_watch_name(path), "filename": path.name,
+                "hdu": hdu_index, "nrows": nrows, "previous_nrows": previous_nrows, "appended_rows": added,
+                "size": version[0], "mtime_ns": version[1]}
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"interval": CATALOG_WATCH_INTERVAL, "watched": len(self._known), "pending": len(self._pending),
+                    "polls": self.polls, "refreshes": self.refreshes, "appends": self.appends,
+                    "failures": self.failures, "refresh_seconds": round(self.refresh_seconds, 3)}
+
+
+catalog_watcher = CatalogWatcher()
+
+
+async def catalog_watch_worker():
+    """Runs catalog_watcher.poll() every CATALOG_WATCH_INTERVAL seconds and broadcasts what changed."""
+    loop = asyncio.get_running_loop()
+    while True:
+        try:
+            await asyncio.sleep(CATALOG_WATCH_INTERVAL)
+            notices = await loop.run_in_executor(app.state.thread_executor, catalog_watcher.poll)
+            for notice in notices:
+                try:
+                    await manager.broadcast(json.dumps(notice))
+                except Exception as e:
+                    print(f"[catalog_watch] Could not send a notice for {notice.get('filename')}: {e}")
+        except asyncio.CancelledError:
+            break
+        except Exception as e:
+            print(f"[catalog_watch] error: {e}")
+
+
 # Helper function similar to parse_jwst_wcs from peak_finder.py
 def _prepare_jwst_header_for_wcs(header):
     """
@@ -13753,6 +20318,7 @@ def load_catalog_data(catalog_path_str, request: Request = None):
 
         fits_file = (session_data.get("current_fits_file") if session_data else getattr(app.state, "current_fits_file", None))
         hdu_index = int(session_data.get("current_hdu_index", 0) if session_data else getattr(app.state, "current_hdu_index", 0))
+        fits_file, hdu_index = _virtual_image_wcs_source(fits_file, hdu_index)
         rgb_generator = _get_rgb_generator(session_data, create=False) if session_data is not None else None
         rgb_frame = None
         if rgb_generator is not None:
@@ -13761,6 +20327,7 @@ def load_catalog_data(catalog_path_str, request: Request = None):
             except Exception:
                 rgb_frame = None
 
+        image_bundle = None
         if rgb_frame is not None and rgb_frame.get("base") is not None:
             base = rgb_frame["base"]
             image_wcs = getattr(base, "wcs", None)
@@ -13786,70 +20353,31 @@ def load_catalog_data(catalog_path_str, request: Request = None):
 
             # Determine flip_y and image_height from the displayed image
             try:
-                with fits.open(fits_file) as hdul:
-                    if not (0 <= hdu_index < len(hdul)):
-                        hdu_index = 0
-
-                    # IMPORTANT PERFORMANCE NOTE:
-                    # Avoid touching `hdu.data` here — for large FITS images it forces reading the full array
-                    # from disk/network, which can take minutes. We only need header + NAXIS sizing.
-                    def _is_image_hdu(h) -> bool:
-                        try:
-                            hdr = getattr(h, 'header', None)
-                            if hdr is None:
-                                return False
-                            naxis = int(hdr.get('NAXIS', 0) or 0)
-                            if naxis < 2:
-                                return False
-                            n1 = hdr.get('NAXIS1', None)
-                            n2 = hdr.get('NAXIS2', None)
-                            return (n1 is not None and n2 is not None and int(n1) > 0 and int(n2) > 0)
-                        except Exception:
-                            return False
-
-                    image_hdu = hdul[hdu_index]
-                    if not _is_image_hdu(image_hdu):
-                        image_hdu = next((h for h in hdul if _is_image_hdu(h)), None)
-                    if image_hdu is None:
-                        print("No image HDU found in FITS file")
-                        return []
+                # IMPORTANT PERFORMANCE NOTE:
+                # Avoid touching `hdu.data` here — for large FITS images it forces reading the full array
+                # from disk/network, which can take minutes. The cached WCS bundle is header-only.
+                image_metadata = fits_metadata_cache.get(fits_file)
+                if not (0 <= hdu_index < len(image_metadata.hdus)) or not image_metadata.hdus[hdu_index].is_2d_image:
+                    hdu_index = image_metadata.first_image_index()
+                if hdu_index is None:
+                    print("No image HDU found in FITS file")
+                    return []
 
-                    fy, _, _ = analyze_wcs_orientation(image_hdu.header, None)
-                    flip_y = bool(fy)
-                    # IMPORTANT: vertical flip uses the number of rows (height)
-                    image_height = int(image_hdu.header.get('NAXIS2', 0))
-                    image_width = int(image_hdu.header.get('NAXIS1', 0))
+                image_bundle = image_metadata.hdu(hdu_index).wcs_bundle
+                flip_y = bool(image_bundle.flip_y)
+                # IMPORTANT: vertical flip uses the number of rows (height)
+                image_height = image_bundle.height
+                image_width = image_bundle.width
 
-                    if image_wcs is None:
-                        try:
-                            wcs_header = _prepare_jwst_header_for_wcs(image_hdu.header)
-                        except Exception:
-                            wcs_header = image_hdu.header
-                        image_wcs = WCS(wcs_header)
-                # Reduce to celestial (2D) WCS if header contains extra axes (e.g., spectral, Stokes)
-                try:
-                    if image_wcs is not None:
-                        if hasattr(image_wcs, 'celestial'):
-                            image_wcs = image_wcs.celestial
-                        else:
-                            # Fallback for older astropy
-                            image_wcs = image_wcs.sub(['celestial'])
-                except Exception:
-                    # If subsetting fails, leave image_wcs as-is; downstream guard handles errors
-                    pass
-            except Exception:
+                if image_wcs is None:
+                    image_wcs = image_bundle.wcs
+            except Exception as e:
                 print(f"WCS/init error: {e}")
                 image_wcs = None
 
-        # Pixel scale for converting angular radii -> pixels (if needed)
-        arcsec_per_pixel = None
-        try:
-            if image_wcs is not None and getattr(image_wcs, "has_celestial", False):
-                arcsec_per_pixel = float(_compute_arcsec_per_pixel(image_wcs))
-                if not np.isfinite(arcsec_per_pixel) or arcsec_per_pixel <= 0:
-                    arcsec_per_pixel = None
-        except Exception:
-            arcsec_per_pixel = None
+        # Celestial (2D) WCS and pixel scale for converting angular radii -> pixels; both come
+        # cached from the bundle for the displayed file.
+        image_wcs, arcsec_per_pixel = _catalog_projection_wcs(image_wcs, image_bundle)
 
         # Column mapping must come from explicit overrides only
         ra_col = dec_col = resolution_col = color_col = None
@@ -14075,10 +20603,19 @@ def load_catalog_data(catalog_path_str, request: Request = None):
                     needed_columns = all_column_names[:]
 
                 from astropy.table import Table  # local import to ensure symbol defined
+                store = None
+                if CATALOG_STORE_ENABLED:
+                    try:
+                        store = catalog_store.get(catalog_path, hdul.index(selected_hdu))
+                    except Exception as e:
+                        print(f"[catalog_store] Could not use store for {catalog_path}: {e}")
                 col_data = {}
                 for name in needed_columns:
                     try:
-                        col_data[name] = selected_hdu.data.field(name)
+                        if store is not None and name in store.colnames:
+                            col_data[name] = store.column(name)
+                        else:
+                            col_data[name] = selected_hdu.data.field(name)
                     except Exception:
                         continue
                 rows = Table(col_data)
@@ -14086,14 +20623,9 @@ def load_catalog_data(catalog_path_str, request: Request = None):
                 full_rows_data = selected_hdu.data
                 full_column_names = list(all_column_names)
         else:
-            from astropy.table import Table
-            try:
-                table = Table.read(catalog_path, format='ascii')
-            except Exception:
-                try:
-                    table = Table.read(catalog_path, format='csv')
-                except Exception:
-                    table = Table.read(catalog_path, format='tab')
+            table = _catalog_store_table(catalog_path)
+            if table is None:
+                table = _read_ascii_catalog_table(catalog_path)
 
             rows = table
             lower_cols = [str(c).strip().lower() for c in table.colnames]
@@ -14747,34 +21279,9 @@ async def generate_rgb_cutouts(request: Request, ra: float, dec: float, catalog_
 
     # Try to get galaxy name from catalog (works best when catalog includes a galaxy column).
     try:
-        catalog_table = loaded_catalogs.get(catalog_name)
+        catalog_table = get_astropy_table_from_catalog(catalog_name, Path(CATALOGS_DIRECTORY))
         if catalog_table is None:
-            print(f"RGB Cutouts: Catalog '{catalog_name}' not in cache. Loading.")
-            # Resolve uploaded catalogs too (frontend typically passes basename like "upload_foo.fits")
-            base_dir = Path(".").resolve()
-            catalogs_dir = Path(CATALOGS_DIRECTORY)
-            try:
-                name = str(catalog_name).strip()
-                direct = base_dir / name
-                in_catalogs = base_dir / CATALOGS_DIRECTORY / name
-                in_files = base_dir / FILES_DIRECTORY / name
-                in_uploads = base_dir / UPLOADS_DIRECTORY / name
-                if direct.is_file():
-                    catalogs_dir = base_dir
-                elif in_catalogs.is_file():
-                    catalogs_dir = base_dir / CATALOGS_DIRECTORY
-                elif in_uploads.is_file():
-                    catalogs_dir = base_dir / UPLOADS_DIRECTORY
-                elif in_files.is_file():
-                    catalogs_dir = base_dir / FILES_DIRECTORY
-            except Exception:
-                catalogs_dir = Path(CATALOGS_DIRECTORY)
-
-            catalog_table = get_astropy_table_from_catalog(catalog_name, catalogs_dir)
-            if catalog_table is not None:
-                loaded_catalogs[catalog_name] = catalog_table
-            else:
-                print(f"RGB Cutouts: Failed to load catalog '{catalog_name}'.")
+            print(f"RGB Cutouts: Failed to load catalog '{catalog_name}'.")
         if catalog_table is not None:
             ra_col, dec_col = None, None
             available_cols_lower = {col.lower(): col for col in catalog_table.colnames}
@@ -14852,6 +21359,7 @@ async def generate_rgb_cutouts(request: Request, ra: float, dec: float, catalog_
                 session = getattr(request.state, "session", None)
                 session_data = session.data if session is not None else {}
                 fits_path = session_data.get("current_fits_file") or ""
+                fits_path, _ = _virtual_image_wcs_source(fits_path, 0)
                 if fits_path:
                     base_name2 = Path(str(fits_path)).name.lower()
                     parent_name2 = Path(str(fits_path)).parent.name.lower()
@@ -15196,36 +21704,7 @@ async def generate_all_rgb_cutouts(request: Request, catalog_name: str, count: i
     if rows_per_page < 1:
         return JSONResponse(status_code=400, content={"error": "rows_per_page must be at least 1"})
 
-    base_dir = Path(".").resolve()
-    catalog_table = loaded_catalogs.get(catalog_name)
-    if catalog_table is None:
-        catalog_dirs_to_try = []
-        try:
-            name = str(catalog_name).strip()
-            candidates = [
-                (base_dir, base_dir / name),
-                (base_dir / CATALOGS_DIRECTORY, base_dir / CATALOGS_DIRECTORY / name),
-                (base_dir / UPLOADS_DIRECTORY, base_dir / UPLOADS_DIRECTORY / name),
-                (base_dir / FILES_DIRECTORY, base_dir / FILES_DIRECTORY / name),
-            ]
-            for candidate_dir, candidate_path in candidates:
-                try:
-                    if candidate_path.is_file():
-                        catalog_dirs_to_try.append(candidate_dir)
-                except Exception:
-                    continue
-        except Exception:
-            pass
-        catalog_dirs_to_try.append(Path(CATALOGS_DIRECTORY))
-
-        for catalog_dir in catalog_dirs_to_try:
-            try:
-                catalog_table = get_astropy_table_from_catalog(catalog_name, catalog_dir)
-                if catalog_table is not None:
-                    loaded_catalogs[catalog_name] = catalog_table
-                    break
-            except Exception:
-                continue
+    catalog_table = get_astropy_table_from_catalog(catalog_name, Path(CATALOGS_DIRECTORY))
 
     if catalog_table is None:
         return JSONResponse(status_code=404, content={"error": f"Could not load catalog '{catalog_name}'."})
@@ -15592,6 +22071,13 @@ async def startup_event():
         _neloura_print("[startup] uploads_auto_clean_worker scheduled")
     except Exception as _e:
         _neloura_print(f"[startup] Failed to schedule uploads_auto_clean_worker: {_e}")
+    # Start the catalog watcher
+    if CATALOG_STORE_ENABLED and CATALOG_WATCH_INTERVAL > 0:
+        try:
+            asyncio.create_task(catalog_watch_worker())
+            _neloura_print(f"[startup] catalog_watch_worker scheduled (every {CATALOG_WATCH_INTERVAL:g}s)")
+        except Exception as _e:
+            _neloura_print(f"[startup] Failed to schedule catalog_watch_worker: {_e}")
     # Seed settings_profiles.json at startup so UI click isn't required
     try:
         from settings_api import _load_store as _sp_load, _save_store as _sp_save, _get_original_defaults as _sp_defaults
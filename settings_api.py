@@ -190,7 +190,7 @@ def _build_defaults_from_main() -> Dict[str, Any]:
     add("UVICORN_HOST", "Web/API")
     add("UVICORN_PORT", "Web/API")
     add("UVICORN_RELOAD_MODE", "Web/API", options=[True, False])
-    add("DEFAULT_EXPORT_FORMAT", "Web/API", options=["csv", "json", "fits"])
+    add("DEFAULT_EXPORT_FORMAT", "Web/API", options=["csv", "fits", "parquet", "votable"])
     add("MAX_EXPORT_ROWS", "Web/API")
     add("CATALOG_COLUMN_ANALYSIS_SAMPLE_SIZE", "Web/API")
     add("SYSTEM_STATS_UPDATE_INTERVAL", "Web/API")
@@ -342,7 +342,7 @@ def _get_schema() -> List[Dict[str, Any]]:
     defaults = _get_original_defaults()
     # Options by key
     OPTIONS: Dict[str, List[Any]] = {
-        "DEFAULT_EXPORT_FORMAT": ["csv", "json", "fits"],
+        "DEFAULT_EXPORT_FORMAT": ["csv", "fits", "parquet", "votable"],
         "UVICORN_RELOAD_MODE": [True, False],
         "ENABLE_IN_MEMORY_FITS": [True, False],
         "ENABLE_PAGECACHE_WARMUP": [True, False],
@@ -2031,9 +2031,14 @@ function canvasUpdateOverlay(opts = null) {
             // Viewer can be replaced (e.g. dynamic range); keep renderer synced.
             try { r.viewer = activeOsViewer; } catch (_) {}
 
-            // If the overlay data array was replaced, rebuild GPU buffers.
+            // If the overlay data array was replaced, rebuild GPU buffers; if records were only
+            // appended to it (viewport level-of-detail streaming), upload just the new tail.
             try {
-                if (r.__catalogDataRef !== catalogData || r.count !== ((catalogData && catalogData.length) || 0)) {
+                const n = (catalogData && catalogData.length) || 0;
+                if (r.__catalogDataRef === catalogData && r.count > 0 && r.count < n && typeof r.appendData === 'function') {
+                    r.appendData(catalogData, r.count);
+                    r.__filterSig = null;
+                } else if (r.__catalogDataRef !== catalogData || r.count !== n) {
                     r.__catalogDataRef = catalogData;
                     if (typeof r.setData === 'function') r.setData(catalogData);
                     // Force re-apply visibility mask next pass
@@ -96,6 +96,9 @@ async function fetchCatalogMetadata(catalogName) {
  
 
 
+  // Result-set cursor per catalog query (everything but page/limit); the server slices later pages from it.
+  const catalogQueryCursors = new Map();
+
   async function fetchCatalogData(catalogName, options = {}) {
     const {
       page = 1,
@@ -113,11 +116,14 @@ async function fetchCatalogMetadata(catalogName) {
 
     const colParam = columns ? (Array.isArray(columns) ? columns.join(',') : String(columns)) : '';
     const effLimit = hasClientOps ? Math.min(Number(limit)||500, 500) : limit;
-    const url = `/catalog-binary-raw/${encodeURIComponent(key)}?page=${page}&limit=${effLimit}`
-      + (colParam ? `&columns=${encodeURIComponent(colParam)}` : '')
+    const query = (colParam ? `&columns=${encodeURIComponent(colParam)}` : '')
       + (hasClientOps ? `&filters=${encodeURIComponent(JSON.stringify(filters||{}))}` : '')
       + (search ? `&search=${encodeURIComponent(String(search))}` : '')
-      + (sortBy ? `&sort_by=${encodeURIComponent(String(sortBy))}&sort_order=${encodeURIComponent(String(sortOrder||'asc'))}` : '')
+      + (sortBy ? `&sort_by=${encodeURIComponent(String(sortBy))}&sort_order=${encodeURIComponent(String(sortOrder||'asc'))}` : '');
+    const queryKey = `${key}?${query}`;
+    const cursor = catalogQueryCursors.get(queryKey);
+    const url = `/catalog-binary-raw/${encodeURIComponent(key)}?page=${page}&limit=${effLimit}` + query
+      + (cursor ? `&cursor=${encodeURIComponent(cursor)}` : '')
       + `&ts=${Date.now()}`;
     const fetchOpts = {};
     if (options && options.signal) fetchOpts.signal = options.signal;
@@ -135,6 +141,8 @@ async function fetchCatalogMetadata(catalogName) {
     if (!parsed || !parsed.records || !parsed.header) throw new Error('Binary parse failed');
 
     const pg = parsed.header.pagination || {};
+    if (pg.cursor) catalogQueryCursors.set(queryKey, pg.cursor);
+    else catalogQueryCursors.delete(queryKey);
     const totalItems = pg.total_items ?? parsed.header.total_rows ?? 0;
     const totalPages = pg.total_pages ?? Math.max(1, Math.ceil(totalItems / limit));
     const showingStart = pg.showing_start ?? (totalItems ? (page - 1) * limit + 1 : 0);
@@ -150,7 +158,8 @@ async function fetchCatalogMetadata(catalogName) {
         has_prev: !!pg.has_prev || page > 1,
         has_next: !!pg.has_next || page < totalPages,
         showing_start: showingStart,
-        showing_end: showingEnd
+        showing_end: showingEnd,
+        cursor: pg.cursor || null
       },
       column_stats: stats ? null : null
     };
@@ -1025,6 +1034,7 @@ function createAdvancedCatalogViewer(catalogName, metadata) {
                         <label style="display: block; margin-bottom: 5px; font-weight: bold;">Filter Type:</label>
                         <select id="filter-type" style="width: 100%; padding: 8px; background: #444; color: white; border: 1px solid #555; border-radius: 4px;">
                             <option value="contains">Contains</option>
+                            <option value="starts_with">Starts With</option>
                             <option value="equals">Equals</option>
                             ${isNumeric ? `
                                 <option value="greater_than">Greater Than</option>
@@ -1036,7 +1046,8 @@ function createAdvancedCatalogViewer(catalogName, metadata) {
                     
                     <div id="filter-value-container">
                         <label style="display: block; margin-bottom: 5px; font-weight: bold;">Value:</label>
-                        <input type="text" id="filter-value" style="width: 100%; padding: 8px; background: #444; color: white; border: 1px solid #555; border-radius: 4px;">
+                        <input type="text" id="filter-value" list="filter-value-suggestions" autocomplete="off" style="width: 100%; padding: 8px; background: #444; color: white; border: 1px solid #555; border-radius: 4px;">
+                        <datalist id="filter-value-suggestions"></datalist>
                     </div>
                     
                     <div id="range-container" style="display: none; margin-top: 15px;">
@@ -1082,6 +1093,7 @@ function createAdvancedCatalogViewer(catalogName, metadata) {
                 </script>
             `;
         });
+        if (!isNumeric) attachValueSuggestions(columnName, 'filter-value', 'filter-type', 'filter-value-suggestions');
         
         window.applyColumnFilter = function(columnName) {
             const filterType = document.getElementById('filter-type').value;
@@ -1114,6 +1126,40 @@ function createAdvancedCatalogViewer(catalogName, metadata) {
         };
     }
 
+    // Offer the most frequent matching values of a text column while the user types
+    // (/catalog-column-suggest/ answers from the stored column's dictionary).
+    function attachValueSuggestions(columnName, inputId, typeSelectId, datalistId) {
+        const input = document.getElementById(inputId);
+        const datalist = document.getElementById(datalistId);
+        if (!input || !datalist) return;
+        const catalogNameForApi = catalogName.startsWith('catalogs/') ? catalogName.replace('catalogs/', '') : catalogName;
+        let timer = null;
+        let controller = null;
+        input.addEventListener('input', () => {
+            if (timer) clearTimeout(timer);
+            timer = setTimeout(async () => {
+                const typeSelect = document.getElementById(typeSelectId);
+                const mode = (typeSelect && typeSelect.value === 'contains') ? 'contains' : 'prefix';
+                try { if (controller) controller.abort(); } catch (_) {}
+                controller = (typeof AbortController !== 'undefined') ? new AbortController() : null;
+                try {
+                    const url = `/catalog-column-suggest/${encodeURIComponent(catalogNameForApi)}/${encodeURIComponent(columnName)}`
+                        + `?q=${encodeURIComponent(input.value)}&mode=${mode}&limit=15`;
+                    const resp = await apiFetch(url, controller ? { signal: controller.signal } : {});
+                    if (!resp.ok) return;
+                    const result = await resp.json();
+                    datalist.innerHTML = '';
+                    (result.suggestions || []).forEach(item => {
+                        const option = document.createElement('option');
+                        option.value = item.value;
+                        option.label = `${item.value} (${item.count})`;
+                        datalist.appendChild(option);
+                    });
+                } catch (_) {}
+            }, 120);
+        });
+    }
+
     function showAdvancedSearchDialog(state, onUpdate) {
         createDialog('advanced-search-dialog', 'Advanced Search', (content) => {
             content.innerHTML = `
@@ -1291,6 +1337,7 @@ function createAdvancedCatalogViewer(catalogName, metadata) {
                                 <label style="display: block; margin-bottom: 5px;">Operation:</label>
                                 <select id="filter-operation" style="width: 100%; padding: 8px; background: #444; color: white; border: 1px solid #555; border-radius: 4px;">
                                     <option value="contains">Contains</option>
+                                    <option value="starts_with">Starts With</option>
                                     <option value="equals">Equals</option>
                                     <option value="greater_than">Greater Than</option>
                                     <option value="less_than">Less Than</option>
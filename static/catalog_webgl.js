@@ -1,7 +1,7 @@
 // catalog_webgl.js - WebGL point renderer for catalogs
 //
 // Renders catalog points in image-pixel coordinates on top of OpenSeadragon.
-// - Upload buffers once per catalog overlay update
+// - Upload buffers once per catalog overlay update (appendData uploads only new records)
 // - On pan/zoom: update transform uniforms and draw (no per-point JS loop)
 // - Optional picking via offscreen render + readPixels (WebGL2 preferred)
 
@@ -665,48 +665,60 @@
       gl.texSubImage2D(gl.TEXTURE_2D, 0, 0, 0, w, 1, gl.RGBA, gl.UNSIGNED_BYTE, paramsArr);
     }
 
-    setData(catalogData) {
-      const gl = this.gl;
-      const n = (catalogData && catalogData.length) ? catalogData.length : 0;
-      this.count = n;
-      if (!n) return;
-
-      // Build typed arrays
-      const pos = new Float32Array(n * 2);
-      const rad = new Float32Array(n);
-      let maxRad = 0;
-      const ids = new Float32Array(n); // float id (fits 24-bit precisely; for >16M ids we'd need uint)
-      const vis = new Uint8Array(n);
-      const cat = new Uint8Array(n);
-      const shape = new Uint8Array(n);
-      // Optional per-point colors for color-coding
-      let pstroke = null;
-      let pfill = null;
-      // Detect color coding quickly (we only need per-point colors if any records have colorCodeColumn)
-      let usePerPointColor = false;
-      const scanN = Math.min(n, 2048);
-      for (let i = 0; i < scanN; i += 1) {
+    _detectPerPointColor(catalogData, start, end) {
+      // We only need per-point colors if any records carry color-coding info.
+      const scanEnd = Math.min(end, start + 2048);
+      for (let i = start; i < scanEnd; i += 1) {
         const s = catalogData[i] || {};
-        if (s && (s.colorCodeColumn || s.colorCodeValue !== undefined || s.colorMapName)) { usePerPointColor = true; break; }
-      }
-      this._usePerPointColor = !!usePerPointColor;
-      if (this._usePerPointColor) {
-        pstroke = new Uint8Array(n * 4);
-        pfill = new Uint8Array(n * 4);
+        if (s && (s.colorCodeColumn || s.colorCodeValue !== undefined || s.colorMapName)) return true;
       }
+      return false;
+    }
 
-      // Build per-catalog id mapping (small)
-      const catKeyToId = new Map();
-      const catKeys = [];
-      const getIdForKey = (key) => {
-        if (!key) return 0;
-        let id = catKeyToId.get(key);
-        if (typeof id === 'number') return id;
-        id = catKeys.length;
-        catKeys.push(key);
-        catKeyToId.set(key, id);
-        return id;
+    // CPU-side copies of the instance attributes, sized to `capacity` so appends can reuse them.
+    _allocCpu(capacity) {
+      const cap = Math.max(1, capacity | 0);
+      const old = this._cpu;
+      const cpu = {
+        capacity: cap,
+        pos: new Float32Array(cap * 2),
+        rad: new Float32Array(cap),
+        ids: new Float32Array(cap), // float id (fits 24-bit precisely; for >16M ids we'd need uint)
+        vis: new Uint8Array(cap),
+        cat: new Uint8Array(cap),
+        shape: new Uint8Array(cap),
+        pstroke: this._usePerPointColor ? new Uint8Array(cap * 4) : null,
+        pfill: this._usePerPointColor ? new Uint8Array(cap * 4) : null
       };
+      if (old && this.count) {
+        const n = Math.min(this.count, cap);
+        cpu.pos.set(old.pos.subarray(0, n * 2));
+        cpu.rad.set(old.rad.subarray(0, n));
+        cpu.ids.set(old.ids.subarray(0, n));
+        cpu.vis.set(old.vis.subarray(0, n));
+        cpu.cat.set(old.cat.subarray(0, n));
+        cpu.shape.set(old.shape.subarray(0, n));
+        if (cpu.pstroke && old.pstroke) cpu.pstroke.set(old.pstroke.subarray(0, n * 4));
+        if (cpu.pfill && old.pfill) cpu.pfill.set(old.pfill.subarray(0, n * 4));
+      }
+      this._cpu = cpu;
+    }
+
+    _getIdForKey(key) {
+      if (!key) return 0;
+      let id = this._catKeyToId.get(key);
+      if (typeof id === 'number') return id;
+      id = this._catKeys.length;
+      this._catKeys.push(key);
+      this._catKeyToId.set(key, id);
+      return id;
+    }
+
+    // Encode catalogData[start..end) into the CPU arrays at the same indices.
+    _writeRecords(catalogData, start, end) {
+      const cpu = this._cpu;
+      const { pos, rad, ids, vis, cat, shape, pstroke, pfill } = cpu;
+      let maxRad = this._maxRadius || 0;
 
       const colorCache = this._usePerPointColor ? new Map() : null;
       const parseCached = (c, fb) => {
@@ -722,7 +734,7 @@
         }
       };
 
-      for (let i = 0; i < n; i++) {
+      for (let i = start; i < end; i++) {
         const s = catalogData[i] || {};
         const x = Number.isFinite(s.x_pixels) ? s.x_pixels : (Number.isFinite(s.x) ? s.x : 0);
         const y = Number.isFinite(s.y_pixels) ? s.y_pixels : (Number.isFinite(s.y) ? s.y : 0);
@@ -735,7 +747,7 @@
         // Use 255 to represent "1.0" so the a_vis < 0.5 cull doesn't hide everything.
         vis[i] = 255;
         const key = this._normCatalogKey(s.__catalogName || s.catalog_name || s.catalogName || s.catalog || '');
-        const cid = getIdForKey(key);
+        const cid = this._getIdForKey(key);
         cat[i] = clamp(cid, 0, 255);
         // Shape: 0=circle,1=square,2=hexagon (default circle)
         try {
@@ -759,8 +771,13 @@
           pfill[i * 4 + 3] = fi[3];
         }
       }
+      this._maxRadius = maxRad;
+    }
 
-      // Create / upload buffers
+    // (Re)create every GPU buffer at the CPU capacity.
+    _uploadAll() {
+      const gl = this.gl;
+      const cpu = this._cpu;
       const makeBuf = (target, data, usage) => {
         const b = gl.createBuffer();
         gl.bindBuffer(target, b);
@@ -777,24 +794,84 @@
       } catch (_) {}
       this.buffers = {};
 
-      this.buffers.pos = makeBuf(gl.ARRAY_BUFFER, pos, gl.STATIC_DRAW);
-      this.buffers.rad = makeBuf(gl.ARRAY_BUFFER, rad, gl.STATIC_DRAW);
-      this.buffers.id = makeBuf(gl.ARRAY_BUFFER, ids, gl.STATIC_DRAW);
-      this.buffers.vis = makeBuf(gl.ARRAY_BUFFER, vis, gl.DYNAMIC_DRAW);
-      this.buffers.cat = makeBuf(gl.ARRAY_BUFFER, cat, gl.STATIC_DRAW);
-      this.buffers.shape = makeBuf(gl.ARRAY_BUFFER, shape, gl.STATIC_DRAW);
+      this.buffers.pos = makeBuf(gl.ARRAY_BUFFER, cpu.pos, gl.STATIC_DRAW);
+      this.buffers.rad = makeBuf(gl.ARRAY_BUFFER, cpu.rad, gl.STATIC_DRAW);
+      this.buffers.id = makeBuf(gl.ARRAY_BUFFER, cpu.ids, gl.STATIC_DRAW);
+      this.buffers.vis = makeBuf(gl.ARRAY_BUFFER, cpu.vis, gl.DYNAMIC_DRAW);
+      this.buffers.cat = makeBuf(gl.ARRAY_BUFFER, cpu.cat, gl.STATIC_DRAW);
+      this.buffers.shape = makeBuf(gl.ARRAY_BUFFER, cpu.shape, gl.STATIC_DRAW);
       if (this._usePerPointColor) {
-        this.buffers.pstroke = makeBuf(gl.ARRAY_BUFFER, pstroke, gl.STATIC_DRAW);
-        this.buffers.pfill = makeBuf(gl.ARRAY_BUFFER, pfill, gl.STATIC_DRAW);
+        this.buffers.pstroke = makeBuf(gl.ARRAY_BUFFER, cpu.pstroke, gl.STATIC_DRAW);
+        this.buffers.pfill = makeBuf(gl.ARRAY_BUFFER, cpu.pfill, gl.STATIC_DRAW);
       }
-      this._maxRadius = maxRad;
+    }
 
-      this._catKeyToId = catKeyToId;
-      this._catKeys = catKeys;
+    // Upload instances [start, end) into the existing GPU buffers.
+    _uploadRange(start, end) {
+      const gl = this.gl;
+      const cpu = this._cpu;
+      const sub = (buf, arr, width) => {
+        if (!buf || !arr) return;
+        gl.bindBuffer(gl.ARRAY_BUFFER, buf);
+        gl.bufferSubData(gl.ARRAY_BUFFER, start * width * arr.BYTES_PER_ELEMENT, arr.subarray(start * width, end * width));
+      };
+      sub(this.buffers.pos, cpu.pos, 2);
+      sub(this.buffers.rad, cpu.rad, 1);
+      sub(this.buffers.id, cpu.ids, 1);
+      sub(this.buffers.vis, cpu.vis, 1);
+      sub(this.buffers.cat, cpu.cat, 1);
+      sub(this.buffers.shape, cpu.shape, 1);
+      sub(this.buffers.pstroke, cpu.pstroke, 4);
+      sub(this.buffers.pfill, cpu.pfill, 4);
+    }
+
+    setData(catalogData) {
+      const n = (catalogData && catalogData.length) ? catalogData.length : 0;
+      this.count = 0;
+      this._cpu = null;
+      this._maxRadius = 0;
+      // Build per-catalog id mapping (small)
+      this._catKeyToId = new Map();
+      this._catKeys = [];
+      if (!n) return;
+
+      this._usePerPointColor = this._detectPerPointColor(catalogData, 0, n);
+      this._allocCpu(n);
+      this._writeRecords(catalogData, 0, n);
+      this.count = n;
+      this._uploadAll();
       // Update style textures now that we have the mapping
       try { this.updateStyleTexturesFromOverlayData(catalogData); } catch (_) {}
     }
 
+    // Incremental update: catalogData[0..start) is what the renderer already holds; only the
+    // records from `start` on are encoded and uploaded. Buffers grow geometrically, so streaming
+    // viewport detail costs O(new records) per append.
+    appendData(catalogData, start) {
+      const n = (catalogData && catalogData.length) ? catalogData.length : 0;
+      const from = start | 0;
+      if (!this._cpu || !this.count || from !== this.count || n < from) {
+        this.setData(catalogData);
+        return;
+      }
+      if (n === from) return;
+      // Per-point colors switched on by the new records: the existing buffers lack them.
+      if (!this._usePerPointColor && this._detectPerPointColor(catalogData, from, n)) {
+        this.setData(catalogData);
+        return;
+      }
+      const grow = n > this._cpu.capacity;
+      if (grow) this._allocCpu(Math.max(n, this._cpu.capacity * 2));
+      const keysBefore = this._catKeys.length;
+      this._writeRecords(catalogData, from, n);
+      this.count = n;
+      if (grow) this._uploadAll();
+      else this._uploadRange(from, n);
+      if (this._catKeys.length !== keysBefore) {
+        try { this.updateStyleTexturesFromOverlayData(catalogData); } catch (_) {}
+      }
+    }
+
     _bindAttribs(prog) {
       const gl = this.gl;
       const locPos = gl.getAttribLocation(prog, 'a_pos');
@@ -926,8 +1003,10 @@
       const gl = this.gl;
       if (!this.buffers || !this.buffers.vis) return;
       if (!mask || mask.length !== this.count) return;
+      // The buffer may be larger than count (append capacity); keep its size.
+      if (this._cpu) this._cpu.vis.set(mask);
       gl.bindBuffer(gl.ARRAY_BUFFER, this.buffers.vis);
-      gl.bufferData(gl.ARRAY_BUFFER, mask, gl.DYNAMIC_DRAW);
+      gl.bufferSubData(gl.ARRAY_BUFFER, 0, mask);
     }
 
     draw() {
@@ -2157,6 +2157,31 @@ function __columnsToAttachForOverlayStyles(styles) {
     return out;
 }
 
+// {row_indices, columns, values} as the JSON form of /catalog-column-values/ returns it. Text goes
+// through the same normalisation the server applies there (trimmed, T/F style flags as booleans).
+function __columnValuesFromColumnar(parsed) {
+    const rowColumn = parsed.columns.__row_index;
+    const n = rowColumn ? rowColumn.length : 0;
+    const out = { row_indices: [], columns: [], values: {} };
+    for (let i = 0; i < n; i++) out.row_indices.push(Number(rowColumn.values[i]));
+    const flag = (s) => {
+        const t = String(s).trim();
+        const u = t.toUpperCase();
+        if (u === 'T' || u === 'TRUE' || u === 'Y' || u === 'YES') return true;
+        if (u === 'F' || u === 'FALSE' || u === 'N' || u === 'NO') return false;
+        return t;
+    };
+    for (const col of Object.values(parsed.columns)) {
+        if (col.name === '__row_index') continue;
+        if (col.dictionary) col.dictionary = col.dictionary.map(flag);
+        const vals = new Array(n);
+        for (let i = 0; i < n; i++) vals[i] = columnarValue(col, i);
+        out.columns.push(col.name);
+        out.values[col.name] = vals;
+    }
+    return out;
+}
+
 async function __attachColumnValuesToRawRecords(catalogApiName, records, columns) {
     const cols = Array.isArray(columns) ? columns.map(String).filter(Boolean) : [String(columns || '')].filter(Boolean);
     if (!catalogApiName || !Array.isArray(records) || !records.length || !cols.length) return;
@@ -2188,12 +2213,13 @@ async function __attachColumnValuesToRawRecords(catalogApiName, records, columns
         const resp = await apiFetch('/catalog-column-values/', {
             method: 'POST',
             headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({ catalog_name: apiName, row_indices: chunkIdxs, columns: missingCols })
+            body: JSON.stringify({ catalog_name: apiName, row_indices: chunkIdxs, columns: missingCols, format: 'columnar' })
         });
-        const data = await resp.json();
         if (!resp.ok) {
-            throw new Error((data && (data.detail || data.error)) ? (data.detail || data.error) : `Failed to fetch column values (HTTP ${resp.status})`);
+            const err = await resp.json().catch(() => null);
+            throw new Error((err && (err.detail || err.error)) ? (err.detail || err.error) : `Failed to fetch column values (HTTP ${resp.status})`);
         }
+        const data = __columnValuesFromColumnar(parseColumnarCatalog(await resp.arrayBuffer()));
 
         const outIdxs = Array.isArray(data.row_indices) ? data.row_indices : [];
         const outCols = Array.isArray(data.columns) ? data.columns : [];
@@ -3586,6 +3612,48 @@ async function refreshCatalogOverlaysAfterRgbFrameChange() {
 }
 try { window.refreshCatalogOverlaysAfterRgbFrameChange = refreshCatalogOverlaysAfterRgbFrameChange; } catch (_) {}
 
+/**
+ * Reload the overlays of a catalog the server reports as changed on disk (a 'catalog_updated'
+ * notice on the system-stats socket, re-dispatched by usage.js as 'catalog:updated').
+ */
+async function refreshCatalogOverlaysAfterSourceUpdate(evt) {
+    const info = evt && evt.detail;
+    if (!info || !info.filename) return;
+    _ensureCatalogOverlayStore();
+    const keys = Object.keys(window.catalogOverlaysByCatalog || {}).filter((k) => {
+        const base = String(k).split('/').pop().split('\\').pop();
+        return base === info.filename && Array.isArray(window.catalogOverlaysByCatalog[k]);
+    });
+    if (!keys.length) return;
+    const prevName = window.currentCatalogName;
+    let prevActive = null;
+    try { prevActive = typeof activeCatalog !== 'undefined' ? activeCatalog : null; } catch (_) { prevActive = null; }
+    for (let i = 0; i < keys.length; i += 1) {
+        try {
+            await loadCatalogBinaryAsync(keys[i], resolveStylesForCatalogKey(keys[i]), { quiet: true, skipCatalogRename: true });
+        } catch (e) {
+            try { console.warn('[refreshCatalogOverlaysAfterSourceUpdate] reload failed', keys[i], e); } catch (_) {}
+        }
+    }
+    try {
+        if (prevName != null) window.currentCatalogName = prevName;
+    } catch (_) {}
+    try {
+        if (prevActive != null) activeCatalog = prevActive;
+    } catch (_) {}
+    const added = Number(info.appended_rows || 0);
+    showNotification(added > 0
+        ? `${info.filename}: ${added.toLocaleString()} new rows`
+        : `${info.filename} was updated`, 3000, 'info');
+}
+try {
+    // Panes share the top window's socket, so listen there as well.
+    const catalogUpdateTarget = (window.top && window.top !== window) ? window.top : window;
+    catalogUpdateTarget.addEventListener('catalog:updated', refreshCatalogOverlaysAfterSourceUpdate);
+} catch (_) {
+    window.addEventListener('catalog:updated', refreshCatalogOverlaysAfterSourceUpdate);
+}
+
 // Binary catalog loader with fast parsing (async core + thin wrapper for backward compatibility)
 async function loadCatalogBinaryAsync(catalogName, styles = null, options = null) {
     const opts = options && typeof options === 'object' ? options : {};
@@ -3684,6 +3752,14 @@ async function loadCatalogBinaryAsync(catalogName, styles = null, options = null
         if (sid && !urlParams.has('sid')) urlParams.set('sid', sid);
     } catch (_) {}
 
+    // Query without the viewport, reused for the level-of-detail follow-up requests.
+    const lodBaseQuery = urlParams.toString();
+    const lodView = _catalogLodViewParams();
+    if (lodView) {
+        urlParams.set('view', lodView.rect.map((n) => n.toFixed(1)).join(','));
+        urlParams.set('zoom', String(lodView.zoom));
+    }
+
     const finalQuery = urlParams.toString();
     const finalUrl = `/catalog-binary/${encodeURIComponent(catalogNameForApi)}${finalQuery ? `?${finalQuery}` : ''}`;
 
@@ -3730,7 +3806,9 @@ async function loadCatalogBinaryAsync(catalogName, styles = null, options = null
     console.log('[loadCatalogBinary] Header from primary endpoint:', catalogData && catalogData.header);
     console.log(`[loadCatalogBinary] Parsed ${catalogData.records.length} objects from binary data (primary).`);
 
-    if (!catalogData.records || catalogData.records.length === 0) {
+    // An empty level-of-detail response just means the current view holds no sources.
+    const lodResponse = !!(catalogData && catalogData.header && catalogData.header.lod);
+    if ((!catalogData.records || catalogData.records.length === 0) && !lodResponse) {
         console.warn('[loadCatalogBinary] Primary endpoint returned 0 records. Falling back to /catalog-binary-raw ...');
         try {
             const rawResp = await apiFetch(`/catalog-binary-raw/${encodeURIComponent(catalogNameForApi)}${finalQuery ? `?${finalQuery}` : ''}`, {
@@ -3756,7 +3834,7 @@ async function loadCatalogBinaryAsync(catalogName, styles = null, options = null
         window.catalogDataWithFlagsName = activeName;
     } catch (_) { window.catalogDataWithFlagsName = null; }
 
-    if (!catalogData.records || catalogData.records.length === 0) {
+    if ((!catalogData.records || catalogData.records.length === 0) && !lodResponse) {
         console.error('[loadCatalogBinary] No records even after fallback. Header was:', catalogData && catalogData.header);
         throw new Error('No catalog data found or invalid format.');
     }
@@ -3775,6 +3853,7 @@ async function loadCatalogBinaryAsync(catalogName, styles = null, options = null
     const key = _catalogKey(catalogName);
     window.catalogOverlaysByCatalog[key] = prepareCatalogOverlayData(catalogData.records, styles, key);
     rebuildCombinedCatalogOverlay();
+    _catalogLodRegister(key, lodBaseQuery, extraHeadersBin, styles, catalogData.header, catalogData.records);
 
     console.log('[loadCatalogBinary] Prepared overlay data with styles. Sample object:',
         window.catalogOverlaysByCatalog[key]?.[0]);
@@ -3805,6 +3884,280 @@ async function loadCatalogBinaryAsync(catalogName, styles = null, options = null
     }
 }
 
+// --- Server-rendered catalog tiles ---
+// For catalogs too dense to draw marker by marker, the server rasterizes density or marker
+// tiles on the image pyramid (/catalog-tile/); the viewer composites them as one more tiled image.
+async function addCatalogTileLayer(catalogName, options = null) {
+    const opts = options && typeof options === 'object' ? options : {};
+    const v = window.viewer || window.tiledViewer;
+    if (!v || !v.world || typeof v.addTiledImage !== 'function') throw new Error('Viewer is not ready');
+    const key = _catalogKey(catalogName);
+    const apiName = key.split('/').pop();
+    removeCatalogTileLayer(key);
+
+    const colParams = new URLSearchParams();
+    if (opts.raColumn) colParams.set('ra_col', opts.raColumn);
+    if (opts.decColumn) colParams.set('dec_col', opts.decColumn);
+    const infoResp = await apiFetch(`/catalog-tile-info/${encodeURIComponent(apiName)}${colParams.toString() ? `?${colParams.toString()}` : ''}`);
+    if (!infoResp.ok) throw new Error(`Failed to load catalog tile info: ${infoResp.statusText}`);
+    const info = await infoResp.json();
+
+    const params = new URLSearchParams(colParams);
+    params.set('catalog_name', apiName);
+    params.set('mode', opts.mode === 'markers' ? 'markers' : 'density');
+    const passThrough = {
+        colormap: opts.colorMapName, color: opts.borderColor, color_col: opts.colorCodeColumn,
+        vmin: opts.vmin, vmax: opts.vmax, size_col: opts.sizeColumn, size_unit: opts.sizeUnit,
+        opacity: opts.opacity, fill_opacity: opts.fillOpacity, line_width: opts.borderWidth,
+        priority_col: opts.priorityColumn, priority_order: opts.priorityOrder
+    };
+    Object.keys(passThrough).forEach((k) => {
+        const val = passThrough[k];
+        if (val !== undefined && val !== null && val !== '') params.set(k, String(val));
+    });
+    try {
+        const sp = new URLSearchParams(window.location.search || '');
+        const sid = window.__forcedSid || sp.get('sid') || sp.get('pane_sid') ||
+            (typeof sessionStorage !== 'undefined' ? sessionStorage.getItem('sid') : null);
+        if (sid) params.set('sid', sid);
+    } catch (_) {}
+    params.set('v', info.version || '');
+    const query = params.toString();
+
+    const base = v.world.getItemAt(0);
+    const bounds = base && typeof base.getBounds === 'function' ? base.getBounds() : null;
+    const tileSource = {
+        width: info.width,
+        height: info.height,
+        tileSize: info.tileSize,
+        maxLevel: info.maxLevel,
+        minLevel: info.minLevel || 0,
+        getTileUrl: function(level, x, y) {
+            return `/catalog-tile/${level}/${x}/${y}?${query}`;
+        }
+    };
+    return new Promise((resolve, reject) => {
+        v.addTiledImage({
+            tileSource,
+            x: bounds ? bounds.x : 0,
+            y: bounds ? bounds.y : 0,
+            width: bounds ? bounds.width : 1,
+            opacity: 1,
+            success: (event) => {
+                if (!window.__catalogTileLayers || typeof window.__catalogTileLayers !== 'object') window.__catalogTileLayers = {};
+                window.__catalogTileLayers[key] = event.item;
+                resolve(event.item);
+            },
+            error: (event) => reject(new Error((event && event.message) || 'Failed to add catalog tile layer'))
+        });
+    });
+}
+
+function removeCatalogTileLayer(catalogName) {
+    const layers = window.__catalogTileLayers || {};
+    const key = _catalogKey(catalogName);
+    const item = layers[key];
+    if (!item) return false;
+    delete layers[key];
+    try {
+        const v = window.viewer || window.tiledViewer;
+        if (v && v.world) v.world.removeItem(item);
+    } catch (_) {}
+    return true;
+}
+try {
+    window.addCatalogTileLayer = addCatalogTileLayer;
+    window.removeCatalogTileLayer = removeCatalogTileLayer;
+} catch (_) {}
+
+// --- Viewport level-of-detail streaming ---
+// Large catalogs are requested for the current view only, thinned to a few sources per screen
+// cell (see /catalog-binary/ view/zoom). When the user pans or zooms in, only the sources the
+// server adds for the new view are fetched and appended to the existing overlay.
+const CATALOG_LOD_VIEW_MARGIN = 0.1; // fraction of the view added on each side
+const CATALOG_LOD_DEBOUNCE_MS = 250;
+
+function _catalogLodViewParams() {
+    if (window.catalogLodEnabled === false) return null;
+    try {
+        const v = window.viewer || window.tiledViewer;
+        const timg = v && v.world && v.world.getItemAt ? v.world.getItemAt(0) : null;
+        if (!timg || !v.viewport) return null;
+        const rect = timg.viewportToImageRectangle(v.viewport.getBounds(true));
+        const zoom = timg.viewportToImageZoom(v.viewport.getZoom(true));
+        if (!rect || !Number.isFinite(rect.width) || !Number.isFinite(zoom) || zoom <= 0) return null;
+        const mx = rect.width * CATALOG_LOD_VIEW_MARGIN;
+        const my = rect.height * CATALOG_LOD_VIEW_MARGIN;
+        return {
+            rect: [rect.x - mx, rect.y - my, rect.x + rect.width + mx, rect.y + rect.height + my],
+            zoom
+        };
+    } catch (_) {
+        return null;
+    }
+}
+
+function _catalogLodRectContains(outer, inner) {
+    return outer[0] <= inner[0] && outer[1] <= inner[1] && outer[2] >= inner[2] && outer[3] >= inner[3];
+}
+
+function _catalogLodRegister(key, baseQuery, headers, styles, header, records) {
+    if (!window.__catalogLodState || typeof window.__catalogLodState !== 'object') window.__catalogLodState = {};
+    const lod = header && header.lod;
+    if (!lod || lod.whole_frame) {
+        delete window.__catalogLodState[key];
+        return;
+    }
+    const loaded = new Set();
+    for (let i = 0; i < records.length; i += 1) {
+        const ri = records[i] && records[i].__row_index;
+        if (ri != null) loaded.add(ri);
+    }
+    window.__catalogLodState[key] = {
+        baseQuery,
+        headers,
+        styles,
+        loaded,
+        cellPx: Number(lod.cell_px) || 32,
+        fetched: [{ rect: lod.view, level: lod.level, complete: !!lod.complete }],
+        pending: false
+    };
+    _catalogLodAttachViewer();
+}
+
+function _catalogLodAttachViewer() {
+    const v = window.viewer || window.tiledViewer;
+    if (!v || v.__catalogLodHandler || typeof v.addHandler !== 'function') return;
+    let timer = null;
+    v.__catalogLodHandler = () => {
+        if (timer) clearTimeout(timer);
+        timer = setTimeout(() => {
+            timer = null;
+            _catalogLodRefresh().catch((e) => console.warn('[catalogLod] refresh failed', e));
+        }, CATALOG_LOD_DEBOUNCE_MS);
+    };
+    v.addHandler('animation-finish', v.__catalogLodHandler);
+}
+
+async function _catalogLodRefresh() {
+    const states = window.__catalogLodState || {};
+    const keys = Object.keys(states);
+    if (!keys.length) return;
+    const vp = _catalogLodViewParams();
+    if (!vp) return;
+    for (let i = 0; i < keys.length; i += 1) {
+        const key = keys[i];
+        const st = states[key];
+        if (!st || st.pending) continue;
+        if (!window.catalogOverlaysByCatalog || !Array.isArray(window.catalogOverlaysByCatalog[key])) {
+            delete states[key];
+            continue;
+        }
+        const level = -Math.ceil(Math.log2(st.cellPx / vp.zoom));
+        // The server nests levels, so anything already fetched at >= this level covers the view.
+        let since = null;
+        let covered = false;
+        for (const f of st.fetched) {
+            if (!_catalogLodRectContains(f.rect, vp.rect)) continue;
+            if (f.complete || f.level >= level) { covered = true; break; }
+            since = (since == null) ? f.level : Math.max(since, f.level);
+        }
+        if (covered) continue;
+
+        const params = new URLSearchParams(st.baseQuery);
+        params.set('view', vp.rect.map((n) => n.toFixed(1)).join(','));
+        params.set('zoom', String(vp.zoom));
+        if (since != null) params.set('since_level', String(since));
+        const name = key.split('/').pop();
+        st.pending = true;
+        try {
+            const resp = await apiFetch(`/catalog-binary/${encodeURIComponent(name)}?${params.toString()}`, {
+                method: 'GET',
+                headers: { ...st.headers }
+            });
+            if (!resp.ok) throw new Error(`${resp.status} ${resp.statusText}`);
+            const parsed = parseBinaryCatalog(await resp.arrayBuffer());
+            const lod = parsed.header && parsed.header.lod;
+            if (window.__catalogLodState[key] !== st) continue; // catalog reloaded or removed meanwhile
+            const fresh = [];
+            for (const r of parsed.records) {
+                const ri = r.__row_index;
+                if (ri == null || st.loaded.has(ri)) continue;
+                st.loaded.add(ri);
+                fresh.push(r);
+            }
+            if (lod) st.fetched.push({ rect: lod.view, level: lod.level, complete: !!lod.complete });
+            if (fresh.length) {
+                try {
+                    const colsAttach = __columnsToAttachForOverlayStyles(st.styles);
+                    if (colsAttach.length) await __attachColumnValuesToRawRecords(name, fresh, colsAttach);
+                } catch (_) {}
+                appendCatalogOverlayRecords(key, fresh, st.styles);
+            }
+        } finally {
+            st.pending = false;
+        }
+    }
+}
+
+/**
+ * Append records to an already loaded catalog overlay without rebuilding it. The combined
+ * overlay array is extended in place so the WebGL renderer only uploads the new tail.
+ */
+function appendCatalogOverlayRecords(key, records, styles) {
+    _ensureCatalogOverlayStore();
+    const current = window.catalogOverlaysByCatalog[key];
+    if (!Array.isArray(current) || !records || !records.length) return 0;
+    if (styles && styles.colorCodeColumn) {
+        // The color scale depends on every record; re-style the catalog as a whole.
+        window.catalogOverlaysByCatalog[key] = prepareCatalogOverlayData(current.concat(records), styles, key);
+        rebuildCombinedCatalogOverlay();
+    } else {
+        const start = current.length;
+        const prepared = prepareCatalogOverlayData(records, styles, key);
+        for (let i = 0; i < prepared.length; i += 1) {
+            prepared[i].index = start + i;
+            current.push(prepared[i]);
+        }
+        const combined = window.catalogDataForOverlay;
+        const keys = Object.keys(window.catalogOverlaysByCatalog);
+        const visible = keys.filter((k) => !window.catalogVisibilityByCatalog || window.catalogVisibilityByCatalog[k] !== false);
+        // Fast path: this catalog is the last visible one, so its records are the tail of the combined array.
+        if (Array.isArray(combined) && visible.length && visible[visible.length - 1] === key) {
+            const grid = window.__catalogSpatialGrid;
+            for (let i = 0; i < prepared.length; i += 1) {
+                const s = prepared[i];
+                const idx = combined.length;
+                s.__overlay_index = idx;
+                s.sourceIndex = idx;
+                combined.push(s);
+                if (grid && grid.cells) {
+                    const x = Number.isFinite(s.x) ? s.x : s.x_pixels;
+                    const y = Number.isFinite(s.y) ? s.y : s.y_pixels;
+                    if (!Number.isFinite(x) || !Number.isFinite(y)) continue;
+                    const gk = `${Math.floor(x / grid.cellSize)},${Math.floor(y / grid.cellSize)}`;
+                    const cell = grid.cells.get(gk);
+                    if (cell) cell.push(idx);
+                    else grid.cells.set(gk, [idx]);
+                    s.__gridKey = gk;
+                }
+            }
+        } else {
+            rebuildCombinedCatalogOverlay();
+        }
+    }
+    try {
+        // The overlay may not exist yet if the initial view held no sources.
+        if (!window.catalogCanvas && typeof canvasAddCatalogOverlay === 'function') {
+            canvasAddCatalogOverlay(window.catalogDataForOverlay);
+        } else if (typeof canvasUpdateOverlay === 'function') {
+            canvasUpdateOverlay();
+        }
+    } catch (_) {}
+    return records.length;
+}
+try { window.appendCatalogOverlayRecords = appendCatalogOverlayRecords; } catch (_) {}
+
 function loadCatalogBinary(catalogName, styles = null, options = null) {
     return loadCatalogBinaryAsync(catalogName, styles, options).catch((error) => {
         console.error('[loadCatalogBinary] Error loading catalog:', error);
@@ -3818,6 +4171,72 @@ function loadCatalogBinary(catalogName, styles = null, options = null) {
 }
 try { window.loadCatalogBinaryAsync = loadCatalogBinaryAsync; } catch (_) {}
 
+// Columnar payloads (/catalog-binary/?layout=columnar, /catalog-column-values/ with format 'columnar'):
+// the header lists one 8-byte aligned little-endian array per column, so each one is wrapped as a
+// typed-array view over the response buffer instead of being parsed.
+const COLUMNAR_ARRAY_TYPES = {
+    bool: Uint8Array, int8: Int8Array, uint8: Uint8Array, int16: Int16Array, uint16: Uint16Array,
+    int32: Int32Array, uint32: Uint32Array, int64: BigInt64Array, uint64: BigUint64Array,
+    float32: Float32Array, float64: Float64Array
+};
+
+function parseColumnarCatalog(arrayBuffer) {
+    const headerLength = new DataView(arrayBuffer).getUint32(0, true);
+    const header = JSON.parse(new TextDecoder().decode(new Uint8Array(arrayBuffer, 4, headerLength)));
+    const body = 4 + headerLength;
+    const columns = {};
+    for (const spec of (header.columns || [])) {
+        const Type = COLUMNAR_ARRAY_TYPES[spec.dtype];
+        if (!Type) throw new Error(`Unsupported column dtype: ${spec.dtype}`);
+        const width = (spec.shape || []).reduce((a, b) => a * b, 1);
+        columns[spec.name] = {
+            name: spec.name,
+            dtype: spec.dtype,
+            length: spec.length,
+            width,
+            values: new Type(arrayBuffer, body + spec.offset, spec.length * width),
+            validity: spec.validity == null ? null : new Uint8Array(arrayBuffer, body + spec.validity, Math.ceil(spec.length / 8)),
+            dictionary: spec.dictionary || null
+        };
+    }
+    return { header, columns };
+}
+
+// Value of row i as the JSON paths would send it: null for masked cells and NaN/Inf, strings for text.
+function columnarValue(column, i) {
+    if (column.validity && !(column.validity[i >> 3] & (1 << (i & 7)))) return null;
+    const scalar = (v) => {
+        if (typeof v === 'bigint') return Number(v);
+        if (column.dictionary) return column.dictionary[v];
+        if (column.dtype === 'bool') return v !== 0;
+        return Number.isFinite(v) ? v : null;
+    };
+    if (column.width !== 1) {
+        return Array.from(column.values.subarray(i * column.width, (i + 1) * column.width), scalar);
+    }
+    return scalar(column.values[i]);
+}
+
+// Record objects (as parseBinaryCatalog returns for the record layout) from a columnar payload.
+function columnarRecords(parsed) {
+    const cols = Object.values(parsed.columns);
+    const n = parsed.header.num_records || (cols.length ? cols[0].length : 0);
+    const positional = new Set(['ra', 'dec', 'x_pixels', 'y_pixels', 'radius_pixels']);
+    const records = new Array(n);
+    for (let i = 0; i < n; i++) {
+        const record = {};
+        for (const col of cols) {
+            record[col.name] = positional.has(col.name) ? col.values[i] : columnarValue(col, i);
+        }
+        records[i] = record;
+    }
+    return records;
+}
+try {
+    window.parseColumnarCatalog = parseColumnarCatalog;
+    window.columnarValue = columnarValue;
+} catch (_) {}
+
 // Parse binary catalog format
 function parseBinaryCatalog(arrayBuffer) {
     function sanitizeNonStandardNumbers(s) {
@@ -3888,6 +4307,10 @@ function parseBinaryCatalog(arrayBuffer) {
     offset += headerLength;
     
     console.log('[parseBinaryCatalog] Header:', header);
+    if (header.layout === 'columnar') {
+        const parsed = parseColumnarCatalog(arrayBuffer);
+        return { header: parsed.header, records: columnarRecords(parsed), columns: parsed.columns };
+    }
     
     // Parse records
     const records = [];
@@ -5971,8 +6394,7 @@ async function uploadCatalog() {
         }
 
         const file = this.files[0];
-        const formData = new FormData();
-        formData.append('file', file);
+        const uploadId = `${Date.now().toString(36)}${Math.random().toString(36).slice(2, 8)}`;
 
         showNotification(true, 'Uploading catalog...');
 
@@ -5995,14 +6417,25 @@ async function uploadCatalog() {
                 if (progressEta) progressEta.textContent = `${Math.round(p)}%`;
             };
 
+            // The server parses the catalog as it arrives and reports over the system-stats
+            // websocket; once the bytes are sent, show its indexing progress instead.
+            const onIngest = (evt) => {
+                const info = evt && evt.detail;
+                if (!info || info.upload_id !== uploadId || info.stage !== 'indexing') return;
+                if (progressEta) progressEta.textContent = info.rows ? `Indexing ${Number(info.rows).toLocaleString()} rows` : 'Indexing...';
+            };
+            window.addEventListener('catalog:ingest', onIngest);
+
             const xhr = new XMLHttpRequest();
-            xhr.open('POST', '/upload-catalog/', true);
+            xhr.open('POST', `/upload-catalog/?filename=${encodeURIComponent(file.name)}&upload_id=${uploadId}`, true);
             if (sid) xhr.setRequestHeader('X-Session-ID', sid);
+            xhr.setRequestHeader('Content-Type', 'application/octet-stream');
             xhr.upload.onprogress = (evt) => {
                 if (evt.lengthComputable) updateCircleProgress((evt.loaded / Math.max(1, evt.total)) * 100);
             };
             xhr.onreadystatechange = () => {
                 if (xhr.readyState !== 4) return;
+                window.removeEventListener('catalog:ingest', onIngest);
                 try {
                     if (xhr.status >= 200 && xhr.status < 300) {
                         const result = JSON.parse(xhr.responseText || '{}');
@@ -6029,7 +6462,7 @@ async function uploadCatalog() {
             };
             showCircleProgress(true);
             updateCircleProgress(0);
-            xhr.send(formData);
+            xhr.send(file);
 
         } catch (error) {
             console.error('Error uploading catalog:', error);
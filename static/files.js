@@ -377,19 +377,19 @@ function uploadFitsToServer(fileData, filename) {
         try {
             const sid = await ensureSession();
 
-            const formData = new FormData();
             const blob = (fileData instanceof Blob)
                 ? fileData
                 : new Blob([fileData], { type: 'application/octet-stream' });
-            formData.append('file', blob, filename);
 
             // Show 0% on the existing progress UI
             const startTime = Date.now();
             try { updateProgressCircle(0, 0, blob.size || 0, startTime); } catch (_) {}
 
             const xhr = new XMLHttpRequest();
-            xhr.open('POST', '/upload-fits/', true);
+            // Send the raw file so the server writes it to disk as it arrives
+            xhr.open('POST', `/upload-fits/?filename=${encodeURIComponent(filename || 'upload.fits')}`, true);
             if (sid) xhr.setRequestHeader('X-Session-ID', sid);
+            xhr.setRequestHeader('Content-Type', 'application/octet-stream');
 
             xhr.upload.onprogress = function (event) {
                 if (event.lengthComputable) {
@@ -418,7 +418,7 @@ function uploadFitsToServer(fileData, filename) {
                 return reject(new Error('Network error during upload'));
             };
 
-            xhr.send(formData);
+            xhr.send(blob);
         } catch (e) {
             try { updateProgressCircle(null); } catch (_) {}
             reject(e);
@@ -134,209 +134,195 @@ function generateHistogram() {
         window.activeCatalog ||
         (typeof activeCatalog !== 'undefined' ? activeCatalog : null);
 
-    // Use the existing data only if it matches the current catalog
-    if (window.sourcePropertiesData && window.sourcePropertiesData.length > 0 && window.sourcePropertiesCatalogName === catalogToUse) {
-        // Process the existing data
-        processHistogramData(
-            plotArea, 
-            window.sourcePropertiesData, 
-            xAxisName, 
-            {
-                title: plotTitle,
-                xLabel: xLabel,
-                yLabel: yLabel,
-                xScale: xScale,
-                yScale: yScale,
-                xMin: xMin,
-                xMax: xMax,
-                yMin: yMin,
-                yMax: yMax,
-                autoLimits: autoLimits,
-                numBins: numBins,
-                barColor: barColor,
-                normalization: normalization
-            }
-        );
-        return;
-    }
+    // Text columns (and anything else the server cannot bin) fall back to sampled objects
+    const plotSampledHistogram = () => {
+        // Use the existing data only if it matches the current catalog
+        if (window.sourcePropertiesData && window.sourcePropertiesData.length > 0 && window.sourcePropertiesCatalogName === catalogToUse) {
+            // Process the existing data
+            processHistogramData(
+                plotArea, 
+                window.sourcePropertiesData, 
+                xAxisName, 
+                {
+                    title: plotTitle,
+                    xLabel: xLabel,
+                    yLabel: yLabel,
+                    xScale: xScale,
+                    yScale: yScale,
+                    xMin: xMin,
+                    xMax: xMax,
+                    yMin: yMin,
+                    yMax: yMax,
+                    autoLimits: autoLimits,
+                    numBins: numBins,
+                    barColor: barColor,
+                    normalization: normalization
+                }
+            );
+            return;
+        }
     
-    // If we don't have data already or cache is for another catalog, load it
-    if (!catalogToUse) {
-        // Clear loading container and show error message
-        plotArea.innerHTML = '';
+        // If we don't have data already or cache is for another catalog, load it
+        if (!catalogToUse) {
+            // Clear loading container and show error message
+            plotArea.innerHTML = '';
         
-        const errorMessage = document.createElement('div');
-        errorMessage.textContent = 'No catalog selected. Please select a catalog first.';
-        errorMessage.style.color = '#aaa';
-        errorMessage.style.textAlign = 'center';
-        errorMessage.style.width = '100%';
-        errorMessage.style.height = '100%';
-        errorMessage.style.display = 'flex';
-        errorMessage.style.alignItems = 'center';
-        errorMessage.style.justifyContent = 'center';
-        
-        plotArea.appendChild(errorMessage);
-        return;
-    }
+            const errorMessage = document.createElement('div');
+            errorMessage.textContent = 'No catalog selected. Please select a catalog first.';
+            errorMessage.style.color = '#aaa';
+            errorMessage.style.textAlign = 'center';
+            errorMessage.style.width = '100%';
+            errorMessage.style.height = '100%';
+            errorMessage.style.display = 'flex';
+            errorMessage.style.alignItems = 'center';
+            errorMessage.style.justifyContent = 'center';
+        
+            plotArea.appendChild(errorMessage);
+            return;
+        }
     
-    // Use either the selected catalog or active catalog
+        // Use either the selected catalog or active catalog
     
-    // Update loading message
-    loadingText.textContent = 'Loading catalog data...';
-    
-    // Load the catalog data (pass RA/DEC overrides if available)
-    {
-        const urlParams = new URLSearchParams();
-        // Try persisted overrides by several keys: raw name and API basename
-        const apiName = (catalogToUse || '').toString().split('/').pop().split('\\').pop();
-        const persisted = (window.catalogOverridesByCatalog && (
-            window.catalogOverridesByCatalog[catalogToUse] ||
-            window.catalogOverridesByCatalog[apiName]
-        )) || null;
-        const raCol = persisted && persisted.ra_col ? persisted.ra_col : 'ra';
-        const decCol = persisted && persisted.dec_col ? persisted.dec_col : 'dec';
-        const sizeCol = persisted && persisted.size_col ? persisted.size_col : null;
-        if (raCol) urlParams.set('ra_col', raCol);
-        if (decCol) urlParams.set('dec_col', decCol);
-        if (sizeCol) urlParams.set('size_col', sizeCol);
-        const headers = {};
-        if (raCol) headers['X-RA-Col'] = raCol;
-        if (decCol) headers['X-DEC-Col'] = decCol;
-        if (sizeCol) headers['X-Size-Col'] = sizeCol;
-        const suffix = urlParams.toString() ? `?${urlParams.toString()}` : '';
-        // Load the catalog data
-        console.log('[plotter] /plotter/load-catalog bootstrap URL:', `/plotter/load-catalog/${apiName}${suffix}`, 'headers:', headers);
-        apiFetch(`/plotter/load-catalog/${apiName}${suffix}`, { headers })
-        .then(response => {
-            if (!response.ok) {
-                throw new Error('Failed to load catalog');
-            }
-            return response.json();
-        })
-        .then(catalogData => {
-            if (!catalogData || catalogData.length === 0) {
-                throw new Error('No catalog data available');
-            }
+        // Update loading message
+        loadingText.textContent = 'Loading catalog data...';
+    
+        // Load the catalog data (pass RA/DEC overrides if available)
+        {
+            const urlParams = new URLSearchParams();
+            // Try persisted overrides by several keys: raw name and API basename
+            const apiName = (catalogToUse || '').toString().split('/').pop().split('\\').pop();
+            const persisted = (window.catalogOverridesByCatalog && (
+                window.catalogOverridesByCatalog[catalogToUse] ||
+                window.catalogOverridesByCatalog[apiName]
+            )) || null;
+            const raCol = persisted && persisted.ra_col ? persisted.ra_col : 'ra';
+            const decCol = persisted && persisted.dec_col ? persisted.dec_col : 'dec';
+            const sizeCol = persisted && persisted.size_col ? persisted.size_col : null;
+            if (raCol) urlParams.set('ra_col', raCol);
+            if (decCol) urlParams.set('dec_col', decCol);
+            if (sizeCol) urlParams.set('size_col', sizeCol);
+            const headers = {};
+            if (raCol) headers['X-RA-Col'] = raCol;
+            if (decCol) headers['X-DEC-Col'] = decCol;
+            if (sizeCol) headers['X-Size-Col'] = sizeCol;
+            const suffix = urlParams.toString() ? `?${urlParams.toString()}` : '';
+            // Load the catalog data
+            console.log('[plotter] /plotter/load-catalog bootstrap URL:', `/plotter/load-catalog/${apiName}${suffix}`, 'headers:', headers);
+            apiFetch(`/plotter/load-catalog/${apiName}${suffix}`, { headers })
+            .then(response => {
+                if (!response.ok) {
+                    throw new Error('Failed to load catalog');
+                }
+                return response.json();
+            })
+            .then(catalogData => {
+                if (!catalogData || catalogData.length === 0) {
+                    throw new Error('No catalog data available');
+                }
             
-            // Create an array to store all properties
-            const maxObjectsToProcess = 500; // Limit to prevent too many requests
+                // Create an array to store all properties
+                const maxObjectsToProcess = 500;
             
-            // If there are too many objects, sample them
-            let objectsToFetch = catalogData;
-            if (catalogData.length > maxObjectsToProcess) {
-                // Sample objects evenly
-                const step = Math.floor(catalogData.length / maxObjectsToProcess);
-                objectsToFetch = [];
-                for (let i = 0; i < catalogData.length; i += step) {
-                    objectsToFetch.push(catalogData[i]);
+                // If there are too many objects, sample them
+                let objectsToFetch = catalogData;
+                if (catalogData.length > maxObjectsToProcess) {
+                    // Sample objects evenly
+                    const step = Math.floor(catalogData.length / maxObjectsToProcess);
+                    objectsToFetch = [];
+                    for (let i = 0; i < catalogData.length; i += step) {
+                        objectsToFetch.push(catalogData[i]);
+                    }
                 }
-            }
-            
-            // Update loading text
-            loadingText.textContent = 'Loading data: 0%';
             
-            // Create an array of promises to fetch properties for each object
-            const fetchPromises = objectsToFetch.map((obj, index) => {
-                return new Promise((resolve, reject) => {
-                    // Add a small delay to prevent overwhelming the server
-                    setTimeout(() => {
-                        apiFetch(`/source-properties/?ra=${obj.ra}&dec=${obj.dec}&catalog_name=${catalogToUse}`)
-                            .then(async (response) => {
-                                if (response.status === 404) {
-                                    // No match within radius; skip quietly for histogram bootstrap.
-                                    return null;
-                                }
-                                if (!response.ok) {
-                                    throw new Error(`Failed to load properties for object ${index} (HTTP ${response.status})`);
-                                }
-                                return await response.json();
-                            })
-                            .then(data => {
-                                if (!data) {
-                                    resolve(null);
-                                    return;
-                                }
-                                if (data.error) {
-                                    throw new Error(data.error);
-                                }
-                                
-                                // Update loading indicator
-                                const progress = Math.round((index + 1) / objectsToFetch.length * 100);
-                                loadingText.textContent = `Loading data: ${progress}%`;
-                                
-                                // Add the original object reference for tooltip
-                                const properties = data.properties || {};
-                                properties._originalObj = obj;
-                                
-                                resolve(properties);
-                            })
-                            .catch(error => {
-                                console.error(`Error fetching properties for object ${index}:`, error);
-                                resolve(null); // Resolve with null to continue processing other objects
-                            });
-                    }, index * 10); // Small delay between requests
-                });
-            });
+                // Properties of every sampled object come back in one batch request
+                loadingText.textContent = 'Loading source properties...';
             
-            // Process all data once fetched
-            return Promise.all(fetchPromises)
-                .then(results => {
-                    // Filter out null results
-                    const validResults = results.filter(result => result !== null);
+                return fetchSampledSourceProperties(catalogToUse, objectsToFetch)
+                    .then(validResults => {
                     
-                    if (validResults.length === 0) {
-                        throw new Error('No valid data found');
-                    }
+                        if (validResults.length === 0) {
+                            throw new Error('No valid data found');
+                        }
                     
-                    // Store the data for future use
-                    window.sourcePropertiesData = validResults;
-                    try { window.sourcePropertiesCatalogName = catalogToUse; } catch(_) {}
+                        // Store the data for future use
+                        window.sourcePropertiesData = validResults;
+                        try { window.sourcePropertiesCatalogName = catalogToUse; } catch(_) {}
                     
-                    // Clear the loading container completely
-                    plotArea.innerHTML = '';
+                        // Clear the loading container completely
+                        plotArea.innerHTML = '';
                     
-                    // Process the data for histogram
-                    return processHistogramData(
-                        plotArea, 
-                        validResults, 
-                        xAxisName, 
-                        {
-                            title: plotTitle,
-                            xLabel: xLabel,
-                            yLabel: yLabel,
-                            xScale: xScale,
-                            yScale: yScale,
-                            xMin: xMin,
-                            xMax: xMax,
-                            yMin: yMin,
-                            yMax: yMax,
-                            autoLimits: autoLimits,
-                            numBins: numBins,
-                            barColor: barColor,
-                            normalization: normalization
-                        }
-                    );
-                });
-        })
-        .catch(error => {
-            console.error('Error loading catalog data:', error);
+                        // Process the data for histogram
+                        return processHistogramData(
+                            plotArea, 
+                            validResults, 
+                            xAxisName, 
+                            {
+                                title: plotTitle,
+                                xLabel: xLabel,
+                                yLabel: yLabel,
+                                xScale: xScale,
+                                yScale: yScale,
+                                xMin: xMin,
+                                xMax: xMax,
+                                yMin: yMin,
+                                yMax: yMax,
+                                autoLimits: autoLimits,
+                                numBins: numBins,
+                                barColor: barColor,
+                                normalization: normalization
+                            }
+                        );
+                    });
+            })
+            .catch(error => {
+                console.error('Error loading catalog data:', error);
             
-            // Clear loading container and show error message
-            plotArea.innerHTML = '';
+                // Clear loading container and show error message
+                plotArea.innerHTML = '';
             
-            const errorMessage = document.createElement('div');
-            errorMessage.textContent = `Error loading catalog data: ${error.message}`;
-            errorMessage.style.color = '#ff6b6b';
-            errorMessage.style.textAlign = 'center';
-            errorMessage.style.width = '100%';
-            errorMessage.style.height = '100%';
-            errorMessage.style.display = 'flex';
-            errorMessage.style.alignItems = 'center';
-            errorMessage.style.justifyContent = 'center';
+                const errorMessage = document.createElement('div');
+                errorMessage.textContent = `Error loading catalog data: ${error.message}`;
+                errorMessage.style.color = '#ff6b6b';
+                errorMessage.style.textAlign = 'center';
+                errorMessage.style.width = '100%';
+                errorMessage.style.height = '100%';
+                errorMessage.style.display = 'flex';
+                errorMessage.style.alignItems = 'center';
+                errorMessage.style.justifyContent = 'center';
             
-            plotArea.appendChild(errorMessage);
-        });
+                plotArea.appendChild(errorMessage);
+            });
+        }
+    };
+    
+    if (!catalogToUse) {
+        plotSampledHistogram();
+        return;
     }
+    // Numeric columns are binned on the server over every row of the catalog
+    fetchAggregatedHistogram(catalogToUse, xAxisName, { numBins, xScale, xMin, xMax }).then(binned => {
+        if (!binned) {
+            plotSampledHistogram();
+            return;
+        }
+        plotArea.innerHTML = '';
+        createHistogram(plotArea, [], xAxisName, new Map(), {
+            title: plotTitle,
+            xLabel: xLabel,
+            yLabel: yLabel,
+            xScale: xScale,
+            yScale: yScale,
+            xMin: xMin,
+            xMax: xMax,
+            yMin: yMin,
+            yMax: yMax,
+            autoLimits: autoLimits,
+            numBins: numBins,
+            barColor: barColor,
+            normalization: normalization,
+            binned: binned
+        });
+    });
 }
 
 // Process data for histogram
@@ -432,10 +418,16 @@ function createHistogram(plotArea, values, xAxisName, categoryMap, customization
         normalization = 'count'
     } = customizationOptions || {};
     
+    // Counts already binned on the server (/plotter/aggregate/, kind=hist1d) stand in for the values
+    const binned = (customizationOptions && customizationOptions.binned) || null;
+    
     // Ensure min and max are valid for logarithmic scales
     let min, max;
     
-    if (xScale === 'log') {
+    if (binned) {
+        min = binned.edges[0];
+        max = binned.edges[binned.edges.length - 1];
+    } else if (xScale === 'log') {
         // For log scale, filter out non-positive values
         const positiveValues = values.filter(v => v > 0);
         if (positiveValues.length === 0) {
@@ -451,11 +443,16 @@ function createHistogram(plotArea, values, xAxisName, categoryMap, customization
     }
     
     // Prepare bins and edges
-    const bins = Array(numBins).fill(0);
+    const bins = binned ? binned.counts.slice() : Array(numBins).fill(0);
     const binEdges = [];
     let binWidths = [];
     
-    if (xScale === 'log') {
+    if (binned) {
+        binned.edges.forEach((edge, i) => {
+            binEdges.push(edge);
+            if (i > 0) binWidths.push(edge - binned.edges[i - 1]);
+        });
+    } else if (xScale === 'log') {
         const logMin = Math.log10(min);
         const logMax = Math.log10(max);
         const logRange = logMax - logMin;
@@ -484,7 +481,7 @@ function createHistogram(plotArea, values, xAxisName, categoryMap, customization
             }
         });
     }
-    const totalValues = values.length;
+    const totalValues = binned ? bins.reduce((sum, count) => sum + count, 0) : values.length;
     
     // Normalize bin values based on the selected normalization type
     let normalizedBins = [...bins];
@@ -934,7 +931,10 @@ function createHistogram(plotArea, values, xAxisName, categoryMap, customization
     infoNote.style.fontSize = '11px';
     infoNote.style.textAlign = 'right';
     
-    let infoText = `${numBins} bins`;
+    let infoText = `${bins.length} bins`;
+    if (binned) {
+        infoText += `, ${totalValues.toLocaleString()} objects`;
+    }
     if (normalization !== 'count') {
         infoText += `, ${normalization} normalization`;
     }
@@ -3127,6 +3127,41 @@ function createPlotterContainer() {
     alphaDiv.appendChild(alphaSliderContainer);
     customizationSection.appendChild(alphaDiv);
     
+    // How scatter plots are drawn: binned on the server, or sampled objects
+    const renderModeDiv = document.createElement('div');
+    renderModeDiv.id = 'render-mode-div';
+    renderModeDiv.style.marginBottom = '15px';
+    
+    const renderModeLabel = document.createElement('label');
+    renderModeLabel.textContent = 'Plot As:';
+    renderModeLabel.htmlFor = 'plot-render-select';
+    renderModeLabel.style.display = 'block';
+    renderModeLabel.style.marginBottom = '5px';
+    renderModeDiv.appendChild(renderModeLabel);
+    
+    const renderModeSelect = document.createElement('select');
+    renderModeSelect.id = 'plot-render-select';
+    renderModeSelect.style.width = '100%';
+    renderModeSelect.style.padding = '8px';
+    renderModeSelect.style.backgroundColor = '#333';
+    renderModeSelect.style.color = 'white';
+    renderModeSelect.style.border = '1px solid #555';
+    renderModeSelect.style.borderRadius = '4px';
+    [
+        ['auto', 'Auto (binned when dense)'],
+        ['hist2d', 'Binned counts / means'],
+        ['hexbin', 'Hexagonal bins'],
+        ['density', 'Density contours'],
+        ['points', 'Sampled objects']
+    ].forEach(([value, text]) => {
+        const option = document.createElement('option');
+        option.value = value;
+        option.textContent = text;
+        renderModeSelect.appendChild(option);
+    });
+    renderModeDiv.appendChild(renderModeSelect);
+    customizationSection.appendChild(renderModeDiv);
+    
     // Histogram-specific controls
     const histogramControls = document.createElement('div');
     histogramControls.id = 'histogram-controls';
@@ -3738,6 +3773,7 @@ function updateScatterControlsVisibility(plotType) {
     const colormapPreview = document.getElementById('colormap-preview');
     const colorScaleContainer = document.getElementById('color-scale-container');
     const alphaDiv = document.getElementById('alpha-div');
+    const renderModeDiv = document.getElementById('render-mode-div');
     const histogramControls = document.getElementById('histogram-controls');
     const booleanFilterContainer = document.getElementById('boolean-filter-container');
     const generateButton = document.getElementById('generate-plot-button');
@@ -3764,6 +3800,7 @@ function updateScatterControlsVisibility(plotType) {
         if (colormapSelect) colormapSelect.parentElement.style.display = 'none';
         if (colorScaleContainer) colorScaleContainer.style.display = 'none';
         if (alphaDiv) alphaDiv.style.display = 'none';
+        if (renderModeDiv) renderModeDiv.style.display = 'none';
         if (histogramControls) histogramControls.style.display = 'block';
         if (generateButton) generateButton.textContent = 'Generate Histogram';
         if (booleanFilterContainer) booleanFilterContainer.style.display = 'none';
@@ -3790,6 +3827,7 @@ function updateScatterControlsVisibility(plotType) {
         if (colormapSelect) colormapSelect.parentElement.style.display = 'block';
         if (colorScaleContainer) colorScaleContainer.style.display = 'block';
         if (alphaDiv) alphaDiv.style.display = 'block';
+        if (renderModeDiv) renderModeDiv.style.display = 'block';
         if (histogramControls) histogramControls.style.display = 'none';
         if (generateButton) generateButton.textContent = 'Generate Plot';
         if (booleanFilterContainer) booleanFilterContainer.style.display = '';
@@ -4106,218 +4144,226 @@ function generatePlot() {
     loadingContainer.appendChild(loadingText);
     plotArea.appendChild(loadingContainer);
     
-    // Use existing data only if it matches the current catalog AND looks like real data for the chosen axes.
-    // (Avoid using the "columns-only" sample that is meant just for dropdowns.)
-    const canUseCache =
-        !!catalogToUse &&
-        Array.isArray(window.sourcePropertiesData) &&
-        window.sourcePropertiesData.length > 0 &&
-        window.sourcePropertiesCatalogName === catalogToUse &&
-        window.sourcePropertiesData.some(o =>
-            o &&
-            o._originalObj &&
-            o[xAxisName] != null &&
-            o[yAxisName] != null
-        );
-    if (canUseCache) {
-        processPlotData(
-            plotArea, 
-            window.sourcePropertiesData, 
-            xAxisName, 
-            yAxisName, 
-            {
-                title: plotTitle,
-                xLabel: xLabel,
-                yLabel: yLabel,
-                xScale: xScale,
-                yScale: yScale,
-                xMin: xMin,
-                xMax: xMax,
-                yMin: yMin,
-                yMax: yMax,
-                autoLimits: autoLimits,
-                pointAlpha: pointAlpha,
-                colorAxisName: colorAxisName,
-                colormap: colormap,
-                colorScale: colorScale,
-                colorMin: cMin, // Pass color min
-                colorMax: cMax  // Pass color max
-            }
-        );
-        return;
-    }
+    // Objects are sampled through /source-properties/batch/ when the server cannot bin the axes
+    // (text columns) or the user asked for them.
+    const plotSampledObjects = () => {
+        // Use existing data only if it matches the current catalog AND looks like real data for the chosen axes.
+        // (Avoid using the "columns-only" sample that is meant just for dropdowns.)
+        const canUseCache =
+            !!catalogToUse &&
+            Array.isArray(window.sourcePropertiesData) &&
+            window.sourcePropertiesData.length > 0 &&
+            window.sourcePropertiesCatalogName === catalogToUse &&
+            window.sourcePropertiesData.some(o =>
+                o &&
+                o._originalObj &&
+                o[xAxisName] != null &&
+                o[yAxisName] != null
+            );
+        if (canUseCache) {
+            processPlotData(
+                plotArea, 
+                window.sourcePropertiesData, 
+                xAxisName, 
+                yAxisName, 
+                {
+                    title: plotTitle,
+                    xLabel: xLabel,
+                    yLabel: yLabel,
+                    xScale: xScale,
+                    yScale: yScale,
+                    xMin: xMin,
+                    xMax: xMax,
+                    yMin: yMin,
+                    yMax: yMax,
+                    autoLimits: autoLimits,
+                    pointAlpha: pointAlpha,
+                    colorAxisName: colorAxisName,
+                    colormap: colormap,
+                    colorScale: colorScale,
+                    colorMin: cMin, // Pass color min
+                    colorMax: cMax  // Pass color max
+                }
+            );
+            return;
+        }
     
-    // Load data from catalog if not available (or cache for different catalog)
-    if (!catalogToUse) {
-        plotArea.innerHTML = '';
-        const errorMessage = document.createElement('div');
-        errorMessage.textContent = 'No catalog selected. Please select a catalog first.';
-        errorMessage.style.color = '#aaa';
-        errorMessage.style.textAlign = 'center';
-        errorMessage.style.width = '100%';
-        errorMessage.style.height = '100%';
-        errorMessage.style.display = 'flex';
-        errorMessage.style.alignItems = 'center';
-        errorMessage.style.justifyContent = 'center';
-        plotArea.appendChild(errorMessage);
-        return;
-    }
+        // Load data from catalog if not available (or cache for different catalog)
+        if (!catalogToUse) {
+            plotArea.innerHTML = '';
+            const errorMessage = document.createElement('div');
+            errorMessage.textContent = 'No catalog selected. Please select a catalog first.';
+            errorMessage.style.color = '#aaa';
+            errorMessage.style.textAlign = 'center';
+            errorMessage.style.width = '100%';
+            errorMessage.style.height = '100%';
+            errorMessage.style.display = 'flex';
+            errorMessage.style.alignItems = 'center';
+            errorMessage.style.justifyContent = 'center';
+            plotArea.appendChild(errorMessage);
+            return;
+        }
     
-    loadingText.textContent = 'Loading catalog data...';
-    
-    // Load catalog data and process (ensure RA/DEC overrides are sent)
-    {
-        const apiName = (catalogToUse || '').toString().split('/').pop().split('\\').pop();
-        const persisted = (window.catalogOverridesByCatalog && (
-            window.catalogOverridesByCatalog[catalogToUse] ||
-            window.catalogOverridesByCatalog[apiName]
-        )) || null;
-        // Only use persisted overrides; do NOT default to 'ra'/'dec'
-        const raCol = persisted && persisted.ra_col ? persisted.ra_col : null;
-        const decCol = persisted && persisted.dec_col ? persisted.dec_col : null;
-        const sizeCol = persisted && persisted.size_col ? persisted.size_col : null;
-        // If overrides are missing, auto-detect from columns first
-        const doFetch = (raFinal, decFinal, sizeFinal) => {
-            const urlParams = new URLSearchParams();
-            if (raFinal) urlParams.set('ra_col', raFinal);
-            if (decFinal) urlParams.set('dec_col', decFinal);
-            if (sizeFinal) urlParams.set('size_col', sizeFinal);
-            const headers = {};
-            if (raFinal) headers['X-RA-Col'] = raFinal;
-            if (decFinal) headers['X-DEC-Col'] = decFinal;
-            if (sizeFinal) headers['X-Size-Col'] = sizeFinal;
-            const suffix = urlParams.toString() ? `?${urlParams.toString()}` : '';
-            console.log('[plotter] /plotter/load-catalog generatePlot URL:', `/plotter/load-catalog/${apiName}${suffix}`, 'headers:', headers);
-            return apiFetch(`/plotter/load-catalog/${apiName}${suffix}`, { headers })
-        };
+        loadingText.textContent = 'Loading catalog data...';
+    
+        // Load catalog data and process (ensure RA/DEC overrides are sent)
+        {
+            const apiName = (catalogToUse || '').toString().split('/').pop().split('\\').pop();
+            const persisted = (window.catalogOverridesByCatalog && (
+                window.catalogOverridesByCatalog[catalogToUse] ||
+                window.catalogOverridesByCatalog[apiName]
+            )) || null;
+            // Only use persisted overrides; do NOT default to 'ra'/'dec'
+            const raCol = persisted && persisted.ra_col ? persisted.ra_col : null;
+            const decCol = persisted && persisted.dec_col ? persisted.dec_col : null;
+            const sizeCol = persisted && persisted.size_col ? persisted.size_col : null;
+            // If overrides are missing, auto-detect from columns first
+            const doFetch = (raFinal, decFinal, sizeFinal) => {
+                const urlParams = new URLSearchParams();
+                if (raFinal) urlParams.set('ra_col', raFinal);
+                if (decFinal) urlParams.set('dec_col', decFinal);
+                if (sizeFinal) urlParams.set('size_col', sizeFinal);
+                const headers = {};
+                if (raFinal) headers['X-RA-Col'] = raFinal;
+                if (decFinal) headers['X-DEC-Col'] = decFinal;
+                if (sizeFinal) headers['X-Size-Col'] = sizeFinal;
+                const suffix = urlParams.toString() ? `?${urlParams.toString()}` : '';
+                console.log('[plotter] /plotter/load-catalog generatePlot URL:', `/plotter/load-catalog/${apiName}${suffix}`, 'headers:', headers);
+                return apiFetch(`/plotter/load-catalog/${apiName}${suffix}`, { headers })
+            };
 
-        const fetchPromise = (raCol && decCol)
-            ? doFetch(raCol, decCol, sizeCol)
-            : apiFetch(`/catalog-columns/?catalog_name=${encodeURIComponent(apiName)}`)
-                .then(r => r.ok ? r.json() : Promise.reject(new Error('Failed to load catalog columns')))
-                .then(data => {
-                    const cols = (data && data.columns) || [];
-                    const lower = new Map(cols.map(c => [String(c).toLowerCase(), c]));
-                    const tryKeys = (arr) => { for (const k of arr) { const m = lower.get(k.toLowerCase()); if (m) return m; } return null; };
-                    const RA_CANDIDATES = [
-                        'PHANGS_RA','XCTR_DEG','cen_ra','CEN_RA','RA','ra','Ra','RightAscension','right_ascension','raj2000','RAJ2000'
-                    ];
-                    const DEC_CANDIDATES = [
-                        'PHANGS_DEC','YCTR_DEG','cen_dec','CEN_DEC','DEC','dec','Dec','Declination','declination','DECLINATION','decj2000','DECJ2000','dej2000','DEJ2000'
-                    ];
-                    const raAuto = tryKeys(RA_CANDIDATES);
-                    const decAuto = tryKeys(DEC_CANDIDATES);
-                    if (!raAuto || !decAuto) throw new Error('Could not auto-detect RA/DEC columns');
-                    return doFetch(raAuto, decAuto, null);
-                });
+            const fetchPromise = (raCol && decCol)
+                ? doFetch(raCol, decCol, sizeCol)
+                : apiFetch(`/catalog-columns/?catalog_name=${encodeURIComponent(apiName)}`)
+                    .then(r => r.ok ? r.json() : Promise.reject(new Error('Failed to load catalog columns')))
+                    .then(data => {
+                        const cols = (data && data.columns) || [];
+                        const lower = new Map(cols.map(c => [String(c).toLowerCase(), c]));
+                        const tryKeys = (arr) => { for (const k of arr) { const m = lower.get(k.toLowerCase()); if (m) return m; } return null; };
+                        const RA_CANDIDATES = [
+                            'PHANGS_RA','XCTR_DEG','cen_ra','CEN_RA','RA','ra','Ra','RightAscension','right_ascension','raj2000','RAJ2000'
+                        ];
+                        const DEC_CANDIDATES = [
+                            'PHANGS_DEC','YCTR_DEG','cen_dec','CEN_DEC','DEC','dec','Dec','Declination','declination','DECLINATION','decj2000','DECJ2000','dej2000','DEJ2000'
+                        ];
+                        const raAuto = tryKeys(RA_CANDIDATES);
+                        const decAuto = tryKeys(DEC_CANDIDATES);
+                        if (!raAuto || !decAuto) throw new Error('Could not auto-detect RA/DEC columns');
+                        return doFetch(raAuto, decAuto, null);
+                    });
 
-        fetchPromise
-        .then(response => {
-            if (!response.ok) {
-                throw new Error('Failed to load catalog');
-            }
-            return response.json();
-        })
-        .then(catalogData => {
-            if (!catalogData || catalogData.length === 0) {
-                throw new Error('No catalog data available');
-            }
-            
-            const maxObjectsToProcess = 500;
-            let objectsToFetch = catalogData;
-            if (catalogData.length > maxObjectsToProcess) {
-                const step = Math.floor(catalogData.length / maxObjectsToProcess);
-                objectsToFetch = [];
-                for (let i = 0; i < catalogData.length; i += step) {
-                    objectsToFetch.push(catalogData[i]);
+            fetchPromise
+            .then(response => {
+                if (!response.ok) {
+                    throw new Error('Failed to load catalog');
+                }
+                return response.json();
+            })
+            .then(catalogData => {
+                if (!catalogData || catalogData.length === 0) {
+                    throw new Error('No catalog data available');
                 }
-            }
             
-            loadingText.textContent = 'Loading data: 0%';
+                const maxObjectsToProcess = 500;
+                let objectsToFetch = catalogData;
+                if (catalogData.length > maxObjectsToProcess) {
+                    const step = Math.floor(catalogData.length / maxObjectsToProcess);
+                    objectsToFetch = [];
+                    for (let i = 0; i < catalogData.length; i += step) {
+                        objectsToFetch.push(catalogData[i]);
+                    }
+                }
             
-            const fetchPromises = objectsToFetch.map((obj, index) => {
-                return new Promise((resolve, reject) => {
-                    setTimeout(() => {
-                        apiFetch(`/source-properties/?ra=${obj.ra}&dec=${obj.dec}&catalog_name=${catalogToUse}`)
-                            .then(response => {
-                                if (!response.ok) {
-                                    throw new Error(`Failed to load properties for object ${index}`);
-                                }
-                                return response.json();
-                            })
-                            .then(data => {
-                                if (data.error) {
-                                    throw new Error(data.error);
-                                }
-                                
-                                const progress = Math.round((index + 1) / objectsToFetch.length * 100);
-                                loadingText.textContent = `Loading data: ${progress}%`;
-                                
-                                const properties = data.properties || {};
-                                properties._originalObj = obj;
-                                resolve(properties);
-                            })
-                            .catch(error => {
-                                console.error(`Error fetching properties for object ${index}:`, error);
-                                resolve(null);
-                            });
-                    }, index * 10);
-                });
-            });
+                loadingText.textContent = 'Loading source properties...';
             
-            return Promise.all(fetchPromises)
-                .then(results => {
-                    const validResults = results.filter(result => result !== null);
+                return fetchSampledSourceProperties(catalogToUse, objectsToFetch)
+                    .then(validResults => {
                     
-                    if (validResults.length === 0) {
-                        throw new Error('No valid data found');
-                    }
+                        if (validResults.length === 0) {
+                            throw new Error('No valid data found');
+                        }
                     
-                    window.sourcePropertiesData = validResults;
-                    try { window.sourcePropertiesCatalogName = catalogToUse; } catch(_) {}
-                    plotArea.innerHTML = '';
+                        window.sourcePropertiesData = validResults;
+                        try { window.sourcePropertiesCatalogName = catalogToUse; } catch(_) {}
+                        plotArea.innerHTML = '';
                     
-                    return processPlotData(
-                        plotArea, 
-                        validResults, 
-                        xAxisName, 
-                        yAxisName, 
-                        {
-                            title: plotTitle,
-                            xLabel: xLabel,
-                            yLabel: yLabel,
-                            xScale: xScale,
-                            yScale: yScale,
-                            xMin: xMin,
-                            xMax: xMax,
-                            yMin: yMin,
-                            yMax: yMax,
-                            autoLimits: autoLimits,
-                            pointAlpha: pointAlpha,
-                            colorAxisName: colorAxisName,
-                            colormap: colormap,
-                            colorScale: colorScale,
-                            colorMin: cMin, // Pass color min
-                            colorMax: cMax  // Pass color max
-                        }
-                    );
-                });
-        })
-        .catch(error => {
-            console.error('Error loading catalog data:', error);
-            plotArea.innerHTML = '';
-            const errorMessage = document.createElement('div');
-            errorMessage.textContent = `Error loading catalog data: ${error.message}`;
-            errorMessage.style.color = '#ff6b6b';
-            errorMessage.style.textAlign = 'center';
-            errorMessage.style.width = '100%';
-            errorMessage.style.height = '100%';
-            errorMessage.style.display = 'flex';
-            errorMessage.style.alignItems = 'center';
-            errorMessage.style.justifyContent = 'center';
-            plotArea.appendChild(errorMessage);
-        });
+                        return processPlotData(
+                            plotArea, 
+                            validResults, 
+                            xAxisName, 
+                            yAxisName, 
+                            {
+                                title: plotTitle,
+                                xLabel: xLabel,
+                                yLabel: yLabel,
+                                xScale: xScale,
+                                yScale: yScale,
+                                xMin: xMin,
+                                xMax: xMax,
+                                yMin: yMin,
+                                yMax: yMax,
+                                autoLimits: autoLimits,
+                                pointAlpha: pointAlpha,
+                                colorAxisName: colorAxisName,
+                                colormap: colormap,
+                                colorScale: colorScale,
+                                colorMin: cMin, // Pass color min
+                                colorMax: cMax  // Pass color max
+                            }
+                        );
+                    });
+            })
+            .catch(error => {
+                console.error('Error loading catalog data:', error);
+                plotArea.innerHTML = '';
+                const errorMessage = document.createElement('div');
+                errorMessage.textContent = `Error loading catalog data: ${error.message}`;
+                errorMessage.style.color = '#ff6b6b';
+                errorMessage.style.textAlign = 'center';
+                errorMessage.style.width = '100%';
+                errorMessage.style.height = '100%';
+                errorMessage.style.display = 'flex';
+                errorMessage.style.alignItems = 'center';
+                errorMessage.style.justifyContent = 'center';
+                plotArea.appendChild(errorMessage);
+            });
+        }
+    };
+    
+    // Binned on the server over every row; in Auto mode a catalog small enough to draw
+    // object by object keeps the interactive scatter plot.
+    const renderMode = document.getElementById('plot-render-select')?.value || 'auto';
+    if (!catalogToUse || renderMode === 'points') {
+        plotSampledObjects();
+        return;
     }
+    createAggregatedPlot(plotArea, catalogToUse, {
+        renderMode,
+        xAxisName,
+        yAxisName,
+        colorAxisName,
+        title: plotTitle,
+        xLabel,
+        yLabel,
+        xScale,
+        yScale,
+        xMin,
+        xMax,
+        yMin,
+        yMax,
+        colormap,
+        colorScale,
+        colorMin: cMin,
+        colorMax: cMax,
+        pointAlpha,
+        fallBackWhenSparse: renderMode === 'auto'
+    }).then(drawn => {
+        if (!drawn) plotSampledObjects();
+    }).catch(error => {
+        console.warn('[plotter] Binned plot unavailable, using sampled objects:', error);
+        if (renderMode !== 'auto') showNotification(`Binned plot failed: ${error.message}`, 3000, 'warning');
+        plotSampledObjects();
+    });
 }
 
 // Updated processPlotData function to handle color scale
@@ -4603,6 +4649,585 @@ function getColorFromMap(value, min, max, colormap, colorScale = 'linear') {
     const colorFunc = colormaps[colormap] || colormaps.viridis;
     return colorFunc(normalizedValue);
 }
+
+// --- Server-side plot aggregation ---
+// Catalogs are binned on the server over every row (/plotter/aggregate/): counts or
+// means on rectangular or hexagonal bins, or a smoothed density with contours. The
+// canvas re-queries the visible range on zoom, and a view holding at most
+// PLOTTER_AGGREGATE_MAX_POINTS objects comes back as the objects themselves.
+const PLOTTER_AGGREGATE_MAX_POINTS = 20000;
+const PLOTTER_CONTOUR_SEGMENTS = [
+    [], [['l', 'b']], [['b', 'r']], [['l', 'r']], [['r', 't']], [['l', 'b'], ['r', 't']], [['b', 't']], [['l', 't']],
+    [['t', 'l']], [['b', 't']], [['b', 'r'], ['t', 'l']], [['r', 't']], [['l', 'r']], [['b', 'r']], [['l', 'b']], []
+];
+
+// Properties of sampled objects (from /plotter/load-catalog) in one /source-properties/batch/
+// request; positions are matched as /source-properties/ matches them and objects without a
+// match are left out. Each result carries its object as _originalObj.
+async function fetchSampledSourceProperties(catalogName, objects) {
+    const response = await apiFetch('/source-properties/batch/', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({
+            catalog_name: catalogName,
+            ra: objects.map(obj => Number(obj.ra)),
+            dec: objects.map(obj => Number(obj.dec)),
+            format: 'columnar'
+        })
+    });
+    if (!response.ok) {
+        const err = await response.json().catch(() => null);
+        throw new Error((err && (err.detail || err.error)) || `Failed to load source properties (HTTP ${response.status})`);
+    }
+    const parsed = window.parseColumnarCatalog(await response.arrayBuffer());
+    const queries = parsed.columns.__query_index;
+    const columns = Object.values(parsed.columns).filter(col => col.name !== '__query_index' && col.name !== '__row_index');
+    const results = [];
+    for (let i = 0; i < (queries ? queries.length : 0); i++) {
+        const properties = {};
+        for (const col of columns) properties[col.name] = window.columnarValue(col, i);
+        properties._originalObj = objects[Number(queries.values[i])];
+        results.push(properties);
+    }
+    return results;
+}
+
+function plotterAggregateUrl(catalogName, params) {
+    const apiName = (catalogName || '').toString().split('/').pop().split('\\').pop();
+    return `/plotter/aggregate/${encodeURIComponent(apiName)}?${params.toString()}`;
+}
+
+// Histogram counts over every row of the catalog, or null when the server cannot bin the column
+// (text columns, expressions it rejects), in which case the caller falls back to sampled objects.
+function fetchAggregatedHistogram(catalogName, xAxisName, options) {
+    const params = new URLSearchParams({
+        kind: 'hist1d',
+        x: xAxisName,
+        bins: String(options.numBins || 20),
+        x_scale: options.xScale || 'linear'
+    });
+    if (options.xMin !== null && Number.isFinite(options.xMin)) params.set('x_min', String(options.xMin));
+    if (options.xMax !== null && Number.isFinite(options.xMax)) params.set('x_max', String(options.xMax));
+    return apiFetch(plotterAggregateUrl(catalogName, params))
+        .then(response => response.ok ? response.json() : null)
+        .then(data => {
+            if (!data || data.mode !== 'binned' || !data.total) return null;
+            const toData = v => data.x_scale === 'log' ? Math.pow(10, v) : v;
+            return { edges: data.edges.map(toData), counts: data.counts };
+        })
+        .catch(error => {
+            console.warn('[plotter] Aggregated histogram unavailable, using sampled objects:', error);
+            return null;
+        });
+}
+
+function colormapLookupTable(colormap) {
+    const lut = new Uint8ClampedArray(256 * 3);
+    for (let i = 0; i < 256; i++) {
+        const match = /rgb\((\d+),\s*(\d+),\s*(\d+)\)/.exec(getColorFromMap(i, 0, 255, colormap));
+        if (match) {
+            lut[i * 3] = +match[1];
+            lut[i * 3 + 1] = +match[2];
+            lut[i * 3 + 2] = +match[3];
+        }
+    }
+    return lut;
+}
+
+function niceAxisStep(lo, hi, count) {
+    const raw = (hi - lo) / Math.max(1, count);
+    if (!(raw > 0)) return 1;
+    const magnitude = Math.pow(10, Math.floor(Math.log10(raw)));
+    return [1, 2, 5, 10].map(m => m * magnitude).find(s => s >= raw) || raw;
+}
+
+function niceAxisTicks(lo, hi, step) {
+    const ticks = [];
+    for (let k = Math.ceil(lo / step - 1e-9); k <= Math.floor(hi / step + 1e-9); k++) {
+        ticks.push(k * step);
+    }
+    return ticks;
+}
+
+// Axis values are log10 of the data on log axes; `step` (the tick spacing, or the size of
+// a pixel) sets how many decimals a linear value needs.
+function formatAggregateTick(value, log, step = 0) {
+    if (log) {
+        const exponent = Math.round(value);
+        if (Math.abs(value - exponent) < 1e-6) {
+            return exponent >= 0 && exponent <= 3 ? String(Math.pow(10, exponent)) : `1e${exponent}`;
+        }
+        return String(parseFloat(Math.pow(10, value).toPrecision(3)));
+    }
+    const magnitude = Math.abs(value);
+    if (magnitude !== 0 && (magnitude < 1e-3 || magnitude >= 1e6)) return value.toExponential(step ? 2 : 1);
+    if (step > 0) return value.toFixed(Math.min(10, Math.max(0, -Math.floor(Math.log10(step)))));
+    return String(parseFloat(value.toPrecision(4)));
+}
+
+// Line segments of the contour at `level` through a row-major ny x nx grid (marching squares),
+// in grid index units.
+function contourSegments(grid, nx, ny, level) {
+    const segments = [];
+    const at = (a, b) => (a === b ? 0.5 : (level - a) / (b - a));
+    for (let j = 0; j < ny - 1; j++) {
+        for (let i = 0; i < nx - 1; i++) {
+            const v0 = grid[j * nx + i], v1 = grid[j * nx + i + 1];
+            const v2 = grid[(j + 1) * nx + i + 1], v3 = grid[(j + 1) * nx + i];
+            const code = (v0 > level ? 1 : 0) | (v1 > level ? 2 : 0) | (v2 > level ? 4 : 0) | (v3 > level ? 8 : 0);
+            if (code === 0 || code === 15) continue;
+            const edge = {
+                b: () => [i + at(v0, v1), j],
+                r: () => [i + 1, j + at(v1, v2)],
+                t: () => [i + at(v3, v2), j + 1],
+                l: () => [i, j + at(v0, v3)]
+            };
+            PLOTTER_CONTOUR_SEGMENTS[code].forEach(([from, to]) => segments.push([edge[from](), edge[to]()]));
+        }
+    }
+    return segments;
+}
+
+// Draws a binned plot of the catalog into plotArea. Resolves false without drawing when
+// `fallBackWhenSparse` is set and the whole catalog is small enough to plot object by object.
+function createAggregatedPlot(plotArea, catalogName, options) {
+    const {
+        renderMode = 'auto',
+        xAxisName,
+        yAxisName,
+        colorAxisName = '',
+        title = '',
+        xLabel = xAxisName,
+        yLabel = yAxisName,
+        xScale = 'linear',
+        yScale = 'linear',
+        xMin = null,
+        xMax = null,
+        yMin = null,
+        yMax = null,
+        colormap = 'viridis',
+        colorScale = 'linear',
+        colorMin = null,
+        colorMax = null,
+        pointAlpha = 0.7,
+        fallBackWhenSparse = false
+    } = options || {};
+    const kind = renderMode === 'auto' ? 'hist2d' : renderMode;
+    const xLog = xScale === 'log';
+    const yLog = yScale === 'log';
+    const margin = { top: 40, right: 80, bottom: 50, left: 70 };
+    const width = Math.max(200, plotArea.clientWidth || 600);
+    const height = Math.max(200, plotArea.clientHeight || 400);
+    const plotW = width - margin.left - margin.right;
+    const plotH = height - margin.top - margin.bottom;
+    const lut = colormapLookupTable(colormap);
+    const state = { data: null, xRange: null, yRange: null, initial: null, request: 0, wheelTimer: null };
+
+    const params = (limits) => {
+        const p = new URLSearchParams({
+            kind,
+            x: xAxisName,
+            y: yAxisName,
+            x_scale: xScale,
+            y_scale: yScale,
+            max_points: String(PLOTTER_AGGREGATE_MAX_POINTS)
+        });
+        if (colorAxisName) {
+            p.set('c', colorAxisName);
+            if (kind !== 'density') p.set('stat', 'mean');
+        }
+        const cell = kind === 'hist2d' ? 3 : (kind === 'density' ? 4 : 14);
+        const nx = Math.max(8, Math.round(plotW / cell));
+        p.set('bins', String(nx));
+        // Hexagons are regular on screen when a row is sqrt(3) times as tall as a column is wide.
+        const ny = kind === 'hexbin' ? Math.round(plotH * nx / (Math.sqrt(3) * plotW)) : Math.round(plotH / cell);
+        p.set('bins_y', String(Math.max(1, ny)));
+        Object.entries(limits).forEach(([key, value]) => {
+            if (value !== null && value !== undefined && Number.isFinite(value)) p.set(key, String(value));
+        });
+        return p;
+    };
+
+    const load = (limits) => {
+        const ticket = ++state.request;
+        return apiFetch(plotterAggregateUrl(catalogName, params(limits)))
+            .then(async response => {
+                const data = await response.json().catch(() => null);
+                if (!response.ok) throw new Error((data && data.detail) || `HTTP ${response.status}`);
+                return data;
+            })
+            .then(data => (ticket === state.request ? data : null));
+    };
+
+    const toData = (v, log) => (log ? Math.pow(10, v) : v);
+    const zoomTo = (xRange, yRange) => {
+        state.xRange = xRange;
+        state.yRange = yRange;
+        draw();
+        load({
+            x_min: toData(xRange[0], xLog), x_max: toData(xRange[1], xLog),
+            y_min: toData(yRange[0], yLog), y_max: toData(yRange[1], yLog)
+        }).then(data => {
+            if (!data) return;
+            state.data = data;
+            state.xRange = data.x_range;
+            state.yRange = data.y_range;
+            draw();
+        }).catch(error => showNotification(`Could not update plot: ${error.message}`, 3000, 'error'));
+    };
+
+    const canvas = document.createElement('canvas');
+    canvas.setAttribute('data-plot-aggregate', kind);
+    const dpr = window.devicePixelRatio || 1;
+    canvas.width = Math.round(width * dpr);
+    canvas.height = Math.round(height * dpr);
+    canvas.style.width = `${width}px`;
+    canvas.style.height = `${height}px`;
+    canvas.style.display = 'block';
+    canvas.style.cursor = 'crosshair';
+    const ctx = canvas.getContext('2d');
+
+    const selectionBox = document.createElement('div');
+    selectionBox.style.position = 'absolute';
+    selectionBox.style.border = '1px dashed #fff';
+    selectionBox.style.background = 'rgba(255, 255, 255, 0.08)';
+    selectionBox.style.pointerEvents = 'none';
+    selectionBox.style.display = 'none';
+
+    const tooltip = document.createElement('div');
+    tooltip.style.position = 'absolute';
+    tooltip.style.background = 'rgba(0, 0, 0, 0.8)';
+    tooltip.style.color = 'white';
+    tooltip.style.padding = '4px 8px';
+    tooltip.style.borderRadius = '4px';
+    tooltip.style.fontSize = '11px';
+    tooltip.style.pointerEvents = 'none';
+    tooltip.style.display = 'none';
+    tooltip.style.whiteSpace = 'nowrap';
+
+    const px = v => margin.left + (v - state.xRange[0]) / (state.xRange[1] - state.xRange[0]) * plotW;
+    const py = v => margin.top + plotH - (v - state.yRange[0]) / (state.yRange[1] - state.yRange[0]) * plotH;
+    const ax = x => state.xRange[0] + (x - margin.left) / plotW * (state.xRange[1] - state.xRange[0]);
+    const ay = y => state.yRange[0] + (margin.top + plotH - y) / plotH * (state.yRange[1] - state.yRange[0]);
+
+    // Color of each bin: counts on a log scale, means of the color column on the chosen scale.
+    const colorScaleOf = (values) => {
+        const data = state.data;
+        if (data.mean) {
+            let lo = Infinity, hi = -Infinity;
+            values.forEach(v => { if (v !== null) { lo = Math.min(lo, v); hi = Math.max(hi, v); } });
+            lo = colorMin !== null && Number.isFinite(colorMin) ? colorMin : lo;
+            hi = colorMax !== null && Number.isFinite(colorMax) ? colorMax : hi;
+            const log = colorScale === 'log' && lo > 0;
+            const a = log ? Math.log10(lo) : lo, b = log ? Math.log10(hi) : hi;
+            return {
+                lo, hi, label: `Mean ${colorAxisName}`,
+                t: v => (v === null ? null : Math.max(0, Math.min(1, ((log ? Math.log10(v) : v) - a) / ((b - a) || 1))))
+            };
+        }
+        const hi = values.reduce((m, v) => Math.max(m, v), 0);
+        return {
+            lo: 1, hi, label: kind === 'density' ? 'Density' : 'Count (log)',
+            t: v => (v > 0 ? (hi > 1 ? Math.log(v) / Math.log(hi) : 1) : null)
+        };
+    };
+    const rgb = t => `rgb(${lut[Math.round(t * 255) * 3]}, ${lut[Math.round(t * 255) * 3 + 1]}, ${lut[Math.round(t * 255) * 3 + 2]})`;
+
+    const drawBins = () => {
+        const data = state.data;
+        const [x0, x1] = data.x_range, [y0, y1] = data.y_range;
+        if (kind === 'hexbin') {
+            const scale = colorScaleOf(data.mean || data.counts);
+            const hx = [0.5, 0.5, 0, -0.5, -0.5, 0].map(d => d * data.sx);
+            const hy = [-0.5, 0.5, 1, 0.5, -0.5, -1].map(d => d * data.sy / 3);
+            data.hex_x.forEach((cx, i) => {
+                const t = scale.t((data.mean || data.counts)[i]);
+                if (t === null) return;
+                ctx.beginPath();
+                for (let k = 0; k < 6; k++) {
+                    const X = px(cx + hx[k]), Y = py(data.hex_y[i] + hy[k]);
+                    if (k === 0) ctx.moveTo(X, Y); else ctx.lineTo(X, Y);
+                }
+                ctx.closePath();
+                ctx.fillStyle = rgb(t);
+                ctx.fill();
+            });
+            return scale;
+        }
+        const values = kind === 'density' ? data.grid : (data.mean || data.counts);
+        const scale = kind === 'density'
+            ? { lo: 0, hi: Math.max(...data.levels.filter(v => v !== null), 0), label: 'Density', t: null }
+            : colorScaleOf(values);
+        const peak = kind === 'density' ? values.reduce((m, v) => Math.max(m, v), 0) : 0;
+        const image = new ImageData(data.nx, data.ny);
+        for (let j = 0; j < data.ny; j++) {
+            for (let i = 0; i < data.nx; i++) {
+                const v = values[j * data.nx + i];
+                const t = kind === 'density' ? (peak > 0 && v > 0 ? Math.sqrt(v / peak) : null) : scale.t(v);
+                if (t === null) continue;
+                const o = ((data.ny - 1 - j) * data.nx + i) * 4, c = Math.round(t * 255) * 3;
+                image.data[o] = lut[c];
+                image.data[o + 1] = lut[c + 1];
+                image.data[o + 2] = lut[c + 2];
+                image.data[o + 3] = kind === 'density' ? 150 : 255;
+            }
+        }
+        const bitmap = document.createElement('canvas');
+        bitmap.width = data.nx;
+        bitmap.height = data.ny;
+        bitmap.getContext('2d').putImageData(image, 0, 0);
+        ctx.imageSmoothingEnabled = kind === 'density';
+        ctx.drawImage(bitmap, px(x0), py(y1), px(x1) - px(x0), py(y0) - py(y1));
+        if (kind === 'density') {
+            const dx = (x1 - x0) / data.nx, dy = (y1 - y0) / data.ny;
+            ctx.strokeStyle = 'white';
+            data.levels.forEach((level, k) => {
+                if (level === null) return;
+                ctx.lineWidth = 1.5 - k * 0.3;
+                ctx.beginPath();
+                contourSegments(data.grid, data.nx, data.ny, level).forEach(([a, b]) => {
+                    ctx.moveTo(px(x0 + (a[0] + 0.5) * dx), py(y0 + (a[1] + 0.5) * dy));
+                    ctx.lineTo(px(x0 + (b[0] + 0.5) * dx), py(y0 + (b[1] + 0.5) * dy));
+                });
+                ctx.stroke();
+            });
+            return null;
+        }
+        return scale;
+    };
+
+    const drawPoints = () => {
+        const points = state.data.points;
+        let scale = null;
+        if (points.c) {
+            let lo = Infinity, hi = -Infinity;
+            points.c.forEach(v => { if (v !== null) { lo = Math.min(lo, v); hi = Math.max(hi, v); } });
+            lo = colorMin !== null && Number.isFinite(colorMin) ? colorMin : lo;
+            hi = colorMax !== null && Number.isFinite(colorMax) ? colorMax : hi;
+            scale = { lo, hi, label: colorAxisName };
+        }
+        ctx.globalAlpha = pointAlpha;
+        points.x.forEach((x, i) => {
+            const c = points.c ? points.c[i] : null;
+            ctx.fillStyle = scale && c !== null ? getColorFromMap(c, scale.lo, scale.hi, colormap, colorScale) : '#4CAF50';
+            ctx.beginPath();
+            ctx.arc(px(x), py(points.y[i]), 2.5, 0, 2 * Math.PI);
+            ctx.fill();
+        });
+        ctx.globalAlpha = 1;
+        if (scale) {
+            const log = colorScale === 'log' && scale.lo > 0;
+            scale.t = v => {
+                const a = log ? Math.log10(scale.lo) : scale.lo, b = log ? Math.log10(scale.hi) : scale.hi;
+                return Math.max(0, Math.min(1, ((log ? Math.log10(v) : v) - a) / ((b - a) || 1)));
+            };
+        }
+        return scale;
+    };
+
+    const drawAxes = (scale) => {
+        const data = state.data;
+        ctx.strokeStyle = '#aaa';
+        ctx.lineWidth = 1;
+        ctx.strokeRect(margin.left, margin.top, plotW, plotH);
+        ctx.fillStyle = '#ddd';
+        ctx.font = '11px Arial';
+        ctx.textAlign = 'center';
+        ctx.textBaseline = 'top';
+        const xStep = niceAxisStep(state.xRange[0], state.xRange[1], 6);
+        niceAxisTicks(state.xRange[0], state.xRange[1], xStep).forEach(v => {
+            const X = px(v);
+            ctx.beginPath();
+            ctx.moveTo(X, margin.top + plotH);
+            ctx.lineTo(X, margin.top + plotH + 5);
+            ctx.stroke();
+            ctx.fillText(formatAggregateTick(v, xLog, xStep), X, margin.top + plotH + 8);
+        });
+        ctx.textAlign = 'right';
+        ctx.textBaseline = 'middle';
+        const yStep = niceAxisStep(state.yRange[0], state.yRange[1], 5);
+        niceAxisTicks(state.yRange[0], state.yRange[1], yStep).forEach(v => {
+            const Y = py(v);
+            ctx.beginPath();
+            ctx.moveTo(margin.left - 5, Y);
+            ctx.lineTo(margin.left, Y);
+            ctx.stroke();
+            ctx.fillText(formatAggregateTick(v, yLog, yStep), margin.left - 8, Y);
+        });
+        ctx.font = '13px Arial';
+        ctx.textAlign = 'center';
+        ctx.textBaseline = 'bottom';
+        ctx.fillText(xLabel, margin.left + plotW / 2, height - 8);
+        if (title) {
+            ctx.font = 'bold 14px Arial';
+            ctx.fillText(title, margin.left + plotW / 2, 24);
+        }
+        ctx.save();
+        ctx.translate(16, margin.top + plotH / 2);
+        ctx.rotate(-Math.PI / 2);
+        ctx.textBaseline = 'top';
+        ctx.font = '13px Arial';
+        ctx.fillText(yLabel, 0, 0);
+        ctx.restore();
+        if (scale && scale.t && Number.isFinite(scale.lo) && Number.isFinite(scale.hi)) {
+            const barX = margin.left + plotW + 14;
+            for (let k = 0; k < plotH; k++) {
+                ctx.fillStyle = rgb(1 - k / (plotH - 1));
+                ctx.fillRect(barX, margin.top + k, 12, 1);
+            }
+            ctx.strokeRect(barX, margin.top, 12, plotH);
+            ctx.fillStyle = '#ddd';
+            ctx.font = '10px Arial';
+            ctx.textAlign = 'left';
+            ctx.textBaseline = 'top';
+            ctx.fillText(formatAggregateTick(scale.hi, false), barX + 15, margin.top);
+            ctx.textBaseline = 'bottom';
+            ctx.fillText(formatAggregateTick(scale.lo, false), barX + 15, margin.top + plotH);
+            ctx.save();
+            ctx.translate(barX + 28, margin.top + plotH / 2);
+            ctx.rotate(Math.PI / 2);
+            ctx.textAlign = 'center';
+            ctx.fillText(scale.label, 0, 0);
+            ctx.restore();
+        }
+        ctx.fillStyle = '#aaa';
+        ctx.font = '11px Arial';
+        ctx.textAlign = 'left';
+        ctx.textBaseline = 'top';
+        const shown = data.mode === 'points' ? 'objects' : (kind === 'density' ? 'density contours' : `${kind === 'hexbin' ? 'hexagonal' : data.nx + '×' + data.ny} bins`);
+        ctx.fillText(`${data.in_view.toLocaleString()} of ${data.total.toLocaleString()} objects in view · ${shown} · drag or scroll to zoom, double-click to reset`, margin.left, 6);
+    };
+
+    const draw = () => {
+        ctx.setTransform(dpr, 0, 0, dpr, 0, 0);
+        ctx.fillStyle = '#222';
+        ctx.fillRect(0, 0, width, height);
+        if (!state.data) return;
+        ctx.save();
+        ctx.beginPath();
+        ctx.rect(margin.left, margin.top, plotW, plotH);
+        ctx.clip();
+        const scale = state.data.mode === 'points' ? drawPoints() : drawBins();
+        ctx.restore();
+        state.scale = scale;
+        drawAxes(scale);
+    };
+
+    const describeAt = (x, y) => {
+        const data = state.data;
+        if (!data || x < margin.left || x > margin.left + plotW || y < margin.top || y > margin.top + plotH) return null;
+        const vx = ax(x), vy = ay(y);
+        const xPixel = (state.xRange[1] - state.xRange[0]) / plotW, yPixel = (state.yRange[1] - state.yRange[0]) / plotH;
+        const where = `${xAxisName}: ${formatAggregateTick(vx, xLog, xPixel)}, ${yAxisName}: ${formatAggregateTick(vy, yLog, yPixel)}`;
+        if (data.mode === 'points') {
+            let best = -1, bestD = 36;
+            data.points.x.forEach((px0, i) => {
+                const d = (px(px0) - x) ** 2 + (py(data.points.y[i]) - y) ** 2;
+                if (d < bestD) { bestD = d; best = i; }
+            });
+            if (best < 0) return where;
+            const c = data.points.c && data.points.c[best] !== null ? `, ${colorAxisName}: ${formatAggregateTick(data.points.c[best], false)}` : '';
+            return `Row ${data.points.rows[best]} · ${xAxisName}: ${formatAggregateTick(data.points.x[best], xLog, xPixel)}, ${yAxisName}: ${formatAggregateTick(data.points.y[best], yLog, yPixel)}${c}`;
+        }
+        if (kind === 'hexbin') return where;
+        const i = Math.floor((vx - data.x_range[0]) / (data.x_range[1] - data.x_range[0]) * data.nx);
+        const j = Math.floor((vy - data.y_range[0]) / (data.y_range[1] - data.y_range[0]) * data.ny);
+        if (i < 0 || j < 0 || i >= data.nx || j >= data.ny) return where;
+        const k = j * data.nx + i;
+        if (kind === 'density') return `${where} · density ${data.grid[k]}`;
+        const mean = data.mean && data.mean[k] !== null ? `, mean ${colorAxisName} ${formatAggregateTick(data.mean[k], false)}` : '';
+        return `${where} · ${data.counts[k]} objects${mean}`;
+    };
+
+    let dragStart = null;
+    const localPoint = (event) => {
+        const rect = canvas.getBoundingClientRect();
+        return [event.clientX - rect.left, event.clientY - rect.top];
+    };
+    canvas.addEventListener('mousedown', (event) => {
+        const [x, y] = localPoint(event);
+        if (x < margin.left || x > margin.left + plotW || y < margin.top || y > margin.top + plotH) return;
+        dragStart = [x, y];
+    });
+    canvas.addEventListener('mousemove', (event) => {
+        const [x, y] = localPoint(event);
+        if (dragStart) {
+            selectionBox.style.display = 'block';
+            selectionBox.style.left = `${Math.min(x, dragStart[0])}px`;
+            selectionBox.style.top = `${Math.min(y, dragStart[1])}px`;
+            selectionBox.style.width = `${Math.abs(x - dragStart[0])}px`;
+            selectionBox.style.height = `${Math.abs(y - dragStart[1])}px`;
+            tooltip.style.display = 'none';
+            return;
+        }
+        const text = describeAt(x, y);
+        if (!text) {
+            tooltip.style.display = 'none';
+            return;
+        }
+        tooltip.textContent = text;
+        tooltip.style.display = 'block';
+        tooltip.style.left = `${Math.min(x + 12, width - tooltip.offsetWidth - 4)}px`;
+        tooltip.style.top = `${y + 12}px`;
+    });
+    const onMouseUp = (event) => {
+        if (!canvas.isConnected) {
+            window.removeEventListener('mouseup', onMouseUp);
+            return;
+        }
+        if (!dragStart) return;
+        const [x, y] = localPoint(event);
+        const start = dragStart;
+        dragStart = null;
+        selectionBox.style.display = 'none';
+        if (Math.abs(x - start[0]) < 5 || Math.abs(y - start[1]) < 5) return;
+        const xs = [ax(Math.max(margin.left, Math.min(x, start[0]))), ax(Math.min(margin.left + plotW, Math.max(x, start[0])))];
+        const ys = [ay(Math.min(margin.top + plotH, Math.max(y, start[1]))), ay(Math.max(margin.top, Math.min(y, start[1])))];
+        zoomTo(xs, ys);
+    };
+    window.addEventListener('mouseup', onMouseUp);
+    canvas.addEventListener('mouseleave', () => { tooltip.style.display = 'none'; });
+    canvas.addEventListener('wheel', (event) => {
+        if (!state.data) return;
+        const [x, y] = localPoint(event);
+        if (x < margin.left || x > margin.left + plotW || y < margin.top || y > margin.top + plotH) return;
+        event.preventDefault();
+        const factor = event.deltaY > 0 ? 1.25 : 0.8;
+        const cx = ax(x), cy = ay(y);
+        state.xRange = [cx - (cx - state.xRange[0]) * factor, cx + (state.xRange[1] - cx) * factor];
+        state.yRange = [cy - (cy - state.yRange[0]) * factor, cy + (state.yRange[1] - cy) * factor];
+        draw();
+        clearTimeout(state.wheelTimer);
+        state.wheelTimer = setTimeout(() => zoomTo(state.xRange, state.yRange), 250);
+    }, { passive: false });
+    canvas.addEventListener('dblclick', () => {
+        if (state.initial) zoomTo(state.initial[0], state.initial[1]);
+    });
+
+    return load({ x_min: xMin, x_max: xMax, y_min: yMin, y_max: yMax }).then(data => {
+        if (!data) return true;
+        if (fallBackWhenSparse && data.mode === 'points') return false;
+        if (!data.total) {
+            plotArea.innerHTML = '';
+            plotArea.textContent = `No rows with finite ${xAxisName} and ${yAxisName} to plot`;
+            return true;
+        }
+        state.data = data;
+        state.xRange = data.x_range;
+        state.yRange = data.y_range;
+        state.initial = [data.x_range, data.y_range];
+        plotArea.innerHTML = '';
+        plotArea.style.position = 'relative';
+        plotArea.appendChild(canvas);
+        plotArea.appendChild(selectionBox);
+        plotArea.appendChild(tooltip);
+        draw();
+        const saveButton = document.getElementById('save-plot-button');
+        if (saveButton) saveButton.style.display = 'block';
+        return true;
+    });
+}
+
 // COMPLETE createScatterPlot function - REPLACE the entire function
 function createScatterPlot(plotArea, processedData, xAxisName, yAxisName, categoryMapsX, categoryMapsY, customizationOptions) {
     // Extract customization options with defaults
@@ -6034,6 +6659,31 @@ function createSedTab(container) {
     flagDiv.appendChild(flagLabel);
     flagDiv.appendChild(flagSelect);
     flagSearchContainer.appendChild(flagDiv);
+
+    // Optional combination of several flags (and/or/not); overrides the single flag above
+    const flagExprDiv = document.createElement('div');
+    flagExprDiv.style.marginBottom = '15px';
+    const flagExprLabel = document.createElement('label');
+    flagExprLabel.htmlFor = 'sed-flag-expression';
+    flagExprLabel.textContent = 'Combine flags (optional):';
+    flagExprLabel.style.display = 'block';
+    flagExprLabel.style.marginBottom = '5px';
+    const flagExprInput = document.createElement('input');
+    flagExprInput.type = 'text';
+    flagExprInput.id = 'sed-flag-expression';
+    flagExprInput.placeholder = 'e.g. saturated | (edge & ~deblended)';
+    Object.assign(flagExprInput.style, {
+        width: '100%', padding: '8px', backgroundColor: '#333', color: 'white', border: '1px solid #555', borderRadius: '4px', boxSizing: 'border-box'
+    });
+    const flagExprHelp = document.createElement('div');
+    flagExprHelp.style.fontSize = '11px';
+    flagExprHelp.style.color = '#aaa';
+    flagExprHelp.style.marginTop = '4px';
+    flagExprHelp.textContent = '& (and), | (or), ~ (not); column == value picks one value of an integer flag.';
+    flagExprDiv.appendChild(flagExprLabel);
+    flagExprDiv.appendChild(flagExprInput);
+    flagExprDiv.appendChild(flagExprHelp);
+    flagSearchContainer.appendChild(flagExprDiv);
     wrapper.appendChild(flagSearchContainer);
 
     // Range Search Container
@@ -7092,9 +7742,9 @@ function performRangeSearch() {
                 return;
             }
             
-            if (operator !== '==') {
+            if (operator !== '==' && operator !== '!=') {
                 validationFailed = true;
-                validationErrors.push(`Row ${rowIndex + 1}: Boolean columns only support '==' operator`);
+                validationErrors.push(`Row ${rowIndex + 1}: Boolean columns only support '==' and '!=' operators`);
                 return;
             }
         } else {
@@ -7191,8 +7841,10 @@ function performFlagSearch() {
     console.log("performFlagSearch triggered.");
     const catalog = getSedCatalogApiName();
     const flagColumn = document.getElementById('sed-flag-select').value;
+    const flagExpression = (document.getElementById('sed-flag-expression')?.value || '').trim();
+    const validFlag = flagColumn && flagColumn !== 'No flags available' && flagColumn !== 'Error loading flags';
 
-    if (!catalog || !flagColumn || flagColumn === 'No flags available' || flagColumn === 'Error loading flags') {
+    if (!catalog || (!validFlag && !flagExpression)) {
         showNotification('Please select a catalog and a valid flag.', 3000, 'warning');
         console.error("Validation failed: Invalid catalog or flag selected.");
         return;
@@ -7201,7 +7853,9 @@ function performFlagSearch() {
     const resultsContainer = document.getElementById('sed-results-container');
     resultsContainer.innerHTML = '<div style="text-align: center; color: #aaa;">Searching by flag...</div>';
 
-    const url = `/flag-search/?catalog_name=${encodeURIComponent(catalog)}&flag_column=${encodeURIComponent(flagColumn)}`;
+    const url = flagExpression
+        ? `/flag-search/?catalog_name=${encodeURIComponent(catalog)}&flags=${encodeURIComponent(flagExpression)}`
+        : `/flag-search/?catalog_name=${encodeURIComponent(catalog)}&flag_column=${encodeURIComponent(flagColumn)}`;
     console.log("Fetching URL:", url);
 
     apiFetch(url)
@@ -179,6 +179,7 @@
     const FRIENDLY_DESCRIPTIONS = {
         'CATALOG_COLUMN_ANALYSIS_SAMPLE_SIZE': 'Rows sampled for quick column analysis to speed up UI.',
         'DEFAULT_EXPORT_FORMAT': 'Initial export format used when exporting catalog data.',
+        'MAX_EXPORT_ROWS': 'Row cap applied to catalog exports when none is requested (0 = no cap).',
         'IN_MEMORY_FITS_MODE': 'Always promote slices to RAM, auto based on disk speed, or never.',
         'IMAGE_TILE_SIZE_PX': 'Tile size used for tiled image display.',
         'FITS_HISTOGRAM_DEFAULT_BINS': 'Default number of bins for FITS histogram endpoint.'
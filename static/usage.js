@@ -65,8 +65,18 @@ function connectToUsageWebSocket() {
 
     socket.onmessage = function(event) {
         try {
+            const data = JSON.parse(event.data);
+            // Other server notices share this socket; re-dispatch them as window events
+            if (data && data.type === 'catalog_ingest') {
+                window.dispatchEvent(new CustomEvent('catalog:ingest', { detail: data }));
+                return;
+            }
+            if (data && data.type === 'catalog_updated') {
+                window.dispatchEvent(new CustomEvent('catalog:updated', { detail: data }));
+                return;
+            }
             previousStats = latestStats;
-            latestStats = JSON.parse(event.data);
+            latestStats = data;
             
             updateUsageIconDisplay(latestStats);
             
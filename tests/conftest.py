@@ -0,0 +1,23 @@
+import importlib
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+REPO = Path(__file__).resolve().parents[1]
+
+
+@pytest.fixture(scope="session")
+def main(tmp_path_factory):
+    # main serves static/ and images/ from the current directory and writes its log file there.
+    cwd = os.getcwd()
+    workdir = tmp_path_factory.mktemp("neloura")
+    (workdir / "static").symlink_to(REPO / "static", target_is_directory=True)
+    (workdir / "images").mkdir()
+    os.chdir(workdir)
+    sys.path.insert(0, str(REPO))
+    try:
+        yield importlib.import_module("main")
+    finally:
+        os.chdir(cwd)
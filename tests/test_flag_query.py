@@ -0,0 +1,31 @@
+"""Flag expressions over catalog columns."""
+import numpy as np
+from astropy.table import Table
+
+
+def _table(n: int = 3000) -> Table:
+    rng = np.random.default_rng(0)
+    return Table({
+        "cls": rng.choice(["star", "galaxy", "qso"], n),
+        "name": np.array([f"src{i}" for i in range(n)]),
+        "saturated": rng.choice(["yes", "no", " True", "f"], n),
+        "edge": rng.integers(0, 2, n),
+    })
+
+
+def _rows(main, table, expression):
+    return main.CatalogFlagQuery(expression, table).mask()
+
+
+def test_text_column_that_is_not_a_flag_selects_nothing(main):
+    table = _table()
+    assert not _rows(main, table, "`cls`").any()
+    assert not _rows(main, table, "`name`").any()
+
+
+def test_true_words_in_text_columns_are_set(main):
+    table = _table()
+    expected = np.isin(np.char.strip(np.char.lower(np.asarray(table["saturated"]))), ["yes", "true"])
+    np.testing.assert_array_equal(_rows(main, table, "`saturated`"), expected)
+    np.testing.assert_array_equal(_rows(main, table, "`saturated` & ~`edge`"),
+                                  expected & (np.asarray(table["edge"]) == 0))
@@ -0,0 +1,146 @@
+"""Accuracy and throughput of the fitted WCS approximation on synthetic SIP and TPV headers."""
+import os
+import time
+import warnings
+
+import numpy as np
+import pytest
+from astropy.io import fits
+from astropy.wcs import WCS
+
+WIDTH = HEIGHT = 2048
+N_POINTS = 200_000
+
+
+def _base_header(ctype_suffix: str, scale_deg: float) -> fits.Header:
+    h = fits.Header()
+    h["NAXIS"] = 2
+    h["NAXIS1"] = WIDTH
+    h["NAXIS2"] = HEIGHT
+    h["CTYPE1"] = f"RA---{ctype_suffix}"
+    h["CTYPE2"] = f"DEC--{ctype_suffix}"
+    h["CRVAL1"] = 150.5
+    h["CRVAL2"] = 20.5
+    h["CRPIX1"] = WIDTH / 2.0
+    h["CRPIX2"] = HEIGHT / 2.0
+    h["CD1_1"] = -scale_deg
+    h["CD1_2"] = scale_deg * 1e-3
+    h["CD2_1"] = scale_deg * 1e-3
+    h["CD2_2"] = scale_deg
+    return h
+
+
+def _sip_header(order: int = 5) -> fits.Header:
+    h = _base_header("TAN-SIP", 3e-5)
+    h["A_ORDER"] = order
+    h["B_ORDER"] = order
+    rng = np.random.default_rng(0)
+    half = WIDTH / 2.0
+    for p in range(order + 1):
+        for q in range(order + 1 - p):
+            if p + q >= 2:
+                # A few pixels of distortion at the image edge for every term.
+                h[f"A_{p}_{q}"] = rng.normal(0.0, 2.0) * half ** -(p + q)
+                h[f"B_{p}_{q}"] = rng.normal(0.0, 2.0) * half ** -(p + q)
+    return h
+
+
+def _tpv_header() -> fits.Header:
+    h = _base_header("TPV", 7e-5)
+    # Terms 4-10 are the quadratic and cubic ones; each moves the image edge by a few pixels.
+    pv1 = [0.0, 1.0, 0.0, 0.0, 0.04, -0.03, 0.05, 0.5, -0.4, 0.3, -0.6]
+    pv2 = [0.0, 1.0, 0.0, 0.0, -0.03, 0.05, -0.02, -0.3, 0.6, -0.5, 0.4]
+    for k, (c1, c2) in enumerate(zip(pv1, pv2)):
+        h[f"PV1_{k}"] = c1
+        h[f"PV2_{k}"] = c2
+    return h
+
+
+HEADERS = {"sip": _sip_header, "tpv": _tpv_header}
+
+
+def _wcs(name: str) -> WCS:
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        w = WCS(HEADERS[name]())
+    w.wcs.set()
+    return w
+
+
+def _pixels(n: int = N_POINTS):
+    rng = np.random.default_rng(1)
+    return rng.uniform(0.0, WIDTH - 1.0, n), rng.uniform(0.0, HEIGHT - 1.0, n)
+
+
+def _best_seconds(fn, repeats: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+@pytest.mark.parametrize("name", sorted(HEADERS))
+def test_fitted_transforms_stay_within_tolerance(main, name):
+    wcs = _wcs(name)
+    approx = main.WcsApproximation(wcs, WIDTH, HEIGHT)
+    assert approx.coverage == 1.0
+    assert approx.max_error_px is not None and approx.max_error_px <= approx.tolerance_px
+
+    x, y = _pixels()
+    ra, dec = wcs.all_pix2world(x, y, 0)
+
+    # pixel -> sky, measured in pixels by mapping the fitted sky position back through the exact WCS.
+    fit_ra, fit_dec = approx._approx_pix2world(x, y)
+    back_x, back_y = wcs.all_world2pix(fit_ra, fit_dec, 0, quiet=True)
+    sky_error_px = np.hypot(back_x - x, back_y - y)
+    # and in arcseconds on the sky
+    sky_error_arcsec = 3600.0 * np.hypot((fit_ra - ra) * np.cos(np.radians(dec)), fit_dec - dec)
+
+    # sky -> pixel
+    fit_x, fit_y = approx._approx_world2pix(ra, dec)
+    pix_error_px = np.hypot(fit_x - x, fit_y - y)
+
+    scale_arcsec = 3600.0 * np.sqrt(abs(np.linalg.det(wcs.pixel_scale_matrix)))
+    # The held-out grid bounds the error per patch; random points may land between its samples.
+    bound_px = 2.0 * approx.tolerance_px
+    assert np.all(np.isfinite(sky_error_px)) and np.all(np.isfinite(pix_error_px))
+    assert sky_error_px.max() <= bound_px
+    assert sky_error_arcsec.max() <= bound_px * scale_arcsec * 1.01
+    assert pix_error_px.max() <= bound_px
+
+
+@pytest.mark.parametrize("name", sorted(HEADERS))
+def test_fitted_path_choice_is_deterministic(main, name):
+    wcs = _wcs(name)
+    first = main.WcsApproximation(wcs, WIDTH, HEIGHT)
+    second = main.WcsApproximation(wcs, WIDTH, HEIGHT)
+    # Distorted headers fit sky -> pixel; neither has lookup tables, so pixel -> sky stays exact.
+    assert (first.use_world2pix, first.use_pix2world) == (True, False)
+    assert (second.use_world2pix, second.use_pix2world) == (True, False)
+
+    x, y = _pixels(5000)
+    ra, dec = wcs.all_pix2world(x, y, 0)
+    np.testing.assert_array_equal(np.array(first.world2pix(ra, dec)), np.array(second.world2pix(ra, dec)))
+
+
+def test_plain_tan_keeps_the_exact_transform(main):
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        wcs = WCS(_base_header("TAN", 3e-5))
+    approx = main.WcsApproximation(wcs, WIDTH, HEIGHT)
+    assert not approx.use_world2pix and not approx.use_pix2world
+
+
+@pytest.mark.skipif(not os.getenv("NELOURA_BENCHMARKS"), reason="timing benchmark; set NELOURA_BENCHMARKS=1 to run")
+@pytest.mark.parametrize("name", sorted(HEADERS))
+def test_fitted_world_to_pixel_throughput(main, name):
+    wcs = _wcs(name)
+    approx = main.WcsApproximation(wcs, WIDTH, HEIGHT)
+    x, y = _pixels()
+    ra, dec = wcs.all_pix2world(x, y, 0)
+
+    exact = _best_seconds(lambda: wcs.all_world2pix(ra, dec, 0, quiet=True))
+    fitted = _best_seconds(lambda: approx.world2pix(ra, dec))
+    assert fitted < exact